@@ -5,7 +5,7 @@ from __future__ import annotations
 from datetime import datetime, timedelta
 from typing import TYPE_CHECKING, Any
 
-from django.db.models import Avg, Count, F, Max, Min, Q
+from django.db.models import Avg, Sum
 from django.utils import timezone
 
 if TYPE_CHECKING:
@@ -21,8 +21,8 @@ def get_wait_times_report(
     site_id: str | None = None,
     service_id: str | None = None,
 ) -> dict[str, Any]:
-    """Génère un rapport sur les temps d'attente."""
-    from apps.tickets.models import Ticket
+    """Génère un rapport sur les temps d'attente (agrégats KPI horaires)."""
+    from apps.queues.rollups import KpiRollups
 
     # Définir les dates par défaut (30 derniers jours)
     if not end_date:
@@ -30,65 +30,42 @@ def get_wait_times_report(
     if not start_date:
         start_date = end_date - timedelta(days=30)
 
-    # Base queryset
-    tickets = Ticket.objects.filter(
-        tenant=tenant,
-        created_at__gte=start_date,
-        created_at__lte=end_date,
-    )
+    # Agrégats des tickets créés dans la période
+    rollups = KpiRollups.for_period(tenant=tenant, since=start_date, until=end_date)
 
     # Filtres optionnels
     if site_id:
-        tickets = tickets.filter(queue__site_id=site_id)
+        rollups = rollups.filter(queue__site_id=site_id)
     if service_id:
-        tickets = tickets.filter(queue__service_id=service_id)
+        rollups = rollups.filter(queue__service_id=service_id)
 
-    # Calculer uniquement pour les tickets terminés
-    completed = tickets.filter(status__in=[Ticket.STATUS_COMPLETED, Ticket.STATUS_NO_SHOW])
+    totals = KpiRollups.totals(rollups)
 
-    if not completed.exists():
+    # Tickets terminés : clôturés ou absents
+    completed = totals["closed_count"] + totals["no_show_count"]
+
+    if not completed:
         return {
             "period": {"start": start_date.isoformat(), "end": end_date.isoformat()},
-            "total_tickets": tickets.count(),
+            "total_tickets": totals["tickets_count"],
             "completed_tickets": 0,
             "metrics": {},
         }
 
-    # Calculer les métriques
-    # Note: wait_seconds = called_at - created_at (temps avant d'être appelé)
-    # service_duration_seconds = closed_at - service_started_at
-    metrics = completed.aggregate(
-        avg_wait=Avg(
-            (F("called_at") - F("created_at")),
-        ),
-        min_wait=Min(
-            (F("called_at") - F("created_at")),
-        ),
-        max_wait=Max(
-            (F("called_at") - F("created_at")),
-        ),
-        avg_service_duration=Avg(
-            (F("closed_at") - F("service_started_at")),
-        ),
-    )
-
-    # Convertir les timedelta en secondes
+    # Note: attente = called_at - created_at (temps avant d'être appelé)
+    # durée de service = ended_at - started_at (tickets clôturés)
     return {
         "period": {
             "start": start_date.isoformat(),
             "end": end_date.isoformat(),
         },
-        "total_tickets": tickets.count(),
-        "completed_tickets": completed.count(),
+        "total_tickets": totals["tickets_count"],
+        "completed_tickets": completed,
         "metrics": {
-            "avg_wait_seconds": int(metrics["avg_wait"].total_seconds()) if metrics["avg_wait"] else 0,
-            "min_wait_seconds": int(metrics["min_wait"].total_seconds()) if metrics["min_wait"] else 0,
-            "max_wait_seconds": int(metrics["max_wait"].total_seconds()) if metrics["max_wait"] else 0,
-            "avg_service_duration_seconds": (
-                int(metrics["avg_service_duration"].total_seconds())
-                if metrics["avg_service_duration"]
-                else 0
-            ),
+            "avg_wait_seconds": int(KpiRollups.mean(totals, "call_wait")),
+            "min_wait_seconds": int(totals["call_wait_min"] or 0),
+            "max_wait_seconds": int(totals["call_wait_max"] or 0),
+            "avg_service_duration_seconds": int(KpiRollups.mean(totals, "service")),
         },
     }
 
@@ -99,8 +76,8 @@ def get_agent_performance_report(
     end_date: datetime | None = None,
     agent_id: str | None = None,
 ) -> dict[str, Any]:
-    """Génère un rapport sur la performance des agents."""
-    from apps.tickets.models import Ticket
+    """Génère un rapport sur la performance des agents (agrégats KPI horaires)."""
+    from apps.queues.rollups import KpiRollups
 
     # Définir les dates par défaut
     if not end_date:
@@ -108,30 +85,24 @@ def get_agent_performance_report(
     if not start_date:
         start_date = end_date - timedelta(days=30)
 
-    # Base queryset
-    tickets = Ticket.objects.filter(
-        tenant=tenant,
-        created_at__gte=start_date,
-        created_at__lte=end_date,
-        agent__isnull=False,
+    rollups = KpiRollups.for_period(tenant=tenant, since=start_date, until=end_date).filter(
+        agent__isnull=False
     )
 
     if agent_id:
-        tickets = tickets.filter(agent_id=agent_id)
+        rollups = rollups.filter(agent_id=agent_id)
 
     # Grouper par agent
-    agent_stats = tickets.values(
+    agent_stats = rollups.values(
         "agent_id",
         "agent__user__first_name",
         "agent__user__last_name",
     ).annotate(
-        total_tickets=Count("id"),
-        completed=Count("id", filter=Q(status=Ticket.STATUS_COMPLETED)),
-        no_show=Count("id", filter=Q(status=Ticket.STATUS_NO_SHOW)),
-        avg_service_duration=Avg(
-            (F("closed_at") - F("service_started_at")),
-            filter=Q(status=Ticket.STATUS_COMPLETED),
-        ),
+        total_tickets=Sum("tickets_count"),
+        completed=Sum("closed_count"),
+        no_show=Sum("no_show_count"),
+        service_count=Sum("service_count"),
+        service_sum=Sum("service_sum"),
     )
 
     agents = []
@@ -142,11 +113,7 @@ def get_agent_performance_report(
             "total_tickets": stat["total_tickets"],
             "completed_tickets": stat["completed"],
             "no_show_tickets": stat["no_show"],
-            "avg_service_duration_seconds": (
-                int(stat["avg_service_duration"].total_seconds())
-                if stat["avg_service_duration"]
-                else 0
-            ),
+            "avg_service_duration_seconds": int(KpiRollups.mean(stat, "service")),
         })
 
     return {
@@ -164,8 +131,8 @@ def get_queue_stats_report(
     end_date: datetime | None = None,
     queue_id: str | None = None,
 ) -> dict[str, Any]:
-    """Génère un rapport sur les statistiques des files."""
-    from apps.tickets.models import Ticket
+    """Génère un rapport sur les statistiques des files (agrégats KPI horaires)."""
+    from apps.queues.rollups import KpiRollups
 
     # Définir les dates par défaut
     if not end_date:
@@ -173,32 +140,25 @@ def get_queue_stats_report(
     if not start_date:
         start_date = end_date - timedelta(days=30)
 
-    # Base queryset
-    tickets = Ticket.objects.filter(
-        tenant=tenant,
-        created_at__gte=start_date,
-        created_at__lte=end_date,
-    )
+    rollups = KpiRollups.for_period(tenant=tenant, since=start_date, until=end_date)
 
     if queue_id:
-        tickets = tickets.filter(queue_id=queue_id)
+        rollups = rollups.filter(queue_id=queue_id)
 
     # Grouper par queue
-    queue_stats = tickets.values(
+    queue_stats = rollups.values(
         "queue_id",
         "queue__name",
         "queue__service__name",
     ).annotate(
-        total_tickets=Count("id"),
-        waiting=Count("id", filter=Q(status=Ticket.STATUS_WAITING)),
-        called=Count("id", filter=Q(status=Ticket.STATUS_CALLED)),
-        in_service=Count("id", filter=Q(status=Ticket.STATUS_IN_SERVICE)),
-        completed=Count("id", filter=Q(status=Ticket.STATUS_COMPLETED)),
-        no_show=Count("id", filter=Q(status=Ticket.STATUS_NO_SHOW)),
-        avg_wait=Avg(
-            (F("called_at") - F("created_at")),
-            filter=Q(called_at__isnull=False),
-        ),
+        total_tickets=Sum("tickets_count"),
+        waiting=Sum("waiting_count"),
+        called=Sum("called_count"),
+        in_service=Sum("in_service_count"),
+        completed=Sum("closed_count"),
+        no_show=Sum("no_show_count"),
+        call_wait_count=Sum("call_wait_count"),
+        call_wait_sum=Sum("call_wait_sum"),
     )
 
     queues = []
@@ -213,11 +173,7 @@ def get_queue_stats_report(
             "in_service": stat["in_service"],
             "completed": stat["completed"],
             "no_show": stat["no_show"],
-            "avg_wait_seconds": (
-                int(stat["avg_wait"].total_seconds())
-                if stat["avg_wait"]
-                else 0
-            ),
+            "avg_wait_seconds": int(KpiRollups.mean(stat, "call_wait")),
         })
 
     return {
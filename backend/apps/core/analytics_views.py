@@ -10,6 +10,7 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from apps.core.db_router import replica_reads
 from apps.core.permissions import HasScope, IsTenantMember, Scopes
 
 from .analytics import (
@@ -34,6 +35,7 @@ class WaitTimesReportView(APIView):
         ],
         responses={200: dict},
     )
+    @replica_reads
     def get(self, request):
         """Récupère le rapport des temps d'attente."""
         # Parse dates
@@ -68,6 +70,7 @@ class AgentPerformanceReportView(APIView):
         ],
         responses={200: dict},
     )
+    @replica_reads
     def get(self, request):
         """Récupère le rapport de performance des agents."""
         start_date = None
@@ -100,6 +103,7 @@ class QueueStatsReportView(APIView):
         ],
         responses={200: dict},
     )
+    @replica_reads
     def get(self, request):
         """Récupère le rapport des statistiques des files."""
         start_date = None
@@ -131,6 +135,7 @@ class SatisfactionReportView(APIView):
         ],
         responses={200: dict},
     )
+    @replica_reads
     def get(self, request):
         """Récupère le rapport de satisfaction client."""
         start_date = None
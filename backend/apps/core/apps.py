@@ -8,6 +8,7 @@ class CoreConfig(AppConfig):
     name = "apps.core"
     verbose_name = "Core"
 
-    def ready(self) -> None:  # pragma: no cover
-        # Point d'entrée pour enregistrer des signaux ou initialiser des services.
+    def ready(self) -> None:
+        from . import signals  # noqa: F401 - compteurs d'utilisation des quotas
+
         return super().ready()
@@ -0,0 +1,207 @@
+"""Routage des lectures vers le réplica (``DATABASE_REPLICA_URL``).
+
+Les lectures ne partent vers le réplica que dans les unités de travail
+déclarées en lecture seule : vues d'analytics et de rapports, listes
+publiques, écrans d'affichage, statistiques super-admin, tâches Celery de
+reporting (``use_replica`` / ``replica_reads``). Tout le reste lit sur la
+base primaire.
+
+Lecture de ses propres écritures : une écriture épingle l'unité de travail
+courante sur la primaire pendant ``REPLICA_PIN_SECONDS``. Pour les requêtes
+HTTP, ``ReplicaPinningMiddleware`` prolonge l'épinglage aux requêtes
+suivantes du même client via un cookie.
+
+Le réplica n'est utilisé que s'il répond et que son retard de réplication
+est inférieur à ``REPLICA_MAX_LAG_SECONDS`` ; l'état est vérifié au plus
+toutes les ``REPLICA_HEALTH_CHECK_SECONDS`` par processus.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from functools import wraps
+from typing import Callable, Iterator, TypeVar
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+PRIMARY_ALIAS = "default"
+REPLICA_ALIAS = "replica"
+
+F = TypeVar("F", bound=Callable)
+
+# Retard de réplication PostgreSQL en secondes (0 si le réplica est à jour
+# ou si la base interrogée n'est pas un réplica)
+_POSTGRES_LAG_SQL = """
+    SELECT CASE
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+
+@dataclass
+class RoutingState:
+    """État de routage d'une unité de travail (requête HTTP ou tâche)."""
+
+    use_replica: bool = False
+    # Horodatage (time.time) jusqu'auquel les lectures restent sur la primaire
+    pinned_until: float = 0.0
+    wrote: bool = False
+
+    @property
+    def pinned(self) -> bool:
+        return self.pinned_until > time.time()
+
+    def pin(self, seconds: float | None = None) -> None:
+        """Épingle l'unité de travail sur la primaire."""
+        if seconds is None:
+            seconds = getattr(settings, "REPLICA_PIN_SECONDS", 5)
+        self.pinned_until = max(self.pinned_until, time.time() + seconds)
+
+
+_state: ContextVar[RoutingState | None] = ContextVar("db_routing_state", default=None)
+
+
+def current_state() -> RoutingState | None:
+    return _state.get()
+
+
+@contextmanager
+def routing_state(pinned_until: float = 0.0) -> Iterator[RoutingState]:
+    """Ouvre une unité de travail (utilisé par le middleware)."""
+    token = _state.set(RoutingState(pinned_until=pinned_until))
+    try:
+        yield _state.get()
+    finally:
+        _state.reset(token)
+
+
+@contextmanager
+def use_replica() -> Iterator[RoutingState]:
+    """
+    Autorise les lectures sur le réplica pendant le bloc.
+
+    Dans une unité de travail déjà ouverte (requête HTTP), l'épinglage et les
+    écritures sont partagés avec elle ; sinon (tâche Celery, commande) une
+    unité de travail est ouverte pour la durée du bloc.
+    """
+    state = _state.get()
+    if state is None:
+        with routing_state() as state:
+            state.use_replica = True
+            yield state
+        return
+
+    previous = state.use_replica
+    state.use_replica = True
+    try:
+        yield state
+    finally:
+        state.use_replica = previous
+
+
+def replica_reads(func: F) -> F:
+    """Décorateur de ``use_replica`` pour une vue, une action ou une tâche en lecture seule."""
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        with use_replica():
+            return func(*args, **kwargs)
+
+    return wrapper  # type: ignore[return-value]
+
+
+class ReplicaHealth:
+    """Disponibilité et retard du réplica, mis en cache par processus."""
+
+    _lock = threading.Lock()
+    _checked_at = 0.0
+    _available = False
+
+    @staticmethod
+    def is_configured() -> bool:
+        return REPLICA_ALIAS in settings.DATABASES and getattr(settings, "REPLICA_READS_ENABLED", True)
+
+    @classmethod
+    def is_available(cls) -> bool:
+        """Réplica configuré, joignable et suffisamment à jour."""
+        if not cls.is_configured():
+            return False
+
+        interval = getattr(settings, "REPLICA_HEALTH_CHECK_SECONDS", 5)
+        now = time.monotonic()
+        if now - cls._checked_at < interval:
+            return cls._available
+
+        with cls._lock:
+            # Un autre thread a pu vérifier pendant l'attente du verrou
+            if now - cls._checked_at >= interval:
+                cls._available = cls._check()
+                cls._checked_at = time.monotonic()
+            return cls._available
+
+    @classmethod
+    def reset(cls) -> None:
+        """Force une nouvelle vérification au prochain appel (tests)."""
+        cls._checked_at = 0.0
+        cls._available = False
+
+    @staticmethod
+    def lag_seconds() -> float:
+        """Retard de réplication du réplica en secondes (lève si injoignable)."""
+        connection = connections[REPLICA_ALIAS]
+        with connection.cursor() as cursor:
+            if connection.vendor == "postgresql":
+                cursor.execute(_POSTGRES_LAG_SQL)
+            else:
+                # Pas de mesure de retard : vérifier seulement la connexion
+                cursor.execute("SELECT 0")
+            return float(cursor.fetchone()[0] or 0)
+
+    @staticmethod
+    def _check() -> bool:
+        max_lag = getattr(settings, "REPLICA_MAX_LAG_SECONDS", 10)
+        try:
+            lag = ReplicaHealth.lag_seconds()
+        except Exception:  # noqa: BLE001 - repli sur la primaire
+            logger.warning("Réplica injoignable, lectures sur la primaire", exc_info=True)
+            return False
+        if lag > max_lag:
+            logger.warning("Réplica en retard de %.1fs (max %.1fs), lectures sur la primaire", lag, max_lag)
+            return False
+        return True
+
+
+class ReplicaRouter:
+    """Routeur ``DATABASE_ROUTERS`` : primaire par défaut, réplica sur demande."""
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or not state.use_replica or state.pinned:
+            return None
+        if not ReplicaHealth.is_available():
+            return None
+        return REPLICA_ALIAS
+
+    def db_for_write(self, model, **hints):
+        # Les lectures suivantes de l'unité de travail doivent voir l'écriture
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+            state.pin()
+        return PRIMARY_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Primaire et réplica contiennent les mêmes données
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return None
@@ -0,0 +1,62 @@
+"""Cache LRU en mémoire du processus, avec expiration.
+
+Premier niveau devant le cache partagé (Redis) pour les données lues à
+chaque requête : un accès coûte un verrou et une recherche dans un dict.
+Les entrées expirent au bout de ``timeout`` secondes, ce qui borne la durée
+pendant laquelle un autre processus peut servir une valeur invalidée.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+# Sentinelle distinguant « absent » d'une valeur None mise en cache
+MISSING = object()
+
+
+class LocalLRUCache:
+    """Cache LRU borné en taille et en durée, sûr entre threads."""
+
+    def __init__(self, max_size: int = 1024, timeout: float = 5.0) -> None:
+        self.max_size = max_size
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._data: OrderedDict[Any, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: Any, default: Any = MISSING) -> Any:
+        """Retourne la valeur si présente et non expirée, sinon ``default``."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Any, value: Any, timeout: float | None = None) -> None:
+        """Ajoute ou remplace une entrée, en évinçant la moins récemment utilisée."""
+        if self.max_size <= 0:
+            return
+        expires_at = time.monotonic() + (self.timeout if timeout is None else timeout)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Any) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -0,0 +1,103 @@
+"""Management command générant un jeu de données synthétique à grande échelle.
+
+Tenants, sites, files, agents, clients, tickets (tous statuts), avis et
+factures, insérés en flux (``COPY`` sur PostgreSQL). Le jeu de données est
+déterminé par ``--seed`` et ``--end`` ; ``--preset benchmark`` produit celui
+des benchmarks (``benchmark_query_plans --tenant synthetic-0000``).
+"""
+
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.synthetic_data import (
+    DATASET_PREFIX,
+    PRESETS,
+    SyntheticConfig,
+    SyntheticDataset,
+)
+
+
+class Command(BaseCommand):
+    help = "Génère un jeu de données synthétique (tenants, files, agents, clients, tickets, avis, factures)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--preset", choices=sorted(PRESETS), default="small", help="Volumétrie de départ")
+        parser.add_argument("--tenants", type=int, help="Nombre de tenants")
+        parser.add_argument("--sites", type=int, help="Sites par tenant")
+        parser.add_argument("--queues", type=int, help="Files par site")
+        parser.add_argument("--agents", type=int, help="Agents par tenant")
+        parser.add_argument("--customers", type=int, help="Clients par tenant")
+        parser.add_argument("--tickets", type=int, help="Tickets au total (ex. 10000000)")
+        parser.add_argument("--days", type=int, help="Profondeur de l'historique en jours")
+        parser.add_argument("--feedback-rate", type=float, help="Part des tickets clôturés avec un avis")
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--end", help="Fin de la simulation (ISO 8601, heure courante par défaut)")
+        parser.add_argument("--chunk-size", type=int, help="Lignes par lot d'écriture")
+        parser.add_argument("--prefix", default=DATASET_PREFIX, help="Préfixe des slugs des tenants générés")
+        parser.add_argument("--reseed", action="store_true", help="Supprimer le jeu de données existant d'abord")
+        parser.add_argument("--drop", action="store_true", help="Supprimer le jeu de données et quitter")
+        parser.add_argument(
+            "--skip-derived",
+            action="store_true",
+            help="Ne pas reconstruire agrégats KPI, ETA, index et compteurs",
+        )
+
+    def handle(self, *args, **options):
+        prefix = options["prefix"]
+        if options["drop"] or options["reseed"]:
+            count = SyntheticDataset.drop(prefix)
+            self.stdout.write(f"{count} tenant(s) supprimé(s)")
+            if options["drop"]:
+                return
+        if SyntheticDataset.tenants(prefix).exists():
+            raise CommandError(f"Des tenants « {prefix}-* » existent déjà : utilisez --reseed ou --drop")
+
+        end = None
+        if options["end"]:
+            try:
+                end = datetime.fromisoformat(options["end"])
+            except ValueError as exc:
+                raise CommandError(f"Date invalide (ISO 8601 attendu): {options['end']}") from exc
+
+        config = SyntheticConfig.preset(
+            options["preset"],
+            tenants=options["tenants"],
+            sites=options["sites"],
+            queues=options["queues"],
+            agents=options["agents"],
+            customers=options["customers"],
+            tickets=options["tickets"],
+            days=options["days"],
+            feedback_rate=options["feedback_rate"],
+            chunk_size=options["chunk_size"],
+            seed=options["seed"],
+            end=end,
+            prefix=prefix,
+        )
+        self.stdout.write(
+            f"Génération de {config.tickets} tickets sur {config.days} jours pour {config.tenants} tenant(s)..."
+        )
+
+        start = time.perf_counter()
+
+        def progress(slug: str, rows: dict[str, int]) -> None:
+            elapsed = time.perf_counter() - start
+            rate = rows["ticket"] / elapsed if elapsed else 0
+            self.stdout.write(f"  {slug} : {rows['ticket']} tickets au total ({rate:,.0f} tickets/s)")
+
+        report = SyntheticDataset.generate(config, progress=progress)
+        self.stdout.write(f"Lignes insérées en {time.perf_counter() - start:.0f} s (fin : {report['end']}) :")
+        for table, count in report["rows"].items():
+            self.stdout.write(f"  {table:<14} {count:>12}")
+
+        if not options["skip_derived"]:
+            self.stdout.write("Reconstruction des données dérivées...")
+            derived_start = time.perf_counter()
+            summary = SyntheticDataset.finalize(prefix)
+            self.stdout.write(
+                f"  {summary['rollups']} agrégats KPI, {summary['queues']} files, "
+                f"{summary['waiting_indexed']} tickets indexés ({time.perf_counter() - derived_start:.0f} s)"
+            )
+        self.stdout.write(self.style.SUCCESS(f"Jeu de données « {prefix} » prêt"))
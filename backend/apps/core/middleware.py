@@ -1,14 +1,18 @@
-"""Middleware de résolution du tenant courant."""
+"""Middlewares du tenant courant et du routage primaire/réplica."""
 
 from __future__ import annotations
 
+import time
 from contextvars import ContextVar
 
 from django.conf import settings
 from django.http import Http404, HttpRequest, HttpResponse
 
+from apps.tenants.cache import TenantCache
 from apps.tenants.models import Tenant
 
+from .db_router import routing_state
+
 _current_tenant: ContextVar[Tenant | None] = ContextVar("current_tenant", default=None)
 
 
@@ -60,10 +64,11 @@ class TenantMiddleware:
 
     def _resolve_tenant(self, request: HttpRequest) -> Tenant:
         if tenant_slug := self._extract_tenant_slug(request):
-            try:
-                return Tenant.objects.get(slug=tenant_slug, is_active=True)
-            except Tenant.DoesNotExist as exc:  # pragma: no cover - protection runtime
-                raise Http404("Tenant introuvable") from exc
+            # Tenant, souscription et plan depuis le cache (sans requête en régime établi)
+            tenant = TenantCache.get_tenant(tenant_slug)
+            if tenant is None or not tenant.is_active:
+                raise Http404("Tenant introuvable")
+            return tenant
         raise Http404("Entête ou sous-domaine tenant manquant")
 
     def _extract_tenant_slug(self, request: HttpRequest) -> str | None:
@@ -189,3 +194,40 @@ class SubscriptionStatusMiddleware:
     def _is_exempt_path(self, path: str) -> bool:
         """Vérifie si le path est exempté de vérification."""
         return any(path.startswith(prefix) for prefix in self.EXEMPT_PATHS)
+
+
+class ReplicaPinningMiddleware:
+    """
+    Ouvre l'unité de travail de routage primaire/réplica de la requête.
+
+    Un client qui vient d'écrire reçoit un cookie : ses requêtes suivantes
+    lisent sur la primaire jusqu'à l'expiration de la fenêtre
+    ``REPLICA_PIN_SECONDS``, même si le réplica n'a pas encore rattrapé.
+    """
+
+    cookie_name = getattr(settings, "REPLICA_PIN_COOKIE", "sq_primary_until")
+
+    def __init__(self, get_response):  # type: ignore[no-untyped-def]
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        with routing_state(pinned_until=self._cookie_pin(request)) as state:
+            response = self.get_response(request)
+
+        if state.wrote:
+            max_age = max(int(state.pinned_until - time.time()) + 1, 1)
+            response.set_cookie(
+                self.cookie_name,
+                f"{state.pinned_until:.3f}",
+                max_age=max_age,
+                httponly=True,
+                samesite="Lax",
+                secure=request.is_secure(),
+            )
+        return response
+
+    def _cookie_pin(self, request: HttpRequest) -> float:
+        try:
+            return float(request.COOKIES.get(self.cookie_name, 0))
+        except ValueError:
+            return 0.0
@@ -0,0 +1,111 @@
+"""Opérations de migration sans verrou d'écriture prolongé.
+
+Sur PostgreSQL, ``CREATE INDEX`` / ``DROP INDEX`` bloquent les écritures sur la
+table pendant toute leur durée : sur les grosses tables (tickets), les index
+sont donc créés et supprimés avec ``CONCURRENTLY``, hors transaction (la
+migration doit déclarer ``atomic = False``). Les autres moteurs (SQLite en
+développement et en test) exécutent l'opération standard.
+"""
+
+from __future__ import annotations
+
+from django.contrib.postgres.operations import (
+    AddIndexConcurrently,
+    NotInTransactionMixin,
+)
+from django.db import migrations
+from django.db.models import Index
+
+
+def _is_postgresql(schema_editor) -> bool:
+    return schema_editor.connection.vendor == "postgresql"
+
+
+class AddIndexConcurrentlyIfSupported(AddIndexConcurrently):
+    """``AddIndexConcurrently`` sur PostgreSQL, ``AddIndex`` ailleurs."""
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if _is_postgresql(schema_editor):
+            return super().database_forwards(app_label, schema_editor, from_state, to_state)
+        return migrations.AddIndex.database_forwards(self, app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if _is_postgresql(schema_editor):
+            return super().database_backwards(app_label, schema_editor, from_state, to_state)
+        return migrations.AddIndex.database_backwards(self, app_label, schema_editor, from_state, to_state)
+
+
+class DropFieldIndexConcurrently(NotInTransactionMixin, migrations.AlterField):
+    """
+    ``AlterField`` passant ``db_index`` à False (index d'une clé étrangère).
+
+    Sur PostgreSQL, l'index implicite de la colonne est supprimé avec
+    ``DROP INDEX CONCURRENTLY`` (et recréé avec ``CREATE INDEX CONCURRENTLY``
+    au retour arrière) ; les autres moteurs passent par ``AlterField``.
+    """
+
+    def describe(self):
+        return f"Concurrently drop the index of field {self.name} on {self.model_name}"
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if not _is_postgresql(schema_editor):
+            return super().database_forwards(app_label, schema_editor, from_state, to_state)
+        self._ensure_not_in_transaction(schema_editor)
+        model = from_state.apps.get_model(app_label, self.model_name)
+        if not self.allow_migrate_model(schema_editor.connection.alias, model):
+            return
+        for name in self._field_index_names(schema_editor, model):
+            schema_editor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {schema_editor.quote_name(name)}")
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if not _is_postgresql(schema_editor):
+            return super().database_backwards(app_label, schema_editor, from_state, to_state)
+        self._ensure_not_in_transaction(schema_editor)
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if not self.allow_migrate_model(schema_editor.connection.alias, model):
+            return
+        field = model._meta.get_field(self.name)
+        schema_editor.execute(schema_editor._create_index_sql(model, fields=[field], concurrently=True))
+
+    def _field_index_names(self, schema_editor, model) -> list[str]:
+        """Index portant sur la seule colonne du champ, hors ``Meta.indexes``."""
+        meta_index_names = {index.name for index in model._meta.indexes}
+        column = model._meta.get_field(self.name).column
+        return schema_editor._constraint_names(
+            model,
+            [column],
+            index=True,
+            type_=Index.suffix,
+            exclude=meta_index_names,
+        )
+
+
+class AddUniqueConstraintConcurrentlyIfSupported(NotInTransactionMixin, migrations.AddConstraint):
+    """
+    ``AddConstraint`` d'une contrainte d'unicité conditionnelle (index unique partiel).
+
+    Sur PostgreSQL, l'index est créé avec ``CREATE UNIQUE INDEX CONCURRENTLY``
+    et supprimé avec ``DROP INDEX CONCURRENTLY`` ; les autres moteurs passent
+    par ``AddConstraint``.
+    """
+
+    def describe(self):
+        return f"Concurrently create constraint {self.constraint.name} on model {self.model_name}"
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if not _is_postgresql(schema_editor):
+            return super().database_forwards(app_label, schema_editor, from_state, to_state)
+        self._ensure_not_in_transaction(schema_editor)
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            sql = str(self.constraint.create_sql(model, schema_editor))
+            schema_editor.execute(sql.replace("CREATE UNIQUE INDEX", "CREATE UNIQUE INDEX CONCURRENTLY", 1))
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if not _is_postgresql(schema_editor):
+            return super().database_backwards(app_label, schema_editor, from_state, to_state)
+        self._ensure_not_in_transaction(schema_editor)
+        model = from_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            name = schema_editor.quote_name(self.constraint.name)
+            schema_editor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
@@ -0,0 +1,288 @@
+"""Pagination par curseur (keyset) pour les grandes listes.
+
+Une page est sélectionnée par ``WHERE (tri) > (valeurs de la dernière ligne)``
+au lieu d'un ``OFFSET`` : son coût ne dépend pas de la profondeur dans la
+liste, et les insertions concurrentes ne décalent pas les pages.
+
+- Tri : celui de ``OrderingFilter`` (``?ordering=``, limité aux
+  ``ordering_fields`` de la vue), sinon ``ordering`` de la vue, sinon
+  ``-created_at`` ; la clé primaire est toujours ajoutée pour départager.
+  Les valeurs NULL sont placées en fin de liste.
+- Sur demande : sans ``cursor``, ``page_size`` ni ``with_count``, la liste
+  est renvoyée entière, en tableau, comme avant la pagination (clients
+  existants).
+- Pas de ``COUNT(*)`` : le total n'est calculé que sur demande
+  (``?with_count=1``), estimé par le planificateur PostgreSQL au-delà de
+  ``PAGINATION_EXACT_COUNT_THRESHOLD`` lignes.
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+import logging
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any
+from uuid import UUID
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db import connections
+from django.db.models import F, Model, Q, QuerySet
+from rest_framework.exceptions import NotFound
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class SortKey:
+    """Champ de tri : nom, sens et possibilité de valeurs NULL."""
+
+    name: str
+    descending: bool
+    nullable: bool
+
+
+@dataclass(frozen=True)
+class Cursor:
+    """Position dans la liste : valeurs de tri d'une ligne et sens de parcours."""
+
+    values: tuple
+    reverse: bool = False
+
+
+def approximate_count(queryset: QuerySet) -> tuple[int, bool]:
+    """
+    Nombre de lignes d'un queryset sans ``COUNT(*)`` complet.
+
+    Returns:
+        tuple: (nombre, True si c'est une estimation)
+    """
+    threshold = getattr(settings, "PAGINATION_EXACT_COUNT_THRESHOLD", 1000)
+    queryset = queryset.order_by()
+
+    if connections[queryset.db].vendor == "postgresql":
+        estimate = _planner_estimate(queryset)
+        if estimate is not None and estimate > threshold:
+            return estimate, True
+
+    # Petit volume ou pas d'estimation : comptage exact, borné au seuil
+    count = queryset[: threshold + 1].count()
+    return count, count > threshold
+
+
+def _planner_estimate(queryset: QuerySet) -> int | None:
+    """Nombre de lignes estimé par ``EXPLAIN`` (statistiques du planificateur)."""
+    connection = connections[queryset.db]
+    sql, params = queryset.query.get_compiler(using=queryset.db).as_sql()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+    except Exception:  # noqa: BLE001 - repli sur le comptage borné
+        logger.warning("Estimation du nombre de lignes impossible", exc_info=True)
+        return None
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+class KeysetPagination(BasePagination):
+    """Pagination par curseur sur (tri demandé, clé primaire)."""
+
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    count_query_param = "with_count"
+    default_ordering = ("-created_at",)
+    invalid_cursor_message = "Curseur invalide."
+
+    def paginate_queryset(self, queryset: QuerySet, request, view=None) -> list | None:
+        if not self.is_requested(request):
+            return None
+        self.request = request
+        self.model = queryset.model
+        self.page_size = self.get_page_size(request)
+        self.keys = self.get_sort_keys(request, queryset, view)
+        cursor = self.decode_cursor(request)
+        reverse = cursor.reverse if cursor else False
+
+        page = queryset.order_by(*self._order_by(reverse))
+        if cursor is not None:
+            condition = self._after(cursor.values, reverse)
+            page = page.filter(condition) if condition is not None else page.none()
+
+        rows = list(page[: self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[: self.page_size]
+        if reverse:
+            rows.reverse()
+
+        # En arrière, « plus de lignes » signifie une page précédente
+        has_next = (cursor is not None) if reverse else has_more
+        has_previous = has_more if reverse else cursor is not None
+        self.next_cursor = Cursor(self._values(rows[-1])) if has_next and rows else None
+        self.previous_cursor = Cursor(self._values(rows[0]), reverse=True) if has_previous and rows else None
+
+        self.count = None
+        if self._wants_count(request):
+            self.count = approximate_count(queryset)
+
+        return rows
+
+    def is_requested(self, request) -> bool:
+        """Pagination activée par l'un de ses paramètres."""
+        params = (self.cursor_query_param, self.page_size_query_param, self.count_query_param)
+        return any(request.query_params.get(param) for param in params)
+
+    def get_paginated_response(self, data) -> Response:
+        payload: dict[str, Any] = {
+            "next": self._link(self.next_cursor),
+            "previous": self._link(self.previous_cursor),
+            "results": data,
+        }
+        if self.count is not None:
+            payload["count"], payload["count_is_estimate"] = self.count
+        return Response(payload)
+
+    def get_paginated_response_schema(self, schema: dict) -> dict:
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+                "count": {"type": "integer"},
+                "count_is_estimate": {"type": "boolean"},
+            },
+        }
+
+    def get_page_size(self, request) -> int:
+        default = getattr(settings, "PAGINATION_PAGE_SIZE", 50)
+        maximum = getattr(settings, "PAGINATION_MAX_PAGE_SIZE", 500)
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, default))
+        except (TypeError, ValueError):
+            return default
+        return min(max(size, 1), maximum)
+
+    def get_sort_keys(self, request, queryset: QuerySet, view) -> list[SortKey]:
+        """Tri demandé (champs du modèle uniquement), complété par la clé primaire."""
+        ordering = None
+        for backend in getattr(view, "filter_backends", ()):
+            if isinstance(backend, type) and issubclass(backend, OrderingFilter):
+                ordering = backend().get_ordering(request, queryset, view)
+                break
+        if not ordering:
+            ordering = getattr(view, "ordering", None) or self.default_ordering
+        if isinstance(ordering, str):
+            ordering = (ordering,)
+
+        model = queryset.model
+        pk_name = model._meta.pk.name
+        keys: list[SortKey] = []
+        for term in ordering:
+            name = term.lstrip("-")
+            if name == "pk":
+                name = pk_name
+            try:
+                field = model._meta.get_field(name)
+            except FieldDoesNotExist:
+                continue
+            if not getattr(field, "concrete", False) or field.is_relation:
+                continue
+            if any(key.name == name for key in keys):
+                continue
+            keys.append(SortKey(name, term.startswith("-"), field.null))
+            if name == pk_name:
+                break
+
+        if not any(key.name == pk_name for key in keys):
+            descending = keys[-1].descending if keys else True
+            keys.append(SortKey(pk_name, descending, False))
+        return keys
+
+    def decode_cursor(self, request) -> Cursor | None:
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode("ascii")))
+            raw_values = payload["v"]
+            if len(raw_values) != len(self.keys):
+                raise ValueError("nombre de valeurs")
+            model = self.model
+            values = tuple(
+                None if raw is None else model._meta.get_field(key.name).to_python(raw)
+                for key, raw in zip(self.keys, raw_values)
+            )
+            return Cursor(values, reverse=bool(payload.get("r")))
+        except (TypeError, ValueError, KeyError, UnicodeEncodeError, binascii.Error, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, cursor: Cursor) -> str:
+        payload: dict[str, Any] = {"v": [_json_value(value) for value in cursor.values]}
+        if cursor.reverse:
+            payload["r"] = 1
+        return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode("ascii")
+
+    def _order_by(self, reverse: bool) -> list:
+        """Ordre SQL ; en arrière, sens inversés et NULL en tête."""
+        expressions = []
+        for key in self.keys:
+            descending = key.descending != reverse
+            nulls = {"nulls_first": True} if reverse else {"nulls_last": True}
+            expression = F(key.name)
+            expressions.append(expression.desc(**nulls) if descending else expression.asc(**nulls))
+        return expressions
+
+    def _after(self, values: tuple, reverse: bool) -> Q | None:
+        """Condition « strictement après la position » dans l'ordre de parcours."""
+        condition = None
+        equal = Q()
+        for key, value in zip(self.keys, values):
+            descending = key.descending != reverse
+            nulls_last = not reverse
+
+            if value is None:
+                # Les NULL sont en fin de parcours avant, en tête en arrière
+                after = None if nulls_last else Q(**{f"{key.name}__isnull": False})
+                same = Q(**{f"{key.name}__isnull": True})
+            else:
+                after = Q(**{f"{key.name}__{'lt' if descending else 'gt'}": value})
+                if key.nullable and nulls_last:
+                    after |= Q(**{f"{key.name}__isnull": True})
+                same = Q(**{key.name: value})
+
+            if after is not None:
+                term = equal & after
+                condition = term if condition is None else condition | term
+            equal &= same
+        return condition
+
+    def _values(self, row: Model) -> tuple:
+        return tuple(getattr(row, key.name) for key in self.keys)
+
+    def _link(self, cursor: Cursor | None) -> str | None:
+        if cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(cursor))
+
+    def _wants_count(self, request) -> bool:
+        return request.query_params.get(self.count_query_param, "").lower() in ("1", "true", "yes")
+
+
+def _json_value(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (UUID, Decimal)):
+        return str(value)
+    return value
@@ -4,6 +4,7 @@ from __future__ import annotations
 
 from rest_framework.permissions import BasePermission
 
+from apps.tenants.cache import TenantCache
 from apps.tenants.models import TenantMembership
 
 
@@ -95,11 +96,7 @@ class IsTenantMember(BasePermission):
         if not request.user.is_authenticated or tenant is None:
             return False
 
-        return TenantMembership.objects.filter(
-            tenant=tenant,
-            user=request.user,
-            is_active=True,
-        ).exists()
+        return TenantCache.get_membership_role(tenant, request.user) is not None
 
 
 class _HasScopeBase(BasePermission):
@@ -115,18 +112,13 @@ class _HasScopeBase(BasePermission):
         if tenant is None:
             return False
 
-        # Récupérer le membership de l'utilisateur
-        try:
-            membership = TenantMembership.objects.get(
-                tenant=tenant,
-                user=request.user,
-                is_active=True,
-            )
-        except TenantMembership.DoesNotExist:
+        # Récupérer le rôle de l'utilisateur (cache tenant)
+        role = TenantCache.get_membership_role(tenant, request.user)
+        if role is None:
             return False
 
         # Récupérer les scopes du rôle
-        user_scopes = ROLE_SCOPES.get(membership.role, [])
+        user_scopes = ROLE_SCOPES.get(role, [])
 
         # Vérifier le scope requis
         if self.required_scope:
@@ -158,16 +150,11 @@ class _HasAnyScopeBase(BasePermission):
         if tenant is None:
             return False
 
-        try:
-            membership = TenantMembership.objects.get(
-                tenant=tenant,
-                user=request.user,
-                is_active=True,
-            )
-        except TenantMembership.DoesNotExist:
+        role = TenantCache.get_membership_role(tenant, request.user)
+        if role is None:
             return False
 
-        user_scopes = ROLE_SCOPES.get(membership.role, [])
+        user_scopes = ROLE_SCOPES.get(role, [])
         return any(scope in user_scopes for scope in self.scopes)
 
 
@@ -192,12 +179,7 @@ class IsAgent(BasePermission):
         if tenant is None:
             return False
 
-        return TenantMembership.objects.filter(
-            tenant=tenant,
-            user=request.user,
-            role=TenantMembership.ROLE_AGENT,
-            is_active=True,
-        ).exists()
+        return TenantCache.get_membership_role(tenant, request.user) == TenantMembership.ROLE_AGENT
 
 
 class IsManager(BasePermission):
@@ -211,12 +193,10 @@ class IsManager(BasePermission):
         if tenant is None:
             return False
 
-        return TenantMembership.objects.filter(
-            tenant=tenant,
-            user=request.user,
-            role__in=[TenantMembership.ROLE_MANAGER, TenantMembership.ROLE_ADMIN],
-            is_active=True,
-        ).exists()
+        return TenantCache.get_membership_role(tenant, request.user) in (
+            TenantMembership.ROLE_MANAGER,
+            TenantMembership.ROLE_ADMIN,
+        )
 
 
 class IsSuperAdmin(BasePermission):
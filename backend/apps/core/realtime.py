@@ -0,0 +1,285 @@
+"""Diffusion temps réel centralisée (Channels).
+
+- ``RealtimeGroups`` définit les noms de groupes canoniques, utilisés à la fois
+  par les consumers et par les émetteurs (caractères autorisés par Channels :
+  alphanumériques, ``-``, ``_`` et ``.``).
+- ``RealtimeBroadcaster`` publie après le commit de la transaction ; l'envoi
+  est confié à un thread par processus, le worker HTTP n'attend jamais Redis.
+- Les rafales sont coalescées : les mises à jour d'une même file reçues dans
+  la fenêtre (``REALTIME_COALESCE_WINDOW_MS``, 100 ms par défaut) partent en
+  un seul message. Un message isolé part inchangé ; une rafale garde le format
+  du dernier message (mêmes champs, mêmes abonnés) et y ajoute ``tickets``
+  (dernier état de chaque ticket) et ``events_count``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import atexit
+import logging
+import os
+import re
+import threading
+import time
+from typing import TYPE_CHECKING, Callable
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+if TYPE_CHECKING:
+    from apps.tickets.models import Ticket
+    from apps.users.models import AgentProfile
+
+logger = logging.getLogger(__name__)
+
+_INVALID_GROUP_CHARS = re.compile(r"[^A-Za-z0-9_.-]")
+
+
+class RealtimeGroups:
+    """Noms canoniques des groupes Channels."""
+
+    @staticmethod
+    def _name(*parts) -> str:
+        return ".".join(_INVALID_GROUP_CHARS.sub("-", str(part)) for part in parts)
+
+    @staticmethod
+    def queue(tenant_slug: str, queue_id) -> str:
+        """Abonnés à l'état d'une file (back-office, agents)."""
+        return RealtimeGroups._name("queue", tenant_slug, queue_id)
+
+    @staticmethod
+    def ticket(tenant_slug: str, ticket_id) -> str:
+        """Abonnés au suivi d'un ticket (client)."""
+        return RealtimeGroups._name("ticket", tenant_slug, ticket_id)
+
+    @staticmethod
+    def agent(tenant_slug: str, agent_id) -> str:
+        """Abonnés au statut d'un agent."""
+        return RealtimeGroups._name("agent", tenant_slug, agent_id)
+
+    @staticmethod
+    def display(tenant_slug: str, display_id) -> str:
+        """Un écran donné (rafraîchissement forcé)."""
+        return RealtimeGroups._name("display", tenant_slug, display_id)
+
+    @staticmethod
+    def queue_displays(tenant_slug: str, queue_id) -> str:
+        """Tous les écrans affichant une file : un seul envoi par appel de ticket."""
+        return RealtimeGroups._name("displays", tenant_slug, queue_id)
+
+
+def merge_queue_updates(messages: list[dict]) -> dict:
+    """
+    Fusionne des ``queue_updated`` d'une même file.
+
+    Un message seul est renvoyé tel quel. Pour une rafale, le dernier message
+    est conservé (compatibilité des abonnés existants) et complété par le
+    dernier état de chaque ticket (``tickets``) et le nombre d'événements.
+    """
+    if len(messages) == 1:
+        return messages[0]
+
+    tickets: dict[str, dict] = {}
+    for message in messages:
+        payload = message["payload"]
+        tickets.pop(payload["ticket_id"], None)
+        tickets[payload["ticket_id"]] = payload
+
+    last = messages[-1]
+    return {
+        **last,
+        "payload": {
+            **last["payload"],
+            "tickets": list(tickets.values()),
+            "events_count": len(messages),
+        },
+    }
+
+
+def keep_last(messages: list[dict]) -> dict:
+    """Seul le dernier message compte (état complet d'un ticket, d'un agent)."""
+    return messages[-1]
+
+
+class BroadcastDispatcher:
+    """
+    Tampon d'envoi d'un processus.
+
+    Les messages coalescents sont regroupés par (groupe, type) jusqu'au
+    prochain vidage ; les autres sont envoyés tels quels, dans l'ordre.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._pending: dict[tuple[str, str], tuple[Callable[[list[dict]], dict], list[dict]]] = {}
+        self._direct: list[tuple[str, dict]] = []
+        self._wakeup = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._pid: int | None = None
+
+    def enqueue(self, group: str, message: dict, merge: Callable[[list[dict]], dict] | None = None) -> None:
+        """Met un message en attente sans déclencher d'envoi."""
+        with self._lock:
+            if merge is None:
+                self._direct.append((group, message))
+            else:
+                _merge, messages = self._pending.setdefault((group, message["type"]), (merge, []))
+                messages.append(message)
+
+    def submit(self, group: str, message: dict, merge: Callable[[list[dict]], dict] | None = None) -> None:
+        """Met un message en attente puis l'envoie (en différé, ou immédiatement en mode synchrone)."""
+        self.enqueue(group, message, merge)
+        if not getattr(settings, "REALTIME_BROADCAST_ASYNC", True):
+            self.flush()
+            return
+        self._ensure_worker()
+        self._wakeup.set()
+
+    def drain(self) -> list[tuple[str, dict]]:
+        """Retire et retourne les messages à envoyer, rafales fusionnées."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            direct, self._direct = self._direct, []
+
+        batch = list(direct)
+        for (group, _message_type), (merge, messages) in pending.items():
+            batch.append((group, merge(messages)))
+        return batch
+
+    def flush(self) -> int:
+        """Envoie immédiatement tout ce qui est en attente. Retourne le nombre de messages."""
+        batch = self.drain()
+        if batch:
+            async_to_sync(self._send_all)(batch)
+        return len(batch)
+
+    async def _send_all(self, batch: list[tuple[str, dict]]) -> None:
+        channel_layer = get_channel_layer()
+        if channel_layer is None:
+            return
+        for group, message in batch:
+            try:
+                await channel_layer.group_send(group, message)
+            except Exception:  # noqa: BLE001 - le temps réel ne doit jamais casser l'appelant
+                logger.warning("Diffusion temps réel impossible vers %s", group, exc_info=True)
+
+    def _ensure_worker(self) -> None:
+        # Après un fork (workers gunicorn/celery), le thread du parent n'existe pas
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="realtime-broadcast", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        loop = asyncio.new_event_loop()
+        while True:
+            self._wakeup.wait()
+            # Laisser la rafale se constituer avant de vider le tampon
+            time.sleep(getattr(settings, "REALTIME_COALESCE_WINDOW_MS", 100) / 1000)
+            self._wakeup.clear()
+            batch = self.drain()
+            if batch:
+                try:
+                    loop.run_until_complete(self._send_all(batch))
+                except Exception:  # noqa: BLE001
+                    logger.exception("Échec du vidage des diffusions temps réel")
+
+
+_dispatcher = BroadcastDispatcher()
+
+
+@atexit.register
+def _flush_on_exit() -> None:  # pragma: no cover - arrêt du processus
+    try:
+        _dispatcher.flush()
+    except Exception:  # noqa: BLE001
+        pass
+
+
+class RealtimeBroadcaster:
+    """Point d'entrée unique des diffusions temps réel."""
+
+    @staticmethod
+    def publish(group: str, message: dict, merge: Callable[[list[dict]], dict] | None = None) -> None:
+        """
+        Diffuse un message à un groupe après le commit de la transaction courante.
+
+        Args:
+            group: nom de groupe (voir ``RealtimeGroups``)
+            message: message Channels (``type`` = handler du consumer)
+            merge: fonction de fusion si le message peut être coalescé
+        """
+        if get_channel_layer() is None:
+            return
+        transaction.on_commit(lambda: _dispatcher.submit(group, message, merge))
+
+    @staticmethod
+    def flush() -> int:
+        """Vide immédiatement le tampon du processus (tests, arrêt)."""
+        return _dispatcher.flush()
+
+    @staticmethod
+    def ticket_event(ticket: Ticket, event_type: str) -> None:
+        """Diffuse un changement d'état de ticket à sa file, au ticket et, s'il est appelé, aux écrans."""
+        from apps.tickets.models import Ticket
+
+        tenant_slug = ticket.tenant.slug
+        payload = {
+            "event": event_type,
+            "ticket_id": str(ticket.id),
+            "queue_id": str(ticket.queue_id),
+            "status": ticket.status,
+            "number": ticket.number,
+        }
+
+        RealtimeBroadcaster.publish(
+            RealtimeGroups.queue(tenant_slug, ticket.queue_id),
+            {"type": "queue_updated", "payload": payload},
+            merge=merge_queue_updates,
+        )
+        RealtimeBroadcaster.publish(
+            RealtimeGroups.ticket(tenant_slug, ticket.id),
+            {"type": "ticket_updated", "payload": payload},
+            merge=keep_last,
+        )
+
+        if event_type == "ticket.called" and ticket.status == Ticket.STATUS_CALLED:
+            agent = ticket.agent
+            ticket_data = {
+                "id": str(ticket.id),
+                "number": ticket.number,
+                "queue_name": ticket.queue.name,
+                "queue_id": str(ticket.queue_id),
+                "status": ticket.status,
+                "called_at": ticket.called_at.isoformat() if ticket.called_at else None,
+                "agent_name": f"{agent.user.first_name} {agent.user.last_name}" if agent else None,
+                "counter": agent.counter_number if agent and agent.counter_number else None,
+            }
+            # Chaque appel compte pour les écrans : pas de coalescence
+            RealtimeBroadcaster.publish(
+                RealtimeGroups.queue_displays(tenant_slug, ticket.queue_id),
+                {"type": "ticket_called", "ticket": ticket_data, "timestamp": timezone.now().isoformat()},
+            )
+
+    @staticmethod
+    def agent_status(profile: AgentProfile, tenant_slug: str) -> None:
+        """Diffuse le statut courant d'un agent."""
+        RealtimeBroadcaster.publish(
+            RealtimeGroups.agent(tenant_slug, profile.user_id),
+            {
+                "type": "status_updated",
+                "payload": {
+                    "agent_id": str(profile.user_id),
+                    "status": profile.current_status,
+                    "updated_at": profile.status_updated_at.isoformat(),
+                },
+            },
+            merge=keep_last,
+        )
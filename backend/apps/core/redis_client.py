@@ -0,0 +1,50 @@
+"""Accès partagé au client Redis brut (structures hors cache Django)."""
+
+from __future__ import annotations
+
+import logging
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_clients: dict[float, object] = {}
+
+
+def get_redis_client(socket_timeout: float | None = None):
+    """
+    Retourne un client Redis partagé par le processus, ou None si Redis est désactivé.
+
+    Le cache Django ne donne pas accès aux structures natives (sorted sets,
+    INCR, scripts Lua) : les services qui en ont besoin passent par ce client.
+    Les appelants doivent toujours prévoir un repli base de données lorsque
+    la valeur retournée est None ou qu'une ``redis.RedisError`` est levée.
+
+    Args:
+        socket_timeout: délai spécifique (secondes) pour les chemins qui
+            préfèrent un repli rapide à l'attente (``REDIS_SOCKET_TIMEOUT`` par défaut)
+    """
+    url = getattr(settings, "REDIS_URL", "")
+    if not url:
+        return None
+
+    if socket_timeout is None:
+        socket_timeout = getattr(settings, "REDIS_SOCKET_TIMEOUT", 0.5)
+
+    client = _clients.get(socket_timeout)
+    if client is None:
+        import redis
+
+        client = redis.Redis.from_url(
+            url,
+            socket_timeout=socket_timeout,
+            socket_connect_timeout=socket_timeout,
+            decode_responses=True,
+        )
+        _clients[socket_timeout] = client
+    return client
+
+
+def reset_redis_client() -> None:
+    """Oublie les clients courants (tests, changement de configuration)."""
+    _clients.clear()
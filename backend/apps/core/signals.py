@@ -0,0 +1,45 @@
+"""Signaux de l'application core : compteurs d'utilisation des quotas."""
+
+from __future__ import annotations
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.queues.models import Queue, Site
+from apps.tenants.models import TenantMembership
+from apps.tickets.models import Ticket
+
+from .usage_counters import (
+    RESOURCE_AGENT,
+    RESOURCE_QUEUE,
+    RESOURCE_SITE,
+    RESOURCE_TICKET,
+    UsageCounters,
+)
+
+_COUNTED_MODELS = {Ticket: RESOURCE_TICKET, Queue: RESOURCE_QUEUE, Site: RESOURCE_SITE}
+
+
+def _count_created(sender, instance, created: bool, **kwargs) -> None:
+    if created:
+        UsageCounters.record(instance.tenant_id, _COUNTED_MODELS[sender], +1, at=instance.created_at)
+
+
+def _count_deleted(sender, instance, **kwargs) -> None:
+    UsageCounters.record(instance.tenant_id, _COUNTED_MODELS[sender], -1, at=instance.created_at)
+
+
+for _model, _resource in _COUNTED_MODELS.items():
+    post_save.connect(_count_created, sender=_model, dispatch_uid=f"core.usage.{_resource}_saved")
+    post_delete.connect(_count_deleted, sender=_model, dispatch_uid=f"core.usage.{_resource}_deleted")
+
+
+@receiver(post_save, sender=TenantMembership, dispatch_uid="core.usage.membership_saved")
+@receiver(post_delete, sender=TenantMembership, dispatch_uid="core.usage.membership_deleted")
+def invalidate_agent_count(sender, instance: TenantMembership, **kwargs) -> None:
+    """Rôle et activation changent hors création : le compteur d'agents est recompté."""
+    tenant_id = instance.tenant_id
+    UsageCounters.invalidate(tenant_id, RESOURCE_AGENT)
+    # Un amorçage avant le commit n'a pas vu ce changement
+    transaction.on_commit(lambda: UsageCounters.invalidate(tenant_id, RESOURCE_AGENT))
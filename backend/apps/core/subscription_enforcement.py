@@ -2,9 +2,12 @@
 Service pour vérifier et appliquer les quotas de souscription.
 
 Ce service vérifie que les tenants respectent les limites de leur plan de souscription.
+Les utilisations courantes sont lues dans les compteurs matérialisés
+(``apps.core.usage_counters``) ; ``claim`` réserve atomiquement une création.
 """
-from typing import Dict, Any
-from django.utils import timezone
+from typing import Any, Dict
+
+from apps.core.usage_counters import UsageCounters
 
 
 class SubscriptionEnforcement:
@@ -21,9 +24,7 @@ class SubscriptionEnforcement:
         Returns:
             bool: True si le tenant peut créer une queue, False sinon
         """
-        from apps.queues.models import Queue
-
-        current_count = Queue.objects.filter(tenant=tenant).count()
+        current_count = UsageCounters.current(tenant, "queue")
         max_allowed = SubscriptionEnforcement._get_max_queues(tenant)
 
         return current_count < max_allowed
@@ -39,9 +40,7 @@ class SubscriptionEnforcement:
         Returns:
             bool: True si le tenant peut créer un site, False sinon
         """
-        from apps.queues.models import Site
-
-        current_count = Site.objects.filter(tenant=tenant).count()
+        current_count = UsageCounters.current(tenant, "site")
         max_allowed = SubscriptionEnforcement._get_max_sites(tenant)
 
         return current_count < max_allowed
@@ -57,11 +56,7 @@ class SubscriptionEnforcement:
         Returns:
             bool: True si le tenant peut ajouter un agent, False sinon
         """
-        from apps.tenants.models import TenantMembership
-
-        current_count = TenantMembership.objects.filter(
-            tenant=tenant, role="agent", is_active=True
-        ).count()
+        current_count = UsageCounters.current(tenant, "agent")
         max_allowed = SubscriptionEnforcement._get_max_agents(tenant)
 
         return current_count < max_allowed
@@ -77,18 +72,40 @@ class SubscriptionEnforcement:
         Returns:
             bool: True si le tenant peut créer un ticket, False sinon
         """
-        from apps.tickets.models import Ticket
-
-        now = timezone.now()
-
-        current_count = Ticket.objects.filter(
-            tenant=tenant, created_at__year=now.year, created_at__month=now.month
-        ).count()
+        current_count = UsageCounters.current(tenant, "ticket")
 
         max_allowed = SubscriptionEnforcement._get_max_tickets_per_month(tenant)
 
         return current_count < max_allowed
 
+    @staticmethod
+    def claim(resource_type: str, tenant) -> bool:
+        """
+        Réserve atomiquement une création si la limite du plan le permet.
+
+        À appeler juste avant la création ; si elle échoue, rendre la
+        réservation avec ``release``.
+
+        Args:
+            resource_type: Type de ressource (queue, site, agent, ticket)
+            tenant: Instance du tenant
+
+        Returns:
+            bool: True si la création est autorisée
+        """
+        limits = {
+            "queue": SubscriptionEnforcement._get_max_queues,
+            "site": SubscriptionEnforcement._get_max_sites,
+            "agent": SubscriptionEnforcement._get_max_agents,
+            "ticket": SubscriptionEnforcement._get_max_tickets_per_month,
+        }
+        return UsageCounters.claim(tenant, resource_type, limits[resource_type](tenant))
+
+    @staticmethod
+    def release(resource_type: str, tenant) -> None:
+        """Rend une réservation de ``claim`` dont la création a échoué."""
+        UsageCounters.release(tenant, resource_type)
+
     @staticmethod
     def get_usage_stats(tenant) -> Dict[str, Any]:
         """
@@ -100,26 +117,16 @@ class SubscriptionEnforcement:
         Returns:
             dict: Statistiques d'utilisation par ressource
         """
-        from apps.queues.models import Queue, Site
-        from apps.tickets.models import Ticket
-        from apps.tenants.models import TenantMembership
-
-        now = timezone.now()
-
-        sites_current = Site.objects.filter(tenant=tenant).count()
+        sites_current = UsageCounters.current(tenant, "site")
         sites_max = SubscriptionEnforcement._get_max_sites(tenant)
 
-        agents_current = TenantMembership.objects.filter(
-            tenant=tenant, role="agent", is_active=True
-        ).count()
+        agents_current = UsageCounters.current(tenant, "agent")
         agents_max = SubscriptionEnforcement._get_max_agents(tenant)
 
-        queues_current = Queue.objects.filter(tenant=tenant).count()
+        queues_current = UsageCounters.current(tenant, "queue")
         queues_max = SubscriptionEnforcement._get_max_queues(tenant)
 
-        tickets_current = Ticket.objects.filter(
-            tenant=tenant, created_at__year=now.year, created_at__month=now.month
-        ).count()
+        tickets_current = UsageCounters.current(tenant, "ticket")
         tickets_max = SubscriptionEnforcement._get_max_tickets_per_month(tenant)
 
         return {
@@ -0,0 +1,643 @@
+"""Générateur de jeux de données synthétiques pour les benchmarks.
+
+Produit des tenants complets (sites, services, files, agents, clients,
+abonnements et factures) et un historique de tickets réaliste :
+
+- arrivées réparties selon un profil horaire (ouverture 7h-19h, pics en fin de
+  matinée et en début d'après-midi), un profil hebdomadaire et une légère
+  croissance sur la période ;
+- chaque journée d'une file est simulée : les agents affectés sont les
+  guichets, les durées de service suivent une loi log-normale centrée sur le
+  temps moyen du service, et un client dont l'attente dépasse sa patience
+  (loi exponentielle) est marqué absent ;
+- la simulation est arrêtée à ``end`` : les tickets du dernier jour sont en
+  attente, appelés, en service, en pause ou transférés selon leur état à
+  cette date ;
+- les tickets clôturés reçoivent un avis client (score corrélé à l'attente).
+
+Les lignes sont écrites en flux, par lots de ``chunk_size`` : ``COPY`` sur
+PostgreSQL, ``INSERT`` par lots sinon. Les insertions contournent l'ORM
+(``created_at`` imposé, pas de signaux) : les données dérivées (agrégats KPI,
+statistiques de service, ETA, index Redis des tickets en attente, compteurs
+d'utilisation) sont reconstruites ensuite par ``SyntheticDataset.finalize``.
+
+Le jeu de données est entièrement déterminé par ``seed`` et ``end``.
+Commande : ``generate_synthetic_data``.
+"""
+
+from __future__ import annotations
+
+import heapq
+import io
+import json
+import logging
+import math
+import random
+import uuid
+from dataclasses import dataclass, fields
+from datetime import date, datetime, timedelta
+from datetime import timezone as dt_timezone
+from typing import Callable
+
+from django.contrib.auth.hashers import make_password
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections, models, router, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+DATASET_PREFIX = "synthetic"
+
+# Poids des arrivées par heure de la journée (0h-23h)
+HOURLY_PROFILE = (
+    [0.0] * 7 + [0.3, 0.9, 1.3, 1.5, 1.3, 0.9, 0.7, 1.1, 1.2, 1.0, 0.6, 0.2] + [0.0] * 5
+)
+# Poids des arrivées par jour de la semaine (lundi = 0)
+WEEKDAY_PROFILE = (1.25, 1.0, 1.0, 0.95, 1.1, 0.45, 0.05)
+
+CHANNEL_WEIGHTS = (("web", 0.35), ("qr", 0.25), ("kiosk", 0.2), ("app", 0.12), ("whatsapp", 0.08))
+PRIORITY_WEIGHTS = ((0, 0.85), (1, 0.1), (2, 0.05))
+SLA_CHOICES = (300, 600, 900, 1200)
+ALGORITHMS = ("fifo", "priority", "sla")
+
+# Durées du parcours d'un ticket (secondes)
+CALL_DELAY = (5, 40)
+WALK_DELAY = (20, 90)
+NO_SHOW_DURATION = 120
+SERVICE_MEAN_RANGE = (240, 900)
+SERVICE_SIGMA = 0.6
+PATIENCE_MEAN = 45 * 60
+# Charge par agent à l'heure de pointe : légèrement au-delà de 1, la file se
+# forme aux pics puis se résorbe
+PEAK_UTILIZATION = 1.1
+
+# Part des tickets vivants du dernier jour transférés / en pause
+TRANSFERRED_RATE = 0.03
+PAUSED_RATE = 0.1
+
+FIRST_NAMES = (
+    "Aminata", "Moussa", "Fatou", "Ibrahima", "Awa", "Cheikh", "Mariama", "Ousmane",
+    "Khady", "Abdoulaye", "Ndeye", "Mamadou", "Aissatou", "Babacar", "Coumba", "Modou",
+)
+LAST_NAMES = (
+    "Diop", "Ndiaye", "Fall", "Sow", "Ba", "Sy", "Diallo", "Faye",
+    "Gueye", "Mbaye", "Sarr", "Cisse", "Kane", "Seck", "Thiam", "Niang",
+)
+CITIES = ("Dakar", "Thiès", "Saint-Louis", "Touba", "Kaolack", "Ziguinchor", "Mbour", "Rufisque")
+ORGANIZATIONS = ("Banque", "Clinique", "Mairie", "Agence", "Assurances", "Préfecture")
+
+INVOICE_PAYMENT_METHODS = ("mobile_money", "card", "bank_transfer")
+
+PRESETS = {
+    "small": {"tenants": 3, "sites": 1, "queues": 3, "agents": 6, "customers": 500, "tickets": 20_000, "days": 30},
+    "benchmark": {
+        "tenants": 10, "sites": 2, "queues": 5, "agents": 15, "customers": 20_000, "tickets": 2_000_000, "days": 180,
+    },
+    "large": {
+        "tenants": 50, "sites": 3, "queues": 4, "agents": 20, "customers": 50_000, "tickets": 10_000_000, "days": 365,
+    },
+}
+
+
+@dataclass
+class SyntheticConfig:
+    """Paramètres du jeu de données (``sites``, ``queues`` par site ; ``agents``, ``customers`` par tenant)."""
+
+    tenants: int = 3
+    sites: int = 1
+    queues: int = 3
+    agents: int = 6
+    customers: int = 500
+    tickets: int = 20_000
+    days: int = 30
+    seed: int = 42
+    # Fin de la simulation (heure courante par défaut)
+    end: datetime | None = None
+    customer_rate: float = 0.6
+    feedback_rate: float = 0.15
+    chunk_size: int = 10_000
+    prefix: str = DATASET_PREFIX
+
+    @classmethod
+    def preset(cls, name: str, **overrides) -> SyntheticConfig:
+        known = {f.name for f in fields(cls)}
+        values = {**PRESETS[name], **{key: value for key, value in overrides.items() if value is not None}}
+        return cls(**{key: value for key, value in values.items() if key in known})
+
+    def resolved_end(self) -> datetime:
+        end = self.end or timezone.now().replace(minute=0, second=0, microsecond=0)
+        if timezone.is_naive(end):
+            end = timezone.make_aware(end, dt_timezone.utc)
+        return end.astimezone(dt_timezone.utc)
+
+
+def apportion(total: int, weights: list[float]) -> list[int]:
+    """Répartit ``total`` proportionnellement aux poids (plus forts restes)."""
+    weight_sum = sum(weights)
+    if total <= 0 or weight_sum <= 0:
+        return [0] * len(weights)
+    shares = [total * weight / weight_sum for weight in weights]
+    counts = [int(share) for share in shares]
+    order = sorted(range(len(shares)), key=lambda index: shares[index] - counts[index], reverse=True)
+    for index in order[: total - sum(counts)]:
+        counts[index] += 1
+    return counts
+
+
+def _uuid(rng: random.Random) -> uuid.UUID:
+    return uuid.UUID(int=rng.getrandbits(128), version=4)
+
+
+def _weighted(rng: random.Random, choices) -> object:
+    values, weights = zip(*choices)
+    return rng.choices(values, weights=weights)[0]
+
+
+class BulkWriter:
+    """
+    Écriture en flux des lignes d'un modèle.
+
+    Les lignes sont des dictionnaires ``attname -> valeur`` ; les colonnes
+    absentes prennent la valeur par défaut du champ (``now`` pour les champs
+    ``auto_now``). ``COPY ... FROM STDIN`` sur PostgreSQL, ``executemany``
+    sinon : ``bulk_create`` imposerait ``created_at`` (``auto_now_add``).
+    """
+
+    def __init__(self, model: type[models.Model], using: str, chunk_size: int = 10_000):
+        self.model = model
+        self.using = using
+        self.chunk_size = chunk_size
+        self.connection = connections[using]
+        self.fields = list(model._meta.concrete_fields)
+        now = timezone.now()
+        self.defaults = {
+            field.attname: now if getattr(field, "auto_now", False) or getattr(field, "auto_now_add", False)
+            else field.get_default()
+            for field in self.fields
+        }
+        self.rows: list[dict] = []
+        self.count = 0
+
+    def write(self, row: dict) -> None:
+        self.rows.append(row)
+        if len(self.rows) >= self.chunk_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self.rows:
+            return
+        rows = [[row.get(field.attname, self.defaults[field.attname]) for field in self.fields] for row in self.rows]
+        if self.connection.vendor == "postgresql":
+            self._copy(rows)
+        else:
+            self._insert(rows)
+        self.count += len(rows)
+        self.rows = []
+
+    def _columns(self) -> str:
+        return ", ".join(self.connection.ops.quote_name(field.column) for field in self.fields)
+
+    def _copy(self, rows: list[list]) -> None:
+        buffer = io.StringIO()
+        for row in rows:
+            buffer.write("\t".join(_copy_value(value) for value in row))
+            buffer.write("\n")
+        buffer.seek(0)
+        sql = f"COPY {self.connection.ops.quote_name(self.model._meta.db_table)} ({self._columns()}) FROM STDIN"
+        with self.connection.cursor() as cursor:
+            raw = cursor.cursor
+            if hasattr(raw, "copy_expert"):  # psycopg2
+                raw.copy_expert(sql, buffer)
+            else:  # psycopg 3
+                with raw.copy(sql) as copy:
+                    copy.write(buffer.getvalue())
+
+    def _insert(self, rows: list[list]) -> None:
+        placeholders = ", ".join(["%s"] * len(self.fields))
+        sql = f"INSERT INTO {self.connection.ops.quote_name(self.model._meta.db_table)} ({self._columns()}) VALUES ({placeholders})"
+        prepared = [
+            [field.get_db_prep_save(value, self.connection) for field, value in zip(self.fields, row)] for row in rows
+        ]
+        with self.connection.cursor() as cursor:
+            cursor.executemany(sql, prepared)
+
+
+def _copy_value(value) -> str:
+    """Valeur au format texte de ``COPY``."""
+    if value is None:
+        return r"\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, (datetime, date)):
+        text = value.isoformat()
+    elif isinstance(value, (dict, list)):
+        text = json.dumps(value, cls=DjangoJSONEncoder)
+    else:
+        text = str(value)
+    return text.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+
+@dataclass
+class _QueuePlan:
+    id: uuid.UUID
+    letter: str
+    weight: float
+    service_mean: float
+    agent_ids: list
+
+
+class _TenantGenerator:
+    """Génère un tenant et son historique avec un générateur aléatoire dédié."""
+
+    def __init__(self, config: SyntheticConfig, index: int, tickets: int, plan, writers: dict, end: datetime):
+        self.config = config
+        self.index = index
+        self.tickets = tickets
+        self.plan = plan
+        self.writers = writers
+        self.end = end
+        self.rng = random.Random(f"{config.seed}:{index}")
+        self.tenant_id = _uuid(self.rng)
+        self.slug = f"{config.prefix}-{index:04d}"
+        self.queues: list[_QueuePlan] = []
+        self.customers: list[tuple] = []
+
+    def run(self) -> None:
+        self._structure()
+        cells = self._allocate()
+        self._staff(cells)
+        # Tickets et avis référencent les lignes de structure
+        for name in ("tenant", "user", "agent", "membership", "site", "service", "queue", "assignment", "customer",
+                     "subscription", "invoice"):
+            self.writers[name].flush()
+        for day, hours, queue, count in cells:
+            if count:
+                self._simulate_day(queue, day, hours, count)
+
+    # --- Structure ---------------------------------------------------------------
+
+    def _structure(self) -> None:
+        rng, config = self.rng, self.config
+        city = rng.choice(CITIES)
+        name = f"{rng.choice(ORGANIZATIONS)} {city} {self.index}"
+        created = self.end - timedelta(days=config.days + 30)
+        self.writers["tenant"].write({
+            "id": self.tenant_id, "name": name, "slug": self.slug, "company_name": name,
+            "email": f"contact@{self.slug}.{config.prefix}.local", "plan": self.plan.slug,
+            "max_sites": max(self.plan.max_sites, config.sites), "max_queues": max(self.plan.max_queues, config.queues * config.sites),
+            "max_agents": max(self.plan.max_agents, config.agents), "created_at": created, "updated_at": created,
+        })
+        self._billing(created)
+
+        queue_plans = []
+        for site_index in range(config.sites):
+            site_id = _uuid(rng)
+            self.writers["site"].write({
+                "id": site_id, "tenant_id": self.tenant_id, "name": f"{city} {site_index + 1}",
+                "slug": f"site-{site_index + 1}", "city": city, "country": "SN", "created_at": created, "updated_at": created,
+            })
+            for queue_index in range(config.queues):
+                number = site_index * config.queues + queue_index
+                service_id, queue_id = _uuid(rng), _uuid(rng)
+                self.writers["service"].write({
+                    "id": service_id, "tenant_id": self.tenant_id, "site_id": site_id, "name": f"Service {number + 1}",
+                    "sla_seconds": rng.choice(SLA_CHOICES), "created_at": created, "updated_at": created,
+                })
+                self.writers["queue"].write({
+                    "id": queue_id, "tenant_id": self.tenant_id, "site_id": site_id, "service_id": service_id,
+                    "name": f"File {number + 1}", "slug": f"file-{number + 1}", "algorithm": ALGORITHMS[number % len(ALGORITHMS)],
+                    "created_at": created, "updated_at": created,
+                })
+                queue_plans.append(_QueuePlan(
+                    id=queue_id,
+                    letter=chr(ord("A") + number % 26),
+                    weight=rng.lognormvariate(0, 0.5),
+                    service_mean=rng.uniform(*SERVICE_MEAN_RANGE),
+                    agent_ids=[],
+                ))
+        self.queues = queue_plans
+
+        for customer_index in range(config.customers):
+            customer_id = _uuid(rng)
+            first_name, last_name = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            phone = f"+22177{customer_index:07d}"
+            self.writers["customer"].write({
+                "id": customer_id, "tenant_id": self.tenant_id, "first_name": first_name, "last_name": last_name,
+                "phone": phone, "notify_sms": True, "created_at": created, "updated_at": created,
+            })
+            self.customers.append((customer_id, f"{first_name} {last_name}", phone))
+
+    def _billing(self, created: datetime) -> None:
+        rng, price = self.rng, int(self.plan.monthly_price)
+        subscription_id = _uuid(rng)
+        self.writers["subscription"].write({
+            "id": subscription_id, "tenant_id": self.tenant_id, "plan_id": self.plan.id, "status": "active",
+            "monthly_price": price, "currency": self.plan.currency, "starts_at": created.date(),
+            "current_period_start": self.end.date().replace(day=1), "created_at": created, "updated_at": created,
+        })
+        month = created.date().replace(day=1)
+        current = self.end.date().replace(day=1)
+        while month <= current:
+            next_month = (month + timedelta(days=32)).replace(day=1)
+            if month == current:
+                status = "open"
+            else:
+                status = _weighted(rng, (("paid", 0.92), ("open", 0.05), ("uncollectible", 0.03)))
+            issued = datetime.combine(month, datetime.min.time(), tzinfo=dt_timezone.utc)
+            subtotal = int(price / 1.18)  # Hors TVA (18 %)
+            paid = status == "paid"
+            self.writers["invoice"].write({
+                "id": _uuid(rng), "tenant_id": self.tenant_id, "subscription_id": subscription_id,
+                "invoice_number": f"{self.slug}-{month:%Y%m}".upper(), "subtotal": subtotal, "tax": price - subtotal,
+                "total": price, "amount_paid": price if paid else 0, "currency": self.plan.currency,
+                "invoice_date": month, "due_date": month + timedelta(days=15), "status": status,
+                "paid_at": issued + timedelta(days=rng.uniform(0, 14)) if paid else None,
+                "payment_method": rng.choice(INVOICE_PAYMENT_METHODS) if paid else "",
+                "period_start": month, "period_end": next_month - timedelta(days=1),
+                "description": f"Abonnement {self.plan.name} {month:%m/%Y}", "created_at": issued, "updated_at": issued,
+            })
+            month = next_month
+
+    # --- Tickets -----------------------------------------------------------------
+
+    def _days(self) -> list[tuple[datetime, list[float]]]:
+        """Jours simulés et poids horaires disponibles (le dernier jour s'arrête à ``end``)."""
+        last = self.end.replace(hour=0, minute=0, second=0, microsecond=0)
+        days = []
+        for offset in range(self.config.days - 1, -1, -1):
+            day = last - timedelta(days=offset)
+            hours = []
+            for hour, weight in enumerate(HOURLY_PROFILE):
+                available = (self.end - (day + timedelta(hours=hour))).total_seconds() / 3600
+                hours.append(weight * min(1.0, max(0.0, available)))
+            days.append((day, hours))
+        return days
+
+    def _allocate(self) -> list[tuple[datetime, list[float], _QueuePlan, int]]:
+        """Nombre de tickets par file et par jour (profil hebdomadaire et croissance sur la période)."""
+        days = self._days()
+        span = max(len(days) - 1, 1)
+        weights, cells = [], []
+        for day_index, (day, hours) in enumerate(days):
+            day_weight = WEEKDAY_PROFILE[day.weekday()] * (0.85 + 0.3 * day_index / span) * sum(hours)
+            for queue in self.queues:
+                weights.append(queue.weight * day_weight)
+                cells.append((day, hours, queue))
+        return [(*cell, count) for cell, count in zip(cells, apportion(self.tickets, weights))]
+
+    def _staff(self, cells: list) -> None:
+        """
+        Crée les agents : chaque file reçoit de quoi absorber son heure de pointe
+        (``PEAK_UTILIZATION``), les agents restants de ``config.agents`` sont
+        répartis selon la charge. Chaque agent ne sert qu'une file.
+        """
+        config, rng = self.config, self.rng
+        peak = {queue.id: 0.0 for queue in self.queues}
+        for _day, hours, queue, count in cells:
+            if count and sum(hours):
+                erlangs = count * max(hours) / sum(hours) * (queue.service_mean + sum(WALK_DELAY) / 2) / 3600
+                peak[queue.id] = max(peak[queue.id], erlangs)
+        staffing = [max(1, math.ceil(peak[queue.id] / PEAK_UTILIZATION)) for queue in self.queues]
+        extra = apportion(max(0, config.agents - sum(staffing)), [peak[queue.id] or 1 for queue in self.queues])
+
+        created = self.end - timedelta(days=config.days + 30)
+        password = make_password(None)
+        agent_index = 0
+        for queue, agents in zip(self.queues, (base + more for base, more in zip(staffing, extra))):
+            for _ in range(agents):
+                user_id, agent_id = _uuid(rng), _uuid(rng)
+                self.writers["user"].write({
+                    "id": user_id, "email": f"agent{agent_index:04d}.{self.index:04d}@{config.prefix}.local",
+                    "first_name": rng.choice(FIRST_NAMES), "last_name": rng.choice(LAST_NAMES), "password": password,
+                    "email_verified": True, "created_at": created, "updated_at": created,
+                })
+                self.writers["agent"].write({
+                    "id": agent_id, "user_id": user_id, "counter_number": agent_index + 1,
+                    "status_updated_at": self.end, "created_at": created, "updated_at": created,
+                })
+                self.writers["membership"].write({
+                    "id": _uuid(rng), "tenant_id": self.tenant_id, "user_id": user_id, "role": "agent",
+                    "created_at": created, "updated_at": created,
+                })
+                self.writers["assignment"].write({
+                    "id": _uuid(rng), "tenant_id": self.tenant_id, "queue_id": queue.id, "agent_id": agent_id,
+                    "created_at": created, "updated_at": created,
+                })
+                queue.agent_ids.append(agent_id)
+                agent_index += 1
+
+    def _simulate_day(self, queue: _QueuePlan, day: datetime, hours: list[float], count: int) -> None:
+        rng, end = self.rng, self.end
+        arrivals = sorted(
+            day + timedelta(hours=hour, seconds=rng.random() * 3600 * min(1.0, (end - day).total_seconds() / 3600 - hour))
+            for hour in rng.choices(range(24), weights=hours, k=count)
+        )
+        sigma = SERVICE_SIGMA
+        mu = math.log(queue.service_mean) - sigma * sigma / 2
+        # Guichets : (heure de disponibilité, agent)
+        counters = [(day, agent_id) for agent_id in queue.agent_ids]
+        heapq.heapify(counters)
+
+        for number, created in enumerate(arrivals, start=1):
+            free_at, agent_id = heapq.heappop(counters)
+            called = max(created, free_at) + timedelta(seconds=rng.uniform(*CALL_DELAY))
+            patience = rng.expovariate(1 / PATIENCE_MEAN)
+            if (called - created).total_seconds() > patience or rng.random() < 0.03:
+                started, ended, final = None, called + timedelta(seconds=NO_SHOW_DURATION), "no_show"
+            else:
+                started = called + timedelta(seconds=rng.uniform(*WALK_DELAY))
+                ended = started + timedelta(seconds=rng.lognormvariate(mu, sigma))
+                final = "clos"
+            heapq.heappush(counters, (ended, agent_id))
+
+            row = {
+                "id": _uuid(rng), "tenant_id": self.tenant_id, "queue_id": queue.id,
+                "number": f"{queue.letter}{number:03d}", "channel": _weighted(rng, CHANNEL_WEIGHTS),
+                "priority": _weighted(rng, PRIORITY_WEIGHTS), "created_at": created,
+            }
+            customer = self._customer()
+            if customer is not None:
+                row.update(customer_id=customer[0], customer_name=customer[1], customer_phone=customer[2])
+
+            # État à la fin de la simulation
+            if called > end:
+                status = "transfere" if rng.random() < TRANSFERRED_RATE else "en_attente"
+                row.update(status=status, updated_at=created)
+            elif ended > end:
+                if started is None or started > end:
+                    row.update(status="appele", agent_id=agent_id, called_at=called, updated_at=called)
+                else:
+                    status = "pause" if rng.random() < PAUSED_RATE else "en_service"
+                    row.update(status=status, agent_id=agent_id, called_at=called, started_at=started, updated_at=started)
+            else:
+                row.update(
+                    status=final, agent_id=agent_id, called_at=called, started_at=started, ended_at=ended, updated_at=ended
+                )
+            self.writers["ticket"].write(row)
+
+            if row["status"] == "clos" and rng.random() < self.config.feedback_rate:
+                self._feedback(row, queue)
+
+    def _customer(self) -> tuple | None:
+        """Client connu (les premiers clients reviennent le plus souvent) ou client de passage."""
+        if not self.customers or self.rng.random() >= self.config.customer_rate:
+            return None
+        return self.customers[int(len(self.customers) * self.rng.random() ** 2)]
+
+    def _feedback(self, ticket: dict, queue: _QueuePlan) -> None:
+        rng = self.rng
+        wait_minutes = (ticket["called_at"] - ticket["created_at"]).total_seconds() / 60
+        csat = min(5, max(1, round(5 - wait_minutes / 15 + rng.gauss(0, 0.8))))
+        self.writers["feedback"].write({
+            "id": _uuid(rng), "tenant_id": self.tenant_id, "ticket_id": ticket["id"],
+            "customer_id": ticket.get("customer_id"), "agent_id": ticket["agent_id"], "queue_id": queue.id,
+            "csat_score": csat,
+            "nps_score": min(10, max(0, round(csat * 2 + rng.gauss(0, 1.5)))),
+            "wait_time_rating": min(5, max(1, round(5 - wait_minutes / 10 + rng.gauss(0, 0.5)))),
+            "service_quality_rating": min(5, max(1, round(csat + rng.gauss(0.3, 0.7)))),
+            "submitted_at": ticket["ended_at"] + timedelta(seconds=rng.uniform(60, 3600)),
+            "created_at": ticket["ended_at"], "updated_at": ticket["ended_at"],
+        })
+
+
+class SyntheticDataset:
+    """Création, finalisation et suppression des jeux de données synthétiques."""
+
+    @staticmethod
+    def generate(
+        config: SyntheticConfig,
+        progress: Callable[[str, dict[str, int]], None] | None = None,
+    ) -> dict:
+        """
+        Génère ``config.tenants`` tenants (un commit par tenant).
+
+        Returns:
+            dict: slugs des tenants, nombre de lignes par table et date de fin
+        """
+        from apps.customers.models import Customer
+        from apps.feedback.models import Feedback
+        from apps.queues.models import Queue, QueueAssignment, Service, Site
+        from apps.tenants.models import Invoice, Subscription, Tenant, TenantMembership
+        from apps.tickets.models import Ticket
+        from apps.users.models import AgentProfile, User
+
+        models_by_name = {
+            "tenant": Tenant, "user": User, "agent": AgentProfile, "membership": TenantMembership, "site": Site,
+            "service": Service, "queue": Queue, "assignment": QueueAssignment, "customer": Customer,
+            "subscription": Subscription, "invoice": Invoice, "ticket": Ticket, "feedback": Feedback,
+        }
+        using = router.db_for_write(Ticket)
+        writers = {name: BulkWriter(model, using, config.chunk_size) for name, model in models_by_name.items()}
+
+        end = config.resolved_end()
+        plans = SyntheticDataset._plans()
+        rng = random.Random(config.seed)
+        # Tailles des tenants : quelques gros, beaucoup de petits
+        sizes = apportion(config.tickets, [rng.lognormvariate(0, 1) for _ in range(config.tenants)])
+
+        slugs = []
+        for index, tickets in enumerate(sizes):
+            # Les plus gros tenants ont les plans les plus chers
+            rank = sorted(sizes, reverse=True).index(tickets)
+            plan = plans[max(0, len(plans) - 1 - rank * len(plans) // max(config.tenants, 1))]
+            generator = _TenantGenerator(config, index, tickets, plan, writers, end)
+            with transaction.atomic(using=using):
+                generator.run()
+                for writer in writers.values():
+                    writer.flush()
+            slugs.append(generator.slug)
+            if progress is not None:
+                progress(generator.slug, {name: writer.count for name, writer in writers.items()})
+
+        return {
+            "tenants": slugs,
+            "rows": {name: writer.count for name, writer in writers.items()},
+            "end": end.isoformat(),
+        }
+
+    @staticmethod
+    def _plans() -> list:
+        """Plans actifs par prix croissant (plans par défaut créés au besoin)."""
+        from django.core.management import call_command
+
+        from apps.tenants.models import SubscriptionPlan
+
+        plans = list(SubscriptionPlan.objects.filter(is_active=True).order_by("monthly_price", "slug"))
+        if not plans:
+            call_command("create_subscription_plans", stdout=io.StringIO())
+            plans = list(SubscriptionPlan.objects.filter(is_active=True).order_by("monthly_price", "slug"))
+        return plans
+
+    @staticmethod
+    def tenants(prefix: str = DATASET_PREFIX):
+        from apps.tenants.models import Tenant
+
+        return Tenant.objects.filter(slug__startswith=f"{prefix}-").order_by("slug")
+
+    @staticmethod
+    def finalize(prefix: str = DATASET_PREFIX) -> dict[str, int]:
+        """
+        Reconstruit les données dérivées des tickets insérés hors ORM.
+
+        Agrégats KPI, statistiques de service, ETA des tickets en attente,
+        profils d'arrivées, index Redis des files et compteurs d'utilisation ;
+        ``ANALYZE`` sur PostgreSQL.
+        """
+        from apps.queues.eta import ETAEngine
+        from apps.queues.forecast import ArrivalProfiles
+        from apps.queues.models import Queue
+        from apps.queues.rollups import KpiRollups
+        from apps.queues.service_stats import ServiceTimeStats
+        from apps.queues.waiting_index import (
+            WaitingIndexUnavailable,
+            WaitingTicketIndex,
+        )
+        from apps.tickets.models import Ticket
+
+        from .usage_counters import UsageCounters
+
+        summary = {"rollups": 0, "queues": 0, "waiting_indexed": 0}
+        tenants = list(SyntheticDataset.tenants(prefix))
+        for tenant in tenants:
+            summary["rollups"] += KpiRollups.rebuild(tenant=tenant)
+            queues = list(Queue.objects.filter(tenant=tenant).select_related("service"))
+            queue_ids = [queue.id for queue in queues]
+            ServiceTimeStats.rebuild_many(queue_ids)
+            ETAEngine.recompute(queue_ids)
+            ArrivalProfiles.build_many(queue_ids)
+            summary["queues"] += len(queues)
+            try:
+                for queue in queues:
+                    summary["waiting_indexed"] += WaitingTicketIndex.rebuild(queue)
+            except WaitingIndexUnavailable:
+                pass
+        UsageCounters.reconcile(tenant_ids=[str(tenant.id) for tenant in tenants])
+
+        connection = connections[router.db_for_write(Ticket)]
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE")
+        return summary
+
+    @staticmethod
+    def drop(prefix: str = DATASET_PREFIX) -> int:
+        """Supprime les tenants du préfixe (tables volumineuses en suppression brute). Retourne leur nombre."""
+        from apps.customers.models import Customer
+        from apps.feedback.models import Feedback
+        from apps.queues.models import Queue, QueueKpiRollup, QueueServiceStats
+        from apps.tenants.models import Invoice
+        from apps.tickets.models import ArchivedTicket, Ticket
+        from apps.users.models import User
+
+        using = router.db_for_write(Ticket)
+        tenants = list(SyntheticDataset.tenants(prefix))
+        tenant_ids = [tenant.id for tenant in tenants]
+        if tenant_ids:
+            for model in (Feedback, Ticket, ArchivedTicket, QueueKpiRollup, QueueServiceStats, Customer, Invoice):
+                model.objects.filter(tenant_id__in=tenant_ids)._raw_delete(using)
+            # Queue.service est protégé : files avant services
+            Queue.objects.filter(tenant_id__in=tenant_ids).delete()
+            for tenant in tenants:
+                tenant.delete()
+        User.objects.filter(email__endswith=f"@{prefix}.local").delete()
+        return len(tenants)
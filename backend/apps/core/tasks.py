@@ -0,0 +1,19 @@
+"""Tâches Celery de l'application core."""
+
+from __future__ import annotations
+
+import logging
+
+from celery import shared_task
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def reconcile_usage_counters() -> dict[str, int]:
+    """Réaligne les compteurs d'utilisation Redis sur la base."""
+    from .usage_counters import UsageCounters
+
+    written = UsageCounters.reconcile()
+    logger.info("Compteurs d'utilisation réalignés : %s", written)
+    return written
@@ -0,0 +1,144 @@
+"""Tests du routeur primaire/réplica, sur deux bases SQLite distinctes.
+
+La base ``replica`` des paramètres de test n'est pas alimentée par la
+primaire : une lecture routée vers le réplica ne voit que les lignes créées
+avec ``.using("replica")``, ce qui rend le routage observable.
+"""
+
+import time
+
+import pytest
+from django.http import HttpResponse
+from django.test import RequestFactory
+from model_bakery import baker
+
+from apps.core.db_router import ReplicaHealth, routing_state, use_replica
+from apps.core.middleware import ReplicaPinningMiddleware
+from apps.queues.public_views import PublicQueueListView
+from apps.tenants.models import Tenant
+
+pytestmark = pytest.mark.django_db(databases=["default", "replica"])
+
+
+@pytest.fixture(autouse=True)
+def replica_reads_enabled(settings):
+    settings.REPLICA_READS_ENABLED = True
+    ReplicaHealth.reset()
+    yield
+    ReplicaHealth.reset()
+
+
+@pytest.fixture
+def replica_tenant():
+    """Tenant présent uniquement sur le réplica."""
+    return baker.make(Tenant, slug="replica-only", _using="replica")
+
+
+def _visible_slugs() -> set[str]:
+    return set(Tenant.objects.values_list("slug", flat=True))
+
+
+class TestReplicaRouter:
+    """Tests pour le choix de la base de lecture."""
+
+    def test_reads_use_primary_by_default(self, tenant, replica_tenant):
+        """Test que les lectures hors unité en lecture seule vont sur la primaire."""
+        assert _visible_slugs() == {tenant.slug}
+
+    def test_read_only_block_uses_replica(self, tenant, replica_tenant):
+        """Test que use_replica envoie les lectures sur le réplica."""
+        with use_replica():
+            assert _visible_slugs() == {replica_tenant.slug}
+
+    def test_write_pins_to_primary(self, tenant, replica_tenant):
+        """Test qu'après une écriture l'unité de travail lit ses propres écritures."""
+        with use_replica():
+            created = baker.make(Tenant, slug="just-written")
+            assert _visible_slugs() == {tenant.slug, created.slug}
+
+    def test_pin_window_expires(self, settings, tenant, replica_tenant):
+        """Test qu'à l'expiration de la fenêtre les lectures repartent sur le réplica."""
+        settings.REPLICA_PIN_SECONDS = 0
+        with use_replica():
+            baker.make(Tenant)
+            assert _visible_slugs() == {replica_tenant.slug}
+
+    def test_lagging_replica_falls_back_to_primary(self, settings, tenant, replica_tenant, mocker):
+        """Test le repli sur la primaire quand le réplica est trop en retard."""
+        settings.REPLICA_MAX_LAG_SECONDS = 5
+        mocker.patch.object(ReplicaHealth, "lag_seconds", return_value=30.0)
+        with use_replica():
+            assert _visible_slugs() == {tenant.slug}
+
+    def test_unreachable_replica_falls_back_to_primary(self, tenant, replica_tenant, mocker):
+        """Test le repli sur la primaire quand le réplica ne répond pas."""
+        mocker.patch.object(ReplicaHealth, "lag_seconds", side_effect=ConnectionError)
+        with use_replica():
+            assert _visible_slugs() == {tenant.slug}
+
+    def test_disabled_replica_reads(self, settings, tenant, replica_tenant):
+        """Test que REPLICA_READS_ENABLED=False garde toutes les lectures sur la primaire."""
+        settings.REPLICA_READS_ENABLED = False
+        with use_replica():
+            assert _visible_slugs() == {tenant.slug}
+
+
+class TestReplicaPinningMiddleware:
+    """Tests pour l'épinglage entre requêtes."""
+
+    def _middleware(self, view):
+        return ReplicaPinningMiddleware(view)
+
+    def test_write_sets_pin_cookie(self):
+        """Test qu'une requête qui écrit reçoit le cookie d'épinglage."""
+
+        def view(request):
+            baker.make(Tenant)
+            return HttpResponse()
+
+        response = self._middleware(view)(RequestFactory().post("/"))
+
+        pinned_until = float(response.cookies[ReplicaPinningMiddleware.cookie_name].value)
+        assert pinned_until > time.time()
+
+    def test_read_request_sets_no_cookie(self):
+        """Test qu'une requête en lecture seule ne pose pas de cookie."""
+        response = self._middleware(lambda request: HttpResponse())(RequestFactory().get("/"))
+
+        assert ReplicaPinningMiddleware.cookie_name not in response.cookies
+
+    def test_pinned_client_reads_primary(self, tenant, replica_tenant):
+        """Test qu'un client épinglé lit sur la primaire dans une vue en lecture seule."""
+        seen = {}
+
+        def view(request):
+            with use_replica():
+                seen["slugs"] = _visible_slugs()
+            return HttpResponse()
+
+        request = RequestFactory().get("/")
+        request.COOKIES[ReplicaPinningMiddleware.cookie_name] = str(time.time() + 60)
+        self._middleware(view)(request)
+
+        assert seen["slugs"] == {tenant.slug}
+
+    def test_read_only_view_uses_replica(self, replica_tenant):
+        """Test qu'une vue publique décorée lit sur le réplica."""
+        view = self._middleware(
+            lambda request: PublicQueueListView.as_view()(request, tenant_slug=replica_tenant.slug)
+        )
+
+        response = view(RequestFactory().get("/"))
+
+        assert response.status_code == 200
+
+
+class TestRoutingState:
+    """Tests pour l'état de routage hors requête (tâches)."""
+
+    def test_use_replica_outside_request_opens_unit_of_work(self):
+        """Test qu'une tâche sans requête obtient sa propre unité de travail."""
+        with use_replica() as state:
+            assert state.use_replica
+        with routing_state() as state:
+            assert not state.use_replica
@@ -0,0 +1,141 @@
+"""Tests pour la pagination par curseur."""
+
+from datetime import timedelta
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+from django.utils import timezone
+from model_bakery import baker
+from rest_framework.exceptions import NotFound
+from rest_framework.filters import OrderingFilter
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from apps.core.pagination import KeysetPagination
+from apps.tickets.models import Ticket
+from apps.tickets.views import TicketViewSet
+
+
+class _TicketListView:
+    """Vue minimale : tri limité aux ordering_fields, comme TicketViewSet."""
+
+    filter_backends = [OrderingFilter]
+    ordering_fields = ("created_at", "priority", "called_at")
+
+
+def _paginate(params=None):
+    paginator = KeysetPagination()
+    request = Request(APIRequestFactory().get("/tickets/", params or {}))
+    rows = paginator.paginate_queryset(Ticket.objects.all(), request, view=_TicketListView())
+    return rows, paginator
+
+
+def _cursor(link):
+    return parse_qs(urlparse(link).query)["cursor"][0]
+
+
+def _walk(params):
+    """Parcourt toutes les pages vers l'avant ; retourne les pages successives."""
+    pages = []
+    rows, paginator = _paginate(params)
+    pages.append(rows)
+    while paginator.next_cursor is not None:
+        link = paginator._link(paginator.next_cursor)
+        rows, paginator = _paginate({**params, "cursor": _cursor(link)})
+        pages.append(rows)
+    return pages
+
+
+@pytest.fixture
+def tickets(tenant, queue):
+    """Sept tickets dont plusieurs créés au même instant, certains appelés."""
+    now = timezone.now()
+    created = []
+    for index in range(7):
+        ticket = baker.make(Ticket, tenant=tenant, queue=queue, priority=index % 3)
+        Ticket.objects.filter(pk=ticket.pk).update(
+            created_at=now - timedelta(minutes=index // 2),
+            called_at=now if index % 2 else None,
+        )
+        created.append(ticket)
+    return created
+
+
+@pytest.mark.django_db
+class TestKeysetPagination:
+    """Tests pour le parcours des pages."""
+
+    def test_walks_every_row_once_in_order(self, tickets):
+        """Test que les pages couvrent chaque ticket une fois, malgré les created_at égaux."""
+        pages = _walk({"page_size": 2})
+
+        flat = [ticket for page in pages for ticket in page]
+        expected = list(Ticket.objects.order_by("-created_at", "-id"))
+        assert [t.pk for t in flat] == [t.pk for t in expected]
+        assert [len(page) for page in pages] == [2, 2, 2, 1]
+
+    def test_ordering_on_nullable_field(self, tickets):
+        """Test le tri demandé sur un champ nullable : NULL en fin de liste."""
+        pages = _walk({"page_size": 3, "ordering": "called_at"})
+
+        flat = [ticket for page in pages for ticket in page]
+        assert len({t.pk for t in flat}) == len(tickets)
+        called = [t.called_at for t in flat]
+        assert called.index(None) == sum(1 for value in called if value is not None)
+
+    def test_previous_page(self, tickets):
+        """Test que le lien précédent ramène exactement la page d'avant."""
+        first, paginator = _paginate({"page_size": 3})
+        second, paginator = _paginate({"page_size": 3, "cursor": _cursor(paginator._link(paginator.next_cursor))})
+
+        back, paginator = _paginate({"page_size": 3, "cursor": _cursor(paginator._link(paginator.previous_cursor))})
+
+        assert [t.pk for t in back] == [t.pk for t in first]
+        assert paginator.previous_cursor is None
+
+    def test_invalid_cursor(self, tickets):
+        """Test qu'un curseur illisible donne une 404."""
+        with pytest.raises(NotFound):
+            _paginate({"cursor": "not-a-cursor"})
+
+    def test_count_on_demand(self, settings, tickets):
+        """Test le total optionnel, exact sous le seuil et borné au-delà."""
+        _, paginator = _paginate({"page_size": 10})
+        assert paginator.count is None
+
+        _, paginator = _paginate({"with_count": "1"})
+        assert paginator.count == (7, False)
+
+        settings.PAGINATION_EXACT_COUNT_THRESHOLD = 3
+        _, paginator = _paginate({"with_count": "1"})
+        assert paginator.count == (4, True)
+
+
+@pytest.mark.django_db
+class TestTicketListEndpoint:
+    """Tests pour la liste paginée des tickets."""
+
+    def test_list_is_paginated(self, tenant, user, tickets):
+        """Test la forme de la réponse de la liste des tickets."""
+        request = APIRequestFactory().get("/tickets/", {"page_size": 5})
+        request.tenant = tenant
+        force_authenticate(request, user=user)
+
+        response = TicketViewSet.as_view({"get": "list"})(request)
+
+        assert response.status_code == 200
+        assert len(response.data["results"]) == 5
+        assert "cursor=" in response.data["next"]
+        assert response.data["previous"] is None
+        assert "count" not in response.data
+
+    def test_list_without_pagination_params_is_bare_array(self, tenant, user, tickets):
+        """Test que sans paramètre de pagination la réponse reste un tableau (clients existants)."""
+        request = APIRequestFactory().get("/tickets/")
+        request.tenant = tenant
+        force_authenticate(request, user=user)
+
+        response = TicketViewSet.as_view({"get": "list"})(request)
+
+        assert response.status_code == 200
+        assert isinstance(response.data, list) and len(response.data) == 7
@@ -0,0 +1,134 @@
+"""Tests pour la diffusion temps réel centralisée."""
+
+import time
+
+import pytest
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from model_bakery import baker
+
+from apps.core.realtime import (
+    BroadcastDispatcher,
+    RealtimeBroadcaster,
+    RealtimeGroups,
+    merge_queue_updates,
+)
+from apps.tickets.models import Ticket
+
+
+def _listen(group):
+    layer = get_channel_layer()
+    channel = async_to_sync(layer.new_channel)()
+    async_to_sync(layer.group_add)(group, channel)
+    return layer, channel
+
+
+def _has_messages(layer, channel):
+    return channel in layer.channels and not layer.channels[channel].empty()
+
+
+def _receive_all(layer, channel):
+    messages = []
+    while _has_messages(layer, channel):
+        messages.append(async_to_sync(layer.receive)(channel))
+    return messages
+
+
+class TestRealtimeGroups:
+    """Tests pour les noms de groupes canoniques."""
+
+    def test_names_are_valid_channels_groups(self):
+        """Test que les noms respectent les caractères autorisés par Channels."""
+        layer = get_channel_layer()
+        for name in (
+            RealtimeGroups.queue("my-tenant", "3f1c2e6a-0000-4000-8000-000000000001"),
+            RealtimeGroups.ticket("my tenant", "abc:def"),
+            RealtimeGroups.queue_displays("my-tenant", "3f1c2e6a00004000800000000000001"),
+        ):
+            assert layer.require_valid_group_name(name)
+
+    def test_queue_group_matches_consumer(self):
+        """Test que l'émetteur et le consumer de file utilisent le même groupe."""
+        assert RealtimeGroups.queue("acme", "q1") == "queue.acme.q1"
+
+
+@pytest.mark.django_db
+class TestRealtimeBroadcaster:
+    """Tests pour RealtimeBroadcaster."""
+
+    def test_ticket_call_reaches_queue_ticket_and_display_groups(
+        self, ticket, django_capture_on_commit_callbacks
+    ):
+        """Test la diffusion d'un appel aux trois groupes, après commit."""
+        slug = ticket.tenant.slug
+        queue_layer, queue_channel = _listen(RealtimeGroups.queue(slug, ticket.queue_id))
+        _layer, ticket_channel = _listen(RealtimeGroups.ticket(slug, ticket.id))
+        _layer, display_channel = _listen(RealtimeGroups.queue_displays(slug, ticket.queue_id))
+
+        ticket.status = Ticket.STATUS_CALLED
+        with django_capture_on_commit_callbacks() as callbacks:
+            RealtimeBroadcaster.ticket_event(ticket, "ticket.called")
+            assert _receive_all(queue_layer, queue_channel) == []
+        for callback in callbacks:
+            callback()
+
+        queue_message = _receive_all(queue_layer, queue_channel)
+        assert len(queue_message) == 1
+        assert queue_message[0]["payload"]["ticket_id"] == str(ticket.id)
+        assert queue_message[0]["payload"]["event"] == "ticket.called"
+        assert _receive_all(queue_layer, ticket_channel)[0]["payload"]["status"] == Ticket.STATUS_CALLED
+        assert _receive_all(queue_layer, display_channel)[0]["ticket"]["number"] == ticket.number
+
+
+@pytest.mark.django_db
+class TestBroadcastDispatcher:
+    """Tests pour la coalescence des rafales."""
+
+    def test_burst_on_one_queue_becomes_one_message(self, tenant, queue):
+        """Test que plusieurs mises à jour d'une file partent en un seul message."""
+        tickets = baker.make(Ticket, tenant=tenant, queue=queue, _quantity=3)
+        group = RealtimeGroups.queue(tenant.slug, queue.id)
+        dispatcher = BroadcastDispatcher()
+
+        for ticket in tickets + tickets[:1]:
+            payload = {"ticket_id": str(ticket.id), "queue_id": str(queue.id), "status": ticket.status}
+            dispatcher.enqueue(group, {"type": "queue_updated", "payload": payload}, merge=merge_queue_updates)
+        dispatcher.enqueue("other", {"type": "ticket_called", "ticket": {}})
+
+        batch = dispatcher.drain()
+
+        assert [name for name, _message in batch] == ["other", group]
+        merged = batch[1][1]["payload"]
+        # Format du dernier message conservé pour les abonnés existants
+        assert merged["ticket_id"] == str(tickets[0].id) and merged["status"] == tickets[0].status
+        assert merged["events_count"] == 4
+        assert [entry["ticket_id"] for entry in merged["tickets"]] == [str(t.id) for t in tickets[1:] + tickets[:1]]
+        assert dispatcher.drain() == []
+
+    def test_single_update_is_sent_unchanged(self):
+        """Test qu'une mise à jour isolée part sans modification de format."""
+        message = {"type": "queue_updated", "payload": {"event": "ticket.created", "ticket_id": "t1", "queue_id": "q1"}}
+        dispatcher = BroadcastDispatcher()
+
+        dispatcher.enqueue("queue.acme.q1", message, merge=merge_queue_updates)
+
+        assert dispatcher.drain() == [("queue.acme.q1", message)]
+
+    def test_async_mode_sends_from_worker_thread(self, settings):
+        """Test l'envoi différé par le thread du processus, fenêtre écoulée."""
+        settings.REALTIME_BROADCAST_ASYNC = True
+        settings.REALTIME_COALESCE_WINDOW_MS = 20
+        layer, channel = _listen("queue.acme.q1")
+        dispatcher = BroadcastDispatcher()
+
+        for index in range(5):
+            payload = {"ticket_id": str(index), "queue_id": "q1", "status": "en_attente"}
+            dispatcher.submit("queue.acme.q1", {"type": "queue_updated", "payload": payload}, merge=merge_queue_updates)
+
+        deadline = time.monotonic() + 2
+        while not _has_messages(layer, channel) and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        messages = _receive_all(layer, channel)
+        assert len(messages) == 1
+        assert messages[0]["payload"]["events_count"] == 5
@@ -0,0 +1,75 @@
+"""Tests pour le générateur de jeux de données synthétiques."""
+
+from datetime import datetime, timezone
+
+import pytest
+
+from apps.core.synthetic_data import (
+    SyntheticConfig,
+    SyntheticDataset,
+    _copy_value,
+    apportion,
+)
+from apps.feedback.models import Feedback
+from apps.queues.models import QueueKpiRollup
+from apps.tenants.models import Invoice, Tenant
+from apps.tickets.models import Ticket
+from apps.users.models import User
+
+END = datetime(2026, 10, 14, 15, 30, tzinfo=timezone.utc)
+
+
+def small_config(**overrides):
+    values = {"tenants": 2, "sites": 1, "queues": 2, "agents": 3, "customers": 20, "tickets": 400, "days": 5}
+    return SyntheticConfig(end=END, chunk_size=100, **{**values, **overrides})
+
+
+def ticket_fingerprint():
+    return sorted(Ticket.objects.values_list("id", "status", "created_at", "agent_id"))
+
+
+@pytest.mark.django_db
+class TestSyntheticDataset:
+    """Tests pour SyntheticDataset (repli INSERT par lots)."""
+
+    def test_generates_consistent_history(self):
+        """Test que l'historique généré est cohérent et respecte les volumes demandés."""
+        report = SyntheticDataset.generate(small_config())
+
+        assert report["rows"]["ticket"] == Ticket.objects.count() == 400
+        assert Tenant.objects.filter(slug__startswith="synthetic-").count() == 2
+        statuses = set(Ticket.objects.values_list("status", flat=True))
+        assert {Ticket.STATUS_CLOSED, Ticket.STATUS_NO_SHOW} <= statuses
+        # Simulation arrêtée à END : rien n'est créé, appelé ou terminé après
+        assert not Ticket.objects.filter(created_at__gt=END).exists()
+        assert not Ticket.objects.filter(called_at__gt=END).exists()
+        assert not Ticket.objects.filter(ended_at__gt=END).exists()
+        assert not Ticket.objects.filter(status=Ticket.STATUS_CLOSED, started_at__isnull=True).exists()
+        # Un agent n'a jamais plus d'un ticket actif
+        active = Ticket.objects.filter(status__in=[Ticket.STATUS_CALLED, Ticket.STATUS_IN_SERVICE])
+        assert active.values("agent_id").distinct().count() == active.count()
+        assert Feedback.objects.exclude(ticket__status=Ticket.STATUS_CLOSED).count() == 0
+        assert Invoice.objects.filter(status=Invoice.STATUS_OPEN, invoice_date__month=END.month).count() == 2
+
+        SyntheticDataset.finalize()
+        assert QueueKpiRollup.objects.exists()
+
+    def test_same_seed_same_dataset(self):
+        """Test qu'une même graine et une même fin produisent le même jeu de données."""
+        SyntheticDataset.generate(small_config(seed=7))
+        first = ticket_fingerprint()
+
+        assert SyntheticDataset.drop() == 2
+        assert not Ticket.objects.exists() and not User.objects.filter(email__endswith="@synthetic.local").exists()
+
+        SyntheticDataset.generate(small_config(seed=7))
+        assert ticket_fingerprint() == first
+
+    def test_apportion_and_copy_format(self):
+        """Test la répartition exacte et l'échappement du format texte de COPY."""
+        assert apportion(10, [1, 1, 1]) == [4, 3, 3]
+        assert sum(apportion(1001, [0.3, 2.5, 0.7, 0])) == 1001
+        assert _copy_value(None) == r"\N"
+        assert _copy_value(True) == "t"
+        assert _copy_value("a\tb\\c\n") == "a\\tb\\\\c\\n"
+        assert _copy_value({"k": [1]}) == '{"k": [1]}'
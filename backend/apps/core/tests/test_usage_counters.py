@@ -0,0 +1,131 @@
+"""Tests pour les compteurs d'utilisation des quotas."""
+
+import pytest
+from model_bakery import baker
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from apps.core.redis_client import get_redis_client, reset_redis_client
+from apps.core.subscription_enforcement import SubscriptionEnforcement
+from apps.core.usage_counters import UsageCounters
+from apps.queues.models import Queue
+from apps.tenants.models import TenantMembership
+from apps.tenants.views import TenantMembershipViewSet
+from apps.tickets.models import Ticket
+
+
+@pytest.fixture
+def redis_counters(settings):
+    """Compteurs sur un Redis local (base 15), test ignoré s'il est injoignable."""
+    settings.REDIS_URL = "redis://localhost:6379/15"
+    reset_redis_client()
+    client = get_redis_client()
+    try:
+        client.flushdb()
+    except Exception:  # noqa: BLE001
+        reset_redis_client()
+        pytest.skip("Redis local indisponible")
+    UsageCounters._scripts.clear()
+    yield client
+    client.flushdb()
+    UsageCounters._scripts.clear()
+    reset_redis_client()
+
+
+@pytest.mark.django_db
+class TestUsageCountersDatabase:
+    """Tests du repli base de données (sans Redis)."""
+
+    def test_current_counts_month_tickets(self, tenant, queue):
+        """Test que l'utilisation courante compte les tickets du mois du tenant."""
+        baker.make(Ticket, tenant=tenant, queue=queue, _quantity=3)
+
+        assert UsageCounters.current(tenant, "ticket") == 3
+        assert SubscriptionEnforcement.get_usage_stats(tenant)["tickets_this_month"]["current"] == 3
+
+    def test_claim_respects_limit(self, tenant, queue):
+        """Test que la réservation est refusée une fois la limite atteinte."""
+        baker.make(Ticket, tenant=tenant, queue=queue, _quantity=2)
+
+        assert UsageCounters.claim(tenant, "ticket", limit=3) is True
+        baker.make(Ticket, tenant=tenant, queue=queue)
+        assert UsageCounters.claim(tenant, "ticket", limit=3) is False
+
+
+@pytest.mark.django_db
+class TestUsageCountersRedis:
+    """Tests des compteurs Redis."""
+
+    def test_claims_never_overshoot(self, tenant, redis_counters):
+        """Test que les réservations s'arrêtent exactement à la limite."""
+        granted = [UsageCounters.claim(tenant, "ticket", limit=5) for _ in range(8)]
+
+        assert granted.count(True) == 5
+        assert UsageCounters.current(tenant, "ticket") == 5
+
+    def test_claimed_creation_counted_once(
+        self, tenant, queue, redis_counters, django_capture_on_commit_callbacks
+    ):
+        """Test qu'une création réservée puis enregistrée n'est comptée qu'une fois."""
+        with django_capture_on_commit_callbacks(execute=True):
+            assert SubscriptionEnforcement.claim("ticket", tenant)
+            ticket = baker.make(Ticket, tenant=tenant, queue=queue)
+            baker.make(Ticket, tenant=tenant, queue=queue)
+        assert UsageCounters.current(tenant, "ticket") == 2
+
+        with django_capture_on_commit_callbacks(execute=True):
+            ticket.delete()
+        assert UsageCounters.current(tenant, "ticket") == 1
+
+    def test_unconsumed_claim_expires(self, tenant, redis_counters, monkeypatch):
+        """Test qu'une réservation jamais consommée (transaction annulée) est décomptée à l'échéance."""
+        monkeypatch.setattr("apps.core.usage_counters.PENDING_TIMEOUT", 0)
+
+        assert UsageCounters.claim(tenant, "queue", limit=1)
+        # La réservation échue est retirée du compteur par le script suivant
+        assert UsageCounters.claim(tenant, "queue", limit=1)
+        assert UsageCounters.current(tenant, "queue") == 1
+
+    def test_release_and_reconcile(self, tenant, queue, redis_counters):
+        """Test qu'une réservation rendue est décomptée et que la réconciliation suit la base."""
+        baker.make(Queue, tenant=tenant, _quantity=2)
+        assert UsageCounters.claim(tenant, "queue", limit=10)
+        assert UsageCounters.current(tenant, "queue") == 4
+        UsageCounters.release(tenant, "queue")
+        assert UsageCounters.current(tenant, "queue") == 3
+
+        Queue.objects.filter(tenant=tenant).exclude(pk=queue.pk).delete()
+        assert UsageCounters.current(tenant, "queue") == 3  # suppression non encore commitée
+
+        UsageCounters.reconcile(tenant_ids=[str(tenant.id)])
+        assert UsageCounters.current(tenant, "queue") == 1
+
+    def test_membership_change_recounts_agents(self, tenant, agent_membership, redis_counters):
+        """Test qu'une désactivation d'agent est prise en compte à la lecture suivante."""
+        assert UsageCounters.current(tenant, "agent") == 1
+
+        agent_membership.is_active = False
+        agent_membership.save()
+
+        assert TenantMembership.objects.filter(tenant=tenant, role="agent", is_active=True).count() == 0
+        assert UsageCounters.current(tenant, "agent") == 0
+
+    def test_agent_invite_claims_quota(
+        self, tenant, admin_membership, agent_membership, redis_counters, django_capture_on_commit_callbacks
+    ):
+        """Test que l'invitation d'un agent réserve le quota et ne le compte qu'une fois."""
+        tenant.max_agents = 2
+        tenant.save()
+        view = TenantMembershipViewSet.as_view({"post": "create"})
+
+        def invite(email):
+            request = APIRequestFactory().post("/members/", {"email": email, "role": "agent"}, format="json")
+            request.tenant = tenant
+            force_authenticate(request, user=admin_membership.user)
+            return view(request)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            assert invite("new-agent@example.com").status_code == 201
+        assert UsageCounters.current(tenant, "agent") == 2
+
+        assert invite("other-agent@example.com").status_code == 403
+        assert UsageCounters.current(tenant, "agent") == 2
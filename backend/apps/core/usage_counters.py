@@ -0,0 +1,305 @@
+"""Compteurs d'utilisation matérialisés pour les quotas de souscription.
+
+Un compteur Redis par tenant, ressource et période remplace les ``COUNT(*)``
+de ``SubscriptionEnforcement`` :
+
+- ``ticket`` : tickets créés dans le mois (clé ``...:ticket:AAAAMM``) ;
+- ``queue``, ``site`` : total courant (clé ``...:all``) ;
+- ``agent`` : memberships agent actifs, invalidé à chaque modification de
+  membership (le rôle et l'activation changent hors création/suppression).
+
+``claim`` vérifie et incrémente atomiquement (script Lua) : deux créations
+concurrentes ne peuvent pas dépasser la limite du plan. Les compteurs absents
+sont amorcés par un comptage en base (``SET NX``) ; ils sont réalignés
+périodiquement par ``reconcile`` (tâche ``reconcile_usage_counters``).
+
+Les créations réservées par ``claim`` sont comptées une seule fois : chaque
+réservation ajoute aussi une unité « en attente » (sorted set, score =
+échéance), que le signal de création consomme au lieu d'incrémenter le
+compteur. Le compteur vaut donc créations validées + réservations en cours.
+Une réservation ni consommée ni rendue (transaction annulée, requête
+interrompue) expire après ``PENDING_TIMEOUT`` et est alors retirée du
+compteur par le script suivant. La base reste la source de vérité : sans
+Redis, les quotas repassent par un comptage sous verrou du tenant.
+"""
+
+from __future__ import annotations
+
+import logging
+import uuid
+from datetime import datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from apps.core.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "sq:usage"
+
+RESOURCE_TICKET = "ticket"
+RESOURCE_QUEUE = "queue"
+RESOURCE_SITE = "site"
+RESOURCE_AGENT = "agent"
+RESOURCES = (RESOURCE_TICKET, RESOURCE_QUEUE, RESOURCE_SITE, RESOURCE_AGENT)
+
+# Délai de vie d'une réservation non suivie de création (requête interrompue)
+PENDING_TIMEOUT = 60
+
+# Retire les réservations échues (KEYS[2]) du compteur (KEYS[1]) ; définit ``now``
+_PURGE_EXPIRED = """
+local now = tonumber(redis.call('TIME')[1])
+local expired = redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', now)
+if expired > 0 and redis.call('EXISTS', KEYS[1]) == 1 then
+    redis.call('DECRBY', KEYS[1], expired)
+end
+"""
+
+# KEYS: compteur, en attente — ARGV: quantité, limite, durée de vie des réservations, jeton
+_CLAIM_SCRIPT = _PURGE_EXPIRED + """
+local current = redis.call('GET', KEYS[1])
+if not current then
+    return {-1, 0}
+end
+current = tonumber(current)
+local amount = tonumber(ARGV[1])
+if current + amount > tonumber(ARGV[2]) then
+    return {0, current}
+end
+for i = 1, amount do
+    redis.call('ZADD', KEYS[2], now + tonumber(ARGV[3]), ARGV[4] .. ':' .. i)
+end
+return {1, redis.call('INCRBY', KEYS[1], amount)}
+"""
+
+# KEYS: compteur, en attente — ARGV: variation (création +1, suppression -1)
+_APPLY_SCRIPT = _PURGE_EXPIRED + """
+local delta = tonumber(ARGV[1])
+if delta > 0 and redis.call('ZPOPMIN', KEYS[2])[1] then
+    return 0
+end
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    redis.call('INCRBY', KEYS[1], delta)
+end
+return 1
+"""
+
+# KEYS: compteur, en attente — ARGV: quantité (réservations échues : déjà décomptées)
+_RELEASE_SCRIPT = _PURGE_EXPIRED + """
+local released = #redis.call('ZPOPMIN', KEYS[2], tonumber(ARGV[1])) / 2
+if released > 0 and redis.call('EXISTS', KEYS[1]) == 1 then
+    redis.call('DECRBY', KEYS[1], released)
+end
+return released
+"""
+
+# KEYS: compteur, en attente — ARGV: valeur en base, durée de vie, NX (1 : amorçage seulement)
+_SET_SCRIPT = _PURGE_EXPIRED + """
+local pending = redis.call('ZCARD', KEYS[2])
+local value = tonumber(ARGV[1]) + pending
+if ARGV[3] == '1' then
+    if redis.call('SET', KEYS[1], value, 'EX', ARGV[2], 'NX') then
+        return value
+    end
+    return tonumber(redis.call('GET', KEYS[1]))
+end
+redis.call('SET', KEYS[1], value, 'EX', ARGV[2])
+return value
+"""
+
+
+class UsageCounters:
+    """Lecture, réservation et réconciliation des compteurs d'utilisation."""
+
+    _scripts: dict[str, object] = {}
+
+    @staticmethod
+    def period(resource: str, at: datetime | None = None) -> str:
+        """Période du compteur : mois courant pour les tickets, ``all`` sinon."""
+        if resource != RESOURCE_TICKET:
+            return "all"
+        return timezone.localtime(at).strftime("%Y%m")
+
+    @staticmethod
+    def _keys(tenant_id, resource: str, period: str) -> tuple[str, str]:
+        base = f"{KEY_PREFIX}:{tenant_id}:{resource}:{period}"
+        return (base, f"{base}:claims")
+
+    @staticmethod
+    def _timeout() -> int:
+        return getattr(settings, "USAGE_COUNTER_TIMEOUT", 86400)
+
+    @staticmethod
+    def _script(client, name: str, source: str):
+        script = UsageCounters._scripts.get(name)
+        if script is None:
+            script = UsageCounters._scripts[name] = client.register_script(source)
+        return script
+
+    @staticmethod
+    def count_from_db(tenant_id, resource: str) -> int:
+        """Comptage de référence en base (amorçage, réconciliation, repli)."""
+        return UsageCounters.counts_from_db(resource, tenant_ids=[tenant_id]).get(str(tenant_id), 0)
+
+    @staticmethod
+    def counts_from_db(resource: str, tenant_ids=None) -> dict[str, int]:
+        """Comptages de référence par tenant en une requête groupée."""
+        from apps.queues.models import Queue, Site
+        from apps.tenants.models import TenantMembership
+        from apps.tickets.models import Ticket
+
+        if resource == RESOURCE_TICKET:
+            month_start = timezone.localtime().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+            # Plage sur l'index (tenant, created_at)
+            queryset = Ticket.objects.filter(created_at__gte=month_start)
+        elif resource == RESOURCE_QUEUE:
+            queryset = Queue.objects.all()
+        elif resource == RESOURCE_SITE:
+            queryset = Site.objects.all()
+        elif resource == RESOURCE_AGENT:
+            queryset = TenantMembership.objects.filter(role="agent", is_active=True)
+        else:
+            raise ValueError(f"Ressource inconnue : {resource}")
+
+        if tenant_ids is not None:
+            queryset = queryset.filter(tenant_id__in=tenant_ids)
+        rows = queryset.order_by().values("tenant_id").annotate(total=Count("pk")).values_list("tenant_id", "total")
+        return {str(tenant_id): total for tenant_id, total in rows}
+
+    @staticmethod
+    def _seed(client, tenant_id, resource: str, keys: list[str]) -> int:
+        """Amorce un compteur absent depuis la base et les réservations en cours (sans écraser un amorçage concurrent)."""
+        value = UsageCounters.count_from_db(tenant_id, resource)
+        script = UsageCounters._script(client, "set", _SET_SCRIPT)
+        return int(script(keys=keys, args=[value, UsageCounters._timeout(), 1]))
+
+    @staticmethod
+    def current(tenant, resource: str) -> int:
+        """Utilisation courante du tenant pour une ressource (O(1) une fois amorcée)."""
+        client = get_redis_client()
+        if client is None:
+            return UsageCounters.count_from_db(tenant.pk, resource)
+
+        keys = list(UsageCounters._keys(tenant.pk, resource, UsageCounters.period(resource)))
+        try:
+            value = client.get(keys[0])
+            if value is None:
+                return UsageCounters._seed(client, tenant.pk, resource, keys)
+            return int(value)
+        except Exception:  # noqa: BLE001 - la base reste la source de vérité
+            logger.warning("Compteur d'utilisation illisible (%s, %s)", tenant.pk, resource, exc_info=True)
+            return UsageCounters.count_from_db(tenant.pk, resource)
+
+    @staticmethod
+    def claim(tenant, resource: str, limit: int, amount: int = 1) -> bool:
+        """
+        Réserve ``amount`` unités si la limite le permet (vérification et incrément atomiques).
+
+        Une réservation dont la création échoue doit être rendue par ``release``.
+        Sans Redis, le tenant est verrouillé jusqu'à la fin de la transaction
+        courante (``ATOMIC_REQUESTS``) et la base est comptée.
+
+        Returns:
+            bool: True si la réservation est accordée
+        """
+        client = get_redis_client()
+        if client is not None:
+            keys = list(UsageCounters._keys(tenant.pk, resource, UsageCounters.period(resource)))
+            try:
+                script = UsageCounters._script(client, "claim", _CLAIM_SCRIPT)
+                args = [amount, limit, PENDING_TIMEOUT, uuid.uuid4().hex]
+                granted, _value = script(keys=keys, args=args)
+                if int(granted) < 0:
+                    UsageCounters._seed(client, tenant.pk, resource, keys)
+                    granted, _value = script(keys=keys, args=args)
+                return int(granted) == 1
+            except Exception:  # noqa: BLE001
+                logger.warning("Réservation Redis impossible (%s, %s)", tenant.pk, resource, exc_info=True)
+
+        from apps.tenants.models import Tenant
+
+        if transaction.get_connection().in_atomic_block:
+            # Sérialise les créations concurrentes du tenant jusqu'au commit
+            Tenant.objects.select_for_update().filter(pk=tenant.pk).exists()
+        return UsageCounters.count_from_db(tenant.pk, resource) + amount <= limit
+
+    @staticmethod
+    def release(tenant, resource: str, amount: int = 1) -> None:
+        """Rend une réservation dont la création n'a pas abouti (ou n'est plus à compter)."""
+        client = get_redis_client()
+        if client is None:
+            return
+        keys = list(UsageCounters._keys(tenant.pk, resource, UsageCounters.period(resource)))
+        try:
+            UsageCounters._script(client, "release", _RELEASE_SCRIPT)(keys=keys, args=[amount])
+        except Exception:  # noqa: BLE001
+            logger.warning("Libération impossible (%s, %s)", tenant.pk, resource, exc_info=True)
+            UsageCounters.invalidate(tenant.pk, resource)
+
+    @staticmethod
+    def record(tenant_id, resource: str, delta: int, at: datetime | None = None) -> None:
+        """
+        Répercute une création (+1) ou une suppression (-1) après le commit.
+
+        Une création consomme d'abord une réservation en attente ; sinon le
+        compteur est incrémenté s'il est amorcé.
+        """
+        def _apply() -> None:
+            client = get_redis_client()
+            if client is None:
+                return
+            keys = list(UsageCounters._keys(tenant_id, resource, UsageCounters.period(resource, at)))
+            try:
+                UsageCounters._script(client, "apply", _APPLY_SCRIPT)(keys=keys, args=[delta])
+            except Exception:  # noqa: BLE001
+                logger.warning("Compteur d'utilisation non mis à jour (%s, %s)", tenant_id, resource, exc_info=True)
+                UsageCounters.invalidate(tenant_id, resource)
+
+        transaction.on_commit(_apply)
+
+    @staticmethod
+    def invalidate(tenant_id, resource: str) -> None:
+        """
+        Supprime un compteur : il sera ré-amorcé depuis la base à la prochaine lecture.
+
+        Les réservations en cours sont conservées et ajoutées à l'amorçage.
+        """
+        client = get_redis_client()
+        if client is None:
+            return
+        try:
+            client.delete(UsageCounters._keys(tenant_id, resource, UsageCounters.period(resource))[0])
+        except Exception:  # noqa: BLE001
+            logger.warning("Invalidation impossible (%s, %s)", tenant_id, resource, exc_info=True)
+
+    @staticmethod
+    def reconcile(tenant_ids=None) -> dict[str, int]:
+        """
+        Réaligne les compteurs sur la base (réservations en cours conservées).
+
+        Returns:
+            dict: nombre de compteurs écrits par ressource
+        """
+        from apps.tenants.models import Tenant
+
+        client = get_redis_client()
+        if client is None:
+            return {}
+
+        if tenant_ids is None:
+            tenant_ids = [str(pk) for pk in Tenant.objects.values_list("pk", flat=True)]
+        script = UsageCounters._script(client, "set", _SET_SCRIPT)
+        timeout = UsageCounters._timeout()
+
+        written = {}
+        for resource in RESOURCES:
+            counts = UsageCounters.counts_from_db(resource, tenant_ids=tenant_ids)
+            period = UsageCounters.period(resource)
+            for tenant_id in tenant_ids:
+                keys = list(UsageCounters._keys(tenant_id, resource, period))
+                script(keys=keys, args=[counts.get(str(tenant_id), 0), timeout, 0])
+            written[resource] = len(tenant_ids)
+        return written
@@ -3,9 +3,13 @@
 from __future__ import annotations
 
 from rest_framework import viewsets
+from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
 
+from apps.core.pagination import KeysetPagination
 from apps.core.permissions import HasScope, IsTenantMember, Scopes
+from apps.tickets.archive import TicketArchive
 
 from .models import Customer
 from .serializers import CustomerCreateSerializer, CustomerSerializer
@@ -19,6 +23,7 @@ class CustomerViewSet(viewsets.ModelViewSet):
     filterset_fields = ("phone", "email", "is_active")
     search_fields = ("first_name", "last_name", "phone", "email")
     ordering_fields = ("created_at", "last_name", "first_name")
+    pagination_class = KeysetPagination
 
     def get_queryset(self):  # type: ignore[override]
         # Vérifier si c'est pour la génération du schéma
@@ -33,3 +38,20 @@ class CustomerViewSet(viewsets.ModelViewSet):
 
     def perform_create(self, serializer):  # type: ignore[override]
         serializer.save(tenant=self.request.tenant)
+
+    @action(detail=True, methods=["get"])
+    def tickets(self, request, pk=None, tenant_slug=None):  # type: ignore[override]
+        """Historique des tickets du client, tickets archivés compris (plus récents d'abord)."""
+        customer = self.get_object()
+        try:
+            limit = min(max(int(request.query_params.get("limit", 50)), 1), 200)
+        except ValueError:
+            limit = 50
+
+        history = TicketArchive.history(tenant=request.tenant, customer=customer).order_by("-created_at")[:limit]
+        return Response(
+            {
+                "count": TicketArchive.count(tenant=request.tenant, customer=customer),
+                "results": list(history),
+            }
+        )
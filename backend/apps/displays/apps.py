@@ -7,3 +7,8 @@ class DisplaysConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.displays"
     verbose_name = "Displays"
+
+    def ready(self) -> None:
+        from . import signals  # noqa: F401 - display state refresh on ticket events
+
+        return super().ready()
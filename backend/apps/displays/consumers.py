@@ -4,9 +4,13 @@ from __future__ import annotations
 import json
 from typing import Any
 
+from channels.db import database_sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
+from django.core.exceptions import ValidationError
 from django.utils import timezone
 
+from apps.core.realtime import RealtimeGroups
+
 
 class DisplayConsumer(AsyncWebsocketConsumer):
     """Consumer for display screen real-time updates."""
@@ -32,13 +36,18 @@ class DisplayConsumer(AsyncWebsocketConsumer):
 
             self.tenant_slug = self.scope["url_route"]["kwargs"]["tenant_slug"]
             self.display_id = str(self.scope["url_route"]["kwargs"]["display_id"])
-            self.room_group_name = f"display_{self.tenant_slug}_{self.display_id}"
+            self.room_group_name = RealtimeGroups.display(self.tenant_slug, self.display_id)
 
             logger.info(f"Display WebSocket connecting: tenant={self.tenant_slug}, display={self.display_id}")
 
-            # Join room group
-            await self.channel_layer.group_add(self.room_group_name, self.channel_name)
-            logger.info(f"Added to channel group: {self.room_group_name}")
+            # Join the display group and one shared group per displayed queue
+            queue_ids = await self._get_queue_ids()
+            self.group_names = [self.room_group_name] + [
+                RealtimeGroups.queue_displays(self.tenant_slug, queue_id) for queue_id in queue_ids
+            ]
+            for group_name in self.group_names:
+                await self.channel_layer.group_add(group_name, self.channel_name)
+            logger.info(f"Added to channel groups: {self.group_names}")
 
             # Accept the connection first
             await self.accept()
@@ -52,10 +61,40 @@ class DisplayConsumer(AsyncWebsocketConsumer):
             }))
             logger.info("Connection confirmation sent")
 
+            # Current state document; later versions are pushed by DisplayState.refresh
+            state = await self._get_state()
+            if state is not None:
+                await self.send(text_data=json.dumps({"type": "display_state", "state": state.document}))
+
         except Exception as e:
             logger.error(f"Error in DisplayConsumer.connect(): {e}", exc_info=True)
             raise
 
+    @database_sync_to_async
+    def _get_queue_ids(self) -> list[str]:
+        """Return the ids of the queues shown on this display."""
+        from apps.displays.models import Display
+
+        try:
+            return [
+                str(queue_id)
+                for queue_id in Display.objects.filter(
+                    pk=self.display_id,
+                    tenant__slug=self.tenant_slug,
+                    is_active=True,
+                    queues__isnull=False,
+                ).values_list("queues__id", flat=True)
+            ]
+        except (ValueError, ValidationError):
+            return []
+
+    @database_sync_to_async
+    def _get_state(self):
+        """Return the cached (or freshly built) state document of this display."""
+        from apps.displays.state import DisplayState
+
+        return DisplayState.get(self.display_id, self.tenant_slug)
+
     def _is_valid_origin(self, origin: str) -> bool:
         """Check if the origin is valid for CORS."""
         if not origin:
@@ -89,10 +128,11 @@ class DisplayConsumer(AsyncWebsocketConsumer):
         logger.info(f"DisplayConsumer.disconnect() called with code: {close_code}")
         logger.info(f"Disconnecting from group: {getattr(self, 'room_group_name', 'unknown')}")
         
-        # Leave room group
-        if hasattr(self, 'room_group_name'):
-            await self.channel_layer.group_discard(self.room_group_name, self.channel_name)
-            logger.info(f"Successfully left group: {self.room_group_name}")
+        # Leave room groups
+        if hasattr(self, 'group_names'):
+            for group_name in self.group_names:
+                await self.channel_layer.group_discard(group_name, self.channel_name)
+            logger.info(f"Successfully left groups: {self.group_names}")
         else:
             logger.warning("No room_group_name found during disconnect")
 
@@ -140,6 +180,13 @@ class DisplayConsumer(AsyncWebsocketConsumer):
             "timestamp": event.get("timestamp", timezone.now().isoformat()),
         }))
 
+    async def display_state(self, event: dict[str, Any]) -> None:
+        """Handle display.state event: push the new state document."""
+        await self.send(text_data=json.dumps({
+            "type": "display_state",
+            "state": event["state"],
+        }))
+
     async def display_refresh(self, event: dict[str, Any]) -> None:
         """Handle display.refresh event to force refresh."""
         await self.send(text_data=json.dumps({
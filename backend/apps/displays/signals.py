@@ -0,0 +1,50 @@
+"""Signals keeping display state documents up to date."""
+
+from __future__ import annotations
+
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from apps.tickets.models import Ticket
+
+from .models import Display
+from .state import DISPLAYED_TICKET_FIELDS, DisplayState
+
+# Display fields not shown on screen (heartbeat)
+_IGNORED_DISPLAY_FIELDS = {"last_ping", "updated_at"}
+
+
+@receiver(post_save, sender=Ticket, dispatch_uid="displays.state.ticket_saved")
+def refresh_on_ticket_saved(sender, instance: Ticket, update_fields=None, **kwargs) -> None:
+    """Schedule a refresh of the displays showing the ticket's queue."""
+    if update_fields is not None and not DISPLAYED_TICKET_FIELDS.intersection(update_fields):
+        return
+    DisplayState.queue_changed(instance.queue_id)
+
+
+@receiver(post_delete, sender=Ticket, dispatch_uid="displays.state.ticket_deleted")
+def refresh_on_ticket_deleted(sender, instance: Ticket, **kwargs) -> None:
+    DisplayState.queue_changed(instance.queue_id)
+
+
+@receiver(post_save, sender=Display, dispatch_uid="displays.state.display_saved")
+def refresh_on_display_saved(sender, instance: Display, update_fields=None, **kwargs) -> None:
+    """Rebuild the document after a configuration change (not on heartbeats)."""
+    if update_fields is not None and not set(update_fields) - _IGNORED_DISPLAY_FIELDS:
+        return
+    DisplayState.display_changed(instance.id)
+
+
+@receiver(m2m_changed, sender=Display.queues.through, dispatch_uid="displays.state.display_queues_changed")
+def refresh_on_display_queues_changed(sender, instance, action: str, reverse: bool, pk_set=None, **kwargs) -> None:
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    # queue.displays.add(...): instance is the queue (a reverse clear has no
+    # pk_set, those documents expire after DISPLAY_STATE_TIMEOUT)
+    for display_id in (pk_set or ()) if reverse else (instance.id,):
+        DisplayState.display_changed(display_id)
+
+
+@receiver(post_delete, sender=Display, dispatch_uid="displays.state.display_deleted")
+def drop_state_on_display_deleted(sender, instance: Display, **kwargs) -> None:
+    DisplayState.invalidate(instance.id)
@@ -0,0 +1,274 @@
+"""Server-maintained display state documents.
+
+Each display has one state document in the cache (Redis in production): the
+display configuration, the tickets recently called on its queues and the
+waiting count per queue. Screens no longer cause database reads:
+
+- ticket changes schedule a refresh of the displays showing the ticket's
+  queue (one Celery task per queue and ``DISPLAY_STATE_REFRESH_DELAY``);
+- a refresh rebuilds the document and, when its content changed, bumps its
+  version and pushes it to the display's WebSocket group;
+- polls are answered from the cache, with ``304 Not Modified`` when the
+  screen already has the current ``ETag``.
+
+Documents expire after ``DISPLAY_STATE_TIMEOUT`` seconds, or earlier when
+the oldest called ticket leaves the recent-calls window, so changes made
+without ``save()`` (``QuerySet.update()``) are picked up by the next poll.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import uuid
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+
+from apps.core.realtime import RealtimeBroadcaster, RealtimeGroups, keep_last
+from apps.tickets.models import Ticket
+
+from .models import Display
+
+logger = logging.getLogger(__name__)
+
+STATE_KEY = "display_state:{display_id}"
+REFRESH_KEY = "display_state:refresh:{queue_id}"
+
+RECENT_CALLED_WINDOW = timedelta(minutes=30)
+RECENT_CALLED_LIMIT = 10
+
+# Ticket fields shown on screens (other saves, e.g. ETA updates, are ignored)
+DISPLAYED_TICKET_FIELDS = {"status", "queue", "queue_id", "agent", "agent_id", "called_at", "number"}
+
+
+@dataclass(frozen=True)
+class DisplayStateEntry:
+    """Cached state document of a display."""
+
+    display_id: str
+    tenant_slug: str
+    etag: str
+    version: int
+    document: dict
+    queue_ids: tuple[str, ...] = ()
+
+    def matches(self, etags: list[str]) -> bool:
+        """Whether the client already holds this version (``If-None-Match``)."""
+        return "*" in etags or f'"{self.etag}"' in etags
+
+
+class DisplayState:
+    """Read, rebuild and publish display state documents."""
+
+    @staticmethod
+    def get(display_id, tenant_slug: str) -> DisplayStateEntry | None:
+        """State of an active display of the tenant, rebuilt if not cached."""
+        try:
+            # URLs may carry the hex form: one cache key per display
+            display_id = str(uuid.UUID(str(display_id)))
+        except ValueError:
+            return None
+        entry = DisplayState._cached(display_id)
+        if entry is None:
+            entry = DisplayState.refresh(display_id, publish=False)
+        if entry is None or entry.tenant_slug != tenant_slug:
+            return None
+        return entry
+
+    @staticmethod
+    def refresh(display_id, publish: bool = True) -> DisplayStateEntry | None:
+        """
+        Rebuild the document of a display from the database.
+
+        The version is bumped (and the document pushed when ``publish``) only
+        if the content changed.
+
+        Returns:
+            DisplayStateEntry, or None if the display is missing or inactive
+        """
+        try:
+            display = Display.objects.filter(pk=display_id, is_active=True).select_related("tenant").first()
+        except (ValueError, ValidationError):
+            return None
+        if display is None:
+            DisplayState.invalidate(display_id)
+            return None
+
+        content, expires_in = DisplayState.build(display)
+        etag = hashlib.sha1(  # noqa: S324 - content fingerprint, not security
+            json.dumps(content, sort_keys=True).encode()
+        ).hexdigest()
+
+        previous = DisplayState._cached(display_id)
+        if previous is not None and previous.etag == etag:
+            entry = previous
+        else:
+            version = previous.version + 1 if previous is not None else 1
+            entry = DisplayStateEntry(
+                display_id=str(display.id),
+                tenant_slug=display.tenant.slug,
+                etag=etag,
+                version=version,
+                document={**content, "version": version, "timestamp": timezone.now().isoformat()},
+                queue_ids=tuple(content["waiting_stats"]),
+            )
+        DisplayState._store(entry, expires_in)
+
+        if publish and entry is not previous:
+            RealtimeBroadcaster.publish(
+                RealtimeGroups.display(entry.tenant_slug, entry.display_id),
+                {"type": "display_state", "state": entry.document},
+                merge=keep_last,
+            )
+        return entry
+
+    @staticmethod
+    def build(display: Display) -> tuple[dict, int]:
+        """
+        Document content of a display (JSON-ready) and its lifetime in seconds.
+
+        Reads the primary database: a lagging replica would cache a stale
+        document until the next change.
+        """
+        from apps.queues.snapshot import TenantQueueSnapshot
+
+        now = timezone.now()
+        queue_ids = sorted(str(queue_id) for queue_id in display.queues.values_list("id", flat=True))
+
+        recent_called = list(
+            Ticket.objects.filter(
+                queue_id__in=queue_ids,
+                status__in=[Ticket.STATUS_CALLED, Ticket.STATUS_IN_SERVICE],
+                called_at__gte=now - RECENT_CALLED_WINDOW,
+            )
+            .select_related("queue", "agent", "agent__user")
+            .order_by("-called_at")[:RECENT_CALLED_LIMIT]
+        )
+
+        # No snapshot cache: the document must reflect the change that triggered it
+        waiting_stats = {queue_id: 0 for queue_id in queue_ids}
+        for entry in TenantQueueSnapshot.build(display.tenant, queue_ids=queue_ids):
+            waiting_stats[str(entry.queue.id)] = entry.waiting_count
+
+        content = {
+            "display": {
+                "id": str(display.id),
+                "name": display.name,
+                "type": display.display_type,
+                "layout": display.layout,
+                "theme": display.theme,
+                "auto_refresh_seconds": display.auto_refresh_seconds,
+                "show_video": display.show_video,
+                "video_url": display.video_url,
+                "background_image": display.background_image,
+                "custom_message": display.custom_message,
+                "secondary_message": display.secondary_message,
+                "message_position": display.message_position,
+                "ticket_colors": display.ticket_colors,
+            },
+            "tickets": [
+                {
+                    "id": str(ticket.id),
+                    "number": ticket.number,
+                    "queue_name": ticket.queue.name,
+                    "queue_id": str(ticket.queue_id),
+                    "status": ticket.status,
+                    "called_at": ticket.called_at,
+                    "counter": ticket.agent.counter_number if ticket.agent else None,
+                    "agent_name": (
+                        f"{ticket.agent.user.first_name} {ticket.agent.user.last_name}" if ticket.agent else None
+                    ),
+                }
+                for ticket in recent_called
+            ],
+            "waiting_stats": waiting_stats,
+        }
+
+        expires_in = getattr(settings, "DISPLAY_STATE_TIMEOUT", 300)
+        if recent_called:
+            # The oldest called ticket leaves the window without any ticket event
+            oldest = min(ticket.called_at for ticket in recent_called)
+            leaves_in = (oldest + RECENT_CALLED_WINDOW - now).total_seconds()
+            expires_in = max(1, min(expires_in, int(leaves_in) + 1))
+
+        return json.loads(json.dumps(content, cls=DjangoJSONEncoder)), expires_in
+
+    @staticmethod
+    def refresh_queue(queue_id) -> int:
+        """Refresh and push the documents of every active display showing a queue."""
+        # Changes committed from now on schedule a new refresh
+        cache.delete(REFRESH_KEY.format(queue_id=queue_id))
+        display_ids = list(
+            Display.objects.filter(queues=queue_id, is_active=True).values_list("id", flat=True).distinct()
+        )
+        for display_id in display_ids:
+            DisplayState.refresh(display_id)
+        return len(display_ids)
+
+    @staticmethod
+    def queue_changed(queue_id) -> None:
+        """
+        Schedule a refresh of the displays of a queue after the commit.
+
+        Bursts are coalesced: one task per queue and ``DISPLAY_STATE_REFRESH_DELAY``.
+        """
+        if queue_id is None:
+            return
+        delay = getattr(settings, "DISPLAY_STATE_REFRESH_DELAY", 1)
+
+        def enqueue() -> None:
+            if not cache.add(REFRESH_KEY.format(queue_id=queue_id), 1, timeout=max(int(delay) * 5, 5)):
+                return
+            from .tasks import refresh_display_states
+
+            try:
+                refresh_display_states.apply_async(args=[str(queue_id)], countdown=delay)
+            except Exception:  # noqa: BLE001 - refresh in-process rather than serve a stale document
+                logger.warning("Display refresh for queue %s not scheduled", queue_id, exc_info=True)
+                DisplayState.refresh_queue(queue_id)
+
+        transaction.on_commit(enqueue)
+
+    @staticmethod
+    def display_changed(display_id) -> None:
+        """Rebuild and push a display's document after its configuration changed."""
+        transaction.on_commit(lambda: DisplayState.refresh(display_id))
+
+    @staticmethod
+    def invalidate(display_id) -> None:
+        try:
+            cache.delete(STATE_KEY.format(display_id=display_id))
+        except Exception:  # noqa: BLE001 - the document expires anyway
+            logger.warning("Display state: could not invalidate %s", display_id, exc_info=True)
+
+    @staticmethod
+    def _cached(display_id) -> DisplayStateEntry | None:
+        try:
+            data = cache.get(STATE_KEY.format(display_id=display_id))
+        except Exception:  # noqa: BLE001 - rebuild from the database
+            logger.warning("Display state: cache read failed for %s", display_id, exc_info=True)
+            return None
+        return DisplayStateEntry(**data) if data else None
+
+    @staticmethod
+    def _store(entry: DisplayStateEntry, timeout: int) -> None:
+        data = {
+            "display_id": entry.display_id,
+            "tenant_slug": entry.tenant_slug,
+            "etag": entry.etag,
+            "version": entry.version,
+            "document": entry.document,
+            "queue_ids": list(entry.queue_ids),
+        }
+        try:
+            cache.set(STATE_KEY.format(display_id=entry.display_id), data, timeout=timeout)
+        except Exception:  # noqa: BLE001
+            logger.warning("Display state: cache write failed for %s", entry.display_id, exc_info=True)
@@ -0,0 +1,13 @@
+"""Celery tasks for display screens."""
+
+from __future__ import annotations
+
+from celery import shared_task
+
+
+@shared_task
+def refresh_display_states(queue_id: str) -> int:
+    """Rebuild and push the state documents of the displays showing a queue."""
+    from .state import DisplayState
+
+    return DisplayState.refresh_queue(queue_id)
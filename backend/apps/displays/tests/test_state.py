@@ -0,0 +1,101 @@
+"""Tests pour les documents d'état des écrans."""
+
+import pytest
+from django.core.cache import cache
+from django.utils import timezone
+from model_bakery import baker
+from rest_framework.test import APIClient
+
+from apps.displays.models import Display
+from apps.displays.state import DisplayState
+from apps.tickets.models import Ticket
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+
+
+@pytest.fixture
+def display(tenant, site, queue):
+    display = baker.make(Display, tenant=tenant, site=site, display_type=Display.TYPE_MAIN, is_active=True)
+    display.queues.add(queue)
+    return display
+
+
+def tickets_url(tenant, display):
+    return f"/api/v1/public/tenants/{tenant.slug}/displays/{display.id.hex}/tickets/"
+
+
+@pytest.mark.django_db
+class TestDisplayState:
+    """Tests pour DisplayState et la vue publique des écrans."""
+
+    def test_poll_returns_304_without_queries(self, tenant, queue, display, django_assert_num_queries):
+        """Test qu'un écran à jour reçoit 304 sans requête SQL."""
+        baker.make(Ticket, tenant=tenant, queue=queue, status=Ticket.STATUS_WAITING)
+        client = APIClient()
+
+        response = client.get(tickets_url(tenant, display))
+        assert response.status_code == 200
+        assert response.data["waiting_stats"] == {str(queue.id): 1}
+        etag = response["ETag"]
+
+        with django_assert_num_queries(0):
+            not_modified = client.get(tickets_url(tenant, display), HTTP_IF_NONE_MATCH=etag)
+        assert not_modified.status_code == 304 and not_modified["ETag"] == etag
+
+    def test_refresh_bumps_version_and_pushes_on_change(self, tenant, queue, display, agent_profile, mocker):
+        """Test qu'un appel de ticket change l'ETag, la version et pousse le document."""
+        publish = mocker.patch("apps.displays.state.RealtimeBroadcaster.publish")
+        first = DisplayState.get(display.id, tenant.slug)
+        ticket = baker.make(Ticket, tenant=tenant, queue=queue, status=Ticket.STATUS_WAITING)
+        Ticket.objects.filter(id=ticket.id).update(
+            status=Ticket.STATUS_CALLED, called_at=timezone.now(), agent=agent_profile
+        )
+
+        assert DisplayState.refresh_queue(queue.id) == 1
+        assert DisplayState.refresh_queue(queue.id) == 1
+
+        second = DisplayState.get(display.id, tenant.slug)
+        assert second.etag != first.etag and second.version == first.version + 1
+        assert [row["id"] for row in second.document["tickets"]] == [str(ticket.id)]
+        publish.assert_called_once()
+        assert publish.call_args.args[1] == {"type": "display_state", "state": second.document}
+
+    def test_ticket_events_schedule_one_refresh_per_queue(
+        self, tenant, queue, display, mocker, django_capture_on_commit_callbacks
+    ):
+        """Test que des changements de tickets en rafale ne planifient qu'un rafraîchissement."""
+        apply_async = mocker.patch("apps.displays.tasks.refresh_display_states.apply_async")
+
+        with django_capture_on_commit_callbacks(execute=True):
+            tickets = baker.make(Ticket, tenant=tenant, queue=queue, status=Ticket.STATUS_WAITING, _quantity=3)
+            tickets[0].eta_seconds = 60
+            tickets[0].save(update_fields=["eta_seconds"])
+
+        apply_async.assert_called_once()
+        assert apply_async.call_args.kwargs["args"] == [str(queue.id)]
+
+    def test_display_change_rebuilds_document(self, tenant, display, mocker, django_capture_on_commit_callbacks):
+        """Test qu'une modification de l'écran produit un nouvel ETag, pas un heartbeat."""
+        mocker.patch("apps.displays.state.RealtimeBroadcaster.publish")
+        first = DisplayState.get(display.id, tenant.slug)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            display.last_ping = timezone.now()
+            display.save(update_fields=["last_ping"])
+        assert DisplayState.get(display.id, tenant.slug).etag == first.etag
+
+        with django_capture_on_commit_callbacks(execute=True):
+            display.custom_message = "Bienvenue"
+            display.save()
+        state = DisplayState.get(display.id, tenant.slug)
+        assert state.etag != first.etag and state.document["display"]["custom_message"] == "Bienvenue"
+
+    def test_unknown_or_foreign_display_is_404(self, tenant, display):
+        """Test que le slug d'un autre tenant ou un identifiant invalide renvoie 404."""
+        client = APIClient()
+
+        assert client.get(f"/api/v1/public/tenants/autre/displays/{display.id}/tickets/").status_code == 404
+        assert client.get(f"/api/v1/public/tenants/{tenant.slug}/displays/abc/tickets/").status_code == 404
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.30 on 2026-10-17 04:33
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tickets", "0005_ticket_archive"),
+        ("feedback", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="feedback",
+            name="ticket",
+            field=models.OneToOneField(
+                blank=True,
+                db_constraint=False,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="feedback",
+                to="tickets.ticket",
+            ),
+        ),
+    ]
@@ -0,0 +1,34 @@
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_queue(apps, schema_editor):
+    """
+    Renseigne ``feedbacks.queue_id`` depuis le ticket pour les avis antérieurs.
+
+    La CSAT et le NPS par file filtrent sur ``Feedback.queue`` ; seuls les
+    nouveaux enregistrements le remplissaient. La file est lue dans
+    ``tickets``, puis dans ``tickets_archive`` pour les tickets déjà archivés.
+    """
+    Feedback = apps.get_model("feedback", "Feedback")
+    Ticket = apps.get_model("tickets", "Ticket")
+    ArchivedTicket = apps.get_model("tickets", "ArchivedTicket")
+    using = schema_editor.connection.alias
+
+    for model in (Ticket, ArchivedTicket):
+        queue_id = model.objects.using(using).filter(pk=OuterRef("ticket_id")).values("queue_id")[:1]
+        Feedback.objects.using(using).filter(queue_id__isnull=True, ticket_id__isnull=False).update(
+            queue_id=Subquery(queue_id)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tickets", "0005_ticket_archive"),
+        ("feedback", "0002_ticket_archive"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_queue, migrations.RunPython.noop),
+    ]
@@ -17,6 +17,8 @@ class Feedback(TenantAwareModel):
     ticket = models.OneToOneField(
         "tickets.Ticket",
         on_delete=models.CASCADE,
+        # Conservé après archivage du ticket (apps.tickets.archive)
+        db_constraint=False,
         null=True,
         blank=True,
         related_name="feedback",
@@ -96,6 +98,14 @@ class Feedback(TenantAwareModel):
     def __str__(self) -> str:  # pragma: no cover
         return f"Feedback {self.id}"
 
+    def save(self, *args, **kwargs):
+        # La file est copiée depuis le ticket : elle reste filtrable après archivage
+        if self.queue_id is None and self.ticket_id is not None:
+            from apps.tickets.models import Ticket
+
+            self.queue_id = Ticket.objects.filter(pk=self.ticket_id).values_list("queue_id", flat=True).first()
+        super().save(*args, **kwargs)
+
     @property
     def nps_category(self) -> str | None:
         """Catégorise le NPS: Détracteur/Passif/Promoteur."""
@@ -7,3 +7,8 @@ class NotificationsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.notifications"
     verbose_name = "Notifications"
+
+    def ready(self) -> None:
+        from . import signals  # noqa: F401 - invalidation du cache des templates
+
+        return super().ready()
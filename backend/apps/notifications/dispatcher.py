@@ -0,0 +1,614 @@
+"""Envoi des notifications par lots, par canal et par fournisseur.
+
+Les notifications sont créées en ``pending`` ; ``NotificationDispatcher``
+les draine par lots de ``NOTIFICATION_BATCH_SIZE`` :
+
+- réservation du lot (``pending`` → ``sending``) avec ``SKIP LOCKED``, pour
+  que plusieurs workers drainent le même canal sans envoyer deux fois ;
+- envoi par le fournisseur du canal, avec des clients réutilisés par
+  processus (session HTTP Twilio, session HTTP SendGrid, application
+  Firebase) et une seule connexion SMTP par lot ;
+- endpoints groupés quand le fournisseur en a : un appel SendGrid par
+  tranche de 1000 destinataires (``personalizations``), un appel FCM par
+  tranche de 500 jetons (``send_each``) ;
+- statuts enregistrés avec un seul ``bulk_update`` par lot.
+
+Le débit de chaque fournisseur est limité, tous workers confondus, par
+``NOTIFICATION_RATE_LIMITS`` (appels API par seconde) via le limiteur à
+fenêtre glissante de ``apps.security.rate_limit``. Les envois refusés par
+le fournisseur pour cause de quota ou d'indisponibilité sont remis en
+attente, jusqu'à ``NOTIFICATION_MAX_ATTEMPTS`` tentatives.
+
+``NOTIFICATION_PROVIDER_BASE_URL`` redirige Twilio et SendGrid vers un autre
+serveur, par exemple le faux fournisseur local
+(``manage.py fake_notification_provider``) pour les tests de débit.
+"""
+
+from __future__ import annotations
+
+import logging
+import smtplib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import timedelta
+from functools import lru_cache
+from typing import TYPE_CHECKING, Iterable
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from apps.security.rate_limit import RateLimit, SlidingWindowRateLimiter
+
+from .models import Notification, NotificationTemplate
+
+if TYPE_CHECKING:
+    from requests import Session
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SUBJECT = "Notification SmartQueue"
+
+# Limites des endpoints groupés
+SENDGRID_MAX_PERSONALIZATIONS = 1000
+SENDGRID_MAX_SUBSTITUTION_BYTES = 10_000
+# Erreurs 4xx qui ne dépendent pas des destinataires (clé, quota) : pas de découpage
+SENDGRID_REQUEST_WIDE_ERRORS = frozenset({401, 403, 429})
+FCM_MAX_MESSAGES = 500
+
+# Emplacement du corps dans le contenu SendGrid partagé par un lot
+_SENDGRID_BODY_TAG = "-sq-body-"
+
+_UPDATE_FIELDS = ["status", "sent_at", "provider_id", "error_message", "attempts", "updated_at"]
+
+
+@dataclass(frozen=True)
+class DeliveryResult:
+    """Résultat de l'envoi d'une notification par un fournisseur."""
+
+    ok: bool
+    provider_id: str = ""
+    error: str = ""
+    # Échec temporaire (quota, indisponibilité) : nouvel essai plus tard
+    retryable: bool = False
+    # Pas d'appel au fournisseur (débit épuisé avant l'échéance du drainage)
+    attempted: bool = True
+
+    @classmethod
+    def success(cls, provider_id: str = "") -> DeliveryResult:
+        return cls(ok=True, provider_id=provider_id or "")
+
+    @classmethod
+    def failure(cls, error: str, retryable: bool = False) -> DeliveryResult:
+        return cls(ok=False, error=error, retryable=retryable)
+
+    @classmethod
+    def deferred(cls) -> DeliveryResult:
+        return cls(ok=False, retryable=True, attempted=False)
+
+
+class Throttle:
+    """Débit d'un fournisseur, partagé entre workers, jusqu'à une échéance."""
+
+    def __init__(self, provider: str, rate: int | None, deadline: float) -> None:
+        self.key = f"notifications:{provider}"
+        self.rate = rate
+        self.deadline = deadline
+
+    def acquire(self) -> bool:
+        """Attend un créneau pour un appel API ; False si l'échéance est dépassée."""
+        if not self.rate:
+            return True
+        wait = 1.0 / self.rate
+        while True:
+            if SlidingWindowRateLimiter.hit([RateLimit(self.key, self.rate, 1)]).allowed:
+                return True
+            if time.monotonic() + wait > self.deadline:
+                return False
+            time.sleep(wait)
+
+
+class NotificationProvider:
+    """Fournisseur d'un canal : envoie un lot, un résultat par notification."""
+
+    name = ""
+    batch_size: int | None = None
+
+    def is_configured(self) -> bool:
+        return True
+
+    def send(self, notifications: list[Notification], throttle: Throttle) -> list[DeliveryResult]:
+        raise NotImplementedError
+
+
+class DevelopmentProvider(NotificationProvider):
+    """Sans identifiants fournisseur : notifications marquées envoyées (développement)."""
+
+    name = "development"
+
+    def send(self, notifications, throttle):
+        return [DeliveryResult.success() for _ in notifications]
+
+
+@lru_cache(maxsize=4)
+def _twilio_client(account_sid: str, auth_token: str, base_url: str):
+    """Client Twilio du processus : une session HTTP keep-alive partagée."""
+    from twilio.http.http_client import TwilioHttpClient
+    from twilio.rest import Client
+
+    client = Client(account_sid, auth_token, http_client=TwilioHttpClient(pool_connections=True))
+    if base_url:
+        client.api.base_url = base_url
+    return client
+
+
+@lru_cache(maxsize=1)
+def _http_session() -> Session:
+    """Session HTTP du processus (pool de connexions keep-alive)."""
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class TwilioSmsProvider(NotificationProvider):
+    """SMS via Twilio : un appel par message, en parallèle sur la session partagée."""
+
+    name = "twilio_sms"
+    error_label = "Erreur Twilio"
+
+    def is_configured(self) -> bool:
+        return bool(settings.TWILIO_ACCOUNT_SID and settings.TWILIO_AUTH_TOKEN)
+
+    def sender(self) -> str:
+        return settings.TWILIO_PHONE_NUMBER
+
+    def recipient(self, notification: Notification) -> str:
+        return notification.recipient
+
+    def send(self, notifications, throttle):
+        from twilio.base.exceptions import TwilioRestException
+
+        client = _twilio_client(
+            settings.TWILIO_ACCOUNT_SID,
+            settings.TWILIO_AUTH_TOKEN,
+            getattr(settings, "NOTIFICATION_PROVIDER_BASE_URL", ""),
+        )
+        sender = self.sender()
+
+        def deliver(notification: Notification) -> DeliveryResult:
+            if not throttle.acquire():
+                return DeliveryResult.deferred()
+            try:
+                message = client.messages.create(
+                    body=notification.body,
+                    from_=sender,
+                    to=self.recipient(notification),
+                )
+            except TwilioRestException as e:
+                return DeliveryResult.failure(
+                    f"{self.error_label}: {e.msg}", retryable=e.status == 429 or e.status >= 500
+                )
+            except Exception as e:  # noqa: BLE001 - réseau : nouvel essai
+                return DeliveryResult.failure(f"{self.error_label}: {e}", retryable=True)
+            return DeliveryResult.success(message.sid)
+
+        concurrency = getattr(settings, "NOTIFICATION_TWILIO_CONCURRENCY", 4)
+        if concurrency <= 1 or len(notifications) == 1:
+            return [deliver(notification) for notification in notifications]
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            return list(pool.map(deliver, notifications))
+
+
+class TwilioWhatsAppProvider(TwilioSmsProvider):
+    """WhatsApp via l'API Twilio (numéros préfixés ``whatsapp:``)."""
+
+    name = "twilio_whatsapp"
+    error_label = "Erreur Twilio WhatsApp"
+
+    def sender(self) -> str:
+        return f"whatsapp:{settings.TWILIO_WHATSAPP_NUMBER}"
+
+    def recipient(self, notification: Notification) -> str:
+        if notification.recipient.startswith("whatsapp:"):
+            return notification.recipient
+        return f"whatsapp:{notification.recipient}"
+
+
+class SendGridProvider(NotificationProvider):
+    """
+    Emails via l'API v3 SendGrid, un appel par tranche de destinataires.
+
+    Chaque destinataire est une ``personalization`` avec son sujet ; le corps
+    de chaque notification est injecté par substitution dans un contenu
+    partagé. Les corps trop longs pour une substitution partent seuls.
+
+    SendGrid refuse tout l'appel si une seule ``personalization`` est invalide
+    (HTTP 400, adresse malformée) : la tranche est alors coupée en deux et
+    renvoyée, jusqu'à isoler les destinataires fautifs.
+    """
+
+    name = "sendgrid"
+
+    def is_configured(self) -> bool:
+        return bool(settings.SENDGRID_API_KEY)
+
+    def url(self) -> str:
+        host = getattr(settings, "NOTIFICATION_PROVIDER_BASE_URL", "") or "https://api.sendgrid.com"
+        return f"{host.rstrip('/')}/v3/mail/send"
+
+    def send(self, notifications, throttle):
+        results: dict[int, DeliveryResult] = {}
+        grouped, alone = [], []
+        for index, notification in enumerate(notifications):
+            if len(notification.body.encode()) > SENDGRID_MAX_SUBSTITUTION_BYTES:
+                alone.append([(index, notification)])
+            else:
+                grouped.append((index, notification))
+
+        chunks = [
+            grouped[start : start + SENDGRID_MAX_PERSONALIZATIONS]
+            for start in range(0, len(grouped), SENDGRID_MAX_PERSONALIZATIONS)
+        ]
+        for chunk in chunks + alone:
+            self._deliver(chunk, throttle, results)
+        return [results[index] for index in range(len(notifications))]
+
+    def _deliver(self, chunk: list[tuple[int, Notification]], throttle, results: dict[int, DeliveryResult]) -> None:
+        """Envoie une tranche ; un refus du contenu de la requête la coupe en deux."""
+        status_code = None
+        if not throttle.acquire():
+            result = DeliveryResult.deferred()
+        else:
+            result, status_code = self._post([notification for _, notification in chunk])
+
+        if len(chunk) > 1 and status_code is not None and 400 <= status_code < 500:
+            if status_code not in SENDGRID_REQUEST_WIDE_ERRORS:
+                middle = len(chunk) // 2
+                self._deliver(chunk[:middle], throttle, results)
+                self._deliver(chunk[middle:], throttle, results)
+                return
+        for index, _ in chunk:
+            results[index] = result
+
+    def _post(self, notifications: list[Notification]) -> tuple[DeliveryResult, int | None]:
+        """Un appel SendGrid : résultat commun et statut HTTP (None sans réponse)."""
+        try:
+            response = _http_session().post(
+                self.url(),
+                json=self._payload(notifications),
+                headers={"Authorization": f"Bearer {settings.SENDGRID_API_KEY}"},
+                timeout=getattr(settings, "NOTIFICATION_HTTP_TIMEOUT", 10),
+            )
+        except Exception as e:  # noqa: BLE001 - réseau : nouvel essai
+            return DeliveryResult.failure(f"Erreur SendGrid: {e}", retryable=True), None
+
+        if response.status_code >= 400:
+            result = DeliveryResult.failure(
+                f"Erreur SendGrid: HTTP {response.status_code} {response.text[:500]}",
+                retryable=response.status_code == 429 or response.status_code >= 500,
+            )
+            return result, response.status_code
+        return DeliveryResult.success(response.headers.get("X-Message-Id", "")), response.status_code
+
+    @staticmethod
+    def _payload(notifications: list[Notification]) -> dict:
+        if len(notifications) == 1:
+            [notification] = notifications
+            return {
+                "personalizations": [
+                    {
+                        "to": [{"email": notification.recipient}],
+                        "subject": notification.subject or DEFAULT_SUBJECT,
+                        "custom_args": {"notification_id": str(notification.id)},
+                    }
+                ],
+                "from": {"email": settings.DEFAULT_FROM_EMAIL},
+                "content": [{"type": "text/html", "value": notification.body}],
+            }
+
+        return {
+            "personalizations": [
+                {
+                    "to": [{"email": notification.recipient}],
+                    "subject": notification.subject or DEFAULT_SUBJECT,
+                    "substitutions": {_SENDGRID_BODY_TAG: notification.body},
+                    "custom_args": {"notification_id": str(notification.id)},
+                }
+                for notification in notifications
+            ],
+            "from": {"email": settings.DEFAULT_FROM_EMAIL},
+            "content": [{"type": "text/html", "value": _SENDGRID_BODY_TAG}],
+        }
+
+
+class SmtpProvider(NotificationProvider):
+    """Emails via le backend email Django, une connexion SMTP par lot."""
+
+    name = "smtp"
+
+    def send(self, notifications, throttle):
+        from django.core.mail import EmailMultiAlternatives, get_connection
+
+        connection = get_connection(fail_silently=False)
+        results = []
+        try:
+            connection.open()
+            for notification in notifications:
+                if not throttle.acquire():
+                    results.append(DeliveryResult.deferred())
+                    continue
+                message = EmailMultiAlternatives(
+                    subject=notification.subject or DEFAULT_SUBJECT,
+                    body=notification.body,
+                    from_email=settings.DEFAULT_FROM_EMAIL,
+                    to=[notification.recipient],
+                    connection=connection,
+                )
+                message.attach_alternative(notification.body, "text/html")
+                try:
+                    message.send()
+                except (smtplib.SMTPRecipientsRefused, smtplib.SMTPDataError) as e:
+                    results.append(DeliveryResult.failure(f"Erreur SMTP: {e}"))
+                except Exception as e:  # noqa: BLE001 - connexion perdue : nouvel essai
+                    results.append(DeliveryResult.failure(f"Erreur SMTP: {e}", retryable=True))
+                else:
+                    results.append(DeliveryResult.success())
+        except Exception as e:  # noqa: BLE001 - serveur injoignable
+            error = DeliveryResult.failure(f"Erreur SMTP: {e}", retryable=True)
+            results.extend(error for _ in notifications[len(results) :])
+        finally:
+            connection.close()
+        return results
+
+
+_firebase_lock = threading.Lock()
+
+
+class FcmProvider(NotificationProvider):
+    """Push via Firebase Cloud Messaging, un appel ``send_each`` par tranche de 500."""
+
+    name = "fcm"
+
+    def is_configured(self) -> bool:
+        return bool(settings.FIREBASE_CREDENTIALS_PATH or settings.FCM_SERVER_KEY)
+
+    @staticmethod
+    def _initialize() -> None:
+        import firebase_admin
+        from firebase_admin import credentials
+
+        with _firebase_lock:
+            if firebase_admin._apps:
+                return
+            if settings.FIREBASE_CREDENTIALS_PATH:
+                firebase_admin.initialize_app(credentials.Certificate(settings.FIREBASE_CREDENTIALS_PATH))
+            else:
+                # Utiliser les credentials par défaut
+                firebase_admin.initialize_app()
+
+    def send(self, notifications, throttle):
+        from firebase_admin import exceptions, messaging
+
+        self._initialize()
+        results: list[DeliveryResult] = []
+        for start in range(0, len(notifications), FCM_MAX_MESSAGES):
+            chunk = notifications[start : start + FCM_MAX_MESSAGES]
+            if not throttle.acquire():
+                results.extend(DeliveryResult.deferred() for _ in chunk)
+                continue
+            messages = [
+                messaging.Message(
+                    notification=messaging.Notification(
+                        title=notification.subject or "SmartQueue",
+                        body=notification.body,
+                    ),
+                    token=notification.recipient,  # FCM device token
+                )
+                for notification in chunk
+            ]
+            try:
+                batch = messaging.send_each(messages)
+            except Exception as e:  # noqa: BLE001 - appel entier en échec : nouvel essai
+                results.extend(DeliveryResult.failure(f"Erreur FCM: {e}", retryable=True) for _ in chunk)
+                continue
+            for response in batch.responses:
+                if response.success:
+                    results.append(DeliveryResult.success(response.message_id))
+                else:
+                    retryable = isinstance(
+                        response.exception,
+                        (messaging.QuotaExceededError, exceptions.UnavailableError, exceptions.InternalError),
+                    )
+                    results.append(DeliveryResult.failure(f"Erreur FCM: {response.exception}", retryable))
+        return results
+
+
+_PROVIDERS: dict[str, type[NotificationProvider]] = {
+    NotificationTemplate.CHANNEL_SMS: TwilioSmsProvider,
+    NotificationTemplate.CHANNEL_WHATSAPP: TwilioWhatsAppProvider,
+    NotificationTemplate.CHANNEL_EMAIL: SendGridProvider,
+    NotificationTemplate.CHANNEL_PUSH: FcmProvider,
+}
+
+
+def provider_for(channel: str) -> NotificationProvider | None:
+    """Fournisseur d'un canal selon la configuration ; None si canal inconnu."""
+    provider_class = _PROVIDERS.get(channel)
+    if provider_class is None:
+        return None
+    provider = provider_class()
+    if provider.is_configured():
+        return provider
+    # Sans identifiants : SMTP pour les emails, simulation pour le reste
+    return SmtpProvider() if channel == NotificationTemplate.CHANNEL_EMAIL else DevelopmentProvider()
+
+
+class NotificationDispatcher:
+    """Drainage des notifications en attente."""
+
+    @staticmethod
+    def channels() -> list[str]:
+        return [channel for channel, _label in NotificationTemplate.CHANNEL_CHOICES]
+
+    @staticmethod
+    def schedule(channel: str) -> None:
+        """
+        Déclenche un drainage du canal après le commit.
+
+        Les créations rapprochées sont regroupées : une seule tâche par canal
+        et par ``NOTIFICATION_DISPATCH_DELAY`` secondes.
+        """
+        delay = getattr(settings, "NOTIFICATION_DISPATCH_DELAY", 1)
+        if not cache.add(f"notifications:dispatch:{channel}", 1, timeout=max(int(delay), 1)):
+            return
+
+        def enqueue() -> None:
+            from .tasks import dispatch_notifications
+
+            try:
+                dispatch_notifications.apply_async(args=[channel], countdown=delay)
+            except Exception:  # noqa: BLE001 - repris par le drainage périodique
+                logger.warning("Drainage des notifications %s non planifié", channel, exc_info=True)
+
+        transaction.on_commit(enqueue)
+
+    @staticmethod
+    def claim(channel: str, limit: int) -> list[Notification]:
+        """Réserve jusqu'à ``limit`` notifications en attente (``pending`` → ``sending``)."""
+        with transaction.atomic():
+            ids = list(
+                Notification.objects.select_for_update(skip_locked=True)
+                .filter(channel=channel, status=Notification.STATUS_PENDING)
+                .order_by("created_at")
+                .values_list("id", flat=True)[:limit]
+            )
+            if not ids:
+                return []
+            Notification.objects.filter(id__in=ids, status=Notification.STATUS_PENDING).update(
+                status=Notification.STATUS_SENDING, updated_at=timezone.now()
+            )
+        return list(Notification.objects.filter(id__in=ids, status=Notification.STATUS_SENDING).order_by("created_at"))
+
+    @staticmethod
+    def deliver(
+        notifications: list[Notification],
+        provider: NotificationProvider,
+        throttle: Throttle,
+    ) -> list[DeliveryResult]:
+        """Envoie un lot réservé et enregistre les statuts (un ``bulk_update``)."""
+        try:
+            results = provider.send(notifications, throttle)
+        except Exception as e:  # noqa: BLE001 - le lot ne doit pas rester en "sending"
+            logger.exception("Envoi %s en échec pour %d notifications", provider.name, len(notifications))
+            results = [DeliveryResult.failure(str(e), retryable=True) for _ in notifications]
+
+        NotificationDispatcher.record(zip(notifications, results))
+        return results
+
+    @staticmethod
+    def record(deliveries: Iterable[tuple[Notification, DeliveryResult]]) -> None:
+        max_attempts = getattr(settings, "NOTIFICATION_MAX_ATTEMPTS", 5)
+        now = timezone.now()
+        notifications = []
+        for notification, result in deliveries:
+            notification.updated_at = now
+            if result.ok:
+                notification.status = Notification.STATUS_SENT
+                notification.sent_at = now
+                notification.provider_id = result.provider_id
+                notification.error_message = ""
+            elif not result.attempted:
+                notification.status = Notification.STATUS_PENDING
+            else:
+                notification.attempts += 1
+                notification.error_message = result.error
+                if result.retryable and notification.attempts < max_attempts:
+                    notification.status = Notification.STATUS_PENDING
+                else:
+                    notification.status = Notification.STATUS_FAILED
+            notifications.append(notification)
+        Notification.objects.bulk_update(notifications, _UPDATE_FIELDS)
+
+    @staticmethod
+    def dispatch(channel: str, max_seconds: float | None = None) -> dict[str, int]:
+        """
+        Draine les notifications en attente d'un canal, lot par lot.
+
+        S'arrête quand la file est vide, quand ``max_seconds`` est écoulé ou
+        quand le débit du fournisseur est épuisé ; le reste est repris au
+        drainage suivant.
+
+        Returns:
+            dict: nombre de notifications envoyées, en échec et remises en attente
+        """
+        stats = {"sent": 0, "failed": 0, "deferred": 0}
+        provider = provider_for(channel)
+        if provider is None:
+            return stats
+
+        if max_seconds is None:
+            max_seconds = getattr(settings, "NOTIFICATION_DISPATCH_SECONDS", 50)
+        deadline = time.monotonic() + max_seconds
+        rate = getattr(settings, "NOTIFICATION_RATE_LIMITS", {}).get(provider.name)
+        throttle = Throttle(provider.name, rate, deadline)
+        batch_size = provider.batch_size or getattr(settings, "NOTIFICATION_BATCH_SIZE", 100)
+
+        while time.monotonic() < deadline:
+            notifications = NotificationDispatcher.claim(channel, batch_size)
+            if not notifications:
+                break
+            results = NotificationDispatcher.deliver(notifications, provider, throttle)
+            for result in results:
+                if result.ok:
+                    stats["sent"] += 1
+                elif result.retryable:
+                    stats["deferred"] += 1
+                else:
+                    stats["failed"] += 1
+            # Débit épuisé ou fournisseur indisponible : les notifications remises
+            # en attente seraient réservées à nouveau aussitôt, on reprend plus tard
+            if any(result.retryable for result in results):
+                break
+
+        if any(stats.values()):
+            logger.info("Notifications %s via %s: %s", channel, provider.name, stats)
+        return stats
+
+    @staticmethod
+    def send_now(notification_id: str) -> bool:
+        """Envoie immédiatement une notification en attente (hors lot)."""
+        claimed = Notification.objects.filter(
+            id=notification_id, status=Notification.STATUS_PENDING
+        ).update(status=Notification.STATUS_SENDING, updated_at=timezone.now())
+        if not claimed:
+            return False
+
+        notification = Notification.objects.get(id=notification_id)
+        provider = provider_for(notification.channel)
+        if provider is None:
+            notification.status = Notification.STATUS_FAILED
+            notification.error_message = f"Canal non supporté: {notification.channel}"
+            notification.save(update_fields=["status", "error_message", "updated_at"])
+            return False
+
+        rate = getattr(settings, "NOTIFICATION_RATE_LIMITS", {}).get(provider.name)
+        throttle = Throttle(provider.name, rate, time.monotonic() + getattr(settings, "NOTIFICATION_HTTP_TIMEOUT", 10))
+        [result] = NotificationDispatcher.deliver([notification], provider, throttle)
+        return result.ok
+
+    @staticmethod
+    def requeue_stale() -> int:
+        """Remet en attente les lots réservés par un worker arrêté en cours d'envoi."""
+        timeout = getattr(settings, "NOTIFICATION_SENDING_TIMEOUT", 600)
+        cutoff = timezone.now() - timedelta(seconds=timeout)
+        return Notification.objects.filter(
+            status=Notification.STATUS_SENDING, updated_at__lt=cutoff
+        ).update(status=Notification.STATUS_PENDING, updated_at=timezone.now())
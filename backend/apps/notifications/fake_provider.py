@@ -0,0 +1,133 @@
+"""Faux fournisseur SMS/email local pour les tests de débit du dispatcher.
+
+Imite les endpoints utilisés par ``apps.notifications.dispatcher`` :
+
+- ``POST /2010-04-01/Accounts/<sid>/Messages.json`` (Twilio SMS/WhatsApp) ;
+- ``POST /v3/mail/send`` (SendGrid, une ``personalization`` par destinataire ;
+  tout l'appel est refusé en HTTP 400 si une adresse est invalide, comme l'API réelle).
+
+Latence, taux d'erreur et quota (réponses 429) sont paramétrables pour
+reproduire le comportement d'un vrai fournisseur sous charge. À utiliser avec
+``NOTIFICATION_PROVIDER_BASE_URL=http://<hôte>:<port>``.
+"""
+
+from __future__ import annotations
+
+import json
+import random
+import threading
+import time
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+
+class FakeProviderServer(ThreadingHTTPServer):
+    """Serveur HTTP multi-thread ; compte les appels et les messages reçus."""
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: tuple[str, int] = ("127.0.0.1", 0),
+        latency: float = 0.0,
+        failure_rate: float = 0.0,
+        rate_limit: int | None = None,
+    ) -> None:
+        super().__init__(address, _Handler)
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.rate_limit = rate_limit
+        self.lock = threading.Lock()
+        self.requests: Counter[str] = Counter()
+        self.messages: Counter[str] = Counter()
+        self.throttled = 0
+        self.recipients: list[str] = []
+        self._second = 0
+        self._calls_this_second = 0
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> threading.Thread:
+        """Sert en arrière-plan (tests) ; arrêt par ``shutdown()``."""
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+    def admit(self) -> bool:
+        """Quota par seconde du faux fournisseur."""
+        if not self.rate_limit:
+            return True
+        with self.lock:
+            second = int(time.time())
+            if second != self._second:
+                self._second, self._calls_this_second = second, 0
+            if self._calls_this_second >= self.rate_limit:
+                self.throttled += 1
+                return False
+            self._calls_this_second += 1
+            return True
+
+    def record(self, route: str, recipients: list[str]) -> None:
+        with self.lock:
+            self.requests[route] += 1
+            self.messages[route] += len(recipients)
+            self.recipients.extend(recipients)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: FakeProviderServer
+    protocol_version = "HTTP/1.1"
+    # En-têtes et corps écrits séparément : sans TCP_NODELAY, chaque réponse
+    # attendrait l'ACK retardé du client (~40 ms)
+    disable_nagle_algorithm = True
+
+    def do_POST(self) -> None:  # noqa: N802 - API BaseHTTPRequestHandler
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+        if not self.server.admit():
+            return self._reply(429, {"code": 20429, "message": "Too Many Requests", "status": 429})
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        if self.server.failure_rate and random.random() < self.server.failure_rate:
+            return self._reply(503, {"code": 20503, "message": "Service Unavailable", "status": 503})
+
+        if self.path.startswith("/2010-04-01/Accounts/") and self.path.endswith("/Messages.json"):
+            form = parse_qs(body.decode())
+            recipient = form.get("To", [""])[0]
+            self.server.record("twilio", [recipient])
+            sid = f"SM{uuid.uuid4().hex}"
+            return self._reply(201, {"sid": sid, "to": recipient, "status": "queued"})
+
+        if self.path == "/v3/mail/send":
+            payload = json.loads(body or b"{}")
+            recipients = [
+                to["email"]
+                for personalization in payload.get("personalizations", [])
+                for to in personalization.get("to", [])
+            ]
+            invalid = [email for email in recipients if "@" not in email]
+            if invalid:
+                self.server.record("sendgrid", [])
+                return self._reply(400, {"errors": [{"message": "Invalid email", "field": invalid[0]}]})
+            self.server.record("sendgrid", recipients)
+            return self._reply(202, None, {"X-Message-Id": uuid.uuid4().hex})
+
+        self._reply(404, {"message": f"Route inconnue: {self.path}"})
+
+    def _reply(self, status: int, payload: dict | None, headers: dict | None = None) -> None:
+        content = json.dumps(payload).encode() if payload is not None else b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args) -> None:  # noqa: A002 - signature héritée
+        pass
@@ -0,0 +1,135 @@
+"""Management command comparant l'envoi message par message au dispatcher par lots.
+
+Les deux chemins envoient vers le faux fournisseur local
+(``apps.notifications.fake_provider``), démarré par la commande si
+``NOTIFICATION_PROVIDER_BASE_URL`` n'est pas défini.
+"""
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from apps.notifications.dispatcher import NotificationDispatcher
+from apps.notifications.fake_provider import FakeProviderServer
+from apps.notifications.models import Notification, NotificationTemplate
+from apps.tenants.models import Tenant
+
+FAKE_CREDENTIALS = {
+    "TWILIO_ACCOUNT_SID": "ACbenchmark",
+    "TWILIO_AUTH_TOKEN": "benchmark",
+    "TWILIO_PHONE_NUMBER": "+15005550006",
+    "SENDGRID_API_KEY": "SG.benchmark",
+}
+
+
+def legacy_send(notification: Notification) -> None:
+    """Implémentation d'origine : un client fournisseur et deux sauvegardes par message."""
+    base_url = settings.NOTIFICATION_PROVIDER_BASE_URL
+    try:
+        if notification.channel == NotificationTemplate.CHANNEL_SMS:
+            from twilio.rest import Client
+
+            client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN)
+            client.api.base_url = base_url
+            message = client.messages.create(
+                body=notification.body, from_=settings.TWILIO_PHONE_NUMBER, to=notification.recipient
+            )
+            notification.provider_id = message.sid
+        else:
+            from sendgrid import SendGridAPIClient
+            from sendgrid.helpers.mail import Mail
+
+            message = Mail(
+                from_email=settings.DEFAULT_FROM_EMAIL,
+                to_emails=notification.recipient,
+                subject=notification.subject,
+                html_content=notification.body,
+            )
+            response = SendGridAPIClient(settings.SENDGRID_API_KEY, host=base_url).send(message)
+            notification.provider_id = response.headers.get("X-Message-Id", "")
+        notification.status = Notification.STATUS_SENT
+        notification.sent_at = timezone.now()
+        notification.save()
+    except Exception as e:  # noqa: BLE001 - comme l'implémentation d'origine
+        notification.status = Notification.STATUS_FAILED
+        notification.error_message = str(e)
+        notification.save()
+
+
+class Command(BaseCommand):
+    help = "Benchmark du débit d'envoi des notifications (message par message vs par lots)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=500, help="Notifications par chemin")
+        parser.add_argument("--channel", choices=["sms", "email"], default="sms")
+        parser.add_argument("--latency-ms", type=float, default=20.0, help="Latence du faux fournisseur")
+        parser.add_argument("--tenant", help="Slug du tenant (défaut : premier tenant)")
+        parser.add_argument("--skip-legacy", action="store_true", help="Ne mesurer que le dispatcher")
+
+    def handle(self, *args, **options):
+        tenant = (
+            Tenant.objects.filter(slug=options["tenant"]).first()
+            if options["tenant"]
+            else Tenant.objects.order_by("created_at").first()
+        )
+        if tenant is None:
+            raise CommandError("Aucun tenant : créez-en un ou passez --tenant")
+
+        server = None
+        overrides = dict(FAKE_CREDENTIALS)
+        if not getattr(settings, "NOTIFICATION_PROVIDER_BASE_URL", ""):
+            server = FakeProviderServer(latency=options["latency_ms"] / 1000)
+            server.start()
+            overrides["NOTIFICATION_PROVIDER_BASE_URL"] = server.base_url
+        # Le débit mesuré est celui du code, pas celui des quotas configurés
+        overrides["NOTIFICATION_RATE_LIMITS"] = {}
+
+        channel = options["channel"]
+        count = options["count"]
+        self.stdout.write(f"{'chemin':<24} {'messages':>9} {'durée (s)':>10} {'msg/s':>9} {'appels':>8}")
+        try:
+            with override_settings(**overrides):
+                if not options["skip_legacy"]:
+                    notifications = self._create(tenant, channel, count)
+                    calls = self._calls(server)
+                    start = time.perf_counter()
+                    for notification in notifications:
+                        legacy_send(notification)
+                    self._report("message par message", count, time.perf_counter() - start, server, calls)
+
+                self._create(tenant, channel, count)
+                calls = self._calls(server)
+                start = time.perf_counter()
+                stats = NotificationDispatcher.dispatch(channel, max_seconds=3600)
+                self._report("dispatcher par lots", stats["sent"], time.perf_counter() - start, server, calls)
+        finally:
+            Notification.objects.filter(tenant=tenant, metadata__benchmark=True).delete()
+            if server is not None:
+                server.shutdown()
+                server.server_close()
+
+    @staticmethod
+    def _create(tenant: Tenant, channel: str, count: int) -> list[Notification]:
+        recipient = "+221770000{:03d}" if channel == "sms" else "bench{}@example.com"
+        return Notification.objects.bulk_create(
+            Notification(
+                tenant=tenant,
+                channel=channel,
+                recipient=recipient.format(index % 1000),
+                subject="Benchmark",
+                body=f"Votre ticket B{index:03d} sera appelé dans quelques minutes.",
+                metadata={"benchmark": True},
+            )
+            for index in range(count)
+        )
+
+    @staticmethod
+    def _calls(server: FakeProviderServer | None) -> int:
+        return sum(server.requests.values()) if server is not None else 0
+
+    def _report(self, name: str, sent: int, elapsed: float, server, calls_before: int) -> None:
+        calls = f"{self._calls(server) - calls_before:>8}" if server is not None else f"{'?':>8}"
+        self.stdout.write(f"{name:<24} {sent:>9} {elapsed:>10.2f} {sent / elapsed:>9.0f} {calls}")
@@ -0,0 +1,41 @@
+"""Commande lançant le faux fournisseur SMS/email pour les tests de débit."""
+
+from django.core.management.base import BaseCommand
+
+from apps.notifications.fake_provider import FakeProviderServer
+
+
+class Command(BaseCommand):
+    help = (
+        "Lance un faux fournisseur Twilio/SendGrid local "
+        "(à utiliser avec NOTIFICATION_PROVIDER_BASE_URL)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8025)
+        parser.add_argument("--latency-ms", type=float, default=50.0, help="Latence simulée par appel")
+        parser.add_argument("--failure-rate", type=float, default=0.0, help="Part des appels en erreur 503")
+        parser.add_argument("--rate-limit", type=int, default=None, help="Appels par seconde avant réponse 429")
+
+    def handle(self, *args, **options):
+        server = FakeProviderServer(
+            (options["host"], options["port"]),
+            latency=options["latency_ms"] / 1000,
+            failure_rate=options["failure_rate"],
+            rate_limit=options["rate_limit"],
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f"Faux fournisseur sur {server.base_url} (Ctrl+C pour arrêter)")
+        )
+        self.stdout.write(f"NOTIFICATION_PROVIDER_BASE_URL={server.base_url}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.stdout.write(
+                f"Appels: {dict(server.requests)} — messages: {dict(server.messages)} "
+                f"— refusés (429): {server.throttled}"
+            )
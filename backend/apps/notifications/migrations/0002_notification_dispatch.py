@@ -0,0 +1,42 @@
+# Generated by Django 4.2.30 on 2026-10-17 04:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notifications", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="notification",
+            name="attempts",
+            field=models.PositiveSmallIntegerField(
+                default=0, help_text="Tentatives d'envoi échouées"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="notification",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("pending", "En attente"),
+                    ("sending", "En cours d'envoi"),
+                    ("sent", "Envoyé"),
+                    ("failed", "Échec"),
+                    ("delivered", "Délivré"),
+                ],
+                default="pending",
+                max_length=20,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(
+                fields=["channel", "status", "created_at"],
+                name="notificatio_channel_76db99_idx",
+            ),
+        ),
+    ]
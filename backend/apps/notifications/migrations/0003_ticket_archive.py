@@ -0,0 +1,27 @@
+# Generated by Django 4.2.30 on 2026-10-17 04:33
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tickets", "0005_ticket_archive"),
+        ("notifications", "0002_notification_dispatch"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="notification",
+            name="ticket",
+            field=models.ForeignKey(
+                blank=True,
+                db_constraint=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="notifications",
+                to="tickets.ticket",
+            ),
+        ),
+    ]
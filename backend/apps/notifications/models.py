@@ -57,12 +57,14 @@ class Notification(TenantAwareModel):
     """Notification envoyée à un client."""
 
     STATUS_PENDING = "pending"
+    STATUS_SENDING = "sending"
     STATUS_SENT = "sent"
     STATUS_FAILED = "failed"
     STATUS_DELIVERED = "delivered"
 
     STATUS_CHOICES = [
         (STATUS_PENDING, "En attente"),
+        (STATUS_SENDING, "En cours d'envoi"),
         (STATUS_SENT, "Envoyé"),
         (STATUS_FAILED, "Échec"),
         (STATUS_DELIVERED, "Délivré"),
@@ -84,11 +86,14 @@ class Notification(TenantAwareModel):
     sent_at = models.DateTimeField(null=True, blank=True)
     delivered_at = models.DateTimeField(null=True, blank=True)
     error_message = models.TextField(blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0, help_text="Tentatives d'envoi échouées")
 
     # Relations optionnelles
     ticket = models.ForeignKey(
         "tickets.Ticket",
         on_delete=models.SET_NULL,
+        # Conservé après archivage du ticket (apps.tickets.archive)
+        db_constraint=False,
         null=True,
         blank=True,
         related_name="notifications",
@@ -118,6 +123,8 @@ class Notification(TenantAwareModel):
         indexes = [
             models.Index(fields=["status", "created_at"]),
             models.Index(fields=["tenant", "channel"]),
+            # Drainage des notifications en attente par canal (dispatcher)
+            models.Index(fields=["channel", "status", "created_at"]),
         ]
 
     def __str__(self) -> str:  # pragma: no cover
@@ -0,0 +1,28 @@
+"""Signaux de l'application notifications."""
+
+from __future__ import annotations
+
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .models import NotificationTemplate
+from .template_cache import NotificationTemplateCache
+
+
+@receiver(pre_save, sender=NotificationTemplate, dispatch_uid="notifications.cache.template_pre_save")
+def remember_previous_event(sender, instance: NotificationTemplate, **kwargs) -> None:
+    """Mémorise l'ancien (tenant, événement) : l'index correspondant doit aussi être invalidé."""
+    if instance._state.adding:
+        return
+    instance._previous_index = (
+        NotificationTemplate.objects.filter(pk=instance.pk).values_list("tenant_id", "event").first()
+    )
+
+
+@receiver(post_save, sender=NotificationTemplate, dispatch_uid="notifications.cache.template_saved")
+@receiver(post_delete, sender=NotificationTemplate, dispatch_uid="notifications.cache.template_deleted")
+def invalidate_template_index(sender, instance: NotificationTemplate, **kwargs) -> None:
+    NotificationTemplateCache.invalidate(instance.tenant_id, instance.event)
+    previous = getattr(instance, "_previous_index", None)
+    if previous and previous != (instance.tenant_id, instance.event):
+        NotificationTemplateCache.invalidate(*previous)
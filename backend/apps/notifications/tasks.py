@@ -2,226 +2,75 @@
 
 from __future__ import annotations
 
+import logging
 from typing import TYPE_CHECKING
 
 from celery import shared_task
-from django.template import Context, Template
 from django.utils import timezone
 
 if TYPE_CHECKING:
     from .models import Notification
+    from .template_cache import CompiledTemplate
+
+logger = logging.getLogger(__name__)
 
 
 @shared_task
 def send_notification(notification_id: str) -> bool:
-    """Envoie une notification selon le canal configuré."""
-    from .models import Notification
+    """Envoie immédiatement une notification en attente, hors drainage par lots."""
+    from .dispatcher import NotificationDispatcher
 
-    try:
-        notification = Notification.objects.select_related("template", "tenant").get(
-            id=notification_id
-        )
-    except Notification.DoesNotExist:
-        return False
+    return NotificationDispatcher.send_now(notification_id)
 
-    try:
-        if notification.channel == "sms":
-            return _send_sms(notification)
-        elif notification.channel == "email":
-            return _send_email(notification)
-        elif notification.channel == "whatsapp":
-            return _send_whatsapp(notification)
-        elif notification.channel == "push":
-            return _send_push(notification)
-        else:
-            notification.status = "failed"
-            notification.error_message = f"Canal non supporté: {notification.channel}"
-            notification.save()
-            return False
-    except Exception as e:
-        notification.status = "failed"
-        notification.error_message = str(e)
-        notification.save()
-        return False
 
+@shared_task
+def dispatch_notifications(channel: str | None = None) -> dict[str, dict[str, int]]:
+    """Draine les notifications en attente par lots, pour un canal ou tous."""
+    from .dispatcher import NotificationDispatcher
 
-def _send_sms(notification: Notification) -> bool:
-    """Envoie un SMS via Twilio."""
-    from django.conf import settings
+    requeued = NotificationDispatcher.requeue_stale()
+    if requeued:
+        logger.warning("%d notifications bloquées en cours d'envoi remises en attente", requeued)
 
-    # Vérifier que les credentials Twilio sont configurés
-    if not settings.TWILIO_ACCOUNT_SID or not settings.TWILIO_AUTH_TOKEN:
-        # Fallback en mode développement sans credentials
-        notification.status = "sent"
-        notification.sent_at = timezone.now()
-        notification.save()
-        return True
+    channels = [channel] if channel else NotificationDispatcher.channels()
+    return {name: NotificationDispatcher.dispatch(name) for name in channels}
 
-    try:
-        from twilio.rest import Client
 
-        client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN)
-        message = client.messages.create(
-            body=notification.body,
-            from_=settings.TWILIO_PHONE_NUMBER,
-            to=notification.recipient
-        )
+def queue_notifications(
+    template: CompiledTemplate,
+    messages: list[tuple[str, dict]],
+    tenant_id: str,
+) -> list[Notification]:
+    """Rend un template pour un lot de (destinataire, contexte) et crée les notifications en attente."""
+    from .dispatcher import NotificationDispatcher
+    from .models import Notification
 
-        notification.status = "sent"
-        notification.sent_at = timezone.now()
-        notification.provider_id = message.sid
-        notification.save()
-        return True
-    except Exception as e:
-        notification.status = "failed"
-        notification.error_message = f"Erreur Twilio: {str(e)}"
-        notification.save()
-        raise
-
-
-def _send_email(notification: Notification) -> bool:
-    """Envoie un email via SendGrid ou SMTP Django."""
-    from django.conf import settings
-
-    # Vérifier que SendGrid est configuré
-    if not settings.SENDGRID_API_KEY:
-        # Fallback: utiliser le backend email Django (SMTP)
-        from django.core.mail import send_mail
-
-        try:
-            send_mail(
-                subject=notification.subject or "Notification SmartQueue",
-                message=notification.body,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[notification.recipient],
-                html_message=notification.body,
-                fail_silently=False,
-            )
-            notification.status = "sent"
-            notification.sent_at = timezone.now()
-            notification.save()
-            return True
-        except Exception as e:
-            notification.status = "failed"
-            notification.error_message = f"Erreur SMTP: {str(e)}"
-            notification.save()
-            raise
-
-    # Utiliser SendGrid
-    try:
-        from sendgrid import SendGridAPIClient
-        from sendgrid.helpers.mail import Mail
-
-        message = Mail(
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            to_emails=notification.recipient,
-            subject=notification.subject or "Notification SmartQueue",
-            html_content=notification.body
+    rendered = template.render_many(context for _recipient, context in messages)
+    notifications = Notification.objects.bulk_create(
+        Notification(
+            tenant_id=tenant_id,
+            template_id=template.id,
+            channel=template.channel,
+            recipient=recipient,
+            subject=subject,
+            body=body,
+            metadata=context,
         )
+        for (recipient, context), (subject, body) in zip(messages, rendered)
+    )
+    NotificationDispatcher.schedule(template.channel)
+    return notifications
 
-        sg = SendGridAPIClient(settings.SENDGRID_API_KEY)
-        response = sg.send(message)
-
-        notification.status = "sent"
-        notification.sent_at = timezone.now()
-        notification.provider_id = response.headers.get('X-Message-Id', '')
-        notification.save()
-        return True
-    except Exception as e:
-        notification.status = "failed"
-        notification.error_message = f"Erreur SendGrid: {str(e)}"
-        notification.save()
-        raise
-
-
-def _send_whatsapp(notification: Notification) -> bool:
-    """Envoie un message WhatsApp via Twilio WhatsApp API."""
-    from django.conf import settings
-
-    # Vérifier que les credentials Twilio sont configurés
-    if not settings.TWILIO_ACCOUNT_SID or not settings.TWILIO_AUTH_TOKEN:
-        # Fallback en mode développement
-        notification.status = "sent"
-        notification.sent_at = timezone.now()
-        notification.save()
-        return True
-
-    try:
-        from twilio.rest import Client
-
-        client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN)
-
-        # Format WhatsApp avec préfixe
-        whatsapp_from = f"whatsapp:{settings.TWILIO_WHATSAPP_NUMBER}"
-        whatsapp_to = notification.recipient
-        if not whatsapp_to.startswith("whatsapp:"):
-            whatsapp_to = f"whatsapp:{whatsapp_to}"
-
-        message = client.messages.create(
-            body=notification.body,
-            from_=whatsapp_from,
-            to=whatsapp_to
-        )
 
-        notification.status = "sent"
-        notification.sent_at = timezone.now()
-        notification.provider_id = message.sid
-        notification.save()
-        return True
-    except Exception as e:
-        notification.status = "failed"
-        notification.error_message = f"Erreur Twilio WhatsApp: {str(e)}"
-        notification.save()
-        raise
-
-
-def _send_push(notification: Notification) -> bool:
-    """Envoie une notification push via FCM."""
-    from django.conf import settings
-
-    # Vérifier que Firebase est configuré
-    if not settings.FIREBASE_CREDENTIALS_PATH and not settings.FCM_SERVER_KEY:
-        # Fallback en mode développement
-        notification.status = "sent"
-        notification.sent_at = timezone.now()
-        notification.save()
-        return True
+def _active_template(template_id: str) -> CompiledTemplate | None:
+    from .models import NotificationTemplate
+    from .template_cache import NotificationTemplateCache
 
     try:
-        import firebase_admin
-        from firebase_admin import credentials, messaging
-
-        # Initialiser Firebase Admin SDK si pas déjà fait
-        if not firebase_admin._apps:
-            if settings.FIREBASE_CREDENTIALS_PATH:
-                cred = credentials.Certificate(settings.FIREBASE_CREDENTIALS_PATH)
-                firebase_admin.initialize_app(cred)
-            else:
-                # Utiliser les credentials par défaut
-                firebase_admin.initialize_app()
-
-        # Créer le message
-        message = messaging.Message(
-            notification=messaging.Notification(
-                title=notification.subject or "SmartQueue",
-                body=notification.body,
-            ),
-            token=notification.recipient,  # FCM device token
-        )
-
-        # Envoyer
-        response = messaging.send(message)
-
-        notification.status = "sent"
-        notification.sent_at = timezone.now()
-        notification.provider_id = response
-        notification.save()
-        return True
-    except Exception as e:
-        notification.status = "failed"
-        notification.error_message = f"Erreur FCM: {str(e)}"
-        notification.save()
-        raise
+        template = NotificationTemplate.objects.get(id=template_id, is_active=True)
+    except NotificationTemplate.DoesNotExist:
+        return None
+    return NotificationTemplateCache.compiled(template)
 
 
 @shared_task
@@ -231,36 +80,38 @@ def render_and_send_notification(
     context: dict,
     tenant_id: str,
 ) -> bool:
-    """Rend un template de notification et l'envoie."""
-    from .models import Notification, NotificationTemplate
-
-    try:
-        template = NotificationTemplate.objects.get(id=template_id, is_active=True)
-    except NotificationTemplate.DoesNotExist:
+    """Rend un template de notification et le met en file d'envoi."""
+    template = _active_template(template_id)
+    if template is None:
         return False
 
-    # Rendre le template avec le contexte
-    body_template = Template(template.body)
-    rendered_body = body_template.render(Context(context))
-
-    subject = ""
-    if template.subject:
-        subject_template = Template(template.subject)
-        subject = subject_template.render(Context(context))
-
-    # Créer la notification
-    notification = Notification.objects.create(
-        tenant_id=tenant_id,
-        template=template,
-        channel=template.channel,
-        recipient=recipient,
-        subject=subject,
-        body=rendered_body,
-        metadata=context,
-    )
+    queue_notifications(template, [(recipient, context)], tenant_id)
+    return True
+
+
+@shared_task
+def render_and_send_notifications(
+    template_id: str,
+    messages: list[tuple[str, dict]],
+    tenant_id: str,
+) -> int:
+    """Rend un template pour un lot de (destinataire, contexte) et les met en file d'envoi."""
+    template = _active_template(template_id)
+    if template is None or not messages:
+        return 0
 
-    # Envoyer
-    return send_notification(str(notification.id))
+    return len(queue_notifications(template, [tuple(message) for message in messages], tenant_id))
+
+
+def recipient_for(template: CompiledTemplate, customer) -> str | None:
+    """Destinataire selon le canal du template et les préférences du client."""
+    if template.channel == "sms" and customer.notify_sms:
+        return customer.phone
+    if template.channel == "email" and customer.notify_email:
+        return customer.email
+    if template.channel == "whatsapp" and customer.notify_whatsapp:
+        return customer.phone
+    return None
 
 
 @shared_task
@@ -269,26 +120,25 @@ def send_ticket_created_notification(ticket_id: str) -> None:
     from apps.tickets.models import Ticket
 
     try:
-        ticket = Ticket.objects.select_related(
-            "queue", "queue__service", "customer", "tenant"
-        ).get(id=ticket_id)
+        ticket = Ticket.objects.select_related("queue", "queue__service", "customer").get(
+            id=ticket_id
+        )
     except Ticket.DoesNotExist:
         return
 
     if not ticket.customer:
         return
 
-    # Trouver le template
+    # Trouver le template (index en cache, premier template actif par nom)
     from .models import NotificationTemplate
+    from .template_cache import NotificationTemplateCache
 
-    template = NotificationTemplate.objects.filter(
-        tenant=ticket.tenant,
-        event=NotificationTemplate.EVENT_TICKET_CREATED,
-        is_active=True,
-    ).first()
-
-    if not template:
+    templates = NotificationTemplateCache.for_event(
+        ticket.tenant_id, NotificationTemplate.EVENT_TICKET_CREATED
+    )
+    if not templates:
         return
+    template = templates[0]
 
     context = {
         "ticket_number": ticket.number,
@@ -298,19 +148,9 @@ def send_ticket_created_notification(ticket_id: str) -> None:
         "eta_minutes": ticket.eta_seconds // 60 if ticket.eta_seconds else "N/A",
     }
 
-    # Choisir le destinataire selon le canal et les préférences
-    recipient = None
-    if template.channel == "sms" and ticket.customer.notify_sms:
-        recipient = ticket.customer.phone
-    elif template.channel == "email" and ticket.customer.notify_email:
-        recipient = ticket.customer.email
-    elif template.channel == "whatsapp" and ticket.customer.notify_whatsapp:
-        recipient = ticket.customer.phone
-
+    recipient = recipient_for(template, ticket.customer)
     if recipient:
-        render_and_send_notification.delay(
-            str(template.id), recipient, context, str(ticket.tenant_id)
-        )
+        queue_notifications(template, [(recipient, context)], str(ticket.tenant_id))
 
 
 @shared_task
@@ -319,9 +159,9 @@ def send_ticket_called_notification(ticket_id: str) -> None:
     from apps.tickets.models import Ticket
 
     try:
-        ticket = Ticket.objects.select_related(
-            "queue", "agent", "agent__user", "customer", "tenant"
-        ).get(id=ticket_id)
+        ticket = Ticket.objects.select_related("queue", "agent", "agent__user", "customer").get(
+            id=ticket_id
+        )
     except Ticket.DoesNotExist:
         return
 
@@ -329,15 +169,14 @@ def send_ticket_called_notification(ticket_id: str) -> None:
         return
 
     from .models import NotificationTemplate
+    from .template_cache import NotificationTemplateCache
 
-    template = NotificationTemplate.objects.filter(
-        tenant=ticket.tenant,
-        event=NotificationTemplate.EVENT_TICKET_CALLED,
-        is_active=True,
-    ).first()
-
-    if not template:
+    templates = NotificationTemplateCache.for_event(
+        ticket.tenant_id, NotificationTemplate.EVENT_TICKET_CALLED
+    )
+    if not templates:
         return
+    template = templates[0]
 
     context = {
         "ticket_number": ticket.number,
@@ -350,18 +189,9 @@ def send_ticket_called_notification(ticket_id: str) -> None:
         "customer_name": ticket.customer.full_name if ticket.customer else "",
     }
 
-    recipient = None
-    if template.channel == "sms" and ticket.customer.notify_sms:
-        recipient = ticket.customer.phone
-    elif template.channel == "email" and ticket.customer.notify_email:
-        recipient = ticket.customer.email
-    elif template.channel == "whatsapp" and ticket.customer.notify_whatsapp:
-        recipient = ticket.customer.phone
-
+    recipient = recipient_for(template, ticket.customer)
     if recipient:
-        render_and_send_notification.delay(
-            str(template.id), recipient, context, str(ticket.tenant_id)
-        )
+        queue_notifications(template, [(recipient, context)], str(ticket.tenant_id))
 
 
 @shared_task
@@ -0,0 +1,148 @@
+"""Cache des templates de notification compilés.
+
+- Templates compilés : LRU en mémoire du processus, clé (id, ``updated_at``).
+  Une modification du template change la clé : pas d'invalidation à gérer,
+  l'ancienne version sort du LRU d'elle-même.
+- Index (tenant, événement) → templates actifs : ce que les tâches de
+  notification de tickets cherchaient par requête à chaque ticket. Deux
+  niveaux comme ``apps.tenants.cache`` (LRU local à expiration courte, puis
+  cache partagé), invalidés par les signaux de ``apps.notifications.signals``.
+
+Les modifications par ``QuerySet.update()`` ne passent ni par les signaux ni
+par ``updated_at`` : elles ne sont vues qu'à l'expiration des caches.
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Iterable
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.template import Context, Template
+
+from apps.core.local_cache import MISSING, LocalLRUCache
+
+from .models import NotificationTemplate
+
+logger = logging.getLogger(__name__)
+
+INDEX_KEY = "notification_templates:{tenant_id}:{event}"
+
+CACHE_TIMEOUT = getattr(settings, "NOTIFICATION_TEMPLATE_CACHE_TIMEOUT", 300)
+LOCAL_TIMEOUT = getattr(settings, "NOTIFICATION_TEMPLATE_CACHE_LOCAL_TIMEOUT", 5)
+LOCAL_SIZE = getattr(settings, "NOTIFICATION_TEMPLATE_CACHE_SIZE", 512)
+
+_INDEX_FIELDS = ("id", "channel", "subject", "body", "updated_at")
+
+# La clé (id, updated_at) suffit à l'invalidation : expiration longue
+_compiled = LocalLRUCache(max_size=LOCAL_SIZE, timeout=24 * 3600)
+_index = LocalLRUCache(max_size=LOCAL_SIZE, timeout=LOCAL_TIMEOUT)
+
+
+@dataclass(frozen=True)
+class CompiledTemplate:
+    """Template de notification prêt au rendu (sujet et corps compilés)."""
+
+    id: Any
+    channel: str
+    subject: Template | None
+    body: Template
+    updated_at: datetime
+
+    def render(self, context: dict) -> tuple[str, str]:
+        """Rend le sujet et le corps ; retourne (sujet, corps)."""
+        return self.render_many([context])[0]
+
+    def render_many(self, contexts: Iterable[dict]) -> list[tuple[str, str]]:
+        """Rend un lot de contextes en une passe, sur un seul ``Context`` réutilisé."""
+        rendered = []
+        base = Context(autoescape=True)
+        for context in contexts:
+            with base.push(context):
+                subject = self.subject.render(base) if self.subject is not None else ""
+                rendered.append((subject, self.body.render(base)))
+        return rendered
+
+
+class NotificationTemplateCache:
+    """Lecture et invalidation des templates compilés et de l'index par événement."""
+
+    @staticmethod
+    def compiled(template: NotificationTemplate | dict) -> CompiledTemplate:
+        """Template compilé, depuis une instance ou une ligne de l'index."""
+        if isinstance(template, NotificationTemplate):
+            template = {field: getattr(template, field) for field in _INDEX_FIELDS}
+
+        key = (template["id"], template["updated_at"])
+        compiled = _compiled.get(key)
+        if compiled is MISSING:
+            compiled = CompiledTemplate(
+                id=template["id"],
+                channel=template["channel"],
+                subject=Template(template["subject"]) if template["subject"] else None,
+                body=Template(template["body"]),
+                updated_at=template["updated_at"],
+            )
+            _compiled.set(key, compiled)
+        return compiled
+
+    @staticmethod
+    def for_event(tenant_id, event: str) -> list[CompiledTemplate]:
+        """Templates actifs d'un événement pour un tenant, dans l'ordre des templates (nom)."""
+        key = INDEX_KEY.format(tenant_id=tenant_id, event=event)
+
+        rows = _index.get(key)
+        if rows is MISSING:
+            rows = NotificationTemplateCache._shared_get(key)
+            if rows is None:
+                rows = list(
+                    NotificationTemplate.objects.filter(
+                        tenant_id=tenant_id, event=event, is_active=True
+                    ).values(*_INDEX_FIELDS)
+                )
+                NotificationTemplateCache._shared_set(key, rows)
+            _index.set(key, rows)
+
+        return [NotificationTemplateCache.compiled(row) for row in rows]
+
+    @staticmethod
+    def invalidate(tenant_id, *events: str) -> None:
+        """Invalide l'index des événements, maintenant et au commit de la transaction."""
+        keys = [INDEX_KEY.format(tenant_id=tenant_id, event=event) for event in events if event]
+
+        def delete() -> None:
+            for key in keys:
+                _index.delete(key)
+            try:
+                cache.delete_many(keys)
+            except Exception:  # noqa: BLE001 - l'expiration prendra le relais
+                logger.warning("Cache templates: invalidation impossible pour %s", keys, exc_info=True)
+
+        delete()
+        # Une tâche concurrente a pu relire l'ancien index avant le commit
+        transaction.on_commit(delete)
+
+    @staticmethod
+    def clear_local() -> None:
+        """Vide les caches du processus (tests)."""
+        _compiled.clear()
+        _index.clear()
+
+    @staticmethod
+    def _shared_get(key: str):
+        try:
+            return cache.get(key)
+        except Exception:  # noqa: BLE001 - repli sur la base
+            logger.warning("Cache templates: lecture impossible pour %s", key, exc_info=True)
+            return None
+
+    @staticmethod
+    def _shared_set(key: str, value) -> None:
+        try:
+            cache.set(key, value, timeout=CACHE_TIMEOUT)
+        except Exception:  # noqa: BLE001
+            logger.warning("Cache templates: écriture impossible pour %s", key, exc_info=True)
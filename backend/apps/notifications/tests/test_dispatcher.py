@@ -0,0 +1,175 @@
+"""Tests pour l'envoi des notifications par lots."""
+
+import pytest
+from django.core import mail
+from django.core.cache import cache
+from model_bakery import baker
+
+from apps.notifications.dispatcher import NotificationDispatcher
+from apps.notifications.fake_provider import FakeProviderServer
+from apps.notifications.models import Notification, NotificationTemplate
+from apps.notifications.tasks import render_and_send_notification
+from apps.security.rate_limit import SlidingWindowRateLimiter
+
+
+@pytest.fixture
+def fake_provider(settings):
+    """Faux fournisseur local et identifiants Twilio/SendGrid de test."""
+    server = FakeProviderServer()
+    server.start()
+    settings.NOTIFICATION_PROVIDER_BASE_URL = server.base_url
+    settings.TWILIO_ACCOUNT_SID = "ACtest"
+    settings.TWILIO_AUTH_TOKEN = "token"
+    settings.TWILIO_PHONE_NUMBER = "+15005550006"
+    settings.SENDGRID_API_KEY = "SG.test"
+    settings.NOTIFICATION_RATE_LIMITS = {}
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _pending(tenant, channel, count, **kwargs):
+    recipient = "+22177000000{}" if channel != NotificationTemplate.CHANNEL_EMAIL else "client{}@example.com"
+    return [
+        baker.make(
+            Notification,
+            tenant=tenant,
+            channel=channel,
+            recipient=recipient.format(index),
+            subject=f"Sujet {index}",
+            body=f"Ticket A{index:03d}",
+            **kwargs,
+        )
+        for index in range(count)
+    ]
+
+
+def _statuses(channel):
+    return sorted(Notification.objects.filter(channel=channel).values_list("status", flat=True))
+
+
+@pytest.mark.django_db
+class TestNotificationDispatcher:
+    """Tests pour le drainage des notifications en attente."""
+
+    def test_sms_through_pooled_client(self, tenant, fake_provider):
+        """Test l'envoi des SMS en lot : un appel par message, statuts et identifiants enregistrés."""
+        _pending(tenant, NotificationTemplate.CHANNEL_SMS, 5)
+
+        stats = NotificationDispatcher.dispatch(NotificationTemplate.CHANNEL_SMS)
+
+        assert stats == {"sent": 5, "failed": 0, "deferred": 0}
+        assert fake_provider.requests["twilio"] == 5
+        for notification in Notification.objects.all():
+            assert notification.status == Notification.STATUS_SENT
+            assert notification.provider_id.startswith("SM")
+            assert notification.sent_at is not None
+
+    def test_email_through_sendgrid_personalizations(self, tenant, fake_provider):
+        """Test qu'un lot d'emails part en un seul appel SendGrid."""
+        _pending(tenant, NotificationTemplate.CHANNEL_EMAIL, 3)
+
+        NotificationDispatcher.dispatch(NotificationTemplate.CHANNEL_EMAIL)
+
+        assert fake_provider.requests["sendgrid"] == 1
+        assert fake_provider.messages["sendgrid"] == 3
+        assert _statuses(NotificationTemplate.CHANNEL_EMAIL) == [Notification.STATUS_SENT] * 3
+
+    def test_invalid_address_only_fails_its_recipient(self, tenant, fake_provider):
+        """Test qu'une adresse invalide refusée par SendGrid n'échoue pas tout le lot."""
+        notifications = _pending(tenant, NotificationTemplate.CHANNEL_EMAIL, 4)
+        Notification.objects.filter(pk=notifications[2].pk).update(recipient="client2-example.com")
+
+        stats = NotificationDispatcher.dispatch(NotificationTemplate.CHANNEL_EMAIL)
+
+        assert stats["sent"] == 3 and stats["failed"] == 1
+        assert fake_provider.messages["sendgrid"] == 3
+        invalid = Notification.objects.get(pk=notifications[2].pk)
+        assert invalid.status == Notification.STATUS_FAILED
+        assert "HTTP 400" in invalid.error_message
+        assert sorted(fake_provider.recipients) == [
+            "client0@example.com",
+            "client1@example.com",
+            "client3@example.com",
+        ]
+
+    def test_email_smtp_fallback(self, tenant, settings):
+        """Test le repli SMTP (une connexion par lot) sans clé SendGrid."""
+        settings.SENDGRID_API_KEY = ""
+        _pending(tenant, NotificationTemplate.CHANNEL_EMAIL, 3)
+
+        NotificationDispatcher.dispatch(NotificationTemplate.CHANNEL_EMAIL)
+
+        assert sorted(message.to[0] for message in mail.outbox) == [
+            "client0@example.com",
+            "client1@example.com",
+            "client2@example.com",
+        ]
+        assert _statuses(NotificationTemplate.CHANNEL_EMAIL) == [Notification.STATUS_SENT] * 3
+
+    def test_provider_outage_is_retried_then_failed(self, tenant, settings, fake_provider):
+        """Test qu'une erreur 503 remet en attente, puis échoue après le nombre max de tentatives."""
+        settings.NOTIFICATION_MAX_ATTEMPTS = 2
+        fake_provider.failure_rate = 1.0
+        [notification] = _pending(tenant, NotificationTemplate.CHANNEL_SMS, 1)
+
+        NotificationDispatcher.dispatch(NotificationTemplate.CHANNEL_SMS)
+        notification.refresh_from_db()
+        assert notification.status == Notification.STATUS_PENDING
+        assert notification.attempts == 1
+
+        NotificationDispatcher.dispatch(NotificationTemplate.CHANNEL_SMS)
+        notification.refresh_from_db()
+        assert notification.status == Notification.STATUS_FAILED
+        assert "Erreur Twilio" in notification.error_message
+
+    def test_rate_limit_defers_remaining(self, tenant, settings, fake_provider):
+        """Test que le débit du fournisseur limite les envois ; le reste attend le drainage suivant."""
+        SlidingWindowRateLimiter.reset("notifications:twilio_sms")
+        settings.NOTIFICATION_RATE_LIMITS = {"twilio_sms": 2}
+        _pending(tenant, NotificationTemplate.CHANNEL_SMS, 5)
+
+        stats = NotificationDispatcher.dispatch(NotificationTemplate.CHANNEL_SMS, max_seconds=0.2)
+
+        assert stats["sent"] == 2
+        assert fake_provider.requests["twilio"] == 2
+        deferred = Notification.objects.filter(status=Notification.STATUS_PENDING)
+        assert deferred.count() == 3
+        assert all(notification.attempts == 0 for notification in deferred)
+
+    def test_claim_and_requeue_stale(self, tenant, settings):
+        """Test qu'un lot réservé n'est pas réservé deux fois, puis est repris s'il reste bloqué."""
+        _pending(tenant, NotificationTemplate.CHANNEL_SMS, 3)
+
+        assert len(NotificationDispatcher.claim(NotificationTemplate.CHANNEL_SMS, 10)) == 3
+        assert NotificationDispatcher.claim(NotificationTemplate.CHANNEL_SMS, 10) == []
+
+        settings.NOTIFICATION_SENDING_TIMEOUT = -1
+        assert NotificationDispatcher.requeue_stale() == 3
+        assert _statuses(NotificationTemplate.CHANNEL_SMS) == [Notification.STATUS_PENDING] * 3
+
+
+@pytest.mark.django_db
+class TestRenderAndSend:
+    """Tests pour la mise en file des notifications rendues."""
+
+    def test_queues_and_schedules_one_dispatch(self, tenant, mocker, django_capture_on_commit_callbacks):
+        """Test que les notifications rapprochées déclenchent un seul drainage du canal."""
+        cache.delete("notifications:dispatch:sms")
+        apply_async = mocker.patch("apps.notifications.tasks.dispatch_notifications.apply_async")
+        template = baker.make(
+            NotificationTemplate,
+            tenant=tenant,
+            channel=NotificationTemplate.CHANNEL_SMS,
+            body="Ticket {{ ticket_number }}",
+        )
+
+        with django_capture_on_commit_callbacks(execute=True):
+            for number in ("A001", "A002"):
+                render_and_send_notification(
+                    str(template.id), "+221770000000", {"ticket_number": number}, str(tenant.id)
+                )
+
+        assert sorted(Notification.objects.values_list("body", flat=True)) == ["Ticket A001", "Ticket A002"]
+        assert set(Notification.objects.values_list("status", flat=True)) == {Notification.STATUS_PENDING}
+        apply_async.assert_called_once()
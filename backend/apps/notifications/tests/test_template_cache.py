@@ -0,0 +1,120 @@
+"""Tests pour le cache des templates de notification."""
+
+import pytest
+from django.core.cache import cache
+from model_bakery import baker
+
+from apps.notifications.models import Notification, NotificationTemplate
+from apps.notifications.tasks import (
+    render_and_send_notifications,
+    send_ticket_called_notification,
+)
+from apps.notifications.template_cache import NotificationTemplateCache
+
+
+@pytest.fixture(autouse=True)
+def clear_template_cache():
+    cache.clear()
+    NotificationTemplateCache.clear_local()
+    yield
+    cache.clear()
+    NotificationTemplateCache.clear_local()
+
+
+@pytest.fixture
+def called_template(tenant):
+    return baker.make(
+        NotificationTemplate,
+        tenant=tenant,
+        name="Appel SMS",
+        event=NotificationTemplate.EVENT_TICKET_CALLED,
+        channel=NotificationTemplate.CHANNEL_SMS,
+        subject="",
+        body="Ticket {{ ticket_number }} : guichet {{ agent_name }}",
+    )
+
+
+@pytest.mark.django_db
+class TestNotificationTemplateCache:
+    """Tests pour les templates compilés et l'index par événement."""
+
+    def test_compiled_template_reused_until_modified(self, called_template):
+        """Test que la compilation est réutilisée, puis refaite après modification."""
+        first = NotificationTemplateCache.compiled(called_template)
+        assert NotificationTemplateCache.compiled(called_template) is first
+
+        called_template.body = "Ticket {{ ticket_number }} appelé"
+        called_template.save()
+
+        compiled = NotificationTemplateCache.compiled(called_template)
+        assert compiled is not first
+        assert compiled.render({"ticket_number": "A001"}) == ("", "Ticket A001 appelé")
+
+    def test_render_many(self, tenant):
+        """Test le rendu d'un lot de contextes, échappement HTML compris."""
+        template = baker.make(NotificationTemplate, tenant=tenant, subject="Bonjour {{ name }}", body="<b>{{ name }}</b>")
+
+        rendered = NotificationTemplateCache.compiled(template).render_many([{"name": "Awa"}, {"name": "<x>"}])
+
+        assert rendered == [("Bonjour Awa", "<b>Awa</b>"), ("Bonjour &lt;x&gt;", "<b>&lt;x&gt;</b>")]
+
+    def test_event_index_served_from_cache(self, tenant, called_template, django_assert_num_queries):
+        """Test que l'index (tenant, événement) ne refait pas de requête une fois chaud."""
+        NotificationTemplateCache.for_event(tenant.id, NotificationTemplate.EVENT_TICKET_CALLED)
+
+        with django_assert_num_queries(0):
+            [template] = NotificationTemplateCache.for_event(tenant.id, NotificationTemplate.EVENT_TICKET_CALLED)
+
+        assert template.id == called_template.id
+
+    def test_event_index_invalidated_on_save(self, tenant, called_template):
+        """Test l'invalidation à l'enregistrement, ancien et nouvel événement compris."""
+        called = NotificationTemplate.EVENT_TICKET_CALLED
+        created = NotificationTemplate.EVENT_TICKET_CREATED
+        assert len(NotificationTemplateCache.for_event(tenant.id, called)) == 1
+        assert NotificationTemplateCache.for_event(tenant.id, created) == []
+
+        called_template.event = created
+        called_template.save()
+
+        assert NotificationTemplateCache.for_event(tenant.id, called) == []
+        assert len(NotificationTemplateCache.for_event(tenant.id, created)) == 1
+
+        called_template.is_active = False
+        called_template.save()
+        assert NotificationTemplateCache.for_event(tenant.id, created) == []
+
+
+@pytest.mark.django_db
+class TestTicketNotifications:
+    """Tests pour les tâches de notification des tickets."""
+
+    def test_called_notification_uses_cached_template(self, ticket, called_template, mocker):
+        """Test qu'un ticket appelé crée la notification rendue à partir de l'index."""
+        mocker.patch("apps.notifications.dispatcher.NotificationDispatcher.schedule")
+        ticket.customer.notify_sms = True
+        ticket.customer.save()
+
+        send_ticket_called_notification(str(ticket.id))
+
+        notification = Notification.objects.get()
+        assert notification.template_id == called_template.id
+        assert notification.recipient == ticket.customer.phone
+        assert notification.body == f"Ticket {ticket.number} : guichet Agent"
+
+    def test_batch_render_and_send(self, tenant, called_template, mocker):
+        """Test la mise en file d'un lot de messages en une passe."""
+        schedule = mocker.patch("apps.notifications.dispatcher.NotificationDispatcher.schedule")
+
+        queued = render_and_send_notifications(
+            str(called_template.id),
+            [["+221770000001", {"ticket_number": "A001"}], ["+221770000002", {"ticket_number": "A002"}]],
+            str(tenant.id),
+        )
+
+        assert queued == 2
+        assert sorted(Notification.objects.values_list("body", flat=True)) == [
+            "Ticket A001 : guichet ",
+            "Ticket A002 : guichet ",
+        ]
+        schedule.assert_called_once_with(NotificationTemplate.CHANNEL_SMS)
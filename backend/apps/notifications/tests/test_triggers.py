@@ -0,0 +1,133 @@
+"""Tests pour la notification « votre tour approche »."""
+
+from datetime import timedelta
+from itertools import count
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from model_bakery import baker
+
+from apps.customers.models import Customer
+from apps.notifications.models import Notification, NotificationTemplate
+from apps.notifications.template_cache import NotificationTemplateCache
+from apps.notifications.triggers import TicketReadyTrigger
+from apps.queues.models import Queue, QueueAssignment
+from apps.queues.services import QueueService
+from apps.tickets.models import Ticket
+from apps.users.models import AgentProfile
+
+
+@pytest.fixture(autouse=True)
+def ready_settings(settings, mocker):
+    settings.TICKET_READY_POSITION = 2
+    settings.TICKET_READY_ETA_SECONDS = 0
+    cache.clear()
+    NotificationTemplateCache.clear_local()
+    mocker.patch("apps.notifications.dispatcher.NotificationDispatcher.schedule")
+
+
+@pytest.fixture
+def ready_template(tenant):
+    return baker.make(
+        NotificationTemplate,
+        tenant=tenant,
+        event=NotificationTemplate.EVENT_TICKET_READY,
+        channel=NotificationTemplate.CHANNEL_SMS,
+        subject="",
+        body="Ticket {{ ticket_number }} : votre tour approche",
+    )
+
+
+_phones = count()
+
+
+def _waiting(tenant, queue, size):
+    """Tickets en attente, du plus ancien au plus récent, avec un client joignable par SMS."""
+    start = timezone.now() - timedelta(hours=1)
+    tickets = []
+    for index in range(size):
+        customer = baker.make(Customer, tenant=tenant, phone=f"+22177{next(_phones):07d}", notify_sms=True)
+        ticket = baker.make(
+            Ticket, tenant=tenant, queue=queue, customer=customer, number=f"A{index:03d}", status=Ticket.STATUS_WAITING
+        )
+        Ticket.objects.filter(pk=ticket.pk).update(created_at=start + timedelta(minutes=index))
+        tickets.append(ticket)
+    return tickets
+
+
+def _notified_numbers():
+    return sorted(body.split()[1] for body in Notification.objects.values_list("body", flat=True))
+
+
+@pytest.mark.django_db
+class TestTicketReadyTrigger:
+    """Tests pour la détection des tickets qui franchissent le seuil."""
+
+    def test_call_next_notifies_ticket_entering_window(
+        self, tenant, queue, agent_profile, ready_template, django_capture_on_commit_callbacks
+    ):
+        """Test que chaque appel ne notifie que le ticket qui entre dans la fenêtre, une seule fois."""
+        _waiting(tenant, queue, 5)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            called = QueueService.call_next(agent_profile, queue)
+        assert _notified_numbers() == ["A001", "A002"]
+
+        with django_capture_on_commit_callbacks(execute=True):
+            QueueService.close_ticket(called, agent_profile)
+            QueueService.call_next(agent_profile, queue)
+        assert _notified_numbers() == ["A001", "A002", "A003"]
+
+    def test_deduplicated_per_ticket(self, tenant, queue, ready_template):
+        """Test qu'une seconde évaluation ne renvoie rien."""
+        _waiting(tenant, queue, 3)
+
+        assert len(TicketReadyTrigger.evaluate(queue.id)) == 2
+        assert TicketReadyTrigger.evaluate(queue.id) == []
+        assert Notification.objects.count() == 2
+
+    def test_cost_independent_of_queue_length(self, tenant, site, service, queue, ready_template):
+        """Test que le nombre de requêtes et de tickets lus ne dépend pas de la longueur de la file."""
+        long_queue = baker.make(Queue, tenant=tenant, site=site, service=service, algorithm=Queue.ALGO_FIFO)
+        _waiting(tenant, queue, 3)
+        _waiting(tenant, long_queue, 40)
+        NotificationTemplateCache.for_event(tenant.id, NotificationTemplate.EVENT_TICKET_READY)
+
+        with CaptureQueriesContext(connection) as short:
+            short_notified = TicketReadyTrigger.evaluate(queue.id)
+        with CaptureQueriesContext(connection) as long:
+            long_notified = TicketReadyTrigger.evaluate(long_queue.id)
+
+        assert len(short_notified) == len(long_notified) == 2
+        assert len(short.captured_queries) == len(long.captured_queries)
+
+    def test_eta_threshold_widens_with_available_agents(self, settings, tenant, queue):
+        """Test que le seuil d'ETA se traduit en rang selon les agents disponibles."""
+        settings.TICKET_READY_POSITION = 1
+        settings.TICKET_READY_ETA_SECONDS = 1200
+        # Sans statistiques, temps de service = SLA du service (600 s)
+        assert TicketReadyTrigger.window(queue) == 3
+
+        for _ in range(2):
+            agent = baker.make(AgentProfile, current_status=AgentProfile.STATUS_AVAILABLE)
+            baker.make(QueueAssignment, tenant=tenant, queue=queue, agent=agent, is_active=True)
+        assert TicketReadyTrigger.window(queue) == 5
+
+        settings.TICKET_READY_MAX_WINDOW = 4
+        assert TicketReadyTrigger.window(queue) == 4
+
+    def test_transfer_resets_notification(self, tenant, site, service, queue, ready_template):
+        """Test qu'un ticket transféré pourra être notifié dans sa nouvelle file."""
+        target = baker.make(Queue, tenant=tenant, site=site, service=service)
+        [ticket] = _waiting(tenant, queue, 1)
+        TicketReadyTrigger.evaluate(queue.id)
+        ticket.refresh_from_db()
+        assert ticket.ready_notified_at is not None
+
+        QueueService.transfer_ticket(ticket, target)
+
+        ticket.refresh_from_db()
+        assert ticket.ready_notified_at is None
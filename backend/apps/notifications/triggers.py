@@ -0,0 +1,146 @@
+"""Déclenchement de la notification « votre tour approche » (``EVENT_TICKET_READY``).
+
+Aucun balayage des files : la notification est évaluée uniquement quand une
+file change, sur les événements de ``QueueService`` (appel du suivant,
+clôture, no-show, transfert).
+
+Un ticket est « prêt » quand sa position est au plus ``TICKET_READY_POSITION``
+ou que son ETA est au plus ``TICKET_READY_ETA_SECONDS``. L'ETA valant
+``tickets devant × temps de service moyen / agents disponibles`` (voir
+``apps.queues.eta``), le seuil d'ETA se traduit en un rang. Les deux seuils
+donnent donc une fenêtre de tête de file de ``window`` tickets, bornée par
+``TICKET_READY_MAX_WINDOW`` :
+
+- un départ (appel, transfert) fait avancer les tickets d'une place : seul
+  le ticket qui entre dans la fenêtre n'a pas encore été notifié ;
+- un agent libéré (clôture, no-show) agrandit la fenêtre d'ETA : seuls les
+  tickets des nouveaux rangs n'ont pas été notifiés.
+
+Une requête lit les tickets de la fenêtre pas encore notifiés
+(``ready_notified_at`` nul) : le coût dépend de la taille de la fenêtre,
+pas de la longueur de la file. ``ready_notified_at`` est posé sous verrou
+avant l'envoi, ce qui dédoublonne par ticket entre workers.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+from typing import TYPE_CHECKING
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from apps.tickets.models import Ticket
+
+from .models import NotificationTemplate
+from .template_cache import NotificationTemplateCache
+
+if TYPE_CHECKING:
+    from apps.queues.models import Queue
+
+logger = logging.getLogger(__name__)
+
+
+class TicketReadyTrigger:
+    """Détection des tickets qui franchissent le seuil « votre tour approche »."""
+
+    @staticmethod
+    def on_queue_changed(queue_id) -> None:
+        """À appeler quand l'ordre ou le rythme d'une file change : évaluation au commit."""
+        if not getattr(settings, "TICKET_READY_ENABLED", True):
+            return
+
+        def evaluate() -> None:
+            try:
+                TicketReadyTrigger.evaluate(queue_id)
+            except Exception:  # noqa: BLE001 - la notification ne doit pas casser l'appel
+                logger.exception("Notification 'votre tour approche' en échec pour la file %s", queue_id)
+
+        transaction.on_commit(evaluate)
+
+    @staticmethod
+    def window(queue: Queue) -> int:
+        """Nombre de tickets en tête de file considérés « prêts »."""
+        position = getattr(settings, "TICKET_READY_POSITION", 3)
+        eta_seconds = getattr(settings, "TICKET_READY_ETA_SECONDS", 300)
+        max_window = getattr(settings, "TICKET_READY_MAX_WINDOW", 20)
+
+        window = position
+        if eta_seconds:
+            from apps.queues.eta import ETAEngine
+
+            inputs = ETAEngine.load_queue_inputs({queue.id}).get(queue.id)
+            if inputs is not None and inputs.avg_service_seconds > 0:
+                # ETA <= seuil  <=>  tickets devant <= seuil × agents / temps de service
+                ahead = math.floor(eta_seconds * inputs.available_agents / inputs.avg_service_seconds)
+                window = max(window, ahead + 1)
+        return min(window, max_window)
+
+    @staticmethod
+    def evaluate(queue_id) -> list[Ticket]:
+        """
+        Notifie les tickets de la fenêtre pas encore notifiés.
+
+        Returns:
+            list: tickets marqués notifiés par cet appel
+        """
+        from apps.queues.models import Queue
+        from apps.queues.services import QueueService
+
+        queue = Queue.objects.select_related("service").filter(id=queue_id).first()
+        if queue is None:
+            return []
+
+        window = TicketReadyTrigger.window(queue)
+        if window <= 0:
+            return []
+
+        head = QueueService.waiting_tickets(queue).values("id")[:window]
+        with transaction.atomic():
+            crossing = list(
+                Ticket.objects.select_for_update(skip_locked=True, of=("self",))
+                .filter(id__in=head, ready_notified_at__isnull=True)
+                .select_related("customer", "tenant")
+            )
+            if not crossing:
+                return []
+            Ticket.objects.filter(id__in=[ticket.id for ticket in crossing]).update(
+                ready_notified_at=timezone.now()
+            )
+
+        TicketReadyTrigger._notify(queue, crossing)
+        return crossing
+
+    @staticmethod
+    def _notify(queue: Queue, tickets: list[Ticket]) -> None:
+        from .tasks import queue_notifications, recipient_for
+
+        templates = NotificationTemplateCache.for_event(queue.tenant_id, NotificationTemplate.EVENT_TICKET_READY)
+        if not templates:
+            return
+        template = templates[0]
+
+        messages = []
+        for ticket in tickets:
+            if ticket.customer is None:
+                continue
+            recipient = recipient_for(template, ticket.customer)
+            if not recipient:
+                continue
+            messages.append(
+                (
+                    recipient,
+                    {
+                        "ticket_number": ticket.number,
+                        "queue_name": queue.name,
+                        "service_name": queue.service.name,
+                        "customer_name": ticket.customer.full_name,
+                        "tenant_name": ticket.tenant.name,
+                        "eta_minutes": ticket.eta_seconds // 60 if ticket.eta_seconds else "N/A",
+                    },
+                )
+            )
+        if messages:
+            queue_notifications(template, messages, str(queue.tenant_id))
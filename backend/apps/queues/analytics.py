@@ -5,13 +5,15 @@ from __future__ import annotations
 from datetime import timedelta
 from typing import TYPE_CHECKING
 
-from django.db.models import Avg, Count, ExpressionWrapper, F, Q
-from django.db.models import fields as model_fields
+from django.db.models import Q
 from django.utils import timezone
 
 from apps.tickets.models import Ticket
 from apps.users.models import AgentProfile
 
+from .forecast import TARGET_SLA, ArrivalProfiles, ErlangC
+from .service_stats import ServiceTimeStats
+
 if TYPE_CHECKING:
     from .models import Queue
 
@@ -38,8 +40,8 @@ class QueueAnalytics:
 
         queue = ticket.queue
 
-        # 1. Calculer le temps de service moyen des 50 derniers tickets clôturés
-        avg_service_time = QueueAnalytics._get_average_service_time(queue)
+        # 1. Temps de service moyen glissant de la file
+        avg_service_time = ServiceTimeStats.average_service_time(queue)
         if not avg_service_time:
             # Fallback sur le SLA du service si pas d'historique
             avg_service_time = queue.service.sla_seconds
@@ -60,40 +62,16 @@ class QueueAnalytics:
         return eta_seconds
 
     @staticmethod
-    def _get_average_service_time(queue: Queue, limit: int = 50) -> float | None:
+    def _get_average_service_time(queue: Queue) -> float | None:
         """
-        Calcule le temps de service moyen des derniers tickets clôturés.
+        Temps de service moyen de la file (moyenne glissante maintenue incrémentalement).
 
-        Args:
-            queue: La file d'attente
-            limit: Nombre de tickets à considérer (par défaut 50)
+        Alias conservé pour les appelants existants : voir ``ServiceTimeStats``.
 
         Returns:
             float | None: Temps moyen en secondes, ou None si pas d'historique
         """
-        recent_closed = (
-            queue.tickets.filter(
-                status=Ticket.STATUS_CLOSED,
-                started_at__isnull=False,
-                ended_at__isnull=False,
-            )
-            .order_by("-ended_at")[:limit]
-        )
-
-        if not recent_closed.exists():
-            return None
-
-        avg_duration = recent_closed.annotate(
-            service_duration=ExpressionWrapper(
-                F("ended_at") - F("started_at"),
-                output_field=model_fields.DurationField(),
-            )
-        ).aggregate(avg=Avg("service_duration"))["avg"]
-
-        if avg_duration:
-            return avg_duration.total_seconds()
-
-        return None
+        return ServiceTimeStats.average_service_time(queue)
 
     @staticmethod
     def _count_tickets_ahead(ticket: Ticket, queue: Queue) -> int:
@@ -182,11 +160,55 @@ class QueueAnalytics:
             - alerts: liste des alertes
             - metrics: métriques détaillées
         """
+        waiting_count = queue.tickets.filter(status=Ticket.STATUS_WAITING).count()
+
+        sla_seconds = queue.service.sla_seconds
+        cutoff_time = timezone.now() - timedelta(seconds=sla_seconds)
+        late_count = queue.tickets.filter(
+            status=Ticket.STATUS_WAITING,
+            created_at__lte=cutoff_time,
+        ).count()
+
+        available_agents = QueueAnalytics._count_available_agents(queue)
+
+        # Temps d'attente moyen actuel sur les premiers tickets
+        avg_eta = None
+        if waiting_count > 0:
+            total_eta = 0
+            for ticket in queue.tickets.filter(status=Ticket.STATUS_WAITING)[:10]:
+                eta = QueueAnalytics.calculate_eta(ticket)
+                if eta:
+                    total_eta += eta
+
+            if total_eta > 0:
+                avg_eta = total_eta / min(waiting_count, 10)
+
+        return QueueAnalytics.score_health(
+            queue,
+            waiting_count=waiting_count,
+            late_count=late_count,
+            available_agents=available_agents,
+            avg_eta=avg_eta,
+        )
+
+    @staticmethod
+    def score_health(
+        queue: Queue,
+        *,
+        waiting_count: int,
+        late_count: int,
+        available_agents: int,
+        avg_eta: float | None,
+    ) -> dict:
+        """
+        Calcule score, alertes et métriques de santé à partir des compteurs d'une file.
+
+        Partagé entre ``get_queue_health`` et ``TenantQueueSnapshot``.
+        """
         alerts = []
         metrics = {}
 
         # 1. Vérifier la capacité
-        waiting_count = queue.tickets.filter(status=Ticket.STATUS_WAITING).count()
         metrics["waiting_count"] = waiting_count
 
         if queue.max_capacity and waiting_count >= queue.max_capacity * 0.9:
@@ -198,13 +220,6 @@ class QueueAnalytics:
 
         # 2. Vérifier les tickets en retard (SLA)
         sla_seconds = queue.service.sla_seconds
-        cutoff_time = timezone.now() - timedelta(seconds=sla_seconds)
-
-        late_tickets = queue.tickets.filter(
-            status=Ticket.STATUS_WAITING,
-            created_at__lte=cutoff_time,
-        )
-        late_count = late_tickets.count()
         metrics["late_tickets_count"] = late_count
 
         if late_count > 0:
@@ -220,7 +235,6 @@ class QueueAnalytics:
             })
 
         # 3. Vérifier la disponibilité des agents
-        available_agents = QueueAnalytics._count_available_agents(queue)
         metrics["available_agents"] = available_agents
 
         if available_agents == 0 and waiting_count > 0:
@@ -230,25 +244,17 @@ class QueueAnalytics:
                 "message": "Aucun agent disponible pour cette file",
             })
 
-        # 4. Calculer le temps d'attente moyen actuel
-        if waiting_count > 0:
-            total_eta = 0
-            for ticket in queue.tickets.filter(status=Ticket.STATUS_WAITING)[:10]:
-                eta = QueueAnalytics.calculate_eta(ticket)
-                if eta:
-                    total_eta += eta
-
-            if total_eta > 0:
-                avg_eta = total_eta / min(waiting_count, 10)
-                metrics["avg_eta_seconds"] = int(avg_eta)
+        # 4. Temps d'attente moyen actuel
+        if avg_eta:
+            metrics["avg_eta_seconds"] = int(avg_eta)
 
-                # Alerte si temps d'attente > 2x SLA
-                if avg_eta > sla_seconds * 2:
-                    alerts.append({
-                        "type": "high_wait_time",
-                        "severity": "medium",
-                        "message": f"Temps d'attente élevé (~{int(avg_eta/60)} min)",
-                    })
+            # Alerte si temps d'attente > 2x SLA
+            if avg_eta > sla_seconds * 2:
+                alerts.append({
+                    "type": "high_wait_time",
+                    "severity": "medium",
+                    "message": f"Temps d'attente élevé (~{int(avg_eta/60)} min)",
+                })
 
         # 5. Calculer le score de santé (0-100)
         health_score = 100
@@ -282,46 +288,36 @@ class QueueAnalytics:
         """
         Prédictions sur l'évolution de la file dans la prochaine heure.
 
+        Lit le profil d'arrivées précalculé de la file (créneau jour/heure
+        courant, voir ``apps.queues.forecast``) ; le renfort est estimé par
+        la formule d'Erlang C pour la conformité SLA visée.
+
         Returns:
             dict avec prédictions d'affluence, temps d'attente, etc.
         """
-        now = timezone.now()
-        current_hour = now.hour
-        current_weekday = now.weekday()  # 0=lundi, 6=dimanche
-
-        # Analyser l'historique des 4 dernières semaines pour cette heure/jour
-        four_weeks_ago = now - timedelta(weeks=4)
-
-        # Compter les tickets créés pendant cette même heure sur les semaines passées
-        historical_tickets = Ticket.objects.filter(
-            queue=queue,
-            created_at__gte=four_weeks_ago,
-            created_at__hour=current_hour,
-            created_at__week_day=(current_weekday + 2) % 7 + 1,  # Django week_day format
-        ).count()
+        profile = ArrivalProfiles.get(queue)
+        weekday, hour = profile.slot(timezone.now())
+        expected_tickets = float(profile.arrival_rates[weekday, hour])
+        service_time = float(profile.service_times[weekday, hour])
 
-        # Moyenne par semaine
-        avg_tickets_per_hour = historical_tickets / 4 if historical_tickets > 0 else 0
-
-        # Prédire la charge dans l'heure suivante
         prediction = {
-            "predicted_tickets_next_hour": int(avg_tickets_per_hour),
+            "predicted_tickets_next_hour": round(expected_tickets),
             "current_waiting": queue.tickets.filter(status=Ticket.STATUS_WAITING).count(),
-            "confidence": "medium" if historical_tickets > 10 else "low",
+            # Plus de 10 tickets observés sur ce créneau dans l'historique
+            "confidence": "medium" if expected_tickets * profile.weeks > 10 else "low",
         }
 
-        # Estimer si renfort nécessaire
-        avg_service_time = QueueAnalytics._get_average_service_time(queue) or queue.service.sla_seconds
+        # Effectif requis (Erlang C) comparé aux agents disponibles
+        sla_seconds = queue.service.sla_seconds
         available_agents = QueueAnalytics._count_available_agents(queue)
+        required, _levels = ErlangC.required_agents([expected_tickets], [service_time], sla_seconds, TARGET_SLA)
+        required_agents = int(required[0])
 
-        if available_agents > 0:
-            # Capacité = agents * (3600 / temps_moyen_service)
-            hourly_capacity = available_agents * (3600 / avg_service_time)
-
-            if avg_tickets_per_hour > hourly_capacity * 0.8:
-                prediction["reinforcement_needed"] = True
-                prediction["recommended_agents"] = int((avg_tickets_per_hour / (3600 / avg_service_time)) + 1)
-            else:
-                prediction["reinforcement_needed"] = False
+        prediction["expected_sla_compliance"] = round(
+            ErlangC.service_level(available_agents, expected_tickets, service_time, sla_seconds), 2
+        )
+        prediction["reinforcement_needed"] = required_agents > available_agents
+        if prediction["reinforcement_needed"]:
+            prediction["recommended_agents"] = required_agents
 
         return prediction
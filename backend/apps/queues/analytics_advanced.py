@@ -1,7 +1,8 @@
 """Advanced Analytics for Queue Intelligence - Phase 3.
 
 This module provides advanced KPIs, trend analysis, and A/B testing capabilities
-for queue management optimization.
+for queue management optimization. Ticket-based KPIs are read from the hourly
+rollups (``apps.queues.rollups``), bucketed by ticket creation hour.
 """
 
 from __future__ import annotations
@@ -9,15 +10,15 @@ from __future__ import annotations
 from datetime import datetime, timedelta
 from typing import Any
 
-from django.db.models import Avg, Count, ExpressionWrapper, F, FloatField, Q, Sum
-from django.db.models.functions import ExtractHour, TruncDate, TruncHour
+from django.db.models import Avg, Count, Q, Sum
+from django.db.models.functions import Coalesce, ExtractHour, TruncDate
 from django.utils import timezone
 
 from apps.feedback.models import Feedback
-from apps.tickets.models import Ticket
 from apps.users.models import AgentProfile
 
 from .models import Queue
+from .rollups import KpiRollups
 
 
 class AdvancedAnalytics:
@@ -40,9 +41,18 @@ class AdvancedAnalytics:
         """
         cutoff_date = timezone.now() - timedelta(days=period_days)
 
-        # Tickets in the period
-        tickets = queue.tickets.filter(created_at__gte=cutoff_date)
-        total_count = tickets.count()
+        # Abandoned tickets: still waiting beyond 2x SLA or marked as no_show
+        sla_seconds = queue.service.sla_seconds
+        abandon_threshold = timezone.now() - timedelta(seconds=sla_seconds * 2)
+
+        totals = KpiRollups.totals(
+            KpiRollups.for_period(queue=queue, since=cutoff_date),
+            # Hours entirely before the threshold
+            stale_waiting=Coalesce(
+                Sum("waiting_count", filter=Q(hour__lte=abandon_threshold - timedelta(hours=1))), 0
+            ),
+        )
+        total_count = totals["tickets_count"]
 
         if total_count == 0:
             return {
@@ -52,14 +62,7 @@ class AdvancedAnalytics:
                 "period_days": period_days,
             }
 
-        # Abandoned tickets: still waiting beyond 2x SLA or marked as no_show
-        sla_seconds = queue.service.sla_seconds
-        abandon_threshold = timezone.now() - timedelta(seconds=sla_seconds * 2)
-
-        abandoned_count = tickets.filter(
-            Q(status=Ticket.STATUS_NO_SHOW)
-            | Q(status=Ticket.STATUS_WAITING, created_at__lte=abandon_threshold)
-        ).count()
+        abandoned_count = totals["no_show_count"] + totals["stale_waiting"]
 
         abandonment_rate = (abandoned_count / total_count) * 100
 
@@ -93,31 +96,24 @@ class AdvancedAnalytics:
             "agent__user"
         )
 
+        # Service time of closed tickets, one grouped query for all agents
+        service_by_agent = {
+            row["agent_id"]: row
+            for row in KpiRollups.for_period(queue=queue, since=cutoff_date)
+            .filter(agent__isnull=False)
+            .values("agent_id")
+            .annotate(tickets_served=Sum("service_count"), service_seconds=Sum("service_sum"))
+        }
+
         agents_data = []
         total_service_seconds = 0
         total_available_seconds = 0
 
         for assignment in assignments:
             agent = assignment.agent
+            served = service_by_agent.get(agent.id, {})
 
-            # Calculate service time from closed tickets
-            closed_tickets = queue.tickets.filter(
-                agent=agent,
-                status=Ticket.STATUS_CLOSED,
-                ended_at__gte=cutoff_date,
-                started_at__isnull=False,
-            )
-
-            service_time_sum = closed_tickets.aggregate(
-                total_service=Sum(
-                    ExpressionWrapper(
-                        F("ended_at") - F("started_at"),
-                        output_field=FloatField(),
-                    )
-                )
-            )["total_service"]
-
-            service_seconds = service_time_sum or 0
+            service_seconds = served.get("service_seconds") or 0
 
             # Estimate available time (period_days * 8 hours work day)
             available_seconds = period_days * 8 * 3600
@@ -128,7 +124,7 @@ class AdvancedAnalytics:
                 {
                     "agent_id": str(agent.id),
                     "agent_name": agent.user.get_full_name(),
-                    "tickets_served": closed_tickets.count(),
+                    "tickets_served": served.get("tickets_served") or 0,
                     "total_service_seconds": int(service_seconds),
                     "available_seconds": available_seconds,
                     "utilization_rate": round(utilization, 2),
@@ -172,13 +168,10 @@ class AdvancedAnalytics:
         """
         cutoff_date = timezone.now() - timedelta(days=period_days)
 
-        closed_tickets = queue.tickets.filter(
-            status=Ticket.STATUS_CLOSED,
-            ended_at__gte=cutoff_date,
-            started_at__isnull=False,
-        )
+        totals = KpiRollups.totals(KpiRollups.for_period(queue=queue, since=cutoff_date))
 
-        total_count = closed_tickets.count()
+        # Closed tickets that went through service
+        total_count = totals["service_count"]
 
         if total_count == 0:
             return {
@@ -193,14 +186,7 @@ class AdvancedAnalytics:
         sla_seconds = queue.service.sla_seconds
 
         # Tickets where wait time <= SLA
-        compliant_tickets = closed_tickets.annotate(
-            wait_seconds=ExpressionWrapper(
-                F("started_at") - F("created_at"),
-                output_field=FloatField(),
-            )
-        ).filter(wait_seconds__lte=sla_seconds)
-
-        compliant_count = compliant_tickets.count()
+        compliant_count = totals["sla_met_count"]
         compliance_rate = (compliant_count / total_count) * 100
 
         return {
@@ -226,11 +212,11 @@ class AdvancedAnalytics:
         """
         cutoff_date = timezone.now() - timedelta(days=period_days)
 
-        # Get feedback for tickets in this queue
+        # Feedback.queue rather than ticket__queue: archived tickets are no longer in the tickets table
         feedback_queryset = Feedback.objects.filter(
-            ticket__queue=queue,
+            queue=queue,
             created_at__gte=cutoff_date,
-            rating__isnull=False,
+            csat_score__isnull=False,
         )
 
         total_feedback = feedback_queryset.count()
@@ -245,17 +231,19 @@ class AdvancedAnalytics:
             }
 
         # Average CSAT (1-5 scale)
-        avg_rating = feedback_queryset.aggregate(Avg("rating"))["rating__avg"]
+        avg_rating = feedback_queryset.aggregate(Avg("csat_score"))["csat_score__avg"]
 
         # Rating distribution
-        distribution = feedback_queryset.values("rating").annotate(count=Count("rating")).order_by("rating")
+        distribution = (
+            feedback_queryset.values("csat_score").annotate(count=Count("csat_score")).order_by("csat_score")
+        )
 
-        rating_distribution = {str(item["rating"]): item["count"] for item in distribution}
+        rating_distribution = {str(item["csat_score"]): item["count"] for item in distribution}
 
         # Calculate NPS (Net Promoter Score)
         # Promoters: rating 4-5, Passives: rating 3, Detractors: rating 1-2
-        promoters = feedback_queryset.filter(rating__gte=4).count()
-        detractors = feedback_queryset.filter(rating__lte=2).count()
+        promoters = feedback_queryset.filter(csat_score__gte=4).count()
+        detractors = feedback_queryset.filter(csat_score__lte=2).count()
 
         nps_score = ((promoters - detractors) / total_feedback) * 100 if total_feedback > 0 else 0
 
@@ -264,7 +252,7 @@ class AdvancedAnalytics:
             "nps_score": round(nps_score, 2),
             "total_feedback": total_feedback,
             "promoters_count": promoters,
-            "passives_count": feedback_queryset.filter(rating=3).count(),
+            "passives_count": feedback_queryset.filter(csat_score=3).count(),
             "detractors_count": detractors,
             "rating_distribution": rating_distribution,
             "period_days": period_days,
@@ -284,13 +272,13 @@ class AdvancedAnalytics:
         """
         cutoff_date = timezone.now() - timedelta(days=period_days)
 
-        # Group tickets by hour
+        # Group tickets by hour of day
         hourly_data = (
-            queue.tickets.filter(created_at__gte=cutoff_date)
-            .annotate(hour=ExtractHour("created_at"))
-            .values("hour")
-            .annotate(count=Count("id"))
-            .order_by("hour")
+            KpiRollups.for_period(queue=queue, since=cutoff_date)
+            .annotate(hour_of_day=ExtractHour("hour"))
+            .values("hour_of_day")
+            .annotate(count=Sum("tickets_count"))
+            .order_by("hour_of_day")
         )
 
         # Initialize all hours with 0
@@ -298,7 +286,7 @@ class AdvancedAnalytics:
 
         # Fill with actual data
         for item in hourly_data:
-            heatmap[item["hour"]] = item["count"]
+            heatmap[item["hour_of_day"]] += item["count"]
 
         # Calculate average per hour over the period
         for hour in heatmap:
@@ -329,52 +317,31 @@ class AdvancedAnalytics:
         """
         cutoff_date = timezone.now() - timedelta(days=period_days)
 
-        # Daily ticket count
-        daily_tickets = (
-            queue.tickets.filter(created_at__gte=cutoff_date)
-            .annotate(date=TruncDate("created_at"))
+        # Daily ticket count, wait and service sums in one grouped query
+        daily = list(
+            KpiRollups.for_period(queue=queue, since=cutoff_date)
+            .annotate(date=TruncDate("hour"))
             .values("date")
-            .annotate(count=Count("id"))
-            .order_by("date")
-        )
-
-        # Daily average wait time
-        daily_wait_time = (
-            queue.tickets.filter(
-                status=Ticket.STATUS_CLOSED,
-                ended_at__gte=cutoff_date,
-                started_at__isnull=False,
-            )
             .annotate(
-                date=TruncDate("created_at"),
-                wait_seconds=ExpressionWrapper(
-                    F("started_at") - F("created_at"),
-                    output_field=FloatField(),
-                ),
+                count=Sum("tickets_count"),
+                wait_count=Sum("wait_count"),
+                wait_sum=Sum("wait_sum"),
+                service_count=Sum("service_count"),
+                service_sum=Sum("service_sum"),
             )
-            .values("date")
-            .annotate(avg_wait=Avg("wait_seconds"))
-            .order_by("date")
-        )
-
-        # Daily average service time
-        daily_service_time = (
-            queue.tickets.filter(
-                status=Ticket.STATUS_CLOSED,
-                ended_at__gte=cutoff_date,
-                started_at__isnull=False,
-            )
-            .annotate(
-                date=TruncDate("started_at"),
-                service_seconds=ExpressionWrapper(
-                    F("ended_at") - F("started_at"),
-                    output_field=FloatField(),
-                ),
-            )
-            .values("date")
-            .annotate(avg_service=Avg("service_seconds"))
             .order_by("date")
         )
+        daily_tickets = [item for item in daily if item["count"]]
+        daily_wait_time = [
+            {"date": item["date"], "avg_wait": item["wait_sum"] / item["wait_count"]}
+            for item in daily
+            if item["wait_count"]
+        ]
+        daily_service_time = [
+            {"date": item["date"], "avg_service": item["service_sum"] / item["service_count"]}
+            for item in daily
+            if item["service_count"]
+        ]
 
         # Format data
         tickets_trend = [
@@ -456,18 +423,10 @@ class ABTestingFramework:
         """
 
         def get_period_metrics(start: datetime, end: datetime) -> dict:
-            tickets = queue.tickets.filter(
-                created_at__gte=start,
-                created_at__lte=end,
-            )
-
-            closed_tickets = tickets.filter(
-                status=Ticket.STATUS_CLOSED,
-                started_at__isnull=False,
-            )
+            totals = KpiRollups.totals(KpiRollups.for_period(queue=queue, since=start, until=end))
 
-            total_tickets = tickets.count()
-            closed_count = closed_tickets.count()
+            total_tickets = totals["tickets_count"]
+            closed_count = totals["closed_count"]
 
             if closed_count == 0:
                 return {
@@ -478,24 +437,11 @@ class ABTestingFramework:
                     "abandonment_rate": 0,
                 }
 
-            # Average wait time
-            avg_wait = closed_tickets.annotate(
-                wait_time=ExpressionWrapper(
-                    F("started_at") - F("created_at"),
-                    output_field=FloatField(),
-                )
-            ).aggregate(Avg("wait_time"))["wait_time__avg"]
-
-            # Average service time
-            avg_service = closed_tickets.annotate(
-                service_time=ExpressionWrapper(
-                    F("ended_at") - F("started_at"),
-                    output_field=FloatField(),
-                )
-            ).aggregate(Avg("service_time"))["service_time__avg"]
+            avg_wait = KpiRollups.mean(totals, "wait")
+            avg_service = KpiRollups.mean(totals, "service")
 
             # Abandonment
-            no_shows = tickets.filter(status=Ticket.STATUS_NO_SHOW).count()
+            no_shows = totals["no_show_count"]
             abandonment_rate = (no_shows / total_tickets * 100) if total_tickets > 0 else 0
 
             return {
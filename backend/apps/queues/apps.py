@@ -7,3 +7,8 @@ class QueuesConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.queues"
     verbose_name = "Queues"
+
+    def ready(self) -> None:
+        from . import signals  # noqa: F401 - enregistrement des receivers
+
+        return super().ready()
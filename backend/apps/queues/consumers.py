@@ -2,6 +2,8 @@ from __future__ import annotations
 
 from channels.generic.websocket import AsyncJsonWebsocketConsumer
 
+from apps.core.realtime import RealtimeGroups
+
 
 class QueueConsumer(AsyncJsonWebsocketConsumer):
     """Diffuse en temps réel l'état d'une file."""
@@ -9,7 +11,7 @@ class QueueConsumer(AsyncJsonWebsocketConsumer):
     async def connect(self):  # pragma: no cover - logique async testée séparément
         tenant_slug = self.scope["url_route"]["kwargs"].get("tenant_slug")
         queue_id = self.scope["url_route"]["kwargs"].get("queue_id")
-        self.group_name = f"queue:{tenant_slug}:{queue_id}"
+        self.group_name = RealtimeGroups.queue(tenant_slug, queue_id)
         await self.channel_layer.group_add(self.group_name, self.channel_name)
         await self.accept()
 
@@ -0,0 +1,204 @@
+"""Recalcul groupé des ETA de tous les tickets en attente.
+
+Remplace la boucle « un ``QueueAnalytics.calculate_eta`` par ticket » : les
+entrées de chaque file (temps de service glissant, agents disponibles, SLA)
+sont chargées une seule fois, le classement des tickets se fait en mémoire et les
+résultats sont réécrits par lots. Les règles de classement sont
+celles de ``QueueAnalytics._count_tickets_ahead``.
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Iterable
+
+from django.db import connection
+from django.db.models import Count
+from django.utils import timezone
+
+from apps.tickets.models import Ticket
+from apps.users.models import AgentProfile
+
+from .models import Queue, QueueAssignment
+from .service_stats import ServiceTimeStats
+
+
+@dataclass
+class QueueETAInputs:
+    """Paramètres d'une file nécessaires au calcul des ETA."""
+
+    algorithm: str
+    sla_seconds: int
+    avg_service_seconds: float
+    available_agents: int
+
+
+@dataclass
+class WaitingTicketRow:
+    """Projection minimale d'un ticket en attente."""
+
+    id: object
+    queue_id: object
+    created_at: datetime
+    priority: int
+    eta_seconds: int | None
+
+
+class ETAEngine:
+    """Moteur de recalcul des ETA par lots."""
+
+    BULK_BATCH_SIZE = 2000
+
+    @staticmethod
+    def recompute(queue_ids: Iterable | None = None) -> dict:
+        """
+        Recalcule et enregistre l'ETA de tous les tickets en attente.
+
+        Args:
+            queue_ids: restreindre à ces files (toutes par défaut)
+
+        Returns:
+            dict avec le nombre de tickets en attente et de tickets mis à jour
+        """
+        waiting = Ticket.objects.filter(status=Ticket.STATUS_WAITING)
+        if queue_ids is not None:
+            waiting = waiting.filter(queue_id__in=list(queue_ids))
+
+        rows = [
+            WaitingTicketRow(*values)
+            for values in waiting.values_list("id", "queue_id", "created_at", "priority", "eta_seconds")
+        ]
+        if not rows:
+            return {"total_waiting": 0, "updated_count": 0}
+
+        now = timezone.now()
+        inputs = ETAEngine.load_queue_inputs({row.queue_id for row in rows})
+        etas = ETAEngine.compute_etas(rows, inputs, now)
+
+        changed = [
+            (row.id, etas[row.id])
+            for row in rows
+            if etas.get(row.id) is not None and etas[row.id] != row.eta_seconds
+        ]
+        ETAEngine._write_etas(changed, now)
+
+        return {"total_waiting": len(rows), "updated_count": len(changed)}
+
+    @staticmethod
+    def _write_etas(changed: list[tuple[object, int]], now: datetime) -> None:
+        """
+        Réécrit les ETA modifiés.
+
+        ``bulk_update`` génère un ``CASE WHEN`` par ligne, coûteux côté Python
+        au-delà de quelques milliers de tickets : sous PostgreSQL on passe par
+        un ``UPDATE ... FROM (VALUES ...)`` par lot.
+        """
+        if not changed:
+            return
+
+        batch_size = ETAEngine.BULK_BATCH_SIZE
+        if connection.vendor != "postgresql":
+            Ticket.objects.bulk_update(
+                [Ticket(id=ticket_id, eta_seconds=eta, updated_at=now) for ticket_id, eta in changed],
+                ["eta_seconds", "updated_at"],
+                batch_size=batch_size,
+            )
+            return
+
+        table = Ticket._meta.db_table
+        with connection.cursor() as cursor:
+            for start in range(0, len(changed), batch_size):
+                batch = changed[start:start + batch_size]
+                placeholders = ", ".join(["(%s::uuid, %s::integer)"] * len(batch))
+                params: list = [now]
+                for ticket_id, eta in batch:
+                    params.extend((ticket_id, eta))
+                cursor.execute(
+                    f"UPDATE {table} AS t SET eta_seconds = v.eta, updated_at = %s "  # noqa: S608 - nom de table interne
+                    f"FROM (VALUES {placeholders}) AS v(id, eta) WHERE t.id = v.id",
+                    params,
+                )
+
+    @staticmethod
+    def load_queue_inputs(queue_ids: set) -> dict[object, QueueETAInputs]:
+        """Charge les paramètres de toutes les files en un nombre fixe de requêtes."""
+        queues = Queue.objects.filter(id__in=queue_ids).values_list(
+            "id", "algorithm", "service__sla_seconds"
+        )
+
+        stats = ServiceTimeStats.get_many(queue_ids)
+
+        available = dict(
+            QueueAssignment.objects.filter(
+                queue_id__in=queue_ids,
+                is_active=True,
+                agent__current_status=AgentProfile.STATUS_AVAILABLE,
+            )
+            .values("queue_id")
+            .annotate(count=Count("agent_id", distinct=True))
+            .values_list("queue_id", "count")
+        )
+
+        return {
+            queue_id: QueueETAInputs(
+                algorithm=algorithm,
+                sla_seconds=sla_seconds,
+                avg_service_seconds=stats[queue_id].service_mean or sla_seconds,
+                # Même convention que QueueAnalytics._count_available_agents
+                available_agents=max(available.get(queue_id, 0), 1),
+            )
+            for queue_id, algorithm, sla_seconds in queues
+        }
+
+    @staticmethod
+    def compute_etas(
+        rows: list[WaitingTicketRow],
+        inputs: dict[object, QueueETAInputs],
+        now: datetime,
+    ) -> dict[object, int]:
+        """Calcule l'ETA de chaque ticket (sans accès base)."""
+        by_queue: dict[object, list[WaitingTicketRow]] = defaultdict(list)
+        for row in rows:
+            by_queue[row.queue_id].append(row)
+
+        etas: dict[object, int] = {}
+        for queue_id, queue_rows in by_queue.items():
+            queue_inputs = inputs.get(queue_id)
+            if queue_inputs is None:
+                continue
+            ahead = ETAEngine._tickets_ahead(queue_rows, queue_inputs, now)
+            per_ticket = queue_inputs.avg_service_seconds / queue_inputs.available_agents
+            for row in queue_rows:
+                etas[row.id] = int(ahead[row.id] * per_ticket)
+        return etas
+
+    @staticmethod
+    def _tickets_ahead(
+        rows: list[WaitingTicketRow],
+        queue_inputs: QueueETAInputs,
+        now: datetime,
+    ) -> dict[object, int]:
+        algo = queue_inputs.algorithm
+
+        if algo == Queue.ALGO_PRIORITY:
+            keys = sorted((-row.priority, row.created_at) for row in rows)
+            return {row.id: bisect_left(keys, (-row.priority, row.created_at)) for row in rows}
+
+        if algo == Queue.ALGO_SLA:
+            cutoff = now - timedelta(seconds=queue_inputs.sla_seconds)
+            late = sorted(-row.priority for row in rows if row.created_at <= cutoff)
+            on_time = sorted(-row.priority for row in rows if row.created_at > cutoff)
+            ahead = {}
+            for row in rows:
+                if row.created_at <= cutoff:
+                    ahead[row.id] = bisect_left(late, -row.priority)
+                else:
+                    ahead[row.id] = len(late) + bisect_left(on_time, -row.priority)
+            return ahead
+
+        # FIFO (et repli)
+        created = sorted(row.created_at for row in rows)
+        return {row.id: bisect_left(created, row.created_at) for row in rows}
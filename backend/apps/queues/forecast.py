@@ -0,0 +1,388 @@
+"""Profils d'arrivées hebdomadaires et prévisions d'effectif (Erlang C).
+
+Chaque nuit, ``ArrivalProfiles.build_many`` agrège les ``QueueKpiRollup`` des
+``QUEUE_PROFILE_WEEKS`` dernières semaines de chaque file en deux matrices
+7 × 24 (jour de la semaine × heure locale du site) : tickets créés par heure
+et durée moyenne de service. Les matrices (float32) sont persistées dans
+``QueueArrivalProfile`` et mises en cache ; prédictions et prévisions
+d'effectif les lisent sans parcourir les tickets. Un profil absent est
+construit à la première lecture.
+
+``ErlangC`` donne, pour chaque créneau, l'effectif minimal pour qu'une part
+``target_sla`` des clients soit appelée avant le SLA du service (modèle
+M/M/N : arrivées de Poisson, durées de service exponentielles).
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Iterable
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Sum
+from django.utils import timezone
+
+from .models import Queue, QueueArrivalProfile, QueueKpiRollup
+from .rollups import hour_bucket
+from .service_stats import ServiceTimeStats
+
+DAYS = 7
+HOURS = 24
+SHAPE = (DAYS, HOURS)
+
+CACHE_KEY = "queue_arrival_profile:{queue_id}"
+# Plus d'une journée : un échec de la reconstruction nocturne ne vide pas le cache
+CACHE_TIMEOUT = 36 * 3600
+# Champs remplacés lors d'une reconstruction
+PROFILE_FIELDS = ["timezone", "weeks", "tickets", "arrival_rates", "service_times", "built_at", "updated_at"]
+
+PROFILE_WEEKS = getattr(settings, "QUEUE_PROFILE_WEEKS", 8)
+TARGET_SLA = getattr(settings, "QUEUE_STAFFING_TARGET_SLA", 80.0)
+# Borne de la recherche de l'effectif par créneau
+MAX_AGENTS = 500
+# Files traitées par requête lors de la reconstruction
+BUILD_BATCH_SIZE = 500
+
+
+def _zone(name: str):
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        return ZoneInfo("UTC")
+
+
+def _encode(matrix: np.ndarray) -> bytes:
+    return np.ascontiguousarray(matrix, dtype="<f4").tobytes()
+
+
+def _decode(data) -> np.ndarray:
+    return np.frombuffer(bytes(data), dtype="<f4").reshape(SHAPE)
+
+
+@dataclass
+class ArrivalProfile:
+    """Profil d'une file : matrices (jour de la semaine, heure locale)."""
+
+    # Tickets créés par heure (moyenne sur l'historique)
+    arrival_rates: np.ndarray
+    # Durée moyenne de service en secondes
+    service_times: np.ndarray
+    timezone: str = "UTC"
+    weeks: int = 0
+    tickets: int = 0
+    built_at: datetime | None = None
+
+    @classmethod
+    def from_model(cls, profile: QueueArrivalProfile) -> ArrivalProfile:
+        return cls(
+            arrival_rates=_decode(profile.arrival_rates),
+            service_times=_decode(profile.service_times),
+            timezone=profile.timezone,
+            weeks=profile.weeks,
+            tickets=profile.tickets,
+            built_at=profile.built_at,
+        )
+
+    def slot(self, moment: datetime) -> tuple[int, int]:
+        """Créneau (jour de la semaine, heure) de ``moment`` dans le fuseau du site."""
+        local = moment.astimezone(_zone(self.timezone))
+        return local.weekday(), local.hour
+
+    def to_cache(self) -> dict:
+        return {
+            "arrival_rates": _encode(self.arrival_rates),
+            "service_times": _encode(self.service_times),
+            "timezone": self.timezone,
+            "weeks": self.weeks,
+            "tickets": self.tickets,
+            "built_at": self.built_at,
+        }
+
+    @classmethod
+    def from_cache(cls, data: dict) -> ArrivalProfile:
+        return cls(
+            **{
+                **data,
+                "arrival_rates": _decode(data["arrival_rates"]),
+                "service_times": _decode(data["service_times"]),
+            }
+        )
+
+
+class ErlangC:
+    """Calculs de file M/M/N (formule d'Erlang C), vectorisés par créneau."""
+
+    @staticmethod
+    def required_agents(
+        arrival_rates,
+        service_times,
+        answer_seconds: float,
+        target_sla: float = TARGET_SLA,
+        max_agents: int = MAX_AGENTS,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Effectif minimal par créneau pour atteindre ``target_sla``.
+
+        Args:
+            arrival_rates: tickets par heure (tableau de forme quelconque)
+            service_times: durées moyennes de service en secondes (même forme)
+            answer_seconds: attente maximale visée (SLA du service)
+            target_sla: part des clients appelés dans ``answer_seconds`` (%)
+            max_agents: borne de la recherche
+
+        Returns:
+            (agents, conformité SLA attendue en %) ; ``max_agents`` si la cible
+            n'est pas atteinte avant la borne
+        """
+        rates = np.asarray(arrival_rates, dtype=float)
+        service = np.asarray(service_times, dtype=float)
+        # Charge offerte en Erlangs
+        load = (rates / 3600.0 * service).ravel()
+        service = np.broadcast_to(service, rates.shape).ravel()
+
+        agents = np.full(load.shape, max_agents, dtype=np.int64)
+        levels = np.zeros(load.shape)
+        idle = load <= 0
+        agents[idle] = 0
+        levels[idle] = 100.0
+        done = idle.copy()
+
+        # Erlang B par récurrence : B(0) = 1, B(n) = A·B(n-1) / (n + A·B(n-1))
+        blocking = np.ones(load.shape)
+        level = np.zeros(load.shape)
+        for count in range(1, max_agents + 1):
+            if done.all():
+                break
+            blocking = load * blocking / (count + load * blocking)
+            level = ErlangC._service_level(count, load, blocking, answer_seconds, service) * 100
+            reached = ~done & (level >= target_sla)
+            agents[reached] = count
+            levels[reached] = level[reached]
+            done |= reached
+        levels[~done] = level[~done]
+        return agents.reshape(rates.shape), levels.reshape(rates.shape)
+
+    @staticmethod
+    def service_level(agents: int, arrival_rate: float, service_time: float, answer_seconds: float) -> float:
+        """Conformité SLA attendue (%) avec ``agents`` agents."""
+        load = arrival_rate / 3600.0 * service_time
+        if load <= 0:
+            return 100.0
+        blocking = 1.0
+        for count in range(1, agents + 1):
+            blocking = load * blocking / (count + load * blocking)
+        level = ErlangC._service_level(agents, np.array([load]), np.array([blocking]), answer_seconds, service_time)
+        return float(level[0]) * 100
+
+    @staticmethod
+    def _service_level(count: int, load: np.ndarray, blocking: np.ndarray, answer_seconds: float, service) -> np.ndarray:
+        """P(attente ≤ answer_seconds) = 1 - C(N, A)·exp(-(N - A)·T / s), 0 si la file diverge."""
+        stable = count > load
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            waiting = blocking / (1 - load / count * (1 - blocking))
+            level = 1 - waiting * np.exp(-(count - load) * answer_seconds / service)
+        return np.where(stable, np.clip(level, 0.0, 1.0), 0.0)
+
+
+class ArrivalProfiles:
+    """Construction et lecture des profils d'arrivées des files."""
+
+    @staticmethod
+    def _cache_key(queue_id) -> str:
+        return CACHE_KEY.format(queue_id=queue_id)
+
+    @staticmethod
+    def get(queue: Queue) -> ArrivalProfile:
+        """Profil d'une file (cache, puis base, puis construction depuis les agrégats)."""
+        key = ArrivalProfiles._cache_key(queue.id)
+        data = cache.get(key)
+        if data is not None:
+            return ArrivalProfile.from_cache(data)
+
+        stored = QueueArrivalProfile.objects.filter(queue_id=queue.id).first()
+        if stored is None:
+            return ArrivalProfiles.build_many([queue.id])[queue.id]
+        profile = ArrivalProfile.from_model(stored)
+        cache.set(key, profile.to_cache(), timeout=CACHE_TIMEOUT)
+        return profile
+
+    @staticmethod
+    def build_many(
+        queue_ids: Iterable | None = None,
+        until: datetime | None = None,
+        weeks: int = PROFILE_WEEKS,
+    ) -> dict[object, ArrivalProfile]:
+        """
+        Reconstruit les profils depuis les agrégats KPI horaires.
+
+        Args:
+            queue_ids: files à reconstruire (toutes par défaut)
+            until: fin de l'historique (heure courante exclue par défaut)
+            weeks: profondeur de l'historique
+
+        Returns:
+            dict queue_id -> profil
+        """
+        until = hour_bucket(until or timezone.now())
+        since = until - timedelta(weeks=weeks)
+        queues = Queue.objects.select_related("site", "service").order_by("id")
+        if queue_ids is not None:
+            queues = queues.filter(id__in=list(queue_ids))
+
+        # Créneau local de chaque heure UTC de l'historique, par fuseau
+        hour_count = weeks * DAYS * HOURS
+        slots_by_zone: dict[str, np.ndarray] = {}
+
+        def slots(zone_name: str) -> np.ndarray:
+            if zone_name not in slots_by_zone:
+                zone = _zone(zone_name)
+                moments = (since + timedelta(hours=offset) for offset in range(hour_count))
+                slots_by_zone[zone_name] = np.array(
+                    [local.weekday() * HOURS + local.hour for local in (moment.astimezone(zone) for moment in moments)],
+                    dtype=np.int64,
+                )
+            return slots_by_zone[zone_name]
+
+        profiles: dict[object, ArrivalProfile] = {}
+        queue_list = list(queues)
+        for offset in range(0, len(queue_list), BUILD_BATCH_SIZE):
+            batch = queue_list[offset:offset + BUILD_BATCH_SIZE]
+            batch_ids = [queue.id for queue in batch]
+            rows = (
+                QueueKpiRollup.objects.filter(queue_id__in=batch_ids, hour__gte=since, hour__lt=until)
+                .values("queue_id", "hour")
+                .annotate(
+                    tickets=Sum("tickets_count"),
+                    service_count=Sum("service_count"),
+                    service_sum=Sum("service_sum"),
+                )
+                .order_by()
+            )
+            # Une ligne par (file, heure) ; colonnes : indice d'heure, tickets, services, somme des durées
+            columns: dict[object, list[tuple[int, float, float, float]]] = {queue_id: [] for queue_id in batch_ids}
+            for row in rows.iterator(chunk_size=10000):
+                index = int((row["hour"] - since).total_seconds() // 3600)
+                columns[row["queue_id"]].append(
+                    (index, row["tickets"] or 0, row["service_count"] or 0, row["service_sum"] or 0.0)
+                )
+            fallback_service = ServiceTimeStats.get_many(batch_ids)
+
+            built_at = timezone.now()
+            for queue in batch:
+                zone_name = queue.site.timezone if queue.site_id else "UTC"
+                fallback = fallback_service[queue.id].service_mean or queue.service.sla_seconds
+                profiles[queue.id] = ArrivalProfiles._profile(
+                    np.array(columns[queue.id], dtype=float).reshape(-1, 4),
+                    slots(zone_name),
+                    fallback_service=float(fallback),
+                    zone_name=zone_name,
+                    built_at=built_at,
+                )
+
+            # Upsert sur la file (OneToOne) : deux constructions concurrentes (première
+            # lecture et tâche nocturne, par exemple) ne se heurtent pas
+            QueueArrivalProfile.objects.bulk_create(
+                [
+                    QueueArrivalProfile(
+                        tenant_id=queue.tenant_id,
+                        queue_id=queue.id,
+                        timezone=profiles[queue.id].timezone,
+                        weeks=profiles[queue.id].weeks,
+                        tickets=profiles[queue.id].tickets,
+                        arrival_rates=_encode(profiles[queue.id].arrival_rates),
+                        service_times=_encode(profiles[queue.id].service_times),
+                        built_at=built_at,
+                    )
+                    for queue in batch
+                ],
+                update_conflicts=True,
+                unique_fields=["queue"],
+                update_fields=PROFILE_FIELDS,
+            )
+            cache.set_many(
+                {ArrivalProfiles._cache_key(queue_id): profiles[queue_id].to_cache() for queue_id in batch_ids},
+                timeout=CACHE_TIMEOUT,
+            )
+        return profiles
+
+    @staticmethod
+    def _profile(
+        rows: np.ndarray,
+        hour_slots: np.ndarray,
+        fallback_service: float,
+        zone_name: str,
+        built_at: datetime,
+    ) -> ArrivalProfile:
+        """Matrices d'une file à partir de ses lignes (indice d'heure, tickets, services, durées)."""
+        cells = DAYS * HOURS
+        # Occurrences de chaque créneau depuis la première heure avec des tickets
+        first_hour = int(rows[:, 0].min()) if len(rows) else len(hour_slots)
+        observed = np.bincount(hour_slots[first_hour:], minlength=cells)
+        slot_of_row = hour_slots[rows[:, 0].astype(np.int64)]
+        tickets = np.bincount(slot_of_row, weights=rows[:, 1], minlength=cells)
+        service_count = np.bincount(slot_of_row, weights=rows[:, 2], minlength=cells)
+        service_sum = np.bincount(slot_of_row, weights=rows[:, 3], minlength=cells)
+
+        overall = service_sum.sum() / service_count.sum() if service_count.sum() else fallback_service
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rates = np.where(observed > 0, tickets / observed, 0.0)
+            service = np.where(service_count > 0, service_sum / service_count, overall)
+        return ArrivalProfile(
+            arrival_rates=rates.reshape(SHAPE).astype(np.float32),
+            service_times=service.reshape(SHAPE).astype(np.float32),
+            timezone=zone_name,
+            weeks=int(np.ceil(len(hour_slots[first_hour:]) / cells)),
+            tickets=int(tickets.sum()),
+            built_at=built_at,
+        )
+
+    @staticmethod
+    def staffing(queue: Queue, target_sla: float = TARGET_SLA, weekday: int | None = None) -> dict:
+        """
+        Effectif requis par créneau horaire pour atteindre ``target_sla``.
+
+        Args:
+            queue: file concernée
+            target_sla: conformité SLA visée (%)
+            weekday: jour de la semaine (0 = lundi) ; toute la semaine par défaut
+
+        Returns:
+            dict avec un créneau par (jour, heure) : arrivées, durée, effectif
+        """
+        profile = ArrivalProfiles.get(queue)
+        sla_seconds = queue.service.sla_seconds
+        agents, levels = ErlangC.required_agents(
+            profile.arrival_rates, profile.service_times, sla_seconds, target_sla
+        )
+        occupancy = profile.arrival_rates / 3600.0 * profile.service_times / np.maximum(agents, 1)
+
+        days = range(DAYS) if weekday is None else [weekday]
+        intervals = [
+            {
+                "weekday": day,
+                "hour": hour,
+                "arrival_rate": round(float(profile.arrival_rates[day, hour]), 2),
+                "service_seconds": round(float(profile.service_times[day, hour])),
+                "required_agents": int(agents[day, hour]),
+                "sla_compliance_rate": round(float(levels[day, hour]), 2),
+                "occupancy_rate": round(float(occupancy[day, hour]) * 100, 2),
+            }
+            for day in days
+            for hour in range(HOURS)
+        ]
+        return {
+            "queue_id": str(queue.id),
+            "timezone": profile.timezone,
+            "interval_minutes": 60,
+            "weeks": profile.weeks,
+            "tickets": profile.tickets,
+            "built_at": profile.built_at.isoformat() if profile.built_at else None,
+            "sla_seconds": sla_seconds,
+            "target_sla_percent": target_sla,
+            "peak_agents": max((interval["required_agents"] for interval in intervals), default=0),
+            "intervals": intervals,
+        }
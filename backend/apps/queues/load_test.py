@@ -0,0 +1,638 @@
+"""Banc de charge de bout en bout : inscriptions, appels d'agents et diffusion temps réel.
+
+Les opérations passent par les vraies vues DRF (``APIRequestFactory``, sans
+réseau ni middlewares) depuis des threads concurrents, chacun avec sa propre
+connexion à la base :
+
+- inscriptions publiques (``QueueSignupView``) ;
+- agents enchaînant ``call_next`` / ``start_service`` / ``close`` ;
+- suivi public des tickets (``PublicTicketStatusView``) ;
+- écrans interrogeant ``PublicDisplayTicketsView`` avec ``If-None-Match``.
+
+En parallèle, des centaines d'abonnés WebSocket (écrans et tickets) sont
+connectés à l'application ASGI par ``WebsocketCommunicator`` : ils reçoivent
+les diffusions réelles via le channel layer Redis. Le délai de livraison est
+mesuré entre la fin de l'opération qui a émis l'événement et sa réception.
+
+Le rapport (JSON) donne par opération le débit, les latences p50/p95/p99 et
+le nombre de requêtes SQL, pour comparer deux commits. Commande :
+``load_test``. À lancer sur PostgreSQL et Redis locaux, avec un worker Celery
+(ou ``--eager-tasks``) pour les tâches déclenchées (ETA, écrans).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import math
+import random
+import subprocess
+import threading
+import time
+import zlib
+from collections import Counter, deque
+from contextlib import ExitStack
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Callable
+
+from django.conf import settings
+from django.db import connections, router
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.tickets.models import Ticket
+
+from .models import Queue, QueueAssignment, Service, Site
+
+logger = logging.getLogger(__name__)
+
+DATASET_SLUG = "load-test-bench"
+
+# Origine acceptée par DisplayConsumer
+WS_ORIGIN = b"http://localhost:3000"
+
+# Pause d'un agent dont la file est vide
+EMPTY_QUEUE_PAUSE = 0.05
+
+
+@dataclass
+class LoadTestConfig:
+    """Paramètres d'un tir de charge."""
+
+    duration: float = 30.0
+    queues: int = 4
+    agents: int = 8
+    displays: int = 4
+    signup_workers: int = 8
+    status_pollers: int = 8
+    display_pollers: int = 4
+    ws_displays: int = 100
+    ws_tickets: int = 200
+    # Tickets en attente par file avant le tir (suivis par les abonnés tickets)
+    prefill: int = 50
+    # Durée simulée du service entre start_service et close (secondes)
+    service_seconds: float = 0.0
+    # Borne d'itérations par worker (None : jusqu'à ``duration``)
+    iterations: int | None = None
+    # Exécution séquentielle dans le thread courant (tests, SQLite en mémoire)
+    inline: bool = False
+    drain_seconds: float = 2.0
+    seed: int = 0
+
+
+@dataclass
+class LoadFixtures:
+    """Objets du jeu de données partagés par les workers."""
+
+    tenant: object
+    queues: list
+    agents: list
+    displays: list
+    prefilled: list[str] = field(default_factory=list)
+
+
+def percentile(values: list[float], rank: float) -> float | None:
+    """Percentile au rang le plus proche d'une liste triée."""
+    if not values:
+        return None
+    index = min(len(values) - 1, max(0, math.ceil(rank / 100 * len(values)) - 1))
+    return values[index]
+
+
+def latency_summary(values: list[float]) -> dict:
+    """p50/p95/p99, moyenne et maximum (ms) d'une série de mesures."""
+    ordered = sorted(values)
+    return {
+        "p50": _round(percentile(ordered, 50)),
+        "p95": _round(percentile(ordered, 95)),
+        "p99": _round(percentile(ordered, 99)),
+        "mean": _round(sum(ordered) / len(ordered)) if ordered else None,
+        "max": _round(ordered[-1]) if ordered else None,
+    }
+
+
+def _round(value: float | None) -> float | None:
+    return round(value, 2) if value is not None else None
+
+
+class LoadRecorder:
+    """Mesures partagées entre threads : latences, requêtes SQL, événements émis et reçus."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.latencies: dict[str, list[float]] = {}
+        self.queries: dict[str, list[int]] = {}
+        self.statuses: dict[str, Counter] = {}
+        self.errors: Counter = Counter()
+        # (ticket_id, statut) -> fin de l'opération qui a émis l'événement
+        self.emitted: dict[tuple[str, str], float] = {}
+        # (ticket_id, statut, type de message, réception)
+        self.deliveries: list[tuple[str, str, str, float]] = []
+        self.messages: Counter = Counter()
+        self.recent_tickets: deque[str] = deque(maxlen=1000)
+
+    def measure(self, name: str, func: Callable[[], object]):
+        """Exécute ``func`` en mesurant sa durée et ses requêtes sur toutes les bases."""
+        with ExitStack() as stack:
+            contexts = [stack.enter_context(CaptureQueriesContext(connections[alias])) for alias in connections]
+            start = time.perf_counter()
+            try:
+                result = func()
+            except Exception:  # noqa: BLE001 - une erreur est une mesure
+                elapsed = (time.perf_counter() - start) * 1000
+                logger.warning("Opération %s en échec", name, exc_info=True)
+                with self._lock:
+                    self.errors[name] += 1
+                    self.latencies.setdefault(name, []).append(elapsed)
+                return None
+            elapsed = (time.perf_counter() - start) * 1000
+        status_code = getattr(result, "status_code", None)
+        with self._lock:
+            self.latencies.setdefault(name, []).append(elapsed)
+            self.queries.setdefault(name, []).append(sum(len(context) for context in contexts))
+            self.statuses.setdefault(name, Counter())[str(status_code)] += 1
+            if status_code is not None and status_code >= 500:
+                self.errors[name] += 1
+        return result
+
+    def emit(self, ticket_id: str, status: str) -> None:
+        with self._lock:
+            self.emitted.setdefault((ticket_id, status), time.time())
+
+    def deliver(self, kind: str, ticket_id: str | None = None, status: str | None = None) -> None:
+        received = time.time()
+        with self._lock:
+            self.messages[kind] += 1
+            if ticket_id and status:
+                self.deliveries.append((ticket_id, status, kind, received))
+
+    def operations(self, elapsed: float) -> dict:
+        report = {}
+        for name, values in sorted(self.latencies.items()):
+            queries = self.queries.get(name, [])
+            report[name] = {
+                "count": len(values),
+                "errors": self.errors.get(name, 0),
+                "throughput_per_s": round(len(values) / elapsed, 2) if elapsed else None,
+                "latency_ms": latency_summary(values),
+                "queries": {
+                    "mean": round(sum(queries) / len(queries), 2) if queries else None,
+                    "max": max(queries) if queries else None,
+                },
+                "statuses": dict(self.statuses.get(name, {})),
+            }
+        return report
+
+    def realtime(self, subscribed_tickets: set[str]) -> dict:
+        lags: dict[str, list[float]] = {}
+        delivered_keys = set()
+        for ticket_id, status, kind, received in self.deliveries:
+            sent = self.emitted.get((ticket_id, status))
+            if sent is None:
+                continue
+            # Message parfois reçu avant le retour de la vue : délai nul
+            lags.setdefault(kind, []).append(max(0.0, received - sent) * 1000)
+            if kind == "ticket_updated":
+                delivered_keys.add((ticket_id, status))
+        expected = {key for key in self.emitted if key[0] in subscribed_tickets}
+        return {
+            "messages": dict(self.messages),
+            "lag_ms": {kind: latency_summary(values) for kind, values in sorted(lags.items())},
+            "ticket_events_expected": len(expected),
+            "ticket_events_delivered": len(expected & delivered_keys),
+        }
+
+
+class RealtimeSubscribers:
+    """Abonnés WebSocket écrans et tickets, dans une boucle asyncio dédiée."""
+
+    def __init__(self, fixtures: LoadFixtures, recorder: LoadRecorder, displays: int, tickets: int) -> None:
+        self.fixtures = fixtures
+        self.recorder = recorder
+        self.display_count = displays
+        self.ticket_ids = fixtures.prefilled[:tickets]
+        self.connected = 0
+        self.failed = 0
+        self._ready = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @staticmethod
+    def unavailable_reason() -> str | None:
+        """Raison d'ignorer les abonnés (channel layer non partageable entre threads)."""
+        backend = settings.CHANNEL_LAYERS.get("default", {}).get("BACKEND", "")
+        if "RedisChannelLayer" not in backend and "RedisPubSubChannelLayer" not in backend:
+            return f"channel layer {backend or 'absent'} : Redis requis"
+        return None
+
+    def start(self, timeout: float = 60.0) -> None:
+        self._thread = threading.Thread(target=lambda: asyncio.run(self._main()), name="load-test-ws", daemon=True)
+        self._thread.start()
+        self._ready.wait(timeout)
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=30)
+
+    def report(self) -> dict:
+        return {
+            "display_subscribers": self.display_count,
+            "ticket_subscribers": len(self.ticket_ids),
+            "connected": self.connected,
+            "failed": self.failed,
+        }
+
+    async def _main(self) -> None:
+        from channels.testing import WebsocketCommunicator
+
+        from smartqueue_backend.asgi import application
+
+        slug = self.fixtures.tenant.slug
+        paths = [
+            f"/ws/tenants/{slug}/displays/{self.fixtures.displays[index % len(self.fixtures.displays)].id.hex}/"
+            for index in range(self.display_count if self.fixtures.displays else 0)
+        ] + [f"/ws/tenants/{slug}/tickets/{ticket_id}/" for ticket_id in self.ticket_ids]
+
+        communicators = []
+        for path in paths:
+            communicator = WebsocketCommunicator(application, path, headers=[(b"origin", WS_ORIGIN)])
+            try:
+                connected, _subprotocol = await communicator.connect(timeout=10)
+            except Exception:  # noqa: BLE001
+                connected = False
+            if connected:
+                communicators.append(communicator)
+            else:
+                self.failed += 1
+        self.connected = len(communicators)
+        self._ready.set()
+
+        await asyncio.gather(*(self._listen(communicator) for communicator in communicators))
+        for communicator in communicators:
+            try:
+                await communicator.disconnect(timeout=5)
+            except Exception:  # noqa: BLE001
+                pass
+
+    async def _listen(self, communicator) -> None:
+        while not self._stop.is_set():
+            try:
+                # receive_output(timeout) annulerait le consumer à la première attente vide
+                output = await asyncio.wait_for(communicator.output_queue.get(), timeout=0.5)
+            except asyncio.TimeoutError:
+                continue
+            if output.get("type") != "websocket.send":
+                return
+            self._record(json.loads(output.get("text") or "{}"))
+
+    def _record(self, message: dict) -> None:
+        kind = message.get("type")
+        if kind == "ticket_called":
+            ticket = message.get("ticket", {})
+            self.recorder.deliver(kind, ticket.get("id"), ticket.get("status"))
+        elif "ticket_id" in message:
+            # TicketConsumer : charge utile de RealtimeBroadcaster.ticket_event
+            self.recorder.deliver("ticket_updated", message["ticket_id"], message.get("status"))
+        else:
+            self.recorder.deliver(kind or "unknown")
+
+
+class LoadTestDataset:
+    """Tenant dédié au banc de charge : files, agents, écrans et tickets en attente."""
+
+    @staticmethod
+    def drop() -> None:
+        from apps.tenants.models import Tenant
+        from apps.users.models import User
+
+        from .models import QueueKpiRollup
+
+        tenant = Tenant.objects.filter(slug=DATASET_SLUG).first()
+        if tenant is not None:
+            using = router.db_for_write(Ticket)
+            Ticket.objects.filter(tenant=tenant)._raw_delete(using)
+            QueueKpiRollup.objects.filter(tenant=tenant)._raw_delete(using)
+            # Queue.service est protégé : files avant services
+            Queue.objects.filter(tenant=tenant).delete()
+            tenant.delete()
+        User.objects.filter(email__endswith=f"@{DATASET_SLUG}.local").delete()
+
+    @staticmethod
+    def create(config: LoadTestConfig) -> LoadFixtures:
+        """Crée le jeu de données ; les tickets pré-remplis passent par la vue d'inscription."""
+        from apps.displays.models import Display
+        from apps.tenants.models import Tenant, TenantMembership
+        from apps.users.models import AgentProfile, User
+
+        tenant = Tenant.objects.create(slug=DATASET_SLUG, name="Load test benchmark")
+        site = Site.objects.create(tenant=tenant, slug="load", name="Load")
+        service = Service.objects.create(tenant=tenant, site=site, name="Load", sla_seconds=600)
+
+        queues = [
+            Queue.objects.create(
+                tenant=tenant,
+                site=site,
+                service=service,
+                slug=f"load-{index:03d}",
+                name=f"Load {index:03d}",
+                max_capacity=0,
+            )
+            for index in range(config.queues)
+        ]
+
+        agents = []
+        for index in range(config.agents):
+            user = User.objects.create(email=f"agent{index:03d}@{DATASET_SLUG}.local", first_name="Agent", last_name=f"{index}")
+            TenantMembership.objects.create(tenant=tenant, user=user, role=TenantMembership.ROLE_AGENT)
+            profile, _ = AgentProfile.objects.get_or_create(user=user)
+            profile.counter_number = index + 1
+            profile.save(update_fields=["counter_number"])
+            queue = queues[index % len(queues)]
+            QueueAssignment.objects.create(tenant=tenant, queue=queue, agent=profile)
+            agents.append((user, profile, queue))
+
+        displays = []
+        for index in range(config.displays):
+            display = Display.objects.create(
+                tenant=tenant,
+                site=site,
+                name=f"Load {index:03d}",
+                display_type=Display.TYPE_MAIN,
+                device_id=f"{DATASET_SLUG}-{index:03d}",
+            )
+            display.queues.set(queues)
+            displays.append(display)
+
+        fixtures = LoadFixtures(tenant=tenant, queues=queues, agents=agents, displays=displays)
+        client = LoadClient(fixtures)
+        for index in range(config.prefill * len(queues)):
+            response = client.signup(queues[index % len(queues)], f"prefill-{index}")
+            if response.status_code == 201:
+                fixtures.prefilled.append(response.data["ticket_id"])
+        return fixtures
+
+
+class LoadClient:
+    """Appels des vues DRF telles que les clients HTTP les déclenchent."""
+
+    def __init__(self, fixtures: LoadFixtures) -> None:
+        from rest_framework.test import APIRequestFactory
+
+        from apps.displays.views import PublicDisplayTicketsView
+        from apps.tickets.views import TicketViewSet
+        from apps.users.views import AgentStatusViewSet
+
+        from .public_views import PublicTicketStatusView, QueueSignupView
+
+        self.fixtures = fixtures
+        self.factory = APIRequestFactory()
+        self.signup_view = QueueSignupView.as_view()
+        self.status_view = PublicTicketStatusView.as_view()
+        self.display_view = PublicDisplayTicketsView.as_view()
+        self.call_next_view = AgentStatusViewSet.as_view({"post": "call_next"})
+        self.start_view = TicketViewSet.as_view({"post": "start_service"})
+        self.close_view = TicketViewSet.as_view({"post": "close"})
+
+    @property
+    def slug(self) -> str:
+        return self.fixtures.tenant.slug
+
+    def signup(self, queue: Queue, key: str):
+        request = self.factory.post(
+            f"/api/v1/public/tenants/{self.slug}/queues/{queue.id}/signup/",
+            {"full_name": f"Client {key}", "email": f"{key}@{DATASET_SLUG}.local", "phone": f"+33{zlib.crc32(key.encode()) % 10**9:09d}"},
+            format="json",
+        )
+        return self.signup_view(request, tenant_slug=self.slug, queue_id=str(queue.id))
+
+    def ticket_status(self, ticket_id: str):
+        request = self.factory.get(f"/api/v1/public/tenants/{self.slug}/tickets/{ticket_id}/")
+        return self.status_view(request, tenant_slug=self.slug, ticket_id=ticket_id)
+
+    def display_poll(self, display, etag: str | None):
+        headers = {"HTTP_IF_NONE_MATCH": etag} if etag else {}
+        request = self.factory.get(f"/api/v1/public/tenants/{self.slug}/displays/{display.id.hex}/tickets/", **headers)
+        return self.display_view(request, tenant_slug=self.slug, pk=display.id.hex)
+
+    def _agent_request(self, user, path: str, data: dict | None = None):
+        from rest_framework.test import force_authenticate
+
+        request = self.factory.post(path, data or {}, format="json")
+        force_authenticate(request, user=user)
+        # Posé par TenantMiddleware en production
+        request.tenant = self.fixtures.tenant
+        return request
+
+    def call_next(self, user, queue: Queue):
+        request = self._agent_request(user, "/api/v1/agents/me/call-next/", {"queue_id": str(queue.id)})
+        return self.call_next_view(request)
+
+    def start_service(self, user, ticket_id: str):
+        return self.start_view(self._agent_request(user, f"/api/v1/tickets/{ticket_id}/start_service/"), pk=ticket_id)
+
+    def close(self, user, ticket_id: str):
+        return self.close_view(self._agent_request(user, f"/api/v1/tickets/{ticket_id}/close/"), pk=ticket_id)
+
+
+class LoadTestRunner:
+    """Orchestration d'un tir : workers, abonnés WebSocket et rapport."""
+
+    def __init__(self, config: LoadTestConfig, fixtures: LoadFixtures) -> None:
+        self.config = config
+        self.fixtures = fixtures
+        self.recorder = LoadRecorder()
+        self.client = LoadClient(fixtures)
+        self.recorder.recent_tickets.extend(fixtures.prefilled)
+        self._deadline = 0.0
+        self._signups = 0
+        self._lock = threading.Lock()
+
+    # --- workers --------------------------------------------------------------
+
+    def signup_worker(self, index: int) -> Callable[[random.Random], None]:
+        def step(rng: random.Random) -> None:
+            with self._lock:
+                self._signups += 1
+                key = f"signup-{self._signups}"
+            queue = rng.choice(self.fixtures.queues)
+            response = self.recorder.measure("signup", lambda: self.client.signup(queue, key))
+            if response is not None and response.status_code == 201:
+                self.recorder.recent_tickets.append(response.data["ticket_id"])
+
+        return step
+
+    def agent_worker(self, index: int) -> Callable[[random.Random], None]:
+        user, _profile, queue = self.fixtures.agents[index]
+        # Ticket en cours et prochaine étape : une étape en échec est rejouée
+        current: dict = {"ticket_id": None, "status": None}
+
+        def resync() -> None:
+            # Étape validée en base mais réponse en erreur (hook après commit...) : reprendre l'état réel
+            status = Ticket.objects.filter(id=current["ticket_id"]).values_list("status", flat=True).first()
+            if status in (Ticket.STATUS_CALLED, Ticket.STATUS_IN_SERVICE):
+                current["status"] = status
+            else:
+                current.update(ticket_id=None, status=None)
+
+        def step(rng: random.Random) -> None:
+            if current["ticket_id"] is None:
+                response = self.recorder.measure("call_next", lambda: self.client.call_next(user, queue))
+                if response is None or response.status_code != 200:
+                    time.sleep(EMPTY_QUEUE_PAUSE)
+                    return
+                current.update(ticket_id=response.data["id"], status=Ticket.STATUS_CALLED)
+                self.recorder.emit(current["ticket_id"], Ticket.STATUS_CALLED)
+
+            ticket_id = current["ticket_id"]
+            if current["status"] == Ticket.STATUS_CALLED:
+                response = self.recorder.measure("start_service", lambda: self.client.start_service(user, ticket_id))
+                if response is None or response.status_code != 200:
+                    resync()
+                    return
+                current["status"] = Ticket.STATUS_IN_SERVICE
+                self.recorder.emit(ticket_id, Ticket.STATUS_IN_SERVICE)
+                if self.config.service_seconds:
+                    time.sleep(rng.expovariate(1 / self.config.service_seconds))
+
+            response = self.recorder.measure("close", lambda: self.client.close(user, ticket_id))
+            if response is not None and response.status_code == 200:
+                current.update(ticket_id=None, status=None)
+                self.recorder.emit(ticket_id, Ticket.STATUS_CLOSED)
+            else:
+                resync()
+
+        return step
+
+    def status_worker(self, index: int) -> Callable[[random.Random], None]:
+        def step(rng: random.Random) -> None:
+            tickets = self.recorder.recent_tickets
+            if not tickets:
+                return
+            ticket_id = tickets[rng.randrange(len(tickets))]
+            self.recorder.measure("ticket_status", lambda: self.client.ticket_status(ticket_id))
+
+        return step
+
+    def display_worker(self, index: int) -> Callable[[random.Random], None]:
+        display = self.fixtures.displays[index % len(self.fixtures.displays)]
+        etag = None
+
+        def step(rng: random.Random) -> None:
+            nonlocal etag
+            response = self.recorder.measure("display_poll", lambda: self.client.display_poll(display, etag))
+            if response is not None and response.status_code in (200, 304):
+                etag = response["ETag"]
+
+        return step
+
+    def workers(self) -> list[Callable[[random.Random], None]]:
+        config = self.config
+        steps = [self.signup_worker(index) for index in range(config.signup_workers)]
+        steps += [self.agent_worker(index) for index in range(len(self.fixtures.agents))]
+        steps += [self.status_worker(index) for index in range(config.status_pollers)]
+        if self.fixtures.displays:
+            steps += [self.display_worker(index) for index in range(config.display_pollers)]
+        return steps
+
+    # --- exécution ------------------------------------------------------------
+
+    def run(self) -> dict:
+        config = self.config
+        subscribers = None
+        realtime_skipped = RealtimeSubscribers.unavailable_reason() or (
+            "exécution séquentielle" if config.inline else None
+        )
+        if realtime_skipped is None and (config.ws_displays or config.ws_tickets):
+            subscribers = RealtimeSubscribers(self.fixtures, self.recorder, config.ws_displays, config.ws_tickets)
+            subscribers.start()
+
+        started_at = timezone.now()
+        start = time.perf_counter()
+        self._deadline = start + config.duration
+        steps = self.workers()
+        if config.inline:
+            self._run_inline(steps)
+        else:
+            self._run_threads(steps)
+        elapsed = time.perf_counter() - start
+
+        realtime: dict = {"skipped": realtime_skipped} if realtime_skipped else {}
+        if subscribers is not None:
+            from apps.core.realtime import RealtimeBroadcaster
+
+            RealtimeBroadcaster.flush()
+            time.sleep(config.drain_seconds)
+            subscribers.stop()
+            realtime = {
+                **subscribers.report(),
+                **self.recorder.realtime(set(subscribers.ticket_ids)),
+            }
+
+        return {
+            "commit": git_commit(),
+            "started_at": started_at.isoformat(),
+            "database": connections[router.db_for_write(Ticket)].vendor,
+            "config": asdict(config),
+            "elapsed_s": round(elapsed, 3),
+            "operations": self.recorder.operations(elapsed),
+            "realtime": realtime,
+        }
+
+    def _run_inline(self, steps: list[Callable[[random.Random], None]]) -> None:
+        rng = random.Random(self.config.seed)
+        iterations = self.config.iterations or 1
+        for _ in range(iterations):
+            for step in steps:
+                step(rng)
+
+    def _run_threads(self, steps: list[Callable[[random.Random], None]]) -> None:
+        def loop(index: int, step: Callable[[random.Random], None]) -> None:
+            rng = random.Random(self.config.seed * 1000 + index)
+            done = 0
+            try:
+                while time.perf_counter() < self._deadline:
+                    if self.config.iterations is not None and done >= self.config.iterations:
+                        break
+                    step(rng)
+                    done += 1
+            finally:
+                connections.close_all()
+
+        threads = [
+            threading.Thread(target=loop, args=(index, step), name=f"load-test-{index}", daemon=True)
+            for index, step in enumerate(steps)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+
+def git_commit() -> str | None:
+    """Commit courant du dépôt (pour comparer les rapports)."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(__file__).resolve().parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare_reports(baseline: dict, current: dict) -> list[tuple[str, str, float | None, float | None]]:
+    """Écarts de débit et de p95 par opération entre deux rapports."""
+    rows = []
+    for name, stats in current.get("operations", {}).items():
+        before = baseline.get("operations", {}).get(name)
+        if before is None:
+            continue
+        rows.append(("throughput_per_s", name, before["throughput_per_s"], stats["throughput_per_s"]))
+        rows.append(("p95_ms", name, before["latency_ms"]["p95"], stats["latency_ms"]["p95"]))
+        rows.append(("queries_mean", name, before["queries"]["mean"], stats["queries"]["mean"]))
+    return rows
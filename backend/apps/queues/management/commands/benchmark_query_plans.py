@@ -0,0 +1,85 @@
+"""Management command vérifiant les plans d'exécution des requêtes chaudes.
+
+Crée au besoin le jeu de données du benchmark (tenant ``query-plan-bench``),
+passe les requêtes des scénarios de ``apps.queues.query_plans`` à ``EXPLAIN``
+et échoue si l'une d'elles lit ``tickets`` ou ``queue_kpi_rollups`` par un
+parcours séquentiel. À lancer sur PostgreSQL avec quelques millions de
+tickets : sur une petite table, le parcours séquentiel est le bon plan.
+``--tenant`` lance les scénarios sur un tenant existant, par exemple un
+tenant de ``generate_synthetic_data --preset benchmark``.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.queues.query_plans import QueryPlanDataset, QueryPlanSuite, default_scenarios
+
+
+class Command(BaseCommand):
+    help = "Benchmark des plans d'exécution des requêtes sur les tickets (échec sur parcours séquentiel)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tickets", type=int, default=2_000_000, help="Tickets d'historique à créer")
+        parser.add_argument("--queues", type=int, default=20, help="Files du jeu de données")
+        parser.add_argument("--days", type=int, default=180, help="Profondeur de l'historique en jours")
+        parser.add_argument(
+            "--tenant",
+            dest="tenant_slug",
+            help="Utiliser un tenant existant (ex. généré par generate_synthetic_data) au lieu du jeu de données",
+        )
+        parser.add_argument("--reseed", action="store_true", help="Recréer le jeu de données")
+        parser.add_argument("--drop", action="store_true", help="Supprimer le jeu de données et quitter")
+        parser.add_argument("--no-analyze", action="store_true", help="EXPLAIN sans exécuter les requêtes")
+        parser.add_argument("--scenario", help="Ne lancer que les scénarios contenant ce texte")
+        parser.add_argument("--show-plans", action="store_true", help="Afficher les plans des régressions")
+
+    def handle(self, *args, **options):
+        if options["tenant_slug"]:
+            fixtures = QueryPlanDataset.fixtures(options["tenant_slug"])
+            if fixtures is None:
+                raise CommandError(f"Tenant introuvable ou sans ticket en attente : {options['tenant_slug']}")
+            self.stdout.write(f"Tenant {options['tenant_slug']}, file {fixtures.queue.name}\n")
+            self._report(fixtures, options)
+            return
+
+        if options["drop"] or options["reseed"]:
+            QueryPlanDataset.drop()
+            if options["drop"]:
+                self.stdout.write("Jeu de données supprimé")
+                return
+
+        fixtures = QueryPlanDataset.fixtures()
+        if fixtures is None:
+            self.stdout.write(f"Création de {options['tickets']} tickets d'historique...")
+            start = time.perf_counter()
+            fixtures = QueryPlanDataset.seed(options["tickets"], queues=options["queues"], days=options["days"])
+            self.stdout.write(f"Jeu de données créé en {time.perf_counter() - start:.0f} s")
+        self.stdout.write(f"{QueryPlanDataset.ticket_count()} tickets dans le jeu de données\n")
+        self._report(fixtures, options)
+
+    def _report(self, fixtures, options):
+        scenarios = default_scenarios()
+        if options["scenario"]:
+            scenarios = [scenario for scenario in scenarios if options["scenario"] in scenario.name]
+
+        reports = QueryPlanSuite.run(fixtures, scenarios, analyze=not options["no_analyze"])
+
+        self.stdout.write(f"{'scénario':<50} {'requêtes':>8} {'ms':>9}  plan")
+        for report in reports:
+            duration = f"{report.duration_ms:>9.1f}" if report.duration_ms is not None else f"{'-':>9}"
+            if report.regressions:
+                tables = sorted({table for plan in report.regressions for table in plan.sequential_scans})
+                verdict = self.style.ERROR(f"PARCOURS SÉQUENTIEL ({', '.join(tables)})")
+            else:
+                indexes = sorted({index for plan in report.plans for index in plan.indexes})
+                verdict = ", ".join(indexes) or "-"
+            self.stdout.write(f"{report.scenario:<50} {len(report.plans):>8} {duration}  {verdict}")
+            if options["show_plans"]:
+                for plan in report.regressions:
+                    self.stdout.write(f"    {plan.sql}\n    {plan.plan}")
+
+        failed = [report.scenario for report in reports if report.regressions]
+        if failed:
+            raise CommandError(f"{len(failed)} scénario(s) en parcours séquentiel : {', '.join(failed)}")
+        self.stdout.write(self.style.SUCCESS(f"\n{len(reports)} scénario(s) sans parcours séquentiel"))
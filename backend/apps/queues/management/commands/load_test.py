@@ -0,0 +1,127 @@
+"""Management command de tir de charge de bout en bout.
+
+Recrée le tenant ``load-test-bench`` (files, agents, écrans, tickets en
+attente), lance inscriptions, agents, suivis publics et abonnés WebSocket en
+parallèle pendant ``--duration`` secondes, puis affiche débit, latences et
+requêtes SQL par opération. ``--output`` écrit le rapport JSON et
+``--compare`` le confronte au rapport d'un autre commit.
+"""
+
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.queues.load_test import (
+    LoadTestConfig,
+    LoadTestDataset,
+    LoadTestRunner,
+    compare_reports,
+)
+
+
+class Command(BaseCommand):
+    help = "Tir de charge : inscriptions, appels d'agents, suivi public et diffusion WebSocket"
+
+    def add_arguments(self, parser):
+        defaults = LoadTestConfig()
+        parser.add_argument("--duration", type=float, default=defaults.duration, help="Durée du tir (secondes)")
+        parser.add_argument("--queues", type=int, default=defaults.queues)
+        parser.add_argument("--agents", type=int, default=defaults.agents, help="Agents (un thread chacun)")
+        parser.add_argument("--displays", type=int, default=defaults.displays)
+        parser.add_argument("--signup-workers", type=int, default=defaults.signup_workers)
+        parser.add_argument("--status-pollers", type=int, default=defaults.status_pollers)
+        parser.add_argument("--display-pollers", type=int, default=defaults.display_pollers)
+        parser.add_argument("--ws-displays", type=int, default=defaults.ws_displays, help="Abonnés WebSocket écrans")
+        parser.add_argument("--ws-tickets", type=int, default=defaults.ws_tickets, help="Abonnés WebSocket tickets")
+        parser.add_argument("--prefill", type=int, default=defaults.prefill, help="Tickets en attente par file")
+        parser.add_argument("--service-seconds", type=float, default=defaults.service_seconds)
+        parser.add_argument("--iterations", type=int, help="Borne d'itérations par worker")
+        parser.add_argument("--drain-seconds", type=float, default=defaults.drain_seconds)
+        parser.add_argument("--seed", type=int, default=defaults.seed)
+        parser.add_argument("--eager-tasks", action="store_true", help="Exécuter les tâches Celery dans le processus")
+        parser.add_argument("--keep", action="store_true", help="Conserver le jeu de données après le tir")
+        parser.add_argument("--output", help="Fichier du rapport JSON")
+        parser.add_argument("--compare", help="Rapport JSON de référence")
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options["compare"]:
+            try:
+                baseline = json.loads(Path(options["compare"]).read_text())
+            except (OSError, ValueError) as exc:
+                raise CommandError(f"Rapport de référence illisible : {exc}") from exc
+
+        if options["eager_tasks"]:
+            from celery import current_app
+
+            current_app.conf.task_always_eager = True
+
+        config = LoadTestConfig(
+            duration=options["duration"],
+            queues=options["queues"],
+            agents=options["agents"],
+            displays=options["displays"],
+            signup_workers=options["signup_workers"],
+            status_pollers=options["status_pollers"],
+            display_pollers=options["display_pollers"],
+            ws_displays=options["ws_displays"],
+            ws_tickets=options["ws_tickets"],
+            prefill=options["prefill"],
+            service_seconds=options["service_seconds"],
+            iterations=options["iterations"],
+            drain_seconds=options["drain_seconds"],
+            seed=options["seed"],
+        )
+
+        LoadTestDataset.drop()
+        self.stdout.write("Création du jeu de données...")
+        fixtures = LoadTestDataset.create(config)
+        try:
+            self.stdout.write(f"Tir de {config.duration:.0f} s...")
+            report = LoadTestRunner(config, fixtures).run()
+        finally:
+            if not options["keep"]:
+                LoadTestDataset.drop()
+
+        self._print(report)
+        if baseline is not None:
+            self._print_comparison(baseline, report)
+        if options["output"]:
+            Path(options["output"]).write_text(json.dumps(report, indent=2, ensure_ascii=False))
+            self.stdout.write(f"Rapport écrit dans {options['output']}")
+
+        errors = sum(stats["errors"] for stats in report["operations"].values())
+        if errors:
+            self.stdout.write(self.style.WARNING(f"{errors} opération(s) en erreur"))
+
+    def _print(self, report: dict) -> None:
+        self.stdout.write(f"\n{'opération':<16} {'n':>7} {'err':>5} {'op/s':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'req':>6}")
+        for name, stats in report["operations"].items():
+            latency = stats["latency_ms"]
+            self.stdout.write(
+                f"{name:<16} {stats['count']:>7} {stats['errors']:>5} {stats['throughput_per_s'] or 0:>8.1f} "
+                f"{latency['p50'] or 0:>8.1f} {latency['p95'] or 0:>8.1f} {latency['p99'] or 0:>8.1f} "
+                f"{stats['queries']['mean'] or 0:>6.1f}"
+            )
+
+        realtime = report["realtime"]
+        if "skipped" in realtime:
+            self.stdout.write(f"\nTemps réel ignoré : {realtime['skipped']}")
+            return
+        self.stdout.write(
+            f"\nWebSocket : {realtime['connected']} abonnés connectés ({realtime['failed']} échecs), "
+            f"{realtime['ticket_events_delivered']}/{realtime['ticket_events_expected']} événements tickets livrés"
+        )
+        for kind, latency in realtime["lag_ms"].items():
+            self.stdout.write(
+                f"  délai {kind:<16} p50 {latency['p50']:.1f} ms  p95 {latency['p95']:.1f} ms  p99 {latency['p99']:.1f} ms"
+            )
+
+    def _print_comparison(self, baseline: dict, report: dict) -> None:
+        self.stdout.write(f"\nComparaison avec {baseline.get('commit') or 'la référence'} :")
+        for metric, name, before, after in compare_reports(baseline, report):
+            if before in (None, 0) or after is None:
+                continue
+            change = (after - before) / before * 100
+            self.stdout.write(f"  {name:<16} {metric:<18} {before:>10.2f} -> {after:>10.2f} ({change:+.1f} %)")
@@ -0,0 +1,48 @@
+"""Management command pour reconstruire les agrégats KPI horaires des files."""
+
+from datetime import date, datetime, time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.queues.rollups import KpiRollups
+from apps.tenants.models import Tenant
+
+
+def _parse_day(value: str) -> datetime:
+    try:
+        day = date.fromisoformat(value)
+    except ValueError as exc:
+        raise CommandError(f"Date invalide (AAAA-MM-JJ attendu): {value}") from exc
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconstruit les agrégats KPI horaires depuis la table des tickets "
+        "(après un import en masse ou pour réparer une dérive)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tenant", dest="tenant_slug", help="Limiter à un tenant (slug)")
+        parser.add_argument("--since", help="Premier jour reconstruit (AAAA-MM-JJ)")
+        parser.add_argument("--until", help="Jour de fin, exclu (AAAA-MM-JJ)")
+        parser.add_argument("--chunk-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        tenant = None
+        if options["tenant_slug"]:
+            tenant = Tenant.objects.filter(slug=options["tenant_slug"]).first()
+            if tenant is None:
+                raise CommandError(f"Tenant introuvable: {options['tenant_slug']}")
+
+        since = _parse_day(options["since"]) if options["since"] else None
+        until = _parse_day(options["until"]) if options["until"] else None
+
+        count = KpiRollups.rebuild(
+            tenant=tenant,
+            since=since,
+            until=until,
+            chunk_size=options["chunk_size"],
+        )
+        self.stdout.write(self.style.SUCCESS(f"{count} ligne(s) d'agrégats reconstruite(s)"))
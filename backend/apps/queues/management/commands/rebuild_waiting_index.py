@@ -0,0 +1,63 @@
+"""Management command pour reconstruire ou vérifier l'index Redis des tickets en attente."""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.queues.models import Queue
+from apps.queues.waiting_index import WaitingIndexUnavailable, WaitingTicketIndex
+
+
+class Command(BaseCommand):
+    help = "Reconstruit (ou vérifie avec --check) l'index Redis des tickets en attente"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--queue", dest="queue_ids", action="append", help="ID de file (répétable)")
+        parser.add_argument("--tenant", dest="tenant_slug", help="Limiter à un tenant (slug)")
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Vérifier la cohérence sans reconstruire",
+        )
+        parser.add_argument(
+            "--repair",
+            action="store_true",
+            help="Avec --check : reconstruire les files incohérentes",
+        )
+
+    def handle(self, *args, **options):
+        queues = Queue.objects.select_related("service")
+        if options["queue_ids"]:
+            queues = queues.filter(id__in=options["queue_ids"])
+        if options["tenant_slug"]:
+            queues = queues.filter(tenant__slug=options["tenant_slug"])
+
+        inconsistent = 0
+        try:
+            for queue in queues:
+                if options["check"]:
+                    report = WaitingTicketIndex.check(queue)
+                    if report["consistent"]:
+                        continue
+                    inconsistent += 1
+                    self.stdout.write(
+                        self.style.WARNING(
+                            f"{queue.name} ({queue.id}): prêt={report['ready']} "
+                            f"manquants={len(report['missing'])} obsolètes={len(report['stale'])} "
+                            f"mal classés={len(report['misranked'])}"
+                        )
+                    )
+                    if options["repair"]:
+                        WaitingTicketIndex.rebuild(queue)
+                        self.stdout.write("  → reconstruit")
+                else:
+                    count = WaitingTicketIndex.rebuild(queue)
+                    self.stdout.write(f"{queue.name} ({queue.id}): {count} ticket(s) indexé(s)")
+        except WaitingIndexUnavailable as exc:
+            raise CommandError(f"Index d'attente indisponible: {exc}") from exc
+
+        if options["check"]:
+            if inconsistent:
+                self.stdout.write(self.style.WARNING(f"{inconsistent} file(s) incohérente(s)"))
+            else:
+                self.stdout.write(self.style.SUCCESS("Index cohérent pour toutes les files"))
+        else:
+            self.stdout.write(self.style.SUCCESS("Index d'attente reconstruit"))
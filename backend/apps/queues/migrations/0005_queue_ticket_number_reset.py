@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-17 03:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("queues", "0004_alter_service_unique_together_remove_site_email_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="queue",
+            name="ticket_number_reset",
+            field=models.CharField(
+                choices=[("never", "Jamais"), ("daily", "Chaque jour")],
+                default="never",
+                help_text="Remise à zéro de la numérotation des tickets",
+                max_length=16,
+            ),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 4.2.30 on 2026-10-17 03:39
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tenants", "0009_paymentplan_dunningaction_paymentplaninstallment"),
+        ("queues", "0005_queue_ticket_number_reset"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="QueueServiceStats",
+            fields=[
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("service_mean", models.FloatField(blank=True, null=True)),
+                ("service_variance", models.FloatField(default=0)),
+                ("service_samples", models.PositiveIntegerField(default=0)),
+                ("service_window", models.JSONField(blank=True, default=list)),
+                ("wait_mean", models.FloatField(blank=True, null=True)),
+                ("wait_variance", models.FloatField(default=0)),
+                ("wait_samples", models.PositiveIntegerField(default=0)),
+                ("wait_window", models.JSONField(blank=True, default=list)),
+                (
+                    "queue",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="service_stats",
+                        to="queues.queue",
+                    ),
+                ),
+                (
+                    "tenant",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="%(class)ss",
+                        to="tenants.tenant",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "queue_service_stats",
+            },
+        ),
+    ]
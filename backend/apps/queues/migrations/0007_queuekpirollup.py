@@ -0,0 +1,112 @@
+# Generated by Django 4.2.30 on 2026-10-17 04:09
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0005_add_pending_company_name"),
+        ("tenants", "0009_paymentplan_dunningaction_paymentplaninstallment"),
+        ("queues", "0006_queueservicestats"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="QueueKpiRollup",
+            fields=[
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                (
+                    "hour",
+                    models.DateTimeField(
+                        help_text="Début de l'heure (UTC) de création des tickets"
+                    ),
+                ),
+                ("tickets_count", models.PositiveIntegerField(default=0)),
+                ("waiting_count", models.PositiveIntegerField(default=0)),
+                ("called_count", models.PositiveIntegerField(default=0)),
+                ("in_service_count", models.PositiveIntegerField(default=0)),
+                ("paused_count", models.PositiveIntegerField(default=0)),
+                ("transferred_count", models.PositiveIntegerField(default=0)),
+                ("closed_count", models.PositiveIntegerField(default=0)),
+                ("no_show_count", models.PositiveIntegerField(default=0)),
+                ("call_wait_count", models.PositiveIntegerField(default=0)),
+                ("call_wait_sum", models.FloatField(default=0)),
+                ("call_wait_min", models.FloatField(blank=True, null=True)),
+                ("call_wait_max", models.FloatField(blank=True, null=True)),
+                ("wait_count", models.PositiveIntegerField(default=0)),
+                ("wait_sum", models.FloatField(default=0)),
+                ("wait_sq_sum", models.FloatField(default=0)),
+                ("service_count", models.PositiveIntegerField(default=0)),
+                ("service_sum", models.FloatField(default=0)),
+                ("service_sq_sum", models.FloatField(default=0)),
+                ("sla_met_count", models.PositiveIntegerField(default=0)),
+                (
+                    "agent",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="kpi_rollups",
+                        to="users.agentprofile",
+                    ),
+                ),
+                (
+                    "queue",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="kpi_rollups",
+                        to="queues.queue",
+                    ),
+                ),
+                (
+                    "tenant",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="%(class)ss",
+                        to="tenants.tenant",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "queue_kpi_rollups",
+                "ordering": ("hour",),
+                "indexes": [
+                    models.Index(
+                        fields=["tenant", "hour"], name="queue_kpi_rollup_tenant_hour"
+                    ),
+                    models.Index(
+                        fields=["queue", "hour"], name="queue_kpi_rollup_queue_hour"
+                    ),
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="queuekpirollup",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("agent__isnull", False)),
+                fields=("queue", "agent", "hour"),
+                name="queue_kpi_rollup_unique_agent_hour",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="queuekpirollup",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("agent__isnull", True)),
+                fields=("queue", "hour"),
+                name="queue_kpi_rollup_unique_unassigned_hour",
+            ),
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 4.2.30 on 2026-10-17 05:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tenants", "0009_paymentplan_dunningaction_paymentplaninstallment"),
+        ("queues", "0007_queuekpirollup"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="QueueArrivalProfile",
+            fields=[
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("timezone", models.CharField(default="UTC", max_length=50)),
+                (
+                    "weeks",
+                    models.PositiveSmallIntegerField(
+                        default=0, help_text="Semaines d'historique couvertes"
+                    ),
+                ),
+                (
+                    "tickets",
+                    models.PositiveIntegerField(
+                        default=0, help_text="Tickets de l'historique"
+                    ),
+                ),
+                ("arrival_rates", models.BinaryField()),
+                ("service_times", models.BinaryField()),
+                ("built_at", models.DateTimeField()),
+                (
+                    "queue",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="arrival_profile",
+                        to="queues.queue",
+                    ),
+                ),
+                (
+                    "tenant",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="%(class)ss",
+                        to="tenants.tenant",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "queue_arrival_profiles",
+            },
+        ),
+    ]
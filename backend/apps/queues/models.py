@@ -78,6 +78,13 @@ class Queue(TenantAwareModel):
         (STATUS_CLOSED, "Fermée"),
     ]
 
+    NUMBER_RESET_NEVER = "never"
+    NUMBER_RESET_DAILY = "daily"
+    NUMBER_RESET_CHOICES = [
+        (NUMBER_RESET_NEVER, "Jamais"),
+        (NUMBER_RESET_DAILY, "Chaque jour"),
+    ]
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     name = models.CharField(max_length=255)
     slug = models.SlugField()
@@ -96,6 +103,12 @@ class Queue(TenantAwareModel):
     algorithm = models.CharField(max_length=32, choices=ALGO_CHOICES, default=ALGO_FIFO)
     status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=STATUS_ACTIVE)
     max_capacity = models.PositiveIntegerField(null=True, blank=True)
+    ticket_number_reset = models.CharField(
+        max_length=16,
+        choices=NUMBER_RESET_CHOICES,
+        default=NUMBER_RESET_NEVER,
+        help_text="Remise à zéro de la numérotation des tickets",
+    )
 
     class Meta:
         db_table = "queues"
@@ -120,3 +133,131 @@ class QueueAssignment(TenantAwareModel):
 
     def __str__(self) -> str:  # pragma: no cover - affichage admin
         return f"{self.queue} - {self.agent}"
+
+
+class QueueServiceStats(TenantAwareModel):
+    """Statistiques glissantes des durées de service et d'attente d'une file.
+
+    Mises à jour incrémentalement à chaque démarrage/clôture de ticket
+    (voir ``apps.queues.service_stats``).
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    queue = models.OneToOneField(Queue, on_delete=models.CASCADE, related_name="service_stats")
+
+    # Durée de service (started_at -> ended_at), en secondes
+    service_mean = models.FloatField(null=True, blank=True)
+    service_variance = models.FloatField(default=0)
+    service_samples = models.PositiveIntegerField(default=0)
+    service_window = models.JSONField(default=list, blank=True)
+
+    # Durée d'attente (created_at -> started_at), en secondes
+    wait_mean = models.FloatField(null=True, blank=True)
+    wait_variance = models.FloatField(default=0)
+    wait_samples = models.PositiveIntegerField(default=0)
+    wait_window = models.JSONField(default=list, blank=True)
+
+    class Meta:
+        db_table = "queue_service_stats"
+
+    def __str__(self) -> str:  # pragma: no cover - affichage admin
+        return f"Stats {self.queue_id}"
+
+
+class QueueArrivalProfile(TenantAwareModel):
+    """Profil hebdomadaire d'arrivées et de durées de service d'une file.
+
+    Matrices 7 × 24 (jour de la semaine × heure locale du site) en float32,
+    reconstruites chaque nuit depuis ``QueueKpiRollup`` (voir
+    ``apps.queues.forecast``).
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    queue = models.OneToOneField(Queue, on_delete=models.CASCADE, related_name="arrival_profile")
+    timezone = models.CharField(max_length=50, default="UTC")
+    weeks = models.PositiveSmallIntegerField(default=0, help_text="Semaines d'historique couvertes")
+    tickets = models.PositiveIntegerField(default=0, help_text="Tickets de l'historique")
+
+    # Tickets créés par heure, moyenne sur l'historique
+    arrival_rates = models.BinaryField()
+    # Durée moyenne de service (started_at -> ended_at), en secondes
+    service_times = models.BinaryField()
+    built_at = models.DateTimeField()
+
+    class Meta:
+        db_table = "queue_arrival_profiles"
+
+    def __str__(self) -> str:  # pragma: no cover - affichage admin
+        return f"Profil {self.queue_id}"
+
+
+class QueueKpiRollup(TenantAwareModel):
+    """Faits agrégés par (file, agent, heure de création des tickets).
+
+    Chaque ticket contribue à une seule ligne, celle de son heure de création,
+    selon son état courant ; la contribution est déplacée à chaque transition
+    (voir ``apps.queues.rollups``). Les rapports d'analytics lisent ces lignes
+    au lieu de parcourir la table ``tickets``.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    queue = models.ForeignKey(Queue, on_delete=models.CASCADE, related_name="kpi_rollups")
+    agent = models.ForeignKey(
+        "users.AgentProfile",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="kpi_rollups",
+    )
+    hour = models.DateTimeField(help_text="Début de l'heure (UTC) de création des tickets")
+
+    tickets_count = models.PositiveIntegerField(default=0)
+
+    # Tickets par statut courant
+    waiting_count = models.PositiveIntegerField(default=0)
+    called_count = models.PositiveIntegerField(default=0)
+    in_service_count = models.PositiveIntegerField(default=0)
+    paused_count = models.PositiveIntegerField(default=0)
+    transferred_count = models.PositiveIntegerField(default=0)
+    closed_count = models.PositiveIntegerField(default=0)
+    no_show_count = models.PositiveIntegerField(default=0)
+
+    # Attente avant appel (created_at -> called_at), en secondes
+    call_wait_count = models.PositiveIntegerField(default=0)
+    call_wait_sum = models.FloatField(default=0)
+    call_wait_min = models.FloatField(null=True, blank=True)
+    call_wait_max = models.FloatField(null=True, blank=True)
+
+    # Attente avant service (created_at -> started_at), en secondes
+    wait_count = models.PositiveIntegerField(default=0)
+    wait_sum = models.FloatField(default=0)
+    wait_sq_sum = models.FloatField(default=0)
+
+    # Service des tickets clôturés (started_at -> ended_at), en secondes
+    service_count = models.PositiveIntegerField(default=0)
+    service_sum = models.FloatField(default=0)
+    service_sq_sum = models.FloatField(default=0)
+    sla_met_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = "queue_kpi_rollups"
+        ordering = ("hour",)
+        constraints = [
+            models.UniqueConstraint(
+                fields=["queue", "agent", "hour"],
+                condition=models.Q(agent__isnull=False),
+                name="queue_kpi_rollup_unique_agent_hour",
+            ),
+            models.UniqueConstraint(
+                fields=["queue", "hour"],
+                condition=models.Q(agent__isnull=True),
+                name="queue_kpi_rollup_unique_unassigned_hour",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["tenant", "hour"], name="queue_kpi_rollup_tenant_hour"),
+            models.Index(fields=["queue", "hour"], name="queue_kpi_rollup_queue_hour"),
+        ]
+
+    def __str__(self) -> str:  # pragma: no cover - affichage admin
+        return f"KPI {self.queue_id} {self.agent_id or '-'} {self.hour:%Y-%m-%d %H}h"
@@ -6,14 +6,14 @@ from collections import defaultdict
 from dataclasses import dataclass
 from typing import TYPE_CHECKING
 
-from django.db.models import Avg, Count, Q
 from django.utils import timezone
 
 from apps.tickets.models import Ticket
 from apps.users.models import AgentProfile
 
-from .analytics import QueueAnalytics
+from .eta import ETAEngine, WaitingTicketRow
 from .models import Queue, QueueAssignment
+from .snapshot import TenantQueueSnapshot
 
 if TYPE_CHECKING:
     from apps.tenants.models import Tenant
@@ -52,19 +52,20 @@ class QueueOptimizer:
     """Service d'optimisation des files d'attente."""
 
     @staticmethod
-    def analyze_load_balance(tenant: Tenant) -> dict:
+    def analyze_load_balance(tenant: Tenant, snapshot: TenantQueueSnapshot | None = None) -> dict:
         """
         Analyse l'équilibre de charge entre toutes les files d'un tenant.
 
+        Args:
+            tenant: Le tenant
+            snapshot: instantané des files actives (construit si absent)
+
         Returns:
             dict avec métriques et score d'équilibre
         """
-        queues = Queue.objects.filter(
-            tenant=tenant,
-            status=Queue.STATUS_ACTIVE
-        ).select_related("service")
+        snapshot = snapshot or TenantQueueSnapshot.build(tenant, active_only=True)
 
-        if not queues.exists():
+        if not snapshot:
             return {
                 "balance_score": 100,
                 "status": "optimal",
@@ -76,9 +77,10 @@ class QueueOptimizer:
         max_load = 0
         min_load = float('inf')
 
-        for queue in queues:
-            waiting_count = queue.tickets.filter(status=Ticket.STATUS_WAITING).count()
-            available_agents = QueueAnalytics._count_available_agents(queue)
+        for entry in snapshot:
+            queue = entry.queue
+            waiting_count = entry.waiting_count
+            available_agents = entry.available_agents
 
             # Calculer le ratio charge/capacité
             if available_agents > 0:
@@ -119,39 +121,38 @@ class QueueOptimizer:
         }
 
     @staticmethod
-    def suggest_transfers(tenant: Tenant, max_suggestions: int = 10) -> list[TransferSuggestion]:
+    def suggest_transfers(
+        tenant: Tenant,
+        max_suggestions: int = 10,
+        snapshot: TenantQueueSnapshot | None = None,
+    ) -> list[TransferSuggestion]:
         """
         Suggère des transferts de tickets pour équilibrer les files.
 
         Args:
             tenant: Le tenant
             max_suggestions: Nombre max de suggestions
+            snapshot: instantané des files actives (construit si absent)
 
         Returns:
             Liste de suggestions de transfert
         """
         suggestions = []
 
-        queues = Queue.objects.filter(
-            tenant=tenant,
-            status=Queue.STATUS_ACTIVE
-        ).select_related("service")
+        snapshot = snapshot or TenantQueueSnapshot.build(tenant, active_only=True)
 
-        if queues.count() < 2:
+        if len(snapshot) < 2:
             return suggestions  # Pas de transfert possible avec moins de 2 files
 
         # Identifier les files surchargées et sous-chargées
         queue_loads = []
-        for queue in queues:
-            waiting_count = queue.tickets.filter(status=Ticket.STATUS_WAITING).count()
-            available_agents = QueueAnalytics._count_available_agents(queue)
-            load_ratio = waiting_count / max(available_agents, 1)
-
+        for entry in snapshot:
             queue_loads.append({
-                "queue": queue,
-                "waiting_count": waiting_count,
-                "available_agents": available_agents,
-                "load_ratio": load_ratio,
+                "queue": entry.queue,
+                "snapshot": entry,
+                "waiting_count": entry.waiting_count,
+                "available_agents": entry.available_agents,
+                "load_ratio": entry.load_ratio,
             })
 
         # Trier par charge (décroissant)
@@ -159,6 +160,11 @@ class QueueOptimizer:
 
         overloaded = [q for q in queue_loads if q["load_ratio"] > 3]  # > 3 tickets/agent
         underloaded = [q for q in queue_loads if q["load_ratio"] < 1.5 and q["available_agents"] > 0]
+        if not overloaded or not underloaded:
+            return suggestions
+
+        # ETA actuel des tickets des files surchargées, calculé en une passe
+        source_etas, oldest_tickets = QueueOptimizer._waiting_etas([q["snapshot"] for q in overloaded])
 
         # Suggérer des transferts depuis les files surchargées vers les sous-chargées
         for overloaded_data in overloaded:
@@ -168,11 +174,9 @@ class QueueOptimizer:
             source_queue = overloaded_data["queue"]
 
             # Prendre les tickets en attente depuis le plus longtemps
-            tickets_to_transfer = source_queue.tickets.filter(
-                status=Ticket.STATUS_WAITING
-            ).order_by("created_at")[:5]
+            tickets_to_transfer = oldest_tickets.get(source_queue.id, [])[:5]
 
-            for ticket in tickets_to_transfer:
+            for ticket_id, ticket_number in tickets_to_transfer:
                 if len(suggestions) >= max_suggestions:
                     break
 
@@ -184,11 +188,11 @@ class QueueOptimizer:
                     # Pour simplifier, on suppose que tous les services sont compatibles
 
                     # Calculer le temps économisé estimé
-                    source_eta = QueueAnalytics.calculate_eta(ticket) or 0
+                    source_eta = source_etas.get(ticket_id) or 0
                     # Estimer l'ETA dans la nouvelle file (simplification)
                     target_waiting = underloaded_data["waiting_count"]
                     target_agents = underloaded_data["available_agents"]
-                    avg_service_time = QueueAnalytics._get_average_service_time(target_queue) or 300
+                    avg_service_time = underloaded_data["snapshot"].service_stats.service_mean or 300
 
                     target_eta = int((target_waiting / max(target_agents, 1)) * avg_service_time)
                     time_saved = max(0, source_eta - target_eta)
@@ -197,8 +201,8 @@ class QueueOptimizer:
                         priority = "high" if time_saved > 300 else "medium" if time_saved > 120 else "low"
 
                         suggestions.append(TransferSuggestion(
-                            ticket_id=str(ticket.id),
-                            ticket_number=ticket.number,
+                            ticket_id=str(ticket_id),
+                            ticket_number=ticket_number,
                             from_queue_id=str(source_queue.id),
                             from_queue_name=source_queue.name,
                             to_queue_id=str(target_queue.id),
@@ -212,44 +216,60 @@ class QueueOptimizer:
         return suggestions
 
     @staticmethod
-    def suggest_agent_reallocation(tenant: Tenant) -> list[AgentReallocationSuggestion]:
+    def _waiting_etas(entries: list) -> tuple[dict, dict]:
+        """
+        Calcule l'ETA des tickets en attente de quelques files en une requête.
+
+        Returns:
+            (ETA par ticket, (id, numéro) des tickets en attente par file, du plus ancien au plus récent)
+        """
+        rows = []
+        oldest: dict[object, list[tuple[object, str]]] = defaultdict(list)
+        tickets = Ticket.objects.filter(
+            queue_id__in=[entry.queue.id for entry in entries],
+            status=Ticket.STATUS_WAITING,
+        ).order_by("created_at")
+        for ticket_id, queue_id, created_at, priority, eta_seconds, number in tickets.values_list(
+            "id", "queue_id", "created_at", "priority", "eta_seconds", "number"
+        ):
+            rows.append(WaitingTicketRow(ticket_id, queue_id, created_at, priority, eta_seconds))
+            oldest[queue_id].append((ticket_id, number))
+
+        inputs = {entry.queue.id: entry.eta_inputs() for entry in entries}
+        return ETAEngine.compute_etas(rows, inputs, timezone.now()), oldest
+
+    @staticmethod
+    def suggest_agent_reallocation(
+        tenant: Tenant,
+        snapshot: TenantQueueSnapshot | None = None,
+    ) -> list[AgentReallocationSuggestion]:
         """
         Suggère des réallocations d'agents entre files.
 
+        Args:
+            tenant: Le tenant
+            snapshot: instantané des files actives (construit si absent)
+
         Returns:
             Liste de suggestions de réallocation
         """
         suggestions = []
 
-        queues = Queue.objects.filter(
-            tenant=tenant,
-            status=Queue.STATUS_ACTIVE
-        ).select_related("service")
+        snapshot = snapshot or TenantQueueSnapshot.build(tenant, active_only=True)
 
-        if queues.count() < 2:
+        if len(snapshot) < 2:
             return suggestions
 
         # Analyser chaque file
         queue_analysis = []
-        for queue in queues:
-            waiting_count = queue.tickets.filter(status=Ticket.STATUS_WAITING).count()
-
-            # Compter les agents assignés (actifs ou non)
-            all_assigned_agents = QueueAssignment.objects.filter(
-                queue=queue,
-                is_active=True
-            ).count()
-
-            # Compter les agents disponibles
-            available_agents = QueueAnalytics._count_available_agents(queue)
-
+        for entry in snapshot:
             queue_analysis.append({
-                "queue": queue,
-                "waiting_count": waiting_count,
-                "total_agents": all_assigned_agents,
-                "available_agents": available_agents,
-                "load_ratio": waiting_count / max(available_agents, 1),
-                "utilization": available_agents / max(all_assigned_agents, 1),
+                "queue": entry.queue,
+                "waiting_count": entry.waiting_count,
+                "total_agents": entry.assigned_agents,
+                "available_agents": entry.available_agents,
+                "load_ratio": entry.load_ratio,
+                "utilization": entry.available_agents / max(entry.assigned_agents, 1),
             })
 
         # Trier par charge
@@ -261,6 +281,17 @@ class QueueOptimizer:
         # Identifier les files qui ont des agents disponibles non utilisés
         has_spare = [q for q in queue_analysis if q["available_agents"] > 0 and q["waiting_count"] < 2]
 
+        if not needs_help or not has_spare:
+            return suggestions
+
+        # Affectations des files "spare", chargées une seule fois
+        spare_assignments: dict[object, list[QueueAssignment]] = defaultdict(list)
+        for assignment in QueueAssignment.objects.filter(
+            queue_id__in=[spare["queue"].id for spare in has_spare],
+            is_active=True,
+        ).select_related("agent", "agent__user"):
+            spare_assignments[assignment.queue_id].append(assignment)
+
         # Suggérer des réallocations
         for needy in needs_help:
             for spare in has_spare:
@@ -268,12 +299,7 @@ class QueueOptimizer:
                     continue
 
                 # Trouver des agents disponibles dans la file "spare"
-                spare_assignments = QueueAssignment.objects.filter(
-                    queue=spare["queue"],
-                    is_active=True
-                ).select_related("agent", "agent__user")
-
-                for assignment in spare_assignments[:1]:  # Suggérer 1 agent max par paire
+                for assignment in spare_assignments[spare["queue"].id][:1]:  # Suggérer 1 agent max par paire
                     agent = assignment.agent
 
                     # Vérifier si l'agent est disponible
@@ -317,6 +343,7 @@ class QueueOptimizer:
         if total_tickets < 10:
             return {
                 "recommended_algorithm": queue.algorithm,
+                "current_algorithm": queue.algorithm,
                 "reason": "Pas assez de données historiques pour une recommandation",
                 "confidence": "low",
             }
@@ -370,15 +397,15 @@ class QueueOptimizer:
         Returns:
             dict avec toutes les analyses et suggestions
         """
-        load_balance = QueueOptimizer.analyze_load_balance(tenant)
-        transfer_suggestions = QueueOptimizer.suggest_transfers(tenant, max_suggestions=10)
-        agent_suggestions = QueueOptimizer.suggest_agent_reallocation(tenant)
+        snapshot = TenantQueueSnapshot.build(tenant, active_only=True)
+        load_balance = QueueOptimizer.analyze_load_balance(tenant, snapshot=snapshot)
+        transfer_suggestions = QueueOptimizer.suggest_transfers(tenant, max_suggestions=10, snapshot=snapshot)
+        agent_suggestions = QueueOptimizer.suggest_agent_reallocation(tenant, snapshot=snapshot)
 
         # Analyser chaque file pour recommandations d'algorithme
         algorithm_recommendations = []
-        queues = Queue.objects.filter(tenant=tenant, status=Queue.STATUS_ACTIVE)
 
-        for queue in queues:
+        for queue in (entry.queue for entry in snapshot):
             rec = QueueOptimizer.recommend_algorithm(queue)
             if rec["recommended_algorithm"] != rec["current_algorithm"]:
                 algorithm_recommendations.append({
@@ -10,13 +10,16 @@ from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from apps.core.db_router import replica_reads
 from apps.customers.models import Customer
 from apps.queues.models import Queue
 from apps.tenants.models import Tenant
 from apps.tickets.models import Ticket
+from apps.tickets.sequences import TicketNumberSequence
 from apps.tickets.tasks import calculate_eta
 
 from .analytics import QueueAnalytics
+from .snapshot import CACHE_TIMEOUT as SNAPSHOT_CACHE_TIMEOUT, TenantQueueSnapshot
 
 
 def _split_full_name(full_name: str) -> tuple[str, str]:
@@ -43,20 +46,18 @@ class PublicQueueListView(APIView):
 
     permission_classes = [AllowAny]
 
+    @replica_reads
     def get(self, request, tenant_slug: str) -> Response:  # noqa: D401 - DRF override
         # Résoudre le tenant à partir du slug dans l'URL
         tenant = get_object_or_404(Tenant, slug=tenant_slug, is_active=True)
 
-        queues = (
-            Queue.objects.filter(tenant=tenant, status=Queue.STATUS_ACTIVE)
-            .select_related("service", "site")
-            .order_by("name")
-        )
+        snapshot = TenantQueueSnapshot.build(tenant, active_only=True, cache_timeout=SNAPSHOT_CACHE_TIMEOUT)
 
         data = []
-        for queue in queues:
-            waiting_count = queue.tickets.filter(status=Ticket.STATUS_WAITING).count()
-            avg_service_time = QueueAnalytics._get_average_service_time(queue) or queue.service.sla_seconds  # noqa: SLF001 - usage interne assumé
+        for entry in snapshot:
+            queue = entry.queue
+            waiting_count = entry.waiting_count
+            avg_service_time = entry.avg_service_seconds
 
             data.append(
                 {
@@ -173,7 +174,7 @@ class QueueSignupView(APIView):
     def _create_ticket(self, queue: Queue, customer: Customer, signup_data: dict) -> Ticket:
         """Crée un ticket en statut attente."""
 
-        number = self._generate_ticket_number(queue)
+        number, number_period = self._generate_ticket_number(queue)
 
         ticket = Ticket.objects.create(
             tenant=queue.tenant,
@@ -182,6 +183,7 @@ class QueueSignupView(APIView):
             customer_name=f"{customer.first_name} {customer.last_name}".strip(),
             customer_phone=customer.phone,
             number=number,
+            number_period=number_period,
             channel=Ticket.CHANNEL_WEB,
             status=Ticket.STATUS_WAITING,
             priority=0,
@@ -189,12 +191,10 @@ class QueueSignupView(APIView):
 
         return ticket
 
-    def _generate_ticket_number(self, queue: Queue) -> str:
-        """Génère un identifiant humain pour le ticket."""
+    def _generate_ticket_number(self, queue: Queue) -> tuple[str, str]:
+        """Génère un identifiant humain pour le ticket et sa période de numérotation."""
 
-        prefix = str(queue.id).split("-")[0].upper()
-        count = Ticket.objects.filter(queue=queue).select_for_update().count() + 1
-        return f"{prefix}-{count:04d}"
+        return TicketNumberSequence.allocate_number(queue)
 
     def _compute_position(self, ticket: Ticket) -> int:
         """Calcule la position du ticket dans la file."""
@@ -0,0 +1,488 @@
+"""Vérification des plans d'exécution des requêtes chaudes sur les tickets.
+
+Chaque scénario appelle le vrai code (``QueueService``, ``QueueAnalytics``,
+vues publiques, modules d'analytics) dans une transaction annulée ; les
+``SELECT`` émis sur les tables surveillées sont capturés puis passés à
+``EXPLAIN`` (``EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON)`` sur PostgreSQL,
+``EXPLAIN QUERY PLAN`` sur SQLite). Un scénario régresse dès qu'une de ses
+requêtes lit une table surveillée par un parcours séquentiel.
+
+Sur une petite table, PostgreSQL préfère à raison le parcours séquentiel :
+les plans ne sont significatifs qu'une fois le jeu de données
+``QueryPlanDataset.seed`` chargé (quelques millions de tickets) et analysé.
+Commande : ``benchmark_query_plans``.
+"""
+
+from __future__ import annotations
+
+import json
+import random
+import re
+import uuid
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Callable
+
+from django.db import NotSupportedError, connections, router, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.tickets.models import Ticket
+
+from .models import Queue, QueueAssignment, Service, Site
+
+# Tables dont un parcours séquentiel est une régression
+WATCHED_TABLES = ("tickets", "queue_kpi_rollups")
+
+DATASET_SLUG = "query-plan-bench"
+
+# Alias de table des requêtes Django : "tickets" U0, "tickets" T3...
+_ALIAS_RE = re.compile(r'"(\w+)"\s+(?:AS\s+)?([A-Z]\d+)\b')
+_SQLITE_INDEX_RE = re.compile(r"USING (?:COVERING )?INDEX (\w+)")
+
+
+@dataclass(frozen=True)
+class PlanFixtures:
+    """Objets du jeu de données passés aux scénarios."""
+
+    tenant: object
+    queue: Queue
+    agent: object
+    ticket: Ticket
+
+
+@dataclass(frozen=True)
+class PlanScenario:
+    """Appel du code applicatif dont les requêtes sont vérifiées."""
+
+    name: str
+    run: Callable[[PlanFixtures], object]
+
+
+@dataclass
+class QueryPlan:
+    """Plan d'une requête capturée."""
+
+    sql: str
+    plan: object
+    sequential_scans: list[str]
+    indexes: list[str]
+    # Temps d'exécution mesuré par EXPLAIN ANALYZE (PostgreSQL uniquement)
+    duration_ms: float | None = None
+
+
+@dataclass
+class ScenarioReport:
+    """Plans des requêtes d'un scénario."""
+
+    scenario: str
+    plans: list[QueryPlan] = field(default_factory=list)
+
+    @property
+    def regressions(self) -> list[QueryPlan]:
+        return [plan for plan in self.plans if plan.sequential_scans]
+
+    @property
+    def duration_ms(self) -> float | None:
+        durations = [plan.duration_ms for plan in self.plans if plan.duration_ms is not None]
+        return sum(durations) if durations else None
+
+
+def default_scenarios() -> list[PlanScenario]:
+    """Scénarios couvrant les chemins chauds des files et des analytics."""
+    from rest_framework.test import APIRequestFactory
+
+    from apps.core import analytics as reports
+    from apps.core.usage_counters import UsageCounters
+
+    from .analytics import QueueAnalytics
+    from .analytics_advanced import AdvancedAnalytics
+    from .eta import ETAEngine
+    from .optimizer import QueueOptimizer
+    from .public_views import PublicTicketStatusView, QueueSignupView
+    from .services import QueueService
+    from .snapshot import TenantQueueSnapshot
+
+    factory = APIRequestFactory()
+
+    def ticket_status(fixtures: PlanFixtures):
+        request = factory.get(f"/api/v1/public/{fixtures.tenant.slug}/tickets/{fixtures.ticket.id}/")
+        return PublicTicketStatusView.as_view()(
+            request, tenant_slug=fixtures.tenant.slug, ticket_id=str(fixtures.ticket.id)
+        )
+
+    return [
+        PlanScenario(
+            "QueueService.get_next_ticket[fifo]",
+            lambda f: QueueService.get_next_ticket(f.queue, Queue.ALGO_FIFO),
+        ),
+        PlanScenario(
+            "QueueService.get_next_ticket[priority]",
+            lambda f: QueueService.get_next_ticket(f.queue, Queue.ALGO_PRIORITY),
+        ),
+        PlanScenario(
+            "QueueService.get_next_ticket[sla]",
+            lambda f: QueueService.get_next_ticket(f.queue, Queue.ALGO_SLA),
+        ),
+        PlanScenario("QueueService.active_ticket", lambda f: QueueService.active_ticket(f.agent)),
+        PlanScenario("QueueService.get_queue_stats", lambda f: QueueService.get_queue_stats(f.queue)),
+        PlanScenario("QueueAnalytics.calculate_eta", lambda f: QueueAnalytics.calculate_eta(f.ticket)),
+        PlanScenario("QueueAnalytics.get_queue_health", lambda f: QueueAnalytics.get_queue_health(f.queue)),
+        PlanScenario("QueueAnalytics.get_queue_predictions", lambda f: QueueAnalytics.get_queue_predictions(f.queue)),
+        PlanScenario("QueueOptimizer.recommend_algorithm", lambda f: QueueOptimizer.recommend_algorithm(f.queue)),
+        PlanScenario("TenantQueueSnapshot.build", lambda f: TenantQueueSnapshot.build(f.tenant)),
+        PlanScenario("ETAEngine.recompute", lambda f: ETAEngine.recompute([f.queue.id])),
+        PlanScenario("QueueSignupView._compute_position", lambda f: QueueSignupView()._compute_position(f.ticket)),
+        PlanScenario("PublicTicketStatusView.get", ticket_status),
+        PlanScenario(
+            "UsageCounters.count_from_db[ticket]",
+            lambda f: UsageCounters.count_from_db(f.tenant.id, "ticket"),
+        ),
+        PlanScenario(
+            "AdvancedAnalytics.calculate_sla_compliance_rate",
+            lambda f: AdvancedAnalytics.calculate_sla_compliance_rate(f.queue),
+        ),
+        PlanScenario(
+            "AdvancedAnalytics.generate_hourly_heatmap",
+            lambda f: AdvancedAnalytics.generate_hourly_heatmap(f.queue),
+        ),
+        PlanScenario("analytics.get_wait_times_report", lambda f: reports.get_wait_times_report(f.tenant)),
+        PlanScenario(
+            "analytics.get_agent_performance_report",
+            lambda f: reports.get_agent_performance_report(f.tenant),
+        ),
+    ]
+
+
+class QueryPlanSuite:
+    """Capture et analyse des plans des scénarios."""
+
+    @staticmethod
+    def run(
+        fixtures: PlanFixtures,
+        scenarios: list[PlanScenario] | None = None,
+        analyze: bool = True,
+    ) -> list[ScenarioReport]:
+        """Exécute les scénarios et retourne un rapport de plans par scénario."""
+        using = router.db_for_read(Ticket)
+        reports = []
+        for scenario in scenarios if scenarios is not None else default_scenarios():
+            report = ScenarioReport(scenario.name)
+            for sql in QueryPlanSuite.capture(scenario, fixtures, using):
+                report.plans.append(QueryPlanSuite.explain(sql, using, analyze=analyze))
+            reports.append(report)
+        return reports
+
+    @staticmethod
+    def capture(scenario: PlanScenario, fixtures: PlanFixtures, using: str) -> list[str]:
+        """``SELECT`` distincts émis par le scénario sur les tables surveillées (écritures annulées)."""
+        connection = connections[using]
+        with CaptureQueriesContext(connection) as captured:
+            with transaction.atomic(using=using):
+                scenario.run(fixtures)
+                transaction.set_rollback(True, using=using)
+
+        statements = []
+        for query in captured.captured_queries:
+            sql = query["sql"]
+            if not sql.lstrip().upper().startswith("SELECT"):
+                continue
+            if not any(f'"{table}"' in sql for table in WATCHED_TABLES):
+                continue
+            if sql not in statements:
+                statements.append(sql)
+        return statements
+
+    @staticmethod
+    def explain(sql: str, using: str, analyze: bool = True) -> QueryPlan:
+        """Plan d'une requête ; ``ANALYZE`` l'exécute dans une transaction annulée."""
+        connection = connections[using]
+        with transaction.atomic(using=using), connection.cursor() as cursor:
+            if connection.vendor == "postgresql":
+                options = "ANALYZE, BUFFERS, FORMAT JSON" if analyze else "FORMAT JSON"
+                cursor.execute(f"EXPLAIN ({options}) {sql}")
+                plan = cursor.fetchone()[0]
+                plan = json.loads(plan) if isinstance(plan, str) else plan
+                result = QueryPlanSuite._postgresql_plan(sql, plan)
+            elif connection.vendor == "sqlite":
+                cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+                result = QueryPlanSuite._sqlite_plan(sql, [row[3] for row in cursor.fetchall()])
+            else:
+                raise NotSupportedError(f"EXPLAIN non pris en charge pour {connection.vendor}")
+            transaction.set_rollback(True, using=using)
+        return result
+
+    @staticmethod
+    def _postgresql_plan(sql: str, plan: list) -> QueryPlan:
+        root = plan[0]
+        nodes = []
+        pending = [root["Plan"]]
+        while pending:
+            node = pending.pop()
+            nodes.append(node)
+            pending.extend(node.get("Plans", []))
+        return QueryPlan(
+            sql=sql,
+            plan=plan,
+            sequential_scans=[
+                node["Relation Name"]
+                for node in nodes
+                if node["Node Type"] == "Seq Scan" and node.get("Relation Name") in WATCHED_TABLES
+            ],
+            indexes=[node["Index Name"] for node in nodes if "Index Name" in node],
+            duration_ms=root.get("Execution Time"),
+        )
+
+    @staticmethod
+    def _sqlite_plan(sql: str, details: list[str]) -> QueryPlan:
+        aliases = {alias: table for table, alias in _ALIAS_RE.findall(sql)}
+        scans = []
+        for detail in details:
+            words = detail.split()
+            # "SCAN tickets" : parcours complet ; "SCAN x USING INDEX" : parcours d'index
+            if len(words) >= 2 and words[0] == "SCAN" and "USING" not in words:
+                table = aliases.get(words[1], words[1])
+                if table in WATCHED_TABLES:
+                    scans.append(table)
+        indexes = [match for detail in details for match in _SQLITE_INDEX_RE.findall(detail)]
+        return QueryPlan(sql=sql, plan=details, sequential_scans=scans, indexes=indexes)
+
+
+class QueryPlanDataset:
+    """Jeu de données du benchmark : un tenant dédié, ses files et un historique volumineux."""
+
+    @staticmethod
+    def fixtures(slug: str = DATASET_SLUG) -> PlanFixtures | None:
+        """
+        Fixtures d'un tenant existant (None s'il n'existe pas ou n'a aucun ticket en attente).
+
+        Par défaut le jeu de données du benchmark ; tout tenant peut servir,
+        par exemple ceux de ``generate_synthetic_data``.
+        """
+        from apps.tenants.models import Tenant
+        from apps.users.models import AgentProfile
+
+        tenant = Tenant.objects.filter(slug=slug).first()
+        if tenant is None:
+            return None
+        queue = (
+            Queue.objects.filter(tenant=tenant, tickets__status=Ticket.STATUS_WAITING)
+            .select_related("service")
+            .order_by("name")
+            .first()
+        )
+        agent = (
+            AgentProfile.objects.filter(queue_assignments__queue=queue).order_by("user__email").first()
+            if queue is not None
+            else None
+        )
+        # Dernier ticket en attente : sa position compte toute la file
+        ticket = (
+            Ticket.objects.filter(queue=queue, status=Ticket.STATUS_WAITING).order_by("-created_at").first()
+            if queue is not None
+            else None
+        )
+        if queue is None or agent is None or ticket is None:
+            return None
+        return PlanFixtures(tenant=tenant, queue=queue, agent=agent, ticket=ticket)
+
+    @staticmethod
+    def ticket_count() -> int:
+        return Ticket.objects.filter(tenant__slug=DATASET_SLUG).count()
+
+    @staticmethod
+    def drop() -> None:
+        """Supprime le jeu de données (tickets et agrégats en suppression brute)."""
+        from apps.tenants.models import Tenant
+        from apps.users.models import User
+
+        from .models import QueueKpiRollup
+
+        tenant = Tenant.objects.filter(slug=DATASET_SLUG).first()
+        if tenant is None:
+            return
+        using = router.db_for_write(Ticket)
+        Ticket.objects.filter(tenant=tenant)._raw_delete(using)
+        QueueKpiRollup.objects.filter(tenant=tenant)._raw_delete(using)
+        # Queue.service est protégé : files avant services
+        Queue.objects.filter(tenant=tenant).delete()
+        tenant.delete()
+        User.objects.filter(email=f"agent@{DATASET_SLUG}.local").delete()
+
+    @staticmethod
+    def seed(
+        tickets: int,
+        queues: int = 20,
+        days: int = 180,
+        waiting_per_queue: int = 50,
+        chunk_size: int = 10000,
+    ) -> PlanFixtures:
+        """
+        Crée le tenant du benchmark et ``tickets`` tickets d'historique.
+
+        L'historique (clôturés et absents sur ``days`` jours) est inséré par
+        ``generate_series`` sur PostgreSQL, par lots sinon ; chaque file reçoit
+        en plus ``waiting_per_queue`` tickets en attente et quelques tickets
+        appelés. Les agrégats KPI sont reconstruits et les statistiques du
+        planificateur mises à jour.
+        """
+        from apps.tenants.models import Tenant, TenantMembership
+        from apps.users.models import AgentProfile, User
+
+        from .rollups import KpiRollups
+
+        tenant, _ = Tenant.objects.get_or_create(slug=DATASET_SLUG, defaults={"name": "Query plan benchmark"})
+        site, _ = Site.objects.get_or_create(tenant=tenant, slug="bench", defaults={"name": "Bench"})
+        service, _ = Service.objects.get_or_create(tenant=tenant, name="Bench", defaults={"sla_seconds": 600})
+        user, _ = User.objects.get_or_create(email=f"agent@{DATASET_SLUG}.local")
+        agent, _ = AgentProfile.objects.get_or_create(user=user)
+        TenantMembership.objects.get_or_create(tenant=tenant, user=user, defaults={"role": TenantMembership.ROLE_AGENT})
+
+        queue_ids = []
+        for index in range(queues):
+            queue, _ = Queue.objects.get_or_create(
+                tenant=tenant,
+                slug=f"bench-{index:03d}",
+                defaults={"name": f"Bench {index:03d}", "site": site, "service": service},
+            )
+            QueueAssignment.objects.get_or_create(tenant=tenant, queue=queue, agent=agent)
+            queue_ids.append(queue.id)
+
+        using = router.db_for_write(Ticket)
+        if connections[using].vendor == "postgresql":
+            QueryPlanDataset._seed_history_postgresql(using, tenant.id, queue_ids, agent.id, tickets, days)
+        else:
+            history = QueryPlanDataset._history_rows(tenant.id, queue_ids, agent.id, tickets, days)
+            QueryPlanDataset._insert(using, history, chunk_size)
+        QueryPlanDataset._insert(
+            using, QueryPlanDataset._live_rows(tenant.id, queue_ids, agent.id, waiting_per_queue), chunk_size
+        )
+
+        KpiRollups.rebuild(tenant=tenant)
+        with connections[using].cursor() as cursor:
+            cursor.execute("ANALYZE")
+        return QueryPlanDataset.fixtures()
+
+    # Colonnes insérées (created_at imposé : pas d'``auto_now_add``)
+    _COLUMNS = (
+        "id",
+        "tenant_id",
+        "queue_id",
+        "agent_id",
+        "number",
+        "channel",
+        "priority",
+        "status",
+        "customer_name",
+        "customer_phone",
+        "created_at",
+        "updated_at",
+        "called_at",
+        "started_at",
+        "ended_at",
+    )
+
+    @staticmethod
+    def _seed_history_postgresql(using: str, tenant_id, queue_ids: list, agent_id, count: int, days: int) -> None:
+        sql = f"""
+            WITH series AS (
+                SELECT g, now() - random() * (%s * interval '1 day') AS created
+                FROM generate_series(1, %s) AS g
+            )
+            INSERT INTO tickets ({", ".join(QueryPlanDataset._COLUMNS)})
+            SELECT
+                gen_random_uuid(), %s, (%s::uuid[])[1 + g %% %s], %s, 'H-' || g, 'web', g %% 5,
+                CASE WHEN g %% 20 = 0 THEN 'no_show' ELSE 'clos' END, '', '',
+                created, created + interval '20 minutes', created + interval '5 minutes',
+                CASE WHEN g %% 20 = 0 THEN NULL ELSE created + interval '6 minutes' END,
+                created + interval '20 minutes'
+            FROM series
+        """
+        with connections[using].cursor() as cursor:
+            cursor.execute(
+                sql,
+                [days, count, str(tenant_id), [str(queue_id) for queue_id in queue_ids], len(queue_ids), str(agent_id)],
+            )
+
+    @staticmethod
+    def _history_rows(tenant_id, queue_ids: list, agent_id, count: int, days: int):
+        now = timezone.now()
+        for index in range(1, count + 1):
+            created = now - timedelta(seconds=random.uniform(0, days * 86400))
+            no_show = index % 20 == 0
+            yield QueryPlanDataset._row(
+                tenant_id,
+                queue_ids[index % len(queue_ids)],
+                agent_id,
+                f"H-{index}",
+                index % 5,
+                Ticket.STATUS_NO_SHOW if no_show else Ticket.STATUS_CLOSED,
+                created,
+                called_at=created + timedelta(minutes=5),
+                started_at=None if no_show else created + timedelta(minutes=6),
+                ended_at=created + timedelta(minutes=20),
+            )
+
+    @staticmethod
+    def _live_rows(tenant_id, queue_ids: list, agent_id, waiting_per_queue: int):
+        now = timezone.now()
+        for queue_index, queue_id in enumerate(queue_ids):
+            for index in range(waiting_per_queue):
+                created = now - timedelta(minutes=waiting_per_queue - index)
+                yield QueryPlanDataset._row(
+                    tenant_id, queue_id, None, f"W-{queue_index}-{index}", index % 3, Ticket.STATUS_WAITING, created
+                )
+            # Un ticket appelé par file ; celui de la première est le ticket actif de l'agent
+            called = now - timedelta(minutes=2)
+            yield QueryPlanDataset._row(
+                tenant_id,
+                queue_id,
+                agent_id if queue_index == 0 else None,
+                f"C-{queue_index}",
+                0,
+                Ticket.STATUS_CALLED,
+                called - timedelta(minutes=10),
+                called_at=called,
+            )
+
+    @staticmethod
+    def _row(
+        tenant_id, queue_id, agent_id, number, priority, status, created, called_at=None, started_at=None, ended_at=None
+    ):
+        """Ligne dans l'ordre de ``_COLUMNS``."""
+        updated = ended_at or called_at or created
+        return (
+            uuid.uuid4(),
+            tenant_id,
+            queue_id,
+            agent_id,
+            number,
+            Ticket.CHANNEL_WEB,
+            priority,
+            status,
+            "",
+            "",
+            created,
+            updated,
+            called_at,
+            started_at,
+            ended_at,
+        )
+
+    @staticmethod
+    def _insert(using: str, rows, chunk_size: int) -> None:
+        connection = connections[using]
+        by_column = {f.attname: f for f in Ticket._meta.concrete_fields}
+        fields = [by_column[name] for name in QueryPlanDataset._COLUMNS]
+        columns = ", ".join(f.column for f in fields)
+        sql = f"INSERT INTO tickets ({columns}) VALUES ({', '.join(['%s'] * len(fields))})"
+
+        batch = []
+        with connection.cursor() as cursor:
+            for row in rows:
+                batch.append([f.get_db_prep_save(value, connection) for f, value in zip(fields, row)])
+                if len(batch) >= chunk_size:
+                    cursor.executemany(sql, batch)
+                    batch = []
+            if batch:
+                cursor.executemany(sql, batch)
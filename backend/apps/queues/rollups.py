@@ -0,0 +1,344 @@
+"""Agrégats KPI horaires (``QueueKpiRollup``) maintenus incrémentalement.
+
+Chaque ticket contribue à la ligne (file, agent, heure de création) selon son
+état courant : statut, attente avant appel et avant service, durée de service,
+respect du SLA. À chaque enregistrement d'un ticket, l'ancienne contribution
+est retirée et la nouvelle ajoutée (un ``UPDATE ... SET x = x + delta`` par
+ligne touchée), après le commit de la transaction.
+
+Les écritures groupées qui ne passent pas par ``save()`` (``update()``,
+``bulk_create()``) ne déclenchent pas ces mises à jour : reconstruire alors la
+période avec ``KpiRollups.rebuild`` (commande ``rebuild_kpi_rollups``).
+La suppression d'un ticket (purge, archivage) ne retire pas sa contribution :
+les agrégats conservent l'historique. La reconstruction lit aussi les tickets
+archivés (``tickets_archive``).
+"""
+
+from __future__ import annotations
+
+import logging
+from collections import defaultdict
+from dataclasses import dataclass, fields
+from datetime import datetime, timezone as dt_timezone
+from itertools import chain
+from typing import TYPE_CHECKING, Iterable
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, FloatField, IntegerField, Max, Min, QuerySet, Sum, Value
+from django.db.models.functions import Coalesce, Greatest, Least
+from django.utils import timezone
+
+from apps.tickets.models import ArchivedTicket, Ticket
+
+from .models import Queue, QueueKpiRollup
+
+if TYPE_CHECKING:
+    from apps.tenants.models import Tenant
+
+logger = logging.getLogger(__name__)
+
+# Champs du ticket dont dépend sa contribution
+TRACKED_FIELDS = {"status", "queue", "queue_id", "agent", "agent_id", "called_at", "started_at", "ended_at"}
+
+STATUS_COUNT_FIELDS = {
+    Ticket.STATUS_WAITING: "waiting_count",
+    Ticket.STATUS_CALLED: "called_count",
+    Ticket.STATUS_IN_SERVICE: "in_service_count",
+    Ticket.STATUS_PAUSED: "paused_count",
+    Ticket.STATUS_TRANSFERRED: "transferred_count",
+    Ticket.STATUS_CLOSED: "closed_count",
+    Ticket.STATUS_NO_SHOW: "no_show_count",
+}
+
+# Champs additifs d'une ligne (incrémentés / décrémentés)
+ADDITIVE_FIELDS = (
+    "tickets_count",
+    *STATUS_COUNT_FIELDS.values(),
+    "call_wait_count",
+    "call_wait_sum",
+    "wait_count",
+    "wait_sum",
+    "wait_sq_sum",
+    "service_count",
+    "service_sum",
+    "service_sq_sum",
+    "sla_met_count",
+)
+
+RollupKey = tuple  # (tenant_id, queue_id, agent_id, hour)
+
+
+@dataclass(frozen=True)
+class TicketFacts:
+    """État d'un ticket pertinent pour les agrégats."""
+
+    tenant_id: object
+    queue_id: object
+    agent_id: object
+    status: str
+    created_at: datetime
+    called_at: datetime | None
+    started_at: datetime | None
+    ended_at: datetime | None
+
+    @classmethod
+    def field_names(cls) -> list[str]:
+        return [field.name for field in fields(cls)]
+
+    @classmethod
+    def from_ticket(cls, ticket: Ticket) -> TicketFacts:
+        return cls(**{name: getattr(ticket, name) for name in cls.field_names()})
+
+    @property
+    def key(self) -> RollupKey:
+        return (self.tenant_id, self.queue_id, self.agent_id, hour_bucket(self.created_at))
+
+    def contribution(self, sla_seconds: int | None) -> dict[str, float]:
+        """Valeurs que ce ticket ajoute à sa ligne."""
+        values: dict[str, float] = {"tickets_count": 1}
+        if status_field := STATUS_COUNT_FIELDS.get(self.status):
+            values[status_field] = 1
+
+        if self.called_at:
+            values["call_wait_count"] = 1
+            values["call_wait_sum"] = _seconds(self.created_at, self.called_at)
+
+        if self.started_at:
+            wait = _seconds(self.created_at, self.started_at)
+            values.update(wait_count=1, wait_sum=wait, wait_sq_sum=wait * wait)
+
+            if self.status == Ticket.STATUS_CLOSED and self.ended_at:
+                service = _seconds(self.started_at, self.ended_at)
+                values.update(service_count=1, service_sum=service, service_sq_sum=service * service)
+                if sla_seconds is not None and wait <= sla_seconds:
+                    values["sla_met_count"] = 1
+
+        return values
+
+
+def hour_bucket(moment: datetime) -> datetime:
+    """Début de l'heure UTC contenant ``moment``."""
+    return moment.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+def _seconds(start: datetime, end: datetime) -> float:
+    return max((end - start).total_seconds(), 0.0)
+
+
+class KpiRollups:
+    """Maintenance et lecture des agrégats KPI."""
+
+    # --- Maintenance incrémentale -------------------------------------------------
+
+    @staticmethod
+    def track(ticket: Ticket, update_fields=None) -> None:
+        """Mémorise l'état en base d'un ticket avant son enregistrement (pre_save)."""
+        if ticket._state.adding or not KpiRollups._is_relevant(update_fields):
+            ticket._kpi_previous = None
+            return
+        row = Ticket.objects.filter(pk=ticket.pk).values(*TicketFacts.field_names()).first()
+        ticket._kpi_previous = TicketFacts(**row) if row else None
+
+    @staticmethod
+    def on_saved(ticket: Ticket, update_fields=None) -> None:
+        """Programme le déplacement de la contribution du ticket (post_save)."""
+        if not KpiRollups._is_relevant(update_fields):
+            return
+        previous = getattr(ticket, "_kpi_previous", None)
+        current = TicketFacts.from_ticket(ticket)
+        ticket._kpi_previous = current
+        if previous == current:
+            return
+
+        changes = [(current, 1)] if previous is None else [(previous, -1), (current, 1)]
+        transaction.on_commit(lambda: KpiRollups.apply(changes))
+
+    @staticmethod
+    def _is_relevant(update_fields) -> bool:
+        return update_fields is None or bool(TRACKED_FIELDS.intersection(update_fields))
+
+    @staticmethod
+    def apply(changes: Iterable[tuple[TicketFacts, int]]) -> None:
+        """Applique des contributions signées (+1 ajout, -1 retrait) aux lignes concernées."""
+        changes = list(changes)
+        sla = KpiRollups._sla_by_queue({facts.queue_id for facts, _sign in changes})
+
+        deltas: dict[RollupKey, dict[str, float]] = defaultdict(lambda: defaultdict(float))
+        call_waits: dict[RollupKey, list[float]] = defaultdict(list)
+        for facts, sign in changes:
+            values = facts.contribution(sla.get(facts.queue_id))
+            for name, value in values.items():
+                deltas[facts.key][name] += sign * value
+            if sign > 0 and "call_wait_sum" in values:
+                call_waits[facts.key].append(values["call_wait_sum"])
+
+        for key, delta in deltas.items():
+            delta = {name: value for name, value in delta.items() if value}
+            if delta or call_waits.get(key):
+                try:
+                    KpiRollups._upsert(key, delta, call_waits.get(key, []))
+                except Exception:  # noqa: BLE001 - les agrégats ne doivent pas casser l'appelant
+                    logger.exception("Mise à jour des agrégats KPI impossible pour %s", key)
+
+    @staticmethod
+    def _sla_by_queue(queue_ids: set) -> dict[object, int]:
+        return dict(Queue.objects.filter(id__in=queue_ids).values_list("id", "service__sla_seconds"))
+
+    @staticmethod
+    def _upsert(key: RollupKey, delta: dict[str, float], call_waits: list[float]) -> None:
+        tenant_id, queue_id, agent_id, hour = key
+        updates = {
+            # Jamais négatif : un retrait peut viser un ticket antérieur aux agrégats
+            name: Greatest(F(name) + Value(value), Value(0)) if value < 0 else F(name) + Value(value)
+            for name, value in delta.items()
+        }
+        if call_waits:
+            updates["call_wait_min"] = Least(Coalesce(F("call_wait_min"), Value(min(call_waits))), Value(min(call_waits)))
+            updates["call_wait_max"] = Greatest(Coalesce(F("call_wait_max"), Value(max(call_waits))), Value(max(call_waits)))
+
+        rows = QueueKpiRollup.objects.filter(queue_id=queue_id, agent_id=agent_id, hour=hour)
+        with transaction.atomic():
+            if rows.update(**updates, updated_at=timezone.now()):
+                return
+            try:
+                with transaction.atomic():
+                    QueueKpiRollup.objects.create(
+                        tenant_id=tenant_id,
+                        queue_id=queue_id,
+                        agent_id=agent_id,
+                        hour=hour,
+                        call_wait_min=min(call_waits) if call_waits else None,
+                        call_wait_max=max(call_waits) if call_waits else None,
+                        **{name: max(value, 0) for name, value in delta.items()},
+                    )
+            except IntegrityError:
+                # Ligne créée entre-temps par une autre transaction
+                rows.update(**updates, updated_at=timezone.now())
+
+    # --- Reconstruction -----------------------------------------------------------
+
+    @staticmethod
+    def rebuild(
+        tenant: Tenant | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        chunk_size: int = 5000,
+    ) -> int:
+        """
+        Reconstruit les agrégats depuis les tables ``tickets`` et ``tickets_archive``.
+
+        Args:
+            tenant: limiter à un tenant (tous par défaut)
+            since: première heure reconstruite (tout l'historique par défaut)
+            until: fin de la période (exclue, maintenant par défaut)
+            chunk_size: taille des lots de lecture et d'écriture
+
+        Returns:
+            int: nombre de lignes d'agrégats écrites
+        """
+        lookups = {}
+        rollups = QueueKpiRollup.objects.all()
+        if tenant is not None:
+            lookups["tenant"] = tenant
+            rollups = rollups.filter(tenant=tenant)
+        if since is not None:
+            since = hour_bucket(since)
+            lookups["created_at__gte"] = since
+            rollups = rollups.filter(hour__gte=since)
+        if until is not None:
+            until = hour_bucket(until)
+            lookups["created_at__lt"] = until
+            rollups = rollups.filter(hour__lt=until)
+
+        queues = Queue.objects.all() if tenant is None else Queue.objects.filter(tenant=tenant)
+        sla = dict(queues.values_list("id", "service__sla_seconds"))
+        totals: dict[RollupKey, dict[str, float]] = defaultdict(lambda: defaultdict(float))
+        call_wait_bounds: dict[RollupKey, list[float]] = {}
+
+        names = TicketFacts.field_names()
+        rows = chain.from_iterable(
+            model.objects.order_by().filter(**lookups).values_list(*names).iterator(chunk_size=chunk_size)
+            for model in (Ticket, ArchivedTicket)
+        )
+        for row in rows:
+            facts = TicketFacts(*row)
+            values = facts.contribution(sla.get(facts.queue_id))
+            for name, value in values.items():
+                totals[facts.key][name] += value
+            if "call_wait_sum" in values:
+                bounds = call_wait_bounds.setdefault(facts.key, [values["call_wait_sum"]] * 2)
+                bounds[0] = min(bounds[0], values["call_wait_sum"])
+                bounds[1] = max(bounds[1], values["call_wait_sum"])
+
+        objects = []
+        for key, values in totals.items():
+            tenant_id, queue_id, agent_id, hour = key
+            bounds = call_wait_bounds.get(key, [None, None])
+            objects.append(
+                QueueKpiRollup(
+                    tenant_id=tenant_id,
+                    queue_id=queue_id,
+                    agent_id=agent_id,
+                    hour=hour,
+                    call_wait_min=bounds[0],
+                    call_wait_max=bounds[1],
+                    **values,
+                )
+            )
+
+        with transaction.atomic():
+            rollups.delete()
+            QueueKpiRollup.objects.bulk_create(objects, batch_size=chunk_size)
+        return len(objects)
+
+    # --- Lecture ------------------------------------------------------------------
+
+    @staticmethod
+    def for_period(
+        *,
+        tenant: Tenant | None = None,
+        queue: Queue | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+    ) -> QuerySet[QueueKpiRollup]:
+        """
+        Lignes des tickets créés dans la période ``[since, until)``, à l'heure près.
+
+        Une heure appartient à la période qui contient son début : elle est
+        comptée si ``since <= hour < until``. Deux périodes adjacentes se
+        partagent donc les heures sans en compter aucune deux fois, et une
+        période se terminant maintenant inclut l'heure en cours.
+        """
+        rollups = QueueKpiRollup.objects.order_by()
+        if tenant is not None:
+            rollups = rollups.filter(tenant=tenant)
+        if queue is not None:
+            rollups = rollups.filter(queue=queue)
+        if since is not None:
+            rollups = rollups.filter(hour__gte=since)
+        if until is not None:
+            rollups = rollups.filter(hour__lt=until)
+        return rollups
+
+    @staticmethod
+    def sums(**extra) -> dict:
+        """Expressions d'agrégation de tous les champs, pour ``aggregate``/``annotate``."""
+        # Les expressions supplémentaires d'abord : elles sont résolues avant
+        # les alias ci-dessous, qui masquent les champs de même nom
+        expressions = dict(extra)
+        for name in ADDITIVE_FIELDS:
+            output = FloatField() if isinstance(QueueKpiRollup._meta.get_field(name), FloatField) else IntegerField()
+            expressions[name] = Coalesce(Sum(name), Value(0), output_field=output)
+        expressions.update(call_wait_min=Min("call_wait_min"), call_wait_max=Max("call_wait_max"))
+        return expressions
+
+    @staticmethod
+    def totals(rollups: QuerySet[QueueKpiRollup], **extra) -> dict:
+        """Totaux d'un ensemble de lignes, en une requête."""
+        return rollups.aggregate(**KpiRollups.sums(**extra))
+
+    @staticmethod
+    def mean(total: dict, name: str) -> float:
+        """Moyenne d'une durée (``wait``, ``call_wait``, ``service``), 0 sans échantillon."""
+        count = total.get(f"{name}_count") or 0
+        return total[f"{name}_sum"] / count if count else 0.0
@@ -87,6 +87,7 @@ class QueueSerializer(serializers.ModelSerializer):
             "algorithm",
             "status",
             "max_capacity",
+            "ticket_number_reset",
             "waiting_count",
             "created_at",
             "updated_at",
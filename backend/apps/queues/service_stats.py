@@ -0,0 +1,252 @@
+"""Statistiques glissantes des temps de service et d'attente par file.
+
+Chaque démarrage de service alimente la durée d'attente, chaque clôture la
+durée de service. On maintient pour chacune une moyenne et une variance
+exponentielles (EWMA) ainsi qu'une fenêtre des dernières valeurs pour les
+percentiles p50/p90. L'état vit en cache et est persisté dans
+``QueueServiceStats`` ; il est reconstruit depuis l'historique si absent.
+"""
+
+from __future__ import annotations
+
+import math
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+from typing import TYPE_CHECKING, Iterable
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
+from apps.tickets.models import Ticket
+
+from .models import Queue, QueueServiceStats
+
+if TYPE_CHECKING:
+    from datetime import datetime
+
+CACHE_KEY = "queue_service_stats:{queue_id}"
+CACHE_TIMEOUT = 6 * 3600
+
+# Champs remplacés lors d'une reconstruction depuis l'historique
+STATS_FIELDS = [
+    f"{kind}_{attr}" for kind in ("service", "wait") for attr in ("mean", "variance", "samples", "window")
+] + ["updated_at"]
+
+# Poids de la dernière observation dans la moyenne exponentielle
+EWMA_ALPHA = getattr(settings, "QUEUE_STATS_EWMA_ALPHA", 0.1)
+# Nombre d'observations conservées pour les percentiles
+WINDOW_SIZE = getattr(settings, "QUEUE_STATS_WINDOW_SIZE", 50)
+
+
+@dataclass
+class ServiceStatsSnapshot:
+    """Vue figée des statistiques d'une file."""
+
+    service_mean: float | None = None
+    service_std: float | None = None
+    service_p50: float | None = None
+    service_p90: float | None = None
+    service_samples: int = 0
+    wait_mean: float | None = None
+    wait_std: float | None = None
+    wait_p50: float | None = None
+    wait_p90: float | None = None
+    wait_samples: int = 0
+
+
+def _percentile(values: list[float], pct: float) -> float | None:
+    """Percentile au rang le plus proche."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(math.ceil(pct / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def _ewma_update(mean: float | None, variance: float, value: float) -> tuple[float, float]:
+    """Met à jour moyenne et variance exponentielles avec une observation."""
+    if mean is None:
+        return value, 0.0
+    diff = value - mean
+    increment = EWMA_ALPHA * diff
+    return mean + increment, (1 - EWMA_ALPHA) * (variance + diff * increment)
+
+
+def _push(window: list[float], value: float) -> list[float]:
+    return (window + [round(value, 3)])[-WINDOW_SIZE:]
+
+
+class ServiceTimeStats:
+    """Accès et mise à jour des statistiques de durée par file."""
+
+    @staticmethod
+    def _cache_key(queue_id) -> str:
+        return CACHE_KEY.format(queue_id=queue_id)
+
+    @staticmethod
+    def snapshot(stats: QueueServiceStats) -> ServiceStatsSnapshot:
+        """Construit la vue figée d'une ligne de statistiques."""
+        return ServiceStatsSnapshot(
+            service_mean=stats.service_mean,
+            service_std=math.sqrt(stats.service_variance) if stats.service_mean is not None else None,
+            service_p50=_percentile(stats.service_window, 50),
+            service_p90=_percentile(stats.service_window, 90),
+            service_samples=stats.service_samples,
+            wait_mean=stats.wait_mean,
+            wait_std=math.sqrt(stats.wait_variance) if stats.wait_mean is not None else None,
+            wait_p50=_percentile(stats.wait_window, 50),
+            wait_p90=_percentile(stats.wait_window, 90),
+            wait_samples=stats.wait_samples,
+        )
+
+    @staticmethod
+    def get(queue: Queue) -> ServiceStatsSnapshot:
+        """Retourne les statistiques d'une file (cache, puis base, puis historique)."""
+        return ServiceTimeStats.get_many([queue.id])[queue.id]
+
+    @staticmethod
+    def get_many(queue_ids: Iterable) -> dict[object, ServiceStatsSnapshot]:
+        """Retourne les statistiques de plusieurs files en un nombre fixe de requêtes."""
+        queue_ids = list(queue_ids)
+        keys = {ServiceTimeStats._cache_key(queue_id): queue_id for queue_id in queue_ids}
+
+        result: dict[object, ServiceStatsSnapshot] = {}
+        for key, data in cache.get_many(list(keys)).items():
+            result[keys[key]] = ServiceStatsSnapshot(**data)
+
+        missing = [queue_id for queue_id in queue_ids if queue_id not in result]
+        if missing:
+            stored = {stats.queue_id: stats for stats in QueueServiceStats.objects.filter(queue_id__in=missing)}
+            still_missing = [queue_id for queue_id in missing if queue_id not in stored]
+            if still_missing:
+                stored.update(ServiceTimeStats.rebuild_many(still_missing))
+
+            to_cache = {}
+            for queue_id in missing:
+                stats = stored.get(queue_id)
+                snapshot = ServiceTimeStats.snapshot(stats) if stats else ServiceStatsSnapshot()
+                result[queue_id] = snapshot
+                to_cache[ServiceTimeStats._cache_key(queue_id)] = asdict(snapshot)
+            cache.set_many(to_cache, timeout=CACHE_TIMEOUT)
+
+        return result
+
+    @staticmethod
+    def average_service_time(queue: Queue) -> float | None:
+        """Temps de service moyen (EWMA) en secondes, ou None sans historique."""
+        return ServiceTimeStats.get(queue).service_mean
+
+    @staticmethod
+    def record_wait(ticket: Ticket) -> None:
+        """Enregistre la durée d'attente d'un ticket dont le service démarre."""
+        if not ticket.started_at or not ticket.created_at:
+            return
+        duration = (ticket.started_at - ticket.created_at).total_seconds()
+        ServiceTimeStats._record_after_commit(ticket, wait=duration)
+
+    @staticmethod
+    def record_service(ticket: Ticket) -> None:
+        """Enregistre la durée de service d'un ticket clôturé."""
+        if not ticket.started_at or not ticket.ended_at:
+            return
+        duration = (ticket.ended_at - ticket.started_at).total_seconds()
+        ServiceTimeStats._record_after_commit(ticket, service=duration)
+
+    @staticmethod
+    def _record_after_commit(ticket: Ticket, wait: float | None = None, service: float | None = None) -> None:
+        queue_id = ticket.queue_id
+        tenant_id = ticket.tenant_id
+        transaction.on_commit(lambda: ServiceTimeStats._record(queue_id, tenant_id, wait=wait, service=service))
+
+    @staticmethod
+    def _record(queue_id, tenant_id, wait: float | None = None, service: float | None = None) -> None:
+        with transaction.atomic():
+            stats = QueueServiceStats.objects.select_for_update().filter(queue_id=queue_id).first()
+            if stats is None:
+                # Première observation : l'historique des tickets clôturés fait foi. Il
+                # inclut déjà la durée de service d'un ticket clôturé, mais pas l'attente
+                # d'un ticket dont le service démarre : celle-ci est appliquée ensuite.
+                if queue_id in ServiceTimeStats.rebuild_many([queue_id]):
+                    service = None
+                stats, _created = QueueServiceStats.objects.get_or_create(
+                    queue_id=queue_id,
+                    defaults={"tenant_id": tenant_id},
+                )
+                stats = QueueServiceStats.objects.select_for_update().get(pk=stats.pk)
+
+            if service is not None and service >= 0:
+                ServiceTimeStats._apply(stats, "service", service)
+            if wait is not None and wait >= 0:
+                ServiceTimeStats._apply(stats, "wait", wait)
+            stats.save()
+
+        cache.set(
+            ServiceTimeStats._cache_key(queue_id),
+            asdict(ServiceTimeStats.snapshot(stats)),
+            timeout=CACHE_TIMEOUT,
+        )
+
+    @staticmethod
+    def _apply(stats: QueueServiceStats, kind: str, value: float) -> None:
+        mean, variance = _ewma_update(getattr(stats, f"{kind}_mean"), getattr(stats, f"{kind}_variance"), value)
+        setattr(stats, f"{kind}_mean", mean)
+        setattr(stats, f"{kind}_variance", variance)
+        setattr(stats, f"{kind}_samples", getattr(stats, f"{kind}_samples") + 1)
+        setattr(stats, f"{kind}_window", _push(getattr(stats, f"{kind}_window"), value))
+
+    @staticmethod
+    def rebuild_many(queue_ids: Iterable) -> dict[object, QueueServiceStats]:
+        """
+        Reconstruit les statistiques depuis les derniers tickets clôturés.
+
+        Une seule requête (fonction fenêtre) pour l'ensemble des files.
+        """
+        queue_ids = list(queue_ids)
+        recent = (
+            Ticket.objects.filter(
+                queue_id__in=queue_ids,
+                status=Ticket.STATUS_CLOSED,
+                started_at__isnull=False,
+                ended_at__isnull=False,
+            )
+            .annotate(
+                rank=Window(
+                    expression=RowNumber(),
+                    partition_by=[F("queue_id")],
+                    order_by=F("ended_at").desc(),
+                )
+            )
+            .filter(rank__lte=WINDOW_SIZE)
+            .values_list("queue_id", "tenant_id", "created_at", "started_at", "ended_at")
+        )
+
+        history: dict[object, list[tuple]] = defaultdict(list)
+        for queue_id, tenant_id, created_at, started_at, ended_at in recent:
+            history[queue_id].append((tenant_id, created_at, started_at, ended_at))
+
+        rebuilt = {}
+        for queue_id, rows in history.items():
+            rows.sort(key=lambda row: row[3])
+            stats = QueueServiceStats(queue_id=queue_id, tenant_id=rows[0][0])
+            for _tenant_id, created_at, started_at, ended_at in rows:
+                ServiceTimeStats._apply(stats, "service", _seconds(started_at, ended_at))
+                ServiceTimeStats._apply(stats, "wait", _seconds(created_at, started_at))
+            rebuilt[queue_id] = stats
+
+        if rebuilt:
+            # Upsert sur la file (OneToOne) : deux reconstructions concurrentes ne se heurtent pas
+            QueueServiceStats.objects.bulk_create(
+                rebuilt.values(),
+                update_conflicts=True,
+                unique_fields=["queue"],
+                update_fields=STATS_FIELDS,
+            )
+            cache.delete_many([ServiceTimeStats._cache_key(queue_id) for queue_id in rebuilt])
+        return rebuilt
+
+
+def _seconds(start: datetime, end: datetime) -> float:
+    return max((end - start).total_seconds(), 0.0)
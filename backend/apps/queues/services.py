@@ -8,32 +8,28 @@ from django.db import transaction
 from django.db.models import BooleanField, Case, Value, When
 from django.utils import timezone
 
+from apps.displays.state import DisplayState
+from apps.notifications.triggers import TicketReadyTrigger
 from apps.tickets.models import Ticket
 from apps.users.models import AgentProfile
 
 from .models import Queue
+from .service_stats import ServiceTimeStats
+from .waiting_index import WaitingIndexUnavailable, WaitingTicketIndex
 
 
 class QueueService:
     """Logique métier pour les files d'attente."""
 
     @staticmethod
-    def get_next_ticket(queue: Queue, algorithm: str | None = None) -> Ticket | None:
-        """Récupère le prochain ticket selon l'algorithme de la file."""
+    def waiting_tickets(queue: Queue, algorithm: str | None = None):
+        """Tickets en attente de la file, dans l'ordre d'appel de l'algorithme."""
         algo = algorithm or queue.algorithm
 
-        waiting_tickets = queue.tickets.filter(
-            status=Ticket.STATUS_WAITING
-        ).select_for_update()
-
-        if not waiting_tickets.exists():
-            return None
-
-        if algo == Queue.ALGO_FIFO:
-            return waiting_tickets.order_by("created_at").first()
+        waiting_tickets = queue.tickets.filter(status=Ticket.STATUS_WAITING)
 
         if algo == Queue.ALGO_PRIORITY:
-            return waiting_tickets.order_by("-priority", "created_at").first()
+            return waiting_tickets.order_by("-priority", "created_at")
 
         if algo == Queue.ALGO_SLA:
             sla_seconds = queue.service.sla_seconds
@@ -48,35 +44,91 @@ class QueueService:
                     )
                 )
                 .order_by("-is_late", "-priority", "created_at")
-                .first()
             )
 
-        return waiting_tickets.order_by("created_at").first()
+        # FIFO (et repli)
+        return waiting_tickets.order_by("created_at")
 
     @staticmethod
-    @transaction.atomic
-    def call_next(agent: AgentProfile, queue: Queue) -> Ticket | None:
-        """Agent appelle le prochain ticket de la file."""
-        active_ticket = Ticket.objects.filter(
+    def get_next_ticket(queue: Queue, algorithm: str | None = None) -> Ticket | None:
+        """Récupère le prochain ticket selon l'algorithme de la file."""
+        waiting_tickets = QueueService.waiting_tickets(queue, algorithm).select_for_update()
+
+        if not waiting_tickets.exists():
+            return None
+
+        return waiting_tickets.first()
+
+    @staticmethod
+    def active_ticket(agent: AgentProfile) -> Ticket | None:
+        """Ticket appelé ou en service de l'agent (index ``tickets_agent_active_idx``)."""
+        return Ticket.objects.filter(
             agent=agent,
             status__in=[Ticket.STATUS_CALLED, Ticket.STATUS_IN_SERVICE],
         ).first()
 
+    @staticmethod
+    @transaction.atomic
+    def call_next(agent: AgentProfile, queue: Queue) -> Ticket | None:
+        """Agent appelle le prochain ticket de la file."""
+        active_ticket = QueueService.active_ticket(agent)
+
         if active_ticket:
             raise ValueError(f"Agent a déjà un ticket actif: {active_ticket.number}")
 
-        next_ticket = QueueService.get_next_ticket(queue)
+        next_ticket = QueueService._pop_indexed_ticket(queue)
+        if next_ticket is None:
+            next_ticket = QueueService.get_next_ticket(queue)
         if not next_ticket:
             return None
 
-        next_ticket.status = Ticket.STATUS_CALLED
-        next_ticket.agent = agent
-        next_ticket.called_at = timezone.now()
-        next_ticket.save(update_fields=["status", "agent", "called_at", "updated_at"])
+        try:
+            next_ticket.status = Ticket.STATUS_CALLED
+            next_ticket.agent = agent
+            next_ticket.called_at = timezone.now()
+            next_ticket.save(update_fields=["status", "agent", "called_at", "updated_at"])
+
+            agent.set_status(AgentProfile.STATUS_BUSY)
+        except Exception:
+            # Le ticket reste en attente en base : le remettre dans l'index
+            next_ticket.status = Ticket.STATUS_WAITING
+            WaitingTicketIndex.restore(next_ticket)
+            raise
+
+        # Les tickets suivants avancent d'une place
+        TicketReadyTrigger.on_queue_changed(queue.id)
+        return next_ticket
 
-        agent.set_status(AgentProfile.STATUS_BUSY)
+    @staticmethod
+    def _pop_indexed_ticket(queue: Queue, max_attempts: int = 5) -> Ticket | None:
+        """
+        Récupère le prochain ticket via l'index Redis, verrouillé en base.
+
+        Les entrées obsolètes de l'index (ticket déjà appelé, transféré...) sont
+        ignorées. Retourne None si l'index est vide, indisponible ou trop
+        incohérent : l'appelant repasse alors par la requête SQL.
+        """
+        for _ in range(max_attempts):
+            try:
+                ticket_id = WaitingTicketIndex.pop_next(queue)
+            except WaitingIndexUnavailable:
+                return None
+            if ticket_id is None:
+                return None
+
+            ticket = (
+                Ticket.objects.select_for_update()
+                .filter(id=ticket_id, queue=queue, status=Ticket.STATUS_WAITING)
+                .first()
+            )
+            if ticket is not None:
+                # Retrait définitif au commit ; sinon la réservation expire et le ticket revient
+                WaitingTicketIndex.confirm_on_commit(ticket)
+                return ticket
+            # Entrée obsolète : son retrait est définitif
+            WaitingTicketIndex.confirm(queue.id, ticket_id)
 
-        return next_ticket
+        return None
 
     @staticmethod
     @transaction.atomic
@@ -88,6 +140,7 @@ class QueueService:
         ticket.status = Ticket.STATUS_IN_SERVICE
         ticket.started_at = timezone.now()
         ticket.save(update_fields=["status", "started_at", "updated_at"])
+        ServiceTimeStats.record_wait(ticket)
 
         return ticket
 
@@ -101,10 +154,13 @@ class QueueService:
         ticket.status = Ticket.STATUS_CLOSED
         ticket.ended_at = timezone.now()
         ticket.save(update_fields=["status", "ended_at", "updated_at"])
+        ServiceTimeStats.record_service(ticket)
 
         if agent:
             agent.set_status(AgentProfile.STATUS_AVAILABLE)
 
+        # Agent libéré : l'ETA des tickets en attente diminue
+        TicketReadyTrigger.on_queue_changed(ticket.queue_id)
         return ticket
 
     @staticmethod
@@ -117,12 +173,20 @@ class QueueService:
         if ticket.tenant != target_queue.tenant:
             raise ValueError("Impossible de transférer vers un autre tenant")
 
+        previous_queue_id = ticket.queue_id
         ticket.queue = target_queue
         ticket.status = Ticket.STATUS_TRANSFERRED
         ticket.priority += 10
         ticket.agent = None
-        ticket.save(update_fields=["queue", "status", "priority", "agent", "updated_at"])
-
+        # Nouvelle file, nouvelle position : la notification pourra repartir
+        ticket.ready_notified_at = None
+        ticket.save(update_fields=["queue", "status", "priority", "agent", "ready_notified_at", "updated_at"])
+        WaitingTicketIndex.sync(ticket, previous_queue_id=previous_queue_id)
+
+        TicketReadyTrigger.on_queue_changed(previous_queue_id)
+        TicketReadyTrigger.on_queue_changed(target_queue.id)
+        # Le signal post_save ne voit que la nouvelle file
+        DisplayState.queue_changed(previous_queue_id)
         return ticket
 
     @staticmethod
@@ -139,6 +203,7 @@ class QueueService:
         if agent:
             agent.set_status(AgentProfile.STATUS_AVAILABLE)
 
+        TicketReadyTrigger.on_queue_changed(ticket.queue_id)
         return ticket
 
     @staticmethod
@@ -0,0 +1,41 @@
+"""Signaux de l'application queues."""
+
+from __future__ import annotations
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from apps.tickets.models import Ticket
+
+from .rollups import KpiRollups
+from .waiting_index import WaitingTicketIndex
+
+# Champs dont dépend la position d'un ticket dans l'index d'attente
+_INDEXED_FIELDS = {"status", "priority", "queue", "queue_id"}
+
+
+@receiver(post_save, sender=Ticket, dispatch_uid="queues.waiting_index.ticket_saved")
+def sync_waiting_index_on_save(sender, instance: Ticket, created: bool, update_fields=None, **kwargs) -> None:
+    """Répercute création et changements de statut/priorité dans l'index d'attente."""
+    if update_fields is not None and not _INDEXED_FIELDS.intersection(update_fields):
+        return
+    WaitingTicketIndex.sync(instance)
+
+
+@receiver(post_delete, sender=Ticket, dispatch_uid="queues.waiting_index.ticket_deleted")
+def sync_waiting_index_on_delete(sender, instance: Ticket, **kwargs) -> None:
+    """Retire un ticket supprimé de l'index d'attente."""
+    transaction.on_commit(lambda: WaitingTicketIndex.discard(instance))
+
+
+@receiver(pre_save, sender=Ticket, dispatch_uid="queues.kpi_rollups.ticket_pre_save")
+def track_kpi_contribution(sender, instance: Ticket, update_fields=None, **kwargs) -> None:
+    """Mémorise l'état précédent du ticket pour les agrégats KPI."""
+    KpiRollups.track(instance, update_fields)
+
+
+@receiver(post_save, sender=Ticket, dispatch_uid="queues.kpi_rollups.ticket_saved")
+def update_kpi_rollups(sender, instance: Ticket, update_fields=None, **kwargs) -> None:
+    """Déplace la contribution du ticket dans les agrégats KPI."""
+    KpiRollups.on_saved(instance, update_fields)
@@ -0,0 +1,429 @@
+"""Simulation à événements discrets d'une file pour comparer les algorithmes.
+
+``QueueSimulator.simulate`` rejoue les arrivées historiques d'une file (dates
+de création, priorités, durées de service réelles) sous les algorithmes
+d'appel ``fifo``, ``priority`` et ``sla`` (mêmes ordres que
+``QueueService.waiting_tickets``) et pour plusieurs effectifs d'agents, puis
+compare distribution des attentes, conformité SLA et abandons.
+
+Modèle :
+
+- chaque journée repart d'une file vide ; ``n`` agents sont présents toute
+  la journée et appellent le prochain ticket dès qu'ils sont libres ;
+- l'attente d'un ticket va de sa création à son appel ; un agent est occupé
+  de l'appel à la clôture (durée historique, tirée parmi les durées
+  observées pour les tickets absents) ;
+- la patience des clients suit une loi exponentielle dont la moyenne est
+  estimée sur l'historique (attentes observées / absences). Les tirages sont
+  conditionnés par l'historique (un client servi après 10 min avait au moins
+  10 min de patience) et communs à tous les scénarios.
+
+Le moteur est vectorisé avec NumPy : toutes les journées de tous les
+scénarios avancent ensemble, un appel par ligne et par itération. Le choix du
+prochain ticket se fait parmi les tickets arrivés à partir du plus ancien
+non traité, dans une fenêtre de la taille de la plus longue file du moment
+bornée à ``window`` ; ``window_saturated_steps`` signale les itérations où
+une file dépassait la borne (ordre alors approché).
+"""
+
+from __future__ import annotations
+
+import heapq
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+import numpy as np
+from django.utils import timezone
+
+from apps.tickets.models import ArchivedTicket, Ticket
+
+from .forecast import MAX_AGENTS
+from .models import Queue
+
+POLICIES = (Queue.ALGO_FIFO, Queue.ALGO_PRIORITY, Queue.ALGO_SLA)
+_POLICY_CODES = {policy: code for code, policy in enumerate(POLICIES)}
+
+# Clés de tri : tickets en retard SLA, puis priorité, puis ancienneté (secondes dans la journée)
+PRIORITY_WEIGHT = 1e6
+LATE_WEIGHT = 1e9
+
+DEFAULT_WINDOW = 512
+MAX_PERIOD_DAYS = 92
+MAX_SCENARIOS = 60
+# Cellules (scénarios × jours × tickets du jour le plus chargé) des matrices d'état du moteur
+MAX_SIMULATED_CELLS = 10_000_000
+
+# Bornes (secondes) de l'histogramme des attentes
+WAIT_BUCKETS = (0, 300, 600, 1200, 1800, 3600)
+
+
+class SimulationError(ValueError):
+    """Historique insuffisant ou paramètres invalides."""
+
+
+@dataclass
+class SimulationHistory:
+    """Historique d'une file mis en forme pour le moteur (une ligne par jour)."""
+
+    # (jours, tickets) ; secondes depuis le début de la journée, +inf pour le bourrage
+    arrivals: np.ndarray
+    priorities: np.ndarray
+    service: np.ndarray
+    patience: np.ndarray
+    # Nombre de tickets par jour
+    lengths: np.ndarray
+    historical: dict
+    agents: int
+    mean_patience: float | None
+
+
+class QueueSimulator:
+    """Rejeu de l'historique d'une file sous différents algorithmes et effectifs."""
+
+    @staticmethod
+    def simulate(
+        queue: Queue,
+        period_days: int = 30,
+        policies: list[str] | None = None,
+        staffing: list[int] | None = None,
+        target_sla: float = 80.0,
+        seed: int = 0,
+        window: int = DEFAULT_WINDOW,
+    ) -> dict:
+        """
+        Rejoue les ``period_days`` derniers jours de la file.
+
+        Args:
+            queue: file simulée
+            period_days: historique rejoué
+            policies: algorithmes comparés (tous par défaut)
+            staffing: effectifs simulés (effectif historique ±1 par défaut, au plus ``MAX_AGENTS``)
+            target_sla: conformité SLA visée (%) pour l'effectif minimal recommandé
+            seed: graine des tirages (durées et patiences)
+
+        Returns:
+            dict avec l'historique, un résultat par scénario et la recommandation
+        """
+        policies = list(policies or POLICIES)
+        unknown = set(policies) - set(POLICIES)
+        if unknown:
+            raise SimulationError(f"Unknown algorithms: {', '.join(sorted(unknown))}")
+        if not 1 <= period_days <= MAX_PERIOD_DAYS:
+            raise SimulationError(f"period_days must be between 1 and {MAX_PERIOD_DAYS}")
+        if staffing is not None and any(not 1 <= agents <= MAX_AGENTS for agents in staffing):
+            raise SimulationError(f"staffing must contain agent counts between 1 and {MAX_AGENTS}")
+
+        until = timezone.now()
+        since = until - timedelta(days=period_days)
+        history = QueueSimulator.load_history(queue, since, until, seed=seed)
+
+        if staffing is None:
+            staffing = [agents for agents in (history.agents - 1, history.agents, history.agents + 1) if 1 <= agents <= MAX_AGENTS]
+        staffing = sorted(set(staffing))
+        if not staffing:
+            raise SimulationError("staffing must contain positive agent counts")
+        scenarios = [(policy, agents) for policy in policies for agents in staffing]
+        if len(scenarios) > MAX_SCENARIOS:
+            raise SimulationError(f"Too many scenarios ({len(scenarios)} > {MAX_SCENARIOS})")
+        if len(scenarios) * history.arrivals.size > MAX_SIMULATED_CELLS:
+            raise SimulationError("Simulation too large: reduce period_days, algorithms or staffing")
+
+        sla_seconds = queue.service.sla_seconds
+        started = time.perf_counter()
+        results, saturated = QueueSimulator.replay(history, scenarios, sla_seconds, window=window)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        return {
+            "queue_id": str(queue.id),
+            "queue_name": queue.name,
+            "period": {"start": since.isoformat(), "end": until.isoformat(), "days": period_days},
+            "sla_seconds": sla_seconds,
+            "mean_patience_seconds": round(history.mean_patience) if history.mean_patience else None,
+            "historical": {**history.historical, "agents": history.agents},
+            "scenarios": results,
+            "recommendation": QueueSimulator.recommend(results, history.agents, target_sla),
+            "engine": {
+                "tickets": int(history.lengths.sum()),
+                "days": int(len(history.lengths)),
+                "scenarios": len(scenarios),
+                "window": window,
+                "window_saturated_steps": saturated,
+                "elapsed_ms": round(elapsed_ms, 1),
+            },
+        }
+
+    # --- Historique ----------------------------------------------------------------
+
+    @staticmethod
+    def load_history(queue: Queue, since: datetime, until: datetime, seed: int = 0) -> SimulationHistory:
+        """Tickets terminés (clôturés ou absents) de la période, tables vive et archive."""
+        names = ("created_at", "called_at", "started_at", "ended_at", "priority", "status")
+        lookups = {
+            "queue": queue,
+            "created_at__gte": since,
+            "created_at__lt": until,
+            "status__in": [Ticket.STATUS_CLOSED, Ticket.STATUS_NO_SHOW],
+        }
+        # Deux flux triés par l'index (queue, created_at), fusionnés
+        rows = list(
+            heapq.merge(
+                *(
+                    model.objects.filter(**lookups).order_by("created_at").values_list(*names).iterator(chunk_size=10000)
+                    for model in (Ticket, ArchivedTicket)
+                ),
+                key=lambda row: row[0],
+            )
+        )
+        if not rows:
+            raise SimulationError("No finished tickets in the period")
+
+        def seconds(values) -> np.ndarray:
+            return np.array([value.timestamp() if value is not None else np.nan for value in values], dtype=float)
+
+        created_at, called_at, started_at, ended_at, priorities, statuses = zip(*rows)
+        created, called, started, ended = (seconds(column) for column in (created_at, called_at, started_at, ended_at))
+        priorities = np.array(priorities, dtype=float)
+        no_show = np.array([status == Ticket.STATUS_NO_SHOW for status in statuses])
+        rng = np.random.default_rng(seed)
+
+        # Appel : called_at, sinon début de service
+        called = np.where(np.isnan(called), started, called)
+        observed_wait = np.clip(called - created, 0, None)
+        occupancy = ended - called
+        known_service = ~no_show & np.isfinite(occupancy) & (occupancy > 0)
+        if not known_service.any():
+            raise SimulationError("No closed tickets with service times in the period")
+        service = np.where(known_service, occupancy, rng.choice(occupancy[known_service], size=len(rows)))
+
+        waited = np.isfinite(observed_wait)
+        observed_wait = np.where(waited, observed_wait, 0.0)
+        patience, mean_patience = QueueSimulator._patience(observed_wait, no_show & waited, rng)
+
+        # Une ligne par jour (UTC) ; temps relatifs au début du jour
+        origin = since.replace(hour=0, minute=0, second=0, microsecond=0).timestamp()
+        absolute_day = ((created - origin) // 86400).astype(np.int64)
+        day_start = origin + 86400.0 * absolute_day
+        day_index = absolute_day - absolute_day.min()
+        days = int(day_index.max()) + 1
+        lengths = np.bincount(day_index, minlength=days)
+        first = np.cumsum(lengths) - lengths
+        position = np.arange(len(rows)) - first[day_index]
+        width = int(lengths.max())
+
+        def matrix(values: np.ndarray, fill: float) -> np.ndarray:
+            result = np.full((days, width), fill, dtype=float)
+            result[day_index, position] = values
+            return result
+
+        served = ~no_show & waited
+        sla_seconds = queue.service.sla_seconds
+        historical = {
+            "tickets": len(rows),
+            "abandonment_rate": round(float(no_show.mean()) * 100, 2),
+            **QueueSimulator._wait_metrics(observed_wait[served], sla_seconds),
+        }
+
+        return SimulationHistory(
+            arrivals=matrix(created - day_start, np.inf),
+            priorities=matrix(priorities, 0),
+            service=matrix(service, 0),
+            patience=matrix(patience, np.inf),
+            lengths=lengths,
+            historical=historical,
+            agents=QueueSimulator._historical_agents(called, ended, known_service, day_index, days),
+            mean_patience=mean_patience,
+        )
+
+    @staticmethod
+    def _patience(observed_wait: np.ndarray, abandoned: np.ndarray, rng) -> tuple[np.ndarray, float | None]:
+        """
+        Patience par ticket, loi exponentielle conditionnée par l'historique.
+
+        Moyenne estimée par maximum de vraisemblance (attentes observées,
+        censurées pour les tickets servis) ; servi après ``w`` : ``w + Exp`` ;
+        absent après ``w`` : exponentielle tronquée à ``[0, w]``.
+        """
+        if not abandoned.any():
+            return np.full(len(observed_wait), np.inf), None
+        mean = float(observed_wait.sum() / abandoned.sum())
+        if mean <= 0:
+            return np.zeros(len(observed_wait)), 0.0
+        served = observed_wait + rng.exponential(mean, size=len(observed_wait))
+        uniform = rng.random(len(observed_wait))
+        left = -mean * np.log1p(-uniform * -np.expm1(-observed_wait / mean))
+        return np.where(abandoned, left, served), mean
+
+    @staticmethod
+    def _historical_agents(called, ended, served, day_index, days: int) -> int:
+        """Effectif historique : médiane des pics quotidiens de tickets servis simultanément."""
+        times = np.concatenate([called[served], ended[served]])
+        deltas = np.concatenate([np.ones(served.sum()), -np.ones(served.sum())])
+        event_days = np.concatenate([day_index[served], day_index[served]])
+        # Fins avant débuts à instant égal
+        order = np.lexsort((deltas, times, event_days))
+        busy = np.cumsum(deltas[order])
+        peaks = np.zeros(days)
+        np.maximum.at(peaks, event_days[order], busy)
+        peaks = peaks[peaks > 0]
+        return max(1, int(np.ceil(np.median(peaks)))) if len(peaks) else 1
+
+    # --- Moteur --------------------------------------------------------------------
+
+    @staticmethod
+    def replay(
+        history: SimulationHistory,
+        scenarios: list[tuple[str, int]],
+        sla_seconds: float,
+        window: int = DEFAULT_WINDOW,
+    ) -> tuple[list[dict], int]:
+        """
+        Rejoue l'historique pour chaque scénario ``(algorithme, agents)``.
+
+        Une ligne d'état par (scénario, jour) ; à chaque itération, chaque
+        ligne active libère son agent le plus tôt disponible, écarte les
+        clients à bout de patience et appelle le meilleur ticket arrivé.
+
+        Returns:
+            (résultats par scénario, itérations où la fenêtre était saturée)
+        """
+        days, width = history.arrivals.shape
+        count = len(scenarios)
+        rows = count * days
+        lengths = np.tile(history.lengths, count)
+        policies = np.repeat([_POLICY_CODES[policy] for policy, _agents in scenarios], days)
+        servers = np.repeat([agents for _policy, agents in scenarios], days)
+
+        # Agents libres dès le début ; colonnes au-delà de l'effectif jamais libres
+        free = np.where(np.arange(servers.max())[None, :] < servers[:, None], -np.inf, np.inf)
+        done = np.arange(width)[None, :] >= lengths[:, None]
+        abandoned = np.zeros((rows, width), dtype=bool)
+        start = np.full((rows, width), np.nan)
+        head = np.zeros(rows, dtype=np.int64)
+        # Premier ticket non encore arrivé (``now`` ne décroît pas sur une ligne)
+        tail = np.zeros(rows, dtype=np.int64)
+        saturated = 0
+
+        active = np.flatnonzero(head < lengths)
+        while active.size:
+            day = (active % days)[:, None]
+            server = free[active].argmin(axis=1)
+            now = np.maximum(free[active, server], history.arrivals[day[:, 0], head[active]])[:, None]
+
+            while True:
+                position = tail[active]
+                move = (position < lengths[active]) & (
+                    history.arrivals[day[:, 0], np.minimum(position, width - 1)] <= now[:, 0]
+                )
+                if not move.any():
+                    break
+                tail[active[move]] += 1
+
+            # Fenêtre : tickets arrivés depuis le plus ancien non traité
+            backlog = tail[active] - head[active]
+            saturated += int(np.count_nonzero(backlog > window))
+            columns = head[active][:, None] + np.arange(min(int(backlog.max()), window))
+            in_range = columns < tail[active][:, None]
+            columns = np.minimum(columns, width - 1)
+            arrivals = history.arrivals[day, columns]
+            pending = in_range & ~done[active[:, None], columns]
+
+            expired = pending & (arrivals + history.patience[day, columns] < now)
+            if expired.any():
+                expired_rows, expired_slots = np.nonzero(expired)
+                done[active[expired_rows], columns[expired_rows, expired_slots]] = True
+                abandoned[active[expired_rows], columns[expired_rows, expired_slots]] = True
+                pending &= ~expired
+
+            policy = policies[active][:, None]
+            by_priority = arrivals - PRIORITY_WEIGHT * history.priorities[day, columns]
+            late = (now - arrivals) >= sla_seconds
+            key = np.where(
+                policy == _POLICY_CODES[Queue.ALGO_FIFO],
+                arrivals,
+                np.where(policy == _POLICY_CODES[Queue.ALGO_SLA], by_priority - LATE_WEIGHT * late, by_priority),
+            )
+            key = np.where(pending, key, np.inf)
+            pick = key.argmin(axis=1)
+            called = np.isfinite(key[np.arange(active.size), pick])
+
+            called_rows = active[called]
+            called_columns = columns[called, pick[called]]
+            called_at = now[called, 0]
+            start[called_rows, called_columns] = called_at
+            done[called_rows, called_columns] = True
+            free[called_rows, server[called]] = (
+                called_at + history.service[called_rows % days, called_columns]
+            )
+
+            # Avance du plus ancien ticket non traité
+            while True:
+                position = head[active]
+                move = (position < lengths[active]) & done[active, np.minimum(position, width - 1)]
+                if not move.any():
+                    break
+                head[active[move]] += 1
+            active = active[head[active] < lengths[active]]
+
+        waits = start - np.tile(history.arrivals, (count, 1))
+        valid = ~(np.arange(width)[None, :] >= history.lengths[:, None])
+        results = []
+        for index, (policy, agents) in enumerate(scenarios):
+            block = slice(index * days, (index + 1) * days)
+            left = abandoned[block] & valid
+            served = valid & ~abandoned[block]
+            tickets = int(valid.sum())
+            results.append({
+                "algorithm": policy,
+                "agents": agents,
+                "tickets": tickets,
+                "served": int(served.sum()),
+                "abandoned": int(left.sum()),
+                "abandonment_rate": round(float(left.sum()) / tickets * 100, 2) if tickets else 0.0,
+                **QueueSimulator._wait_metrics(waits[block][served], sla_seconds),
+            })
+        return results, saturated
+
+    @staticmethod
+    def _wait_metrics(waits: np.ndarray, sla_seconds: float) -> dict:
+        if not len(waits):
+            return {"sla_compliance_rate": 100.0, "wait_seconds": None, "wait_histogram": {}}
+        p50, p90, p95, p99 = np.percentile(waits, [50, 90, 95, 99])
+        counts, _ = np.histogram(waits, bins=[*WAIT_BUCKETS, np.inf])
+        labels = [f"{low // 60}-{high // 60}min" for low, high in zip(WAIT_BUCKETS, WAIT_BUCKETS[1:])]
+        labels.append(f"{WAIT_BUCKETS[-1] // 60}min+")
+        return {
+            "sla_compliance_rate": round(float((waits <= sla_seconds).mean()) * 100, 2),
+            "wait_seconds": {
+                "mean": round(float(waits.mean())),
+                "p50": round(float(p50)),
+                "p90": round(float(p90)),
+                "p95": round(float(p95)),
+                "p99": round(float(p99)),
+                "max": round(float(waits.max())),
+            },
+            "wait_histogram": dict(zip(labels, (int(count) for count in counts))),
+        }
+
+    @staticmethod
+    def recommend(results: list[dict], current_agents: int, target_sla: float) -> dict:
+        """Meilleur algorithme à effectif courant et effectif minimal par algorithme pour ``target_sla``."""
+
+        def score(result: dict):
+            mean_wait = result["wait_seconds"]["mean"] if result["wait_seconds"] else 0
+            return (-result["sla_compliance_rate"], result["abandonment_rate"], mean_wait)
+
+        at_current = [result for result in results if result["agents"] == current_agents] or results
+        best = min(at_current, key=score)
+        minimum_agents = {}
+        for result in sorted(results, key=lambda item: item["agents"]):
+            if result["sla_compliance_rate"] >= target_sla:
+                minimum_agents.setdefault(result["algorithm"], result["agents"])
+        return {
+            "algorithm": best["algorithm"],
+            "agents": best["agents"],
+            "target_sla_percent": target_sla,
+            "min_agents_for_target": {
+                policy: minimum_agents.get(policy) for policy in dict.fromkeys(r["algorithm"] for r in results)
+            },
+        }
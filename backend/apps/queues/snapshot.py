@@ -0,0 +1,285 @@
+"""Instantané agrégé des files d'un tenant.
+
+Les tableaux de bord (vue d'ensemble, équilibrage de charge, suggestions) et
+les listes publiques ont besoin des mêmes compteurs pour chaque file. Plutôt
+que de les recompter file par file, ``TenantQueueSnapshot.build`` les collecte
+en un nombre fixe de requêtes groupées, quel que soit le nombre de files :
+
+1. les files (avec service et site) ;
+2. les tickets vivants par statut, dont les tickets en retard sur leur SLA ;
+3. le temps d'attente moyen des tickets clôturés aujourd'hui ;
+4. les agents assignés / disponibles ;
+5. les statistiques glissantes de service (``ServiceTimeStats``, en cache).
+
+Un cache court (quelques secondes) peut être placé devant le calcul pour les
+endpoints très sollicités (écrans, listes publiques).
+"""
+
+from __future__ import annotations
+
+import hashlib
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Iterable
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Avg, Count, DurationField, ExpressionWrapper, F, Q
+from django.utils import timezone
+
+from apps.tickets.models import Ticket
+from apps.users.models import AgentProfile
+
+from .analytics import QueueAnalytics
+from .eta import QueueETAInputs
+from .models import Queue, QueueAssignment
+from .service_stats import ServiceStatsSnapshot, ServiceTimeStats
+
+if TYPE_CHECKING:
+    from apps.tenants.models import Tenant
+
+CACHE_KEY = "tenant_queue_snapshot:{tenant_id}:{variant}"
+# Durée de vie par défaut de l'instantané en cache (0 = pas de cache)
+CACHE_TIMEOUT = getattr(settings, "QUEUE_SNAPSHOT_CACHE_SECONDS", 5)
+
+# Nombre de premiers tickets pris en compte pour l'ETA moyen (cf. get_queue_health)
+HEALTH_ETA_SAMPLE = 10
+
+
+@dataclass
+class QueueSnapshot:
+    """Compteurs d'une file à l'instant de l'instantané."""
+
+    queue: Queue
+    waiting_count: int = 0
+    called_count: int = 0
+    in_service_count: int = 0
+    late_count: int = 0
+    assigned_agents: int = 0
+    available_agents_count: int = 0
+    avg_wait_today_seconds: float | None = None
+    service_stats: ServiceStatsSnapshot = field(default_factory=ServiceStatsSnapshot)
+
+    @property
+    def available_agents(self) -> int:
+        """Agents disponibles, au minimum 1 (même convention que ``_count_available_agents``)."""
+        return max(self.available_agents_count, 1)
+
+    @property
+    def avg_service_seconds(self) -> float:
+        """Temps de service moyen glissant, ou SLA du service sans historique."""
+        return self.service_stats.service_mean or self.queue.service.sla_seconds
+
+    @property
+    def load_ratio(self) -> float:
+        """Tickets en attente par agent disponible."""
+        return self.waiting_count / self.available_agents
+
+    def estimate_eta(self, tickets_ahead: int) -> int:
+        """ETA en secondes d'un ticket ayant ``tickets_ahead`` tickets devant lui."""
+        return int((tickets_ahead / self.available_agents) * self.avg_service_seconds)
+
+    def eta_inputs(self) -> QueueETAInputs:
+        """Paramètres de la file pour ``ETAEngine.compute_etas``."""
+        return QueueETAInputs(
+            algorithm=self.queue.algorithm,
+            sla_seconds=self.queue.service.sla_seconds,
+            avg_service_seconds=self.avg_service_seconds,
+            available_agents=self.available_agents,
+        )
+
+    def stats(self) -> dict:
+        """Même forme que ``QueueService.get_queue_stats``."""
+        return {
+            "waiting_count": self.waiting_count,
+            "called_count": self.called_count,
+            "in_service_count": self.in_service_count,
+            "avg_wait_seconds": self.avg_wait_today_seconds,
+        }
+
+    def health(self) -> dict:
+        """
+        Santé de la file, même barème que ``QueueAnalytics.get_queue_health``.
+
+        L'ETA moyen est estimé sur les premiers tickets en attente à partir de
+        leur rang (0, 1, 2...), sans recalcul ticket par ticket.
+        """
+        avg_eta = None
+        sample = min(self.waiting_count, HEALTH_ETA_SAMPLE)
+        if sample:
+            total_eta = sum(self.estimate_eta(position) for position in range(sample))
+            if total_eta > 0:
+                avg_eta = total_eta / sample
+
+        return QueueAnalytics.score_health(
+            self.queue,
+            waiting_count=self.waiting_count,
+            late_count=self.late_count,
+            available_agents=self.available_agents,
+            avg_eta=avg_eta,
+        )
+
+
+@dataclass
+class TenantQueueSnapshot:
+    """Instantané des files d'un tenant, dans l'ordre des files."""
+
+    queues: list[QueueSnapshot]
+    generated_at: datetime
+
+    def __iter__(self):
+        return iter(self.queues)
+
+    def __len__(self) -> int:
+        return len(self.queues)
+
+    def get(self, queue_id) -> QueueSnapshot | None:
+        """Retourne l'instantané d'une file, ou None si elle n'en fait pas partie."""
+        for entry in self.queues:
+            if str(entry.queue.id) == str(queue_id):
+                return entry
+        return None
+
+    @staticmethod
+    def build(
+        tenant: Tenant,
+        *,
+        queue_ids: Iterable | None = None,
+        active_only: bool = False,
+        cache_timeout: int | None = None,
+    ) -> TenantQueueSnapshot:
+        """
+        Construit l'instantané des files d'un tenant.
+
+        Args:
+            tenant: Le tenant
+            queue_ids: restreindre à ces files (toutes par défaut)
+            active_only: ne garder que les files actives
+            cache_timeout: durée de cache en secondes (None = aucun cache)
+
+        Returns:
+            TenantQueueSnapshot
+        """
+        queues = Queue.objects.filter(tenant=tenant).select_related("service", "site")
+        if active_only:
+            queues = queues.filter(status=Queue.STATUS_ACTIVE)
+        if queue_ids is not None:
+            queue_ids = sorted(str(queue_id) for queue_id in queue_ids)
+            queues = queues.filter(id__in=queue_ids)
+
+        if not cache_timeout:
+            return TenantQueueSnapshot.from_queues(queues)
+
+        variant = hashlib.md5(  # noqa: S324 - clé de cache, pas de sécurité
+            f"{active_only}:{','.join(queue_ids) if queue_ids is not None else '*'}".encode()
+        ).hexdigest()
+        key = CACHE_KEY.format(tenant_id=tenant.id, variant=variant)
+
+        snapshot = cache.get(key)
+        if snapshot is None:
+            snapshot = TenantQueueSnapshot.from_queues(queues)
+            cache.set(key, snapshot, timeout=cache_timeout)
+        return snapshot
+
+    @staticmethod
+    def from_queues(queues: Iterable[Queue]) -> TenantQueueSnapshot:
+        """Construit l'instantané d'un ensemble de files déjà sélectionnées."""
+        queues = list(queues)
+        now = timezone.now()
+        if not queues:
+            return TenantQueueSnapshot(queues=[], generated_at=now)
+
+        ids = [queue.id for queue in queues]
+        tickets = TenantQueueSnapshot._ticket_counts(queues, now)
+        waits = TenantQueueSnapshot._average_wait_today(ids, now)
+        agents = TenantQueueSnapshot._agent_counts(ids)
+        stats = ServiceTimeStats.get_many(ids)
+
+        entries = []
+        for queue in queues:
+            counts = tickets.get(queue.id, {})
+            assigned, available = agents.get(queue.id, (0, 0))
+            entries.append(
+                QueueSnapshot(
+                    queue=queue,
+                    waiting_count=counts.get("waiting", 0),
+                    called_count=counts.get("called", 0),
+                    in_service_count=counts.get("in_service", 0),
+                    late_count=counts.get("late", 0),
+                    assigned_agents=assigned,
+                    available_agents_count=available,
+                    avg_wait_today_seconds=waits.get(queue.id),
+                    service_stats=stats.get(queue.id, ServiceStatsSnapshot()),
+                )
+            )
+        return TenantQueueSnapshot(queues=entries, generated_at=now)
+
+    @staticmethod
+    def _ticket_counts(queues: list[Queue], now: datetime) -> dict[object, dict[str, int]]:
+        """Tickets vivants par file et par statut, en une requête groupée."""
+        # Le seuil de retard dépend du SLA de chaque file : une condition par SLA distinct
+        by_sla: dict[int, list] = defaultdict(list)
+        for queue in queues:
+            by_sla[queue.service.sla_seconds].append(queue.id)
+
+        late_filter = Q()
+        for sla_seconds, queue_ids in by_sla.items():
+            late_filter |= Q(queue_id__in=queue_ids, created_at__lte=now - timedelta(seconds=sla_seconds))
+
+        rows = (
+            Ticket.objects.filter(
+                queue_id__in=[queue.id for queue in queues],
+                status__in=[Ticket.STATUS_WAITING, Ticket.STATUS_CALLED, Ticket.STATUS_IN_SERVICE],
+            )
+            .order_by()
+            .values("queue_id")
+            .annotate(
+                waiting=Count("id", filter=Q(status=Ticket.STATUS_WAITING)),
+                called=Count("id", filter=Q(status=Ticket.STATUS_CALLED)),
+                in_service=Count("id", filter=Q(status=Ticket.STATUS_IN_SERVICE)),
+                late=Count("id", filter=Q(status=Ticket.STATUS_WAITING) & late_filter),
+            )
+        )
+        return {row.pop("queue_id"): row for row in rows}
+
+    @staticmethod
+    def _average_wait_today(queue_ids: list, now: datetime) -> dict[object, float]:
+        """Attente moyenne (secondes) des tickets clôturés aujourd'hui, par file."""
+        today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        rows = (
+            Ticket.objects.filter(
+                queue_id__in=queue_ids,
+                status=Ticket.STATUS_CLOSED,
+                ended_at__gte=today,
+                started_at__isnull=False,
+            )
+            .order_by()
+            .values("queue_id")
+            .annotate(
+                avg_wait=Avg(
+                    ExpressionWrapper(F("started_at") - F("created_at"), output_field=DurationField())
+                )
+            )
+            .values_list("queue_id", "avg_wait")
+        )
+        return {queue_id: avg_wait.total_seconds() for queue_id, avg_wait in rows if avg_wait is not None}
+
+    @staticmethod
+    def _agent_counts(queue_ids: list) -> dict[object, tuple[int, int]]:
+        """Agents assignés et disponibles par file, en une requête groupée."""
+        rows = (
+            QueueAssignment.objects.filter(queue_id__in=queue_ids, is_active=True)
+            .order_by()
+            .values("queue_id")
+            .annotate(
+                assigned=Count("id"),
+                available=Count(
+                    "agent_id",
+                    distinct=True,
+                    filter=Q(agent__current_status=AgentProfile.STATUS_AVAILABLE),
+                ),
+            )
+            .values_list("queue_id", "assigned", "available")
+        )
+        return {queue_id: (assigned, available) for queue_id, assigned, available in rows}
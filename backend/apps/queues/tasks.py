@@ -3,12 +3,16 @@
 from __future__ import annotations
 
 from celery import shared_task
+from django.conf import settings
 from django.utils import timezone
 
-from apps.tickets.models import Ticket
+from apps.core.db_router import replica_reads
 
 from .analytics import QueueAnalytics
+from .eta import ETAEngine
+from .forecast import ArrivalProfiles
 from .models import Queue
+from .waiting_index import WaitingIndexUnavailable, WaitingTicketIndex
 
 
 @shared_task
@@ -18,26 +22,17 @@ def update_tickets_eta():
 
     Cette tâche devrait être exécutée toutes les 1-2 minutes.
     """
-    waiting_tickets = Ticket.objects.filter(
-        status=Ticket.STATUS_WAITING
-    ).select_related("queue", "queue__service")
-
-    updated_count = 0
-    for ticket in waiting_tickets:
-        eta = QueueAnalytics.calculate_eta(ticket)
-        if eta is not None and eta != ticket.eta_seconds:
-            ticket.eta_seconds = eta
-            ticket.save(update_fields=["eta_seconds", "updated_at"])
-            updated_count += 1
+    result = ETAEngine.recompute()
 
     return {
-        "updated_count": updated_count,
-        "total_waiting": waiting_tickets.count(),
+        "updated_count": result["updated_count"],
+        "total_waiting": result["total_waiting"],
         "timestamp": timezone.now().isoformat(),
     }
 
 
 @shared_task
+@replica_reads
 def check_queue_health():
     """
     Vérifie la santé de toutes les files actives et génère des alertes.
@@ -79,32 +74,66 @@ def check_queue_health():
 
 
 @shared_task
-def cleanup_old_tickets():
+def reconcile_waiting_index():
     """
-    Archive ou nettoie les vieux tickets clôturés (> 90 jours).
+    Vérifie l'index Redis des tickets en attente et reconstruit les files incohérentes.
 
-    Cette tâche devrait être exécutée quotidiennement.
+    Cette tâche devrait être exécutée toutes les 5 minutes.
     """
-    from datetime import timedelta
+    active_queues = Queue.objects.filter(status=Queue.STATUS_ACTIVE)
+
+    rebuilt = []
+    try:
+        for queue in active_queues:
+            report = WaitingTicketIndex.check(queue)
+            if not report["consistent"]:
+                WaitingTicketIndex.rebuild(queue)
+                rebuilt.append(str(queue.id))
+    except WaitingIndexUnavailable as exc:
+        return {
+            "status": "unavailable",
+            "reason": str(exc),
+            "timestamp": timezone.now().isoformat(),
+        }
+
+    return {
+        "status": "ok",
+        "rebuilt_queues": rebuilt,
+        "timestamp": timezone.now().isoformat(),
+    }
 
-    cutoff_date = timezone.now() - timedelta(days=90)
 
-    old_tickets = Ticket.objects.filter(
-        status__in=[Ticket.STATUS_CLOSED, Ticket.STATUS_NO_SHOW],
-        ended_at__lt=cutoff_date,
-    )
+@shared_task
+def build_arrival_profiles():
+    """
+    Reconstruit les profils d'arrivées et de durées de service de toutes les files.
 
-    count = old_tickets.count()
+    Exécutée chaque nuit ; lit les agrégats KPI horaires.
+    """
+    profiles = ArrivalProfiles.build_many()
 
-    # Option 1 : Supprimer (attention aux contraintes FK)
-    # old_tickets.delete()
+    return {
+        "queues": len(profiles),
+        "timestamp": timezone.now().isoformat(),
+    }
+
+
+@shared_task
+def cleanup_old_tickets():
+    """
+    Archive les tickets clôturés ou absents depuis plus de ``TICKET_ARCHIVE_AFTER_DAYS``.
+
+    Exécutée quotidiennement ; une exécution limitée par
+    ``TICKET_ARCHIVE_MAX_SECONDS`` est reprise le lendemain.
+    """
+    from apps.tickets.archive import TicketArchive
 
-    # Option 2 : Marquer pour archivage (nécessite un champ is_archived)
-    # old_tickets.update(is_archived=True)
+    result = TicketArchive.archive(max_seconds=getattr(settings, "TICKET_ARCHIVE_MAX_SECONDS", 1800))
 
     return {
-        "old_tickets_found": count,
-        "action": "identified",  # ou "deleted" / "archived"
-        "cutoff_date": cutoff_date.isoformat(),
+        "archived": result["archived"],
+        "batches": result["batches"],
+        "complete": result["complete"],
+        "cutoff_date": result["cutoff"].isoformat(),
         "timestamp": timezone.now().isoformat(),
     }
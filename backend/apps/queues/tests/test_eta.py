@@ -0,0 +1,73 @@
+"""Tests pour le recalcul groupé des ETA."""
+
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+from freezegun import freeze_time
+from model_bakery import baker
+
+from apps.queues.analytics import QueueAnalytics
+from apps.queues.eta import ETAEngine
+from apps.queues.models import Queue
+from apps.tickets.models import Ticket
+
+
+@pytest.mark.django_db
+class TestETAEngine:
+    """Tests pour ETAEngine.recompute."""
+
+    def _make_waiting_tickets(self, tenant, queue):
+        now = timezone.now()
+        specs = [(60, 0), (45, 5), (30, 0), (20, 10), (5, 5), (1, 0)]
+        for minutes_ago, priority in specs:
+            with freeze_time(now - timedelta(minutes=minutes_ago)):
+                baker.make(
+                    Ticket,
+                    tenant=tenant,
+                    queue=queue,
+                    status=Ticket.STATUS_WAITING,
+                    priority=priority,
+                )
+
+    @pytest.mark.parametrize("algorithm", [Queue.ALGO_FIFO, Queue.ALGO_PRIORITY, Queue.ALGO_SLA])
+    def test_matches_per_ticket_calculation(self, queue, tenant, algorithm):
+        """Test que le calcul groupé donne les mêmes ETA que QueueAnalytics.calculate_eta."""
+        queue.algorithm = algorithm
+        queue.save()
+        self._make_waiting_tickets(tenant, queue)
+
+        with freeze_time(timezone.now()):
+            expected = {
+                ticket.id: QueueAnalytics.calculate_eta(ticket)
+                for ticket in Ticket.objects.filter(queue=queue).select_related("queue__service")
+            }
+            result = ETAEngine.recompute()
+
+        assert result["total_waiting"] == 6
+        actual = dict(Ticket.objects.filter(queue=queue).values_list("id", "eta_seconds"))
+        assert actual == expected
+
+    def test_uses_recent_service_time(self, queue, tenant):
+        """Test la prise en compte du temps de service historique."""
+        now = timezone.now()
+        baker.make(
+            Ticket,
+            tenant=tenant,
+            queue=queue,
+            status=Ticket.STATUS_CLOSED,
+            started_at=now - timedelta(minutes=10),
+            ended_at=now - timedelta(minutes=8),
+        )
+        with freeze_time(now - timedelta(minutes=5)):
+            baker.make(Ticket, tenant=tenant, queue=queue, status=Ticket.STATUS_WAITING)
+        last = baker.make(Ticket, tenant=tenant, queue=queue, status=Ticket.STATUS_WAITING)
+
+        ETAEngine.recompute()
+
+        last.refresh_from_db()
+        assert last.eta_seconds == 120
+
+    def test_no_waiting_tickets(self):
+        """Test qu'aucune écriture n'a lieu sans ticket en attente."""
+        assert ETAEngine.recompute() == {"total_waiting": 0, "updated_count": 0}
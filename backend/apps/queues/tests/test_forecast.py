@@ -0,0 +1,122 @@
+"""Tests pour les profils d'arrivées et les prévisions d'effectif."""
+
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+
+import pytest
+from django.core.cache import cache
+from model_bakery import baker
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from apps.queues.analytics import QueueAnalytics
+from apps.queues.forecast import ArrivalProfiles, ErlangC
+from apps.queues.models import QueueArrivalProfile, QueueKpiRollup
+from apps.queues.views import QueueViewSet
+
+# Un lundi, 00:00 UTC
+UNTIL = datetime(2026, 10, 12, tzinfo=dt_timezone.utc)
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def make_rollup(queue, hour, tickets, service_count=0, service_sum=0.0):
+    return baker.make(
+        QueueKpiRollup,
+        tenant=queue.tenant,
+        queue=queue,
+        agent=None,
+        hour=hour,
+        tickets_count=tickets,
+        service_count=service_count,
+        service_sum=service_sum,
+    )
+
+
+class TestErlangC:
+    """Tests pour le calcul d'effectif Erlang C."""
+
+    def test_reference_values(self):
+        """Test la probabilité d'attente de référence (A = 10 Erlangs, N = 11 : C ≈ 0,682)."""
+        # Avec T = 0, la conformité vaut 1 - C(N, A)
+        assert ErlangC.service_level(11, 360, 100, 0) == pytest.approx(31.79, abs=0.01)
+        assert ErlangC.service_level(10, 360, 100, 600) == 0.0
+
+        agents, levels = ErlangC.required_agents([[360, 0], [36, 720]], [[100, 100], [100, 50]], 20, 80)
+
+        assert agents.tolist() == [[13, 0], [3, 13]]
+        assert levels[0, 0] >= 80 > ErlangC.service_level(12, 360, 100, 20)
+        assert levels[0, 1] == 100.0
+
+
+@pytest.mark.django_db
+class TestArrivalProfiles:
+    """Tests pour ArrivalProfiles."""
+
+    def test_build_from_rollups_in_site_timezone(self, queue, site):
+        """Test les matrices construites depuis les agrégats, en heure locale du site."""
+        site.timezone = "Europe/Paris"
+        site.save()
+        # Lundis à 9h UTC (11h à Paris, heure d'été) des deux dernières semaines
+        make_rollup(queue, UNTIL - timedelta(days=7) + timedelta(hours=9), 12, service_count=10, service_sum=3000)
+        make_rollup(queue, UNTIL - timedelta(days=14) + timedelta(hours=9), 4, service_count=2, service_sum=1200)
+        # Hors historique (heure de fin exclue)
+        make_rollup(queue, UNTIL, 100)
+
+        profile = ArrivalProfiles.build_many([queue.id], until=UNTIL, weeks=4)[queue.id]
+
+        assert profile.timezone == "Europe/Paris" and profile.tickets == 16
+        # 16 tickets sur 2 lundis : l'historique commence au premier ticket
+        assert profile.arrival_rates[0, 11] == pytest.approx(8.0)
+        assert profile.arrival_rates.sum() == pytest.approx(8.0)
+        assert profile.service_times[0, 11] == pytest.approx(350.0)
+        # Créneaux sans service observé : moyenne de l'historique
+        assert profile.service_times[3, 3] == pytest.approx(350.0)
+
+        stored = QueueArrivalProfile.objects.get(queue=queue)
+        assert stored.weeks == 2
+        assert ArrivalProfiles.get(queue).arrival_rates.tolist() == profile.arrival_rates.tolist()
+
+    def test_rebuild_upserts_existing_profile(self, queue):
+        """Test qu'une construction concurrente met à jour le profil existant sans conflit."""
+        ArrivalProfiles.build_many([queue.id], until=UNTIL)
+        make_rollup(queue, UNTIL - timedelta(hours=1), 6)
+
+        profile = ArrivalProfiles.build_many([queue.id], until=UNTIL)[queue.id]
+
+        stored = QueueArrivalProfile.objects.get(queue=queue)
+        assert stored.tickets == profile.tickets == 6
+
+    def test_predictions_read_precomputed_profile(self, queue, django_assert_num_queries):
+        """Test que les prédictions lisent le profil en cache sans compter l'historique."""
+        ArrivalProfiles.build_many([queue.id])
+        # Compteur des tickets en attente et agents disponibles
+        with django_assert_num_queries(2):
+            prediction = QueueAnalytics.get_queue_predictions(queue)
+
+        assert prediction["predicted_tickets_next_hour"] == 0
+        assert prediction["confidence"] == "low"
+        assert prediction["reinforcement_needed"] is False
+
+    def test_staffing_endpoint(self, tenant, user, queue):
+        """Test la réponse de l'endpoint d'effectif et la validation des paramètres."""
+        view = QueueViewSet.as_view({"get": "staffing"})
+
+        def get(params):
+            request = APIRequestFactory().get("/staffing/", params)
+            request.tenant = tenant
+            force_authenticate(request, user=user)
+            return view(request, pk=str(queue.id))
+
+        response = get({"weekday": 2, "target_sla": 90})
+        assert response.status_code == 200
+        assert len(response.data["intervals"]) == 24
+        assert {interval["weekday"] for interval in response.data["intervals"]} == {2}
+        assert response.data["target_sla_percent"] == 90
+
+        assert get({"weekday": 9}).status_code == 400
+        assert get({"target_sla": "abc"}).status_code == 400
@@ -0,0 +1,48 @@
+"""Tests pour le banc de charge de bout en bout."""
+
+import pytest
+
+from apps.queues.load_test import (
+    LoadTestConfig,
+    LoadTestDataset,
+    LoadTestRunner,
+    percentile,
+)
+from apps.tickets.models import Ticket
+
+
+@pytest.mark.django_db(databases=["default", "replica"])
+class TestLoadTest:
+    """Tests pour LoadTestRunner (exécution séquentielle, requêtes mesurées sur toutes les bases)."""
+
+    def test_inline_run_reports_every_operation(self, mocker):
+        """Test qu'un tir séquentiel passe par toutes les vues et mesure requêtes et latences."""
+        mocker.patch("apps.queues.public_views.calculate_eta.delay")
+        config = LoadTestConfig(
+            queues=1, agents=1, displays=1, signup_workers=1, status_pollers=1, display_pollers=1,
+            prefill=2, iterations=2, inline=True,
+        )
+        fixtures = LoadTestDataset.create(config)
+
+        report = LoadTestRunner(config, fixtures).run()
+
+        operations = report["operations"]
+        assert set(operations) == {"signup", "call_next", "start_service", "close", "ticket_status", "display_poll"}
+        assert all(stats["errors"] == 0 for stats in operations.values())
+        assert operations["signup"]["statuses"] == {"201": 2}
+        assert operations["close"]["statuses"] == {"200": 2}
+        assert operations["display_poll"]["statuses"] == {"200": 1, "304": 1}
+        assert operations["signup"]["queries"]["mean"] > 0
+        assert operations["call_next"]["latency_ms"]["p99"] is not None
+        assert report["realtime"] == {"skipped": "channel layer channels.layers.InMemoryChannelLayer : Redis requis"}
+        assert Ticket.objects.filter(tenant=fixtures.tenant, status=Ticket.STATUS_CLOSED).count() == 2
+
+        LoadTestDataset.drop()
+        assert not Ticket.objects.filter(tenant=fixtures.tenant).exists()
+
+    def test_percentile_nearest_rank(self):
+        """Test le calcul des percentiles."""
+        values = [float(value) for value in range(1, 101)]
+
+        assert (percentile(values, 50), percentile(values, 95), percentile(values, 99)) == (50.0, 95.0, 99.0)
+        assert percentile([], 50) is None
@@ -0,0 +1,41 @@
+"""Tests pour la vérification des plans d'exécution des requêtes chaudes."""
+
+import pytest
+from django.db import DEFAULT_DB_ALIAS
+
+from apps.queues.query_plans import QueryPlanDataset, QueryPlanSuite, default_scenarios
+from apps.tickets.models import Ticket
+
+
+@pytest.mark.django_db
+class TestQueryPlanSuite:
+    """Tests pour QueryPlanSuite (SQLite)."""
+
+    def test_hot_paths_use_indexes(self):
+        """Test qu'aucun scénario ne parcourt séquentiellement les tickets ou les agrégats."""
+        fixtures = QueryPlanDataset.seed(500, queues=3, days=30, waiting_per_queue=10)
+
+        reports = QueryPlanSuite.run(fixtures)
+
+        assert len(reports) == len(default_scenarios())
+        assert all(report.plans for report in reports), [r.scenario for r in reports if not r.plans]
+        assert [(report.scenario, report.regressions) for report in reports if report.regressions] == []
+
+    def test_detects_sequential_scan(self):
+        """Test qu'un filtre sans index est signalé, alias de sous-requête compris."""
+        unindexed = Ticket.objects.filter(priority=42)
+        aliased = Ticket.objects.filter(id__in=unindexed.values("id")[:5])
+
+        for queryset in (unindexed, aliased):
+            plan = QueryPlanSuite.explain(str(queryset.query), DEFAULT_DB_ALIAS)
+            assert plan.sequential_scans == ["tickets"]
+
+    def test_seed_creates_history_and_live_tickets(self):
+        """Test le contenu du jeu de données."""
+        fixtures = QueryPlanDataset.seed(100, queues=2, days=10, waiting_per_queue=5)
+
+        tickets = Ticket.objects.filter(tenant=fixtures.tenant)
+        assert tickets.filter(status__in=[Ticket.STATUS_CLOSED, Ticket.STATUS_NO_SHOW]).count() == 100
+        assert tickets.filter(status=Ticket.STATUS_WAITING).count() == 10
+        assert fixtures.ticket.status == Ticket.STATUS_WAITING
+        assert tickets.filter(agent=fixtures.agent, status=Ticket.STATUS_CALLED).count() == 1
@@ -0,0 +1,155 @@
+"""Tests pour les agrégats KPI horaires maintenus incrémentalement."""
+
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+from model_bakery import baker
+
+from apps.core.analytics import get_queue_stats_report, get_wait_times_report
+from apps.queues.analytics_advanced import AdvancedAnalytics
+from apps.queues.models import Queue, QueueKpiRollup
+from apps.queues.rollups import KpiRollups, hour_bucket
+from apps.queues.services import QueueService
+from apps.tickets.models import Ticket
+
+# Champs comparés entre maintenance incrémentale et reconstruction
+_COMPARED = ("queue_id", "agent_id", "hour", "tickets_count", "waiting_count", "called_count",
+             "in_service_count", "closed_count", "no_show_count", "transferred_count",
+             "call_wait_count", "wait_count", "service_count", "sla_met_count")
+
+
+def _snapshot(tenant):
+    rows = QueueKpiRollup.objects.filter(tenant=tenant).exclude(tickets_count=0)
+    return sorted(rows.values_list(*_COMPARED), key=str)
+
+
+@pytest.mark.django_db
+class TestIncrementalRollups:
+    """Tests pour la maintenance des agrégats par les signaux."""
+
+    def test_lifecycle_matches_rebuild(
+        self, tenant, queue, agent_profile, django_capture_on_commit_callbacks
+    ):
+        """Test que les transitions de QueueService donnent les mêmes agrégats qu'une reconstruction."""
+        with django_capture_on_commit_callbacks(execute=True):
+            closed = baker.make(Ticket, tenant=tenant, queue=queue, number="A001")
+            baker.make(Ticket, tenant=tenant, queue=queue, number="A002")
+
+        with django_capture_on_commit_callbacks(execute=True):
+            QueueService.call_next(agent_profile, queue)
+        with django_capture_on_commit_callbacks(execute=True):
+            closed.refresh_from_db()
+            QueueService.start_service(closed)
+        with django_capture_on_commit_callbacks(execute=True):
+            QueueService.close_ticket(closed, agent_profile)
+
+        incremental = _snapshot(tenant)
+        KpiRollups.rebuild(tenant=tenant)
+
+        assert incremental == _snapshot(tenant)
+        totals = KpiRollups.totals(KpiRollups.for_period(tenant=tenant))
+        assert totals["tickets_count"] == 2
+        assert totals["closed_count"] == 1
+        assert totals["waiting_count"] == 1
+        assert totals["service_count"] == 1
+
+    def test_transfer_moves_contribution(
+        self, tenant, site, service, queue, django_capture_on_commit_callbacks
+    ):
+        """Test qu'un transfert déplace la contribution vers la file cible."""
+        target = baker.make(Queue, tenant=tenant, site=site, service=service, name="Cible")
+        with django_capture_on_commit_callbacks(execute=True):
+            ticket = baker.make(Ticket, tenant=tenant, queue=queue)
+        with django_capture_on_commit_callbacks(execute=True):
+            QueueService.transfer_ticket(ticket, target)
+
+        by_queue = {
+            row["queue_id"]: row
+            for row in QueueKpiRollup.objects.filter(tenant=tenant).values(
+                "queue_id", "tickets_count", "transferred_count"
+            )
+        }
+        assert by_queue[queue.id]["tickets_count"] == 0
+        assert by_queue[target.id]["tickets_count"] == 1
+        assert by_queue[target.id]["transferred_count"] == 1
+
+    def test_rebuild_limits_period(self, tenant, queue):
+        """Test que la reconstruction ne remplace que la période demandée."""
+        now = timezone.now()
+        old = baker.make(Ticket, tenant=tenant, queue=queue)
+        Ticket.objects.filter(pk=old.pk).update(created_at=now - timedelta(days=3))
+        baker.make(Ticket, tenant=tenant, queue=queue)
+        QueueKpiRollup.objects.all().delete()
+
+        KpiRollups.rebuild(tenant=tenant, since=now - timedelta(days=1))
+
+        hours = list(QueueKpiRollup.objects.values_list("hour", flat=True))
+        assert hours == [hour_bucket(now)]
+
+    def test_adjacent_periods_share_hours(self, tenant, queue):
+        """Test qu'une heure coupée par la limite entre deux périodes n'est comptée qu'une fois."""
+        hour = hour_bucket(timezone.now()) - timedelta(hours=2)
+        ticket = baker.make(Ticket, tenant=tenant, queue=queue)
+        Ticket.objects.filter(pk=ticket.pk).update(created_at=hour + timedelta(minutes=40))
+        KpiRollups.rebuild(tenant=tenant)
+        boundary = hour + timedelta(minutes=30)
+
+        def count(**period):
+            return KpiRollups.totals(KpiRollups.for_period(tenant=tenant, **period))["tickets_count"]
+
+        assert count(since=hour - timedelta(hours=1), until=boundary) == 1
+        assert count(since=boundary, until=hour + timedelta(hours=2)) == 0
+        assert count(until=hour) == 0
+
+
+@pytest.mark.django_db
+class TestReportsFromRollups:
+    """Tests pour les rapports calculés sur les agrégats."""
+
+    def test_wait_times_report(self, tenant, queue):
+        """Test les temps d'attente calculés depuis les agrégats."""
+        now = timezone.now()
+        ticket = baker.make(Ticket, tenant=tenant, queue=queue, status=Ticket.STATUS_CLOSED)
+        Ticket.objects.filter(pk=ticket.pk).update(
+            created_at=now - timedelta(minutes=30),
+            called_at=now - timedelta(minutes=20),
+            started_at=now - timedelta(minutes=19),
+            ended_at=now - timedelta(minutes=10),
+        )
+        KpiRollups.rebuild(tenant=tenant)
+
+        report = get_wait_times_report(tenant, start_date=now - timedelta(days=1), end_date=now)
+
+        assert report["total_tickets"] == 1
+        assert report["completed_tickets"] == 1
+        assert report["metrics"]["avg_wait_seconds"] == 600
+        assert report["metrics"]["avg_service_duration_seconds"] == 540
+
+    def test_queue_stats_report(self, tenant, queue):
+        """Test le regroupement par file."""
+        baker.make(Ticket, tenant=tenant, queue=queue, _quantity=2)
+        baker.make(Ticket, tenant=tenant, queue=queue, status=Ticket.STATUS_NO_SHOW)
+        KpiRollups.rebuild(tenant=tenant)
+
+        report = get_queue_stats_report(tenant)
+
+        [stats] = report["queues"]
+        assert stats["queue_id"] == str(queue.id)
+        assert stats["total_tickets"] == 3
+        assert stats["waiting"] == 2
+        assert stats["no_show"] == 1
+
+    def test_abandonment_counts_stale_waiting_tickets(self, tenant, queue):
+        """Test que les tickets en attente au-delà de 2x SLA comptent comme abandonnés."""
+        now = timezone.now()
+        stale = baker.make(Ticket, tenant=tenant, queue=queue)
+        Ticket.objects.filter(pk=stale.pk).update(created_at=now - timedelta(days=1))
+        baker.make(Ticket, tenant=tenant, queue=queue)
+        baker.make(Ticket, tenant=tenant, queue=queue, status=Ticket.STATUS_NO_SHOW)
+        KpiRollups.rebuild(tenant=tenant)
+
+        result = AdvancedAnalytics.calculate_abandonment_rate(queue)
+
+        assert result["total_tickets"] == 3
+        assert result["abandoned_count"] == 2
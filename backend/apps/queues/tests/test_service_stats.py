@@ -0,0 +1,123 @@
+"""Tests pour les statistiques glissantes de temps de service."""
+
+from datetime import timedelta
+
+import pytest
+from django.core.cache import cache
+from django.utils import timezone
+from model_bakery import baker
+
+from apps.queues.models import QueueServiceStats
+from apps.queues.service_stats import ServiceTimeStats
+from apps.queues.services import QueueService
+from apps.tickets.models import Ticket
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def _closed_ticket(tenant, queue, service_seconds, wait_seconds=60):
+    ended_at = timezone.now()
+    started_at = ended_at - timedelta(seconds=service_seconds)
+    ticket = baker.make(
+        Ticket,
+        tenant=tenant,
+        queue=queue,
+        status=Ticket.STATUS_CLOSED,
+        started_at=started_at,
+        ended_at=ended_at,
+    )
+    Ticket.objects.filter(pk=ticket.pk).update(created_at=started_at - timedelta(seconds=wait_seconds))
+    return ticket
+
+
+@pytest.mark.django_db
+class TestServiceTimeStats:
+    """Tests pour ServiceTimeStats."""
+
+    def test_no_history_returns_empty_stats(self, queue):
+        """Test qu'une file sans historique n'a pas de moyenne."""
+        stats = ServiceTimeStats.get(queue)
+
+        assert stats.service_mean is None
+        assert stats.service_samples == 0
+
+    def test_rebuilds_from_history(self, queue, tenant):
+        """Test la reconstruction depuis les tickets clôturés."""
+        for seconds in (100, 200, 300):
+            _closed_ticket(tenant, queue, seconds)
+
+        stats = ServiceTimeStats.get(queue)
+
+        assert stats.service_samples == 3
+        assert stats.service_p50 == 200
+        assert stats.service_p90 == 300
+        assert stats.wait_p50 == 60
+        assert 100 < stats.service_mean < 300
+        assert QueueServiceStats.objects.filter(queue=queue).exists()
+
+    def test_close_ticket_updates_stats_incrementally(self, queue, tenant, agent_profile, django_capture_on_commit_callbacks):
+        """Test que close_ticket met à jour la moyenne glissante."""
+        _closed_ticket(tenant, queue, 100)
+        assert ServiceTimeStats.get(queue).service_mean == 100
+
+        ticket = baker.make(
+            Ticket,
+            tenant=tenant,
+            queue=queue,
+            agent=agent_profile,
+            status=Ticket.STATUS_IN_SERVICE,
+            started_at=timezone.now() - timedelta(seconds=300),
+        )
+        with django_capture_on_commit_callbacks(execute=True):
+            QueueService.close_ticket(ticket, agent_profile)
+
+        stats = ServiceTimeStats.get(queue)
+        assert stats.service_samples == 2
+        assert stats.service_mean == pytest.approx(120, abs=1)
+        assert stats.service_p90 == pytest.approx(300, abs=1)
+
+    def test_get_many_serves_from_cache(self, queue, tenant, django_assert_num_queries):
+        """Test que les lectures suivantes ne touchent pas la base."""
+        _closed_ticket(tenant, queue, 100)
+        ServiceTimeStats.get(queue)
+
+        with django_assert_num_queries(0):
+            assert ServiceTimeStats.get_many([queue.id])[queue.id].service_mean == 100
+
+    def test_rebuild_upserts_existing_stats(self, queue, tenant):
+        """Test qu'une reconstruction concurrente met à jour la ligne existante sans conflit."""
+        _closed_ticket(tenant, queue, 100)
+        ServiceTimeStats.rebuild_many([queue.id])
+        _closed_ticket(tenant, queue, 300)
+
+        ServiceTimeStats.rebuild_many([queue.id])
+
+        stats = QueueServiceStats.objects.get(queue=queue)
+        assert stats.service_samples == 2
+        assert stats.service_window == [100, 300]
+
+    def test_first_observation_keeps_wait_sample(self, queue, tenant, agent_profile, django_capture_on_commit_callbacks):
+        """Test que l'attente d'un ticket démarré est ajoutée à l'historique lors de la première observation."""
+        _closed_ticket(tenant, queue, 100, wait_seconds=60)
+        ticket = baker.make(
+            Ticket,
+            tenant=tenant,
+            queue=queue,
+            agent=agent_profile,
+            status=Ticket.STATUS_CALLED,
+        )
+        Ticket.objects.filter(pk=ticket.pk).update(created_at=timezone.now() - timedelta(seconds=600))
+        ticket.refresh_from_db()
+
+        with django_capture_on_commit_callbacks(execute=True):
+            QueueService.start_service(ticket)
+
+        stats = QueueServiceStats.objects.get(queue=queue)
+        assert stats.service_samples == 1
+        assert stats.wait_samples == 2
+        assert stats.wait_window[-1] == pytest.approx(600, abs=1)
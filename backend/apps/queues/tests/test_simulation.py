@@ -0,0 +1,117 @@
+"""Tests pour le simulateur d'algorithmes de file."""
+
+from datetime import timedelta
+
+import numpy as np
+import pytest
+from django.utils import timezone
+from model_bakery import baker
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from apps.queues.models import Queue
+from apps.queues.simulation import QueueSimulator, SimulationError, SimulationHistory
+from apps.queues.views import QueueViewSet
+from apps.tickets.models import Ticket
+
+
+def make_history(arrivals, priorities, service, patience=None):
+    arrivals = np.array([arrivals], dtype=float)
+    return SimulationHistory(
+        arrivals=arrivals,
+        priorities=np.array([priorities], dtype=float),
+        service=np.array([service], dtype=float),
+        patience=np.full(arrivals.shape, np.inf) if patience is None else np.array([patience], dtype=float),
+        lengths=np.array([arrivals.shape[1]]),
+        historical={},
+        agents=1,
+        mean_patience=None,
+    )
+
+
+def make_closed_tickets(queue, count):
+    base = timezone.now() - timedelta(days=2)
+    for index in range(count):
+        ticket = baker.make(Ticket, tenant=queue.tenant, queue=queue, status=Ticket.STATUS_CLOSED, priority=index % 3)
+        created = base + timedelta(minutes=5 * index)
+        Ticket.objects.filter(pk=ticket.pk).update(
+            created_at=created,
+            called_at=created + timedelta(minutes=2),
+            started_at=created + timedelta(minutes=2),
+            ended_at=created + timedelta(minutes=9),
+        )
+
+
+class TestQueueSimulatorReplay:
+    """Tests pour le moteur vectorisé."""
+
+    def test_policies_order_and_staffing(self):
+        """Test que chaque algorithme appelle dans son ordre et qu'un agent de plus réduit l'attente."""
+        history = make_history([0, 10, 20], [0, 0, 2], [100, 100, 100])
+
+        results, saturated = QueueSimulator.replay(
+            history, [(Queue.ALGO_FIFO, 1), (Queue.ALGO_PRIORITY, 1), (Queue.ALGO_FIFO, 2)], sla_seconds=150
+        )
+
+        fifo, priority, two_agents = results
+        assert saturated == 0
+        # fifo : attentes 0, 90, 180 ; priority : le dernier arrivé (priorité 2) passe avant le deuxième
+        assert fifo["wait_seconds"]["p50"] == 90 and fifo["wait_seconds"]["max"] == 180
+        assert priority["wait_seconds"]["p50"] == 80 and priority["wait_seconds"]["max"] == 190
+        assert fifo["sla_compliance_rate"] == pytest.approx(66.67)
+        assert two_agents["wait_seconds"]["max"] == 80
+
+    def test_impatient_customers_abandon(self):
+        """Test qu'un client dont la patience expire avant l'appel est compté comme abandon."""
+        history = make_history([0, 10], [0, 0], [300, 300], patience=[np.inf, 60])
+
+        (result,), _saturated = QueueSimulator.replay(history, [(Queue.ALGO_FIFO, 1)], sla_seconds=600)
+
+        assert result["served"] == 1 and result["abandoned"] == 1
+        assert result["abandonment_rate"] == 50.0
+
+
+@pytest.mark.django_db
+class TestQueueSimulator:
+    """Tests pour QueueSimulator.simulate."""
+
+    def test_simulates_every_scenario(self, tenant, queue):
+        """Test qu'un scénario est produit par algorithme et effectif, avec une recommandation."""
+        make_closed_tickets(queue, 12)
+
+        result = QueueSimulator.simulate(queue, period_days=7, staffing=[1, 2])
+
+        assert result["engine"]["tickets"] == 12
+        assert len(result["scenarios"]) == 6
+        assert {scenario["served"] for scenario in result["scenarios"]} == {12}
+        assert result["recommendation"]["algorithm"] in {Queue.ALGO_FIFO, Queue.ALGO_PRIORITY, Queue.ALGO_SLA}
+
+    def test_rejects_invalid_parameters(self, queue, monkeypatch):
+        """Test le rejet des algorithmes inconnus, d'un historique vide et des simulations trop grandes."""
+        with pytest.raises(SimulationError):
+            QueueSimulator.simulate(queue, policies=["random"])
+        with pytest.raises(SimulationError):
+            QueueSimulator.simulate(queue)
+        with pytest.raises(SimulationError, match="between 1 and"):
+            QueueSimulator.simulate(queue, staffing=[5_000_000])
+
+        make_closed_tickets(queue, 12)
+        monkeypatch.setattr("apps.queues.simulation.MAX_SIMULATED_CELLS", 20)
+        with pytest.raises(SimulationError, match="too large"):
+            QueueSimulator.simulate(queue, period_days=7, staffing=[1, 2])
+
+    def test_endpoint_requires_manager(self, tenant, queue, agent_membership, manager_membership):
+        """Test que seuls les managers et administrateurs lancent une simulation."""
+        make_closed_tickets(queue, 12)
+        # Options de l'action (permissions), comme le routeur
+        view = QueueViewSet.as_view({"post": "simulate_algorithms"}, **QueueViewSet.simulate_algorithms.kwargs)
+
+        def post(user):
+            request = APIRequestFactory().post("/simulate/", {"period_days": 7, "staffing": [1]}, format="json")
+            request.tenant = tenant
+            force_authenticate(request, user=user)
+            return view(request, pk=str(queue.id))
+
+        assert post(agent_membership.user).status_code == 403
+        response = post(manager_membership.user)
+        assert response.status_code == 200
+        assert len(response.data["scenarios"]) == 3
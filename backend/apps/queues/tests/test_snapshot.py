@@ -0,0 +1,103 @@
+"""Tests pour l'instantané agrégé des files d'un tenant."""
+
+from datetime import timedelta
+
+import pytest
+from django.core.cache import cache
+from django.utils import timezone
+from model_bakery import baker
+
+from apps.queues.analytics import QueueAnalytics
+from apps.queues.models import Queue, QueueAssignment, Service
+from apps.queues.optimizer import QueueOptimizer
+from apps.queues.services import QueueService
+from apps.queues.snapshot import TenantQueueSnapshot
+from apps.tickets.models import Ticket
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def _make_tickets(tenant, queue, waiting=0, late=0, called=0, in_service=0):
+    for _ in range(waiting):
+        baker.make(Ticket, tenant=tenant, queue=queue, status=Ticket.STATUS_WAITING)
+    for _ in range(late):
+        ticket = baker.make(Ticket, tenant=tenant, queue=queue, status=Ticket.STATUS_WAITING)
+        Ticket.objects.filter(pk=ticket.pk).update(created_at=timezone.now() - timedelta(hours=2))
+    for _ in range(called):
+        baker.make(Ticket, tenant=tenant, queue=queue, status=Ticket.STATUS_CALLED)
+    for _ in range(in_service):
+        baker.make(Ticket, tenant=tenant, queue=queue, status=Ticket.STATUS_IN_SERVICE)
+
+
+@pytest.fixture
+def second_queue(tenant, site):
+    service = Service.objects.create(tenant=tenant, site=site, name="Long Service", sla_seconds=3 * 3600)
+    return baker.make(Queue, tenant=tenant, site=site, service=service, name="Another Queue")
+
+
+@pytest.mark.django_db
+class TestTenantQueueSnapshot:
+    """Tests pour TenantQueueSnapshot."""
+
+    def test_counts_match_per_queue_services(self, tenant, queue, second_queue, agent_profile):
+        """Test que l'instantané reproduit les compteurs calculés file par file."""
+        _make_tickets(tenant, queue, waiting=3, late=2, called=1, in_service=1)
+        _make_tickets(tenant, second_queue, waiting=1, late=1)
+        baker.make(QueueAssignment, tenant=tenant, queue=queue, agent=agent_profile)
+
+        snapshot = TenantQueueSnapshot.build(tenant)
+
+        assert [entry.queue.id for entry in snapshot] == [second_queue.id, queue.id]
+        for queue_obj in (queue, second_queue):
+            entry = snapshot.get(queue_obj.id)
+            assert entry.stats() == QueueService.get_queue_stats(queue_obj)
+            assert entry.health() == QueueAnalytics.get_queue_health(queue_obj)
+
+        entry = snapshot.get(queue.id)
+        assert entry.late_count == 2
+        assert entry.assigned_agents == 1
+        assert entry.available_agents_count == 1
+        # Le SLA de 3h de la seconde file ne compte pas ses tickets de 2h comme en retard
+        assert snapshot.get(second_queue.id).late_count == 0
+
+    def test_query_count_independent_of_queue_count(
+        self, tenant, site, service, django_assert_max_num_queries
+    ):
+        """Test que le nombre de requêtes ne dépend pas du nombre de files."""
+        for index in range(8):
+            queue = baker.make(Queue, tenant=tenant, site=site, service=service, name=f"Q{index}")
+            _make_tickets(tenant, queue, waiting=2, late=1)
+        TenantQueueSnapshot.build(tenant)  # amorce les statistiques de service
+
+        with django_assert_max_num_queries(5):
+            snapshot = TenantQueueSnapshot.build(tenant)
+
+        assert len(snapshot) == 8
+        assert all(entry.waiting_count == 3 for entry in snapshot)
+
+    def test_cached_snapshot(self, tenant, queue, django_assert_num_queries):
+        """Test que l'instantané en cache est servi sans requête."""
+        _make_tickets(tenant, queue, waiting=2)
+        TenantQueueSnapshot.build(tenant, active_only=True, cache_timeout=5)
+        _make_tickets(tenant, queue, waiting=1)
+
+        with django_assert_num_queries(0):
+            cached = TenantQueueSnapshot.build(tenant, active_only=True, cache_timeout=5)
+
+        assert cached.get(queue.id).waiting_count == 2
+        assert TenantQueueSnapshot.build(tenant).get(queue.id).waiting_count == 3
+
+    def test_load_balance_uses_snapshot(self, tenant, queue, second_queue):
+        """Test l'analyse d'équilibre de charge à partir de l'instantané."""
+        _make_tickets(tenant, queue, waiting=6)
+
+        result = QueueOptimizer.analyze_load_balance(tenant)
+
+        assert result["total_waiting_tickets"] == 6
+        assert result["queues_data"][0]["queue_id"] == str(queue.id)
+        assert result["queues_data"][0]["load_ratio"] == 6
@@ -0,0 +1,137 @@
+"""Tests pour l'index des tickets en attente."""
+
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+import pytest
+from django.db import transaction
+from model_bakery import baker
+
+from apps.core.redis_client import get_redis_client, reset_redis_client
+from apps.queues.services import QueueService
+from apps.queues.waiting_index import WaitingIndexUnavailable, WaitingTicketIndex
+from apps.tickets.models import Ticket
+
+
+@pytest.fixture
+def redis_index(settings):
+    """Index sur un Redis local (base 15), test ignoré s'il est injoignable."""
+    settings.REDIS_URL = "redis://localhost:6379/15"
+    reset_redis_client()
+    client = get_redis_client()
+    try:
+        client.flushdb()
+    except Exception:  # noqa: BLE001
+        reset_redis_client()
+        pytest.skip("Redis local indisponible")
+    WaitingTicketIndex._pop_script = None
+    yield client
+    client.flushdb()
+    WaitingTicketIndex._pop_script = None
+    reset_redis_client()
+
+
+class TestMemberEncoding:
+    """Tests pour l'encodage des membres des sorted sets."""
+
+    def test_members_sort_by_creation_time(self):
+        """Test que l'ordre lexicographique suit l'ordre de création."""
+        base = datetime(2025, 1, 1, 10, 0, tzinfo=dt_timezone.utc)
+        older = WaitingTicketIndex.encode_member("ffffffff", base)
+        newer = WaitingTicketIndex.encode_member("00000000", base + timedelta(microseconds=1))
+
+        assert older < newer
+
+    def test_decode_returns_ticket_id(self):
+        """Test le décodage de l'identifiant du ticket."""
+        member = WaitingTicketIndex.encode_member("abc-123", datetime.now(dt_timezone.utc))
+        assert WaitingTicketIndex.decode_member(member) == "abc-123"
+
+
+@pytest.mark.django_db
+class TestCallNextWithIndex:
+    """Tests pour call_next avec l'index Redis."""
+
+    def test_falls_back_to_database_when_index_unavailable(self, queue, agent_profile, tenant):
+        """Test que call_next utilise la base quand Redis est désactivé."""
+        ticket = baker.make(Ticket, tenant=tenant, queue=queue, status=Ticket.STATUS_WAITING)
+
+        with pytest.raises(WaitingIndexUnavailable):
+            WaitingTicketIndex.pop_next(queue)
+
+        assert QueueService.call_next(agent_profile, queue) == ticket
+
+    def test_skips_stale_index_entries(self, queue, agent_profile, tenant, mocker):
+        """Test que les entrées obsolètes de l'index sont ignorées."""
+        already_called = baker.make(Ticket, tenant=tenant, queue=queue, status=Ticket.STATUS_CALLED)
+        waiting = baker.make(Ticket, tenant=tenant, queue=queue, status=Ticket.STATUS_WAITING)
+        mocker.patch.object(
+            WaitingTicketIndex,
+            "pop_next",
+            side_effect=[str(already_called.id), str(waiting.id)],
+        )
+
+        called = QueueService.call_next(agent_profile, queue)
+
+        assert called == waiting
+        waiting.refresh_from_db()
+        assert waiting.status == Ticket.STATUS_CALLED
+
+
+@pytest.mark.django_db
+class TestIndexClaims:
+    """Tests pour la réservation des tickets retirés de l'index."""
+
+    def test_commit_confirms_removal(self, queue, agent_profile, tenant, redis_index, django_capture_on_commit_callbacks):
+        """Test que le retrait est définitif une fois la transaction d'appel validée."""
+        ticket = baker.make(Ticket, tenant=tenant, queue=queue, status=Ticket.STATUS_WAITING)
+        WaitingTicketIndex.rebuild(queue)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            assert QueueService.call_next(agent_profile, queue) == ticket
+
+        claims_key, _claim_prio_key = WaitingTicketIndex._claim_keys(queue.id)
+        assert redis_index.zcard(claims_key) == 0
+        assert WaitingTicketIndex.check(queue)["consistent"]
+
+    def test_rolled_back_call_is_restored(self, queue, agent_profile, tenant, redis_index, mocker):
+        """Test qu'un ticket retiré par une transaction annulée revient dans l'index à l'expiration."""
+        ticket = baker.make(Ticket, tenant=tenant, queue=queue, status=Ticket.STATUS_WAITING, priority=2)
+        WaitingTicketIndex.rebuild(queue)
+        mocker.patch("apps.queues.waiting_index.CLAIM_LEASE_SECONDS", 0)
+
+        # L'appel est annulé par la transaction englobante, après la sortie de call_next
+        with pytest.raises(RuntimeError):
+            with transaction.atomic():
+                QueueService.call_next(agent_profile, queue)
+                raise RuntimeError("rollback")
+
+        ticket.refresh_from_db()
+        assert ticket.status == Ticket.STATUS_WAITING
+        # Le membre est réservé, pas manquant
+        assert WaitingTicketIndex.check(queue)["missing"] == []
+        # La réservation expirée est réinsérée avec sa priorité, puis retirée à nouveau
+        _fifo_key, prio_key, _ready_key = WaitingTicketIndex._keys(queue.id)
+        redis_index.zadd(prio_key, {WaitingTicketIndex.encode_member("other", ticket.created_at): -1})
+        assert WaitingTicketIndex.pop_next(queue, algorithm="priority") == str(ticket.id)
+
+    def test_rebuild_keeps_concurrent_additions(self, queue, tenant, redis_index, mocker):
+        """Test que la reconstruction conserve un ticket indexé pendant la lecture de la base."""
+        waiting = baker.make(Ticket, tenant=tenant, queue=queue, status=Ticket.STATUS_WAITING)
+        closed = baker.make(Ticket, tenant=tenant, queue=queue, status=Ticket.STATUS_CLOSED)
+        late = baker.make(Ticket, tenant=tenant, queue=queue, status=Ticket.STATUS_CLOSED)
+        WaitingTicketIndex.add(closed)
+        expected = WaitingTicketIndex._expected_members
+
+        def read_then_commit(q):
+            members = expected(q)
+            # Ticket validé entre la lecture de la base et l'écriture de l'index
+            WaitingTicketIndex.add(late)
+            return members
+
+        mocker.patch.object(WaitingTicketIndex, "_expected_members", side_effect=read_then_commit)
+
+        assert WaitingTicketIndex.rebuild(queue) == 1
+
+        fifo_key, _prio_key, _ready_key = WaitingTicketIndex._keys(queue.id)
+        indexed = {WaitingTicketIndex.decode_member(m) for m in redis_index.zrange(fifo_key, 0, -1)}
+        assert indexed == {str(waiting.id), str(late.id)}
@@ -6,12 +6,15 @@ from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
+from apps.core.db_router import replica_reads
+from apps.core.permissions import IsManager
 from apps.tenants.permissions import IsTenantAdmin
 from apps.tickets.models import Ticket
 
 from .analytics import QueueAnalytics
 from .analytics_advanced import ABTestingFramework, AdvancedAnalytics
 from .filters import QueueFilter
+from .forecast import TARGET_SLA, ArrivalProfiles
 from .models import Queue, QueueAssignment, Service, Site
 from .optimizer import QueueOptimizer
 from .serializers import (
@@ -21,6 +24,7 @@ from .serializers import (
     SiteSerializer,
 )
 from .services import QueueService
+from .snapshot import TenantQueueSnapshot
 
 
 class SiteViewSet(viewsets.ModelViewSet):
@@ -38,18 +42,22 @@ class SiteViewSet(viewsets.ModelViewSet):
         return Site.objects.filter(tenant=self.request.tenant)
 
     def perform_create(self, serializer):  # type: ignore[override]
-        # Double vérification de sécurité
+        # Réservation atomique du quota (la permission ne fait qu'une lecture)
         from apps.core.subscription_enforcement import SubscriptionEnforcement
         from rest_framework.exceptions import PermissionDenied
 
-        if not SubscriptionEnforcement.can_create_site(self.request.tenant):
+        if not SubscriptionEnforcement.claim("site", self.request.tenant):
             raise PermissionDenied(
                 SubscriptionEnforcement.get_quota_error_message(
                     "site", self.request.tenant
                 )
             )
 
-        serializer.save(tenant=self.request.tenant)
+        try:
+            serializer.save(tenant=self.request.tenant)
+        except Exception:
+            SubscriptionEnforcement.release("site", self.request.tenant)
+            raise
 
 
 class ServiceViewSet(viewsets.ModelViewSet):
@@ -85,18 +93,22 @@ class QueueViewSet(viewsets.ModelViewSet):
         return super().get_permissions()
 
     def perform_create(self, serializer):  # type: ignore[override]
-        # Double vérification de sécurité (defense in depth)
+        # Réservation atomique du quota (la permission ne fait qu'une lecture)
         from apps.core.subscription_enforcement import SubscriptionEnforcement
         from rest_framework.exceptions import PermissionDenied
 
-        if not SubscriptionEnforcement.can_create_queue(self.request.tenant):
+        if not SubscriptionEnforcement.claim("queue", self.request.tenant):
             raise PermissionDenied(
                 SubscriptionEnforcement.get_quota_error_message(
                     "queue", self.request.tenant
                 )
             )
 
-        serializer.save(tenant=self.request.tenant)
+        try:
+            serializer.save(tenant=self.request.tenant)
+        except Exception:
+            SubscriptionEnforcement.release("queue", self.request.tenant)
+            raise
 
     @action(detail=True, methods=["get"], permission_classes=[IsAuthenticated])
     def stats(self, request, pk=None, tenant_slug=None):  # type: ignore[override]
@@ -127,15 +139,39 @@ class QueueViewSet(viewsets.ModelViewSet):
         predictions = QueueAnalytics.get_queue_predictions(queue)
         return Response(predictions)
 
+    @action(detail=True, methods=["get"], permission_classes=[IsAuthenticated])
+    def staffing(self, request, pk=None, tenant_slug=None):  # type: ignore[override]
+        """Effectif requis par créneau horaire (Erlang C) à partir du profil d'arrivées.
+
+        Query params:
+            - target_sla (float): Conformité SLA visée en % (défaut: QUEUE_STAFFING_TARGET_SLA)
+            - weekday (int): Jour de la semaine, 0 = lundi (défaut: toute la semaine)
+        """
+        queue = self.get_object()
+
+        try:
+            target_sla = float(request.query_params.get("target_sla", TARGET_SLA))
+            weekday = request.query_params.get("weekday")
+            weekday = int(weekday) if weekday not in (None, "") else None
+        except ValueError as e:
+            return Response({"error": f"Invalid parameters: {e}"}, status=400)
+        if not 0 < target_sla < 100:
+            return Response({"error": "target_sla must be between 0 and 100 (exclusive)"}, status=400)
+        if weekday is not None and not 0 <= weekday <= 6:
+            return Response({"error": "weekday must be between 0 (Monday) and 6 (Sunday)"}, status=400)
+
+        return Response(ArrivalProfiles.staffing(queue, target_sla=target_sla, weekday=weekday))
+
     @action(detail=False, methods=["get"], permission_classes=[IsAuthenticated])
     def overview(self, request, tenant_slug=None):  # type: ignore[override]
         """Vue d'ensemble de toutes les files avec santé et métriques."""
-        queues = self.get_queryset()
+        snapshot = TenantQueueSnapshot.from_queues(self.get_queryset())
 
         overview_data = []
-        for queue in queues:
-            stats = QueueService.get_queue_stats(queue)
-            health = QueueAnalytics.get_queue_health(queue)
+        for entry in snapshot:
+            queue = entry.queue
+            stats = entry.stats()
+            health = entry.health()
 
             overview_data.append({
                 "id": str(queue.id),
@@ -180,6 +216,7 @@ class QueueViewSet(viewsets.ModelViewSet):
     # ========== Phase 3: Advanced Analytics Endpoints ==========
 
     @action(detail=True, methods=["get"], permission_classes=[IsAuthenticated])
+    @replica_reads
     def abandonment_rate(self, request, pk=None, tenant_slug=None):  # type: ignore[override]
         """Taux d'abandon des tickets pour cette file.
 
@@ -192,6 +229,7 @@ class QueueViewSet(viewsets.ModelViewSet):
         return Response(data)
 
     @action(detail=True, methods=["get"], permission_classes=[IsAuthenticated])
+    @replica_reads
     def agent_utilization(self, request, pk=None, tenant_slug=None):  # type: ignore[override]
         """Taux d'utilisation des agents de cette file.
 
@@ -204,6 +242,7 @@ class QueueViewSet(viewsets.ModelViewSet):
         return Response(data)
 
     @action(detail=True, methods=["get"], permission_classes=[IsAuthenticated])
+    @replica_reads
     def sla_compliance(self, request, pk=None, tenant_slug=None):  # type: ignore[override]
         """Taux de conformité SLA pour cette file.
 
@@ -216,6 +255,7 @@ class QueueViewSet(viewsets.ModelViewSet):
         return Response(data)
 
     @action(detail=True, methods=["get"], permission_classes=[IsAuthenticated])
+    @replica_reads
     def csat(self, request, pk=None, tenant_slug=None):  # type: ignore[override]
         """Métriques de satisfaction client (CSAT/NPS) pour cette file.
 
@@ -228,6 +268,7 @@ class QueueViewSet(viewsets.ModelViewSet):
         return Response(data)
 
     @action(detail=True, methods=["get"], permission_classes=[IsAuthenticated])
+    @replica_reads
     def hourly_heatmap(self, request, pk=None, tenant_slug=None):  # type: ignore[override]
         """Heatmap horaire du volume de tickets.
 
@@ -240,6 +281,7 @@ class QueueViewSet(viewsets.ModelViewSet):
         return Response(data)
 
     @action(detail=True, methods=["get"], permission_classes=[IsAuthenticated])
+    @replica_reads
     def daily_trends(self, request, pk=None, tenant_slug=None):  # type: ignore[override]
         """Tendances quotidiennes (tickets, temps d'attente, temps de service).
 
@@ -277,6 +319,7 @@ class QueueViewSet(viewsets.ModelViewSet):
         return Response(test_config)
 
     @action(detail=True, methods=["post"], permission_classes=[IsAuthenticated])
+    @replica_reads
     def compare_algorithms(self, request, pk=None, tenant_slug=None):  # type: ignore[override]
         """Comparer les performances de deux algorithmes sur des périodes différentes.
 
@@ -317,6 +360,45 @@ class QueueViewSet(viewsets.ModelViewSet):
         )
         return Response(comparison)
 
+    @action(detail=True, methods=["post"], permission_classes=[IsAuthenticated, IsManager])
+    @replica_reads
+    def simulate_algorithms(self, request, pk=None, tenant_slug=None):  # type: ignore[override]
+        """Rejouer l'historique de la file sous plusieurs algorithmes et effectifs.
+
+        Body params:
+            - period_days (int): Historique rejoué en jours (défaut: 30, max: 92)
+            - algorithms (list[str]): Algorithmes simulés (défaut: fifo, priority, sla)
+            - staffing (list[int]): Nombres d'agents simulés (défaut: effectif historique ±1)
+            - target_sla (float): Conformité SLA visée en % (défaut: 80)
+            - seed (int): Graine des tirages aléatoires (défaut: 0)
+        """
+        from .simulation import QueueSimulator, SimulationError
+
+        queue = self.get_object()
+
+        try:
+            period_days = int(request.data.get("period_days", 30))
+            algorithms = request.data.get("algorithms") or None
+            staffing = request.data.get("staffing")
+            staffing = [int(agents) for agents in staffing] if staffing else None
+            target_sla = float(request.data.get("target_sla", 80))
+            seed = int(request.data.get("seed", 0))
+        except (ValueError, TypeError) as e:
+            return Response({"error": f"Invalid parameters: {e}"}, status=400)
+
+        try:
+            result = QueueSimulator.simulate(
+                queue,
+                period_days=period_days,
+                policies=algorithms,
+                staffing=staffing,
+                target_sla=target_sla,
+                seed=seed,
+            )
+        except SimulationError as e:
+            return Response({"error": str(e)}, status=400)
+        return Response(result)
+
 
 class QueueAssignmentViewSet(viewsets.ModelViewSet):
     serializer_class = QueueAssignmentSerializer
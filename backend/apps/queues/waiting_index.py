@@ -0,0 +1,345 @@
+"""Index Redis des tickets en attente, par file.
+
+La base reste la source de vérité : l'index ne sert qu'à éviter le
+``SELECT ... FOR UPDATE ORDER BY`` sur toute la file à chaque appel d'agent.
+
+Chaque file possède deux sorted sets dont les membres sont encodés
+``"<created_at en µs sur 17 chiffres>|<ticket_id>"`` :
+
+- ``fifo`` : score constant, l'ordre lexicographique des membres donne l'ordre d'arrivée ;
+- ``prio`` : score ``-priority``, à score égal l'ordre lexicographique départage par ancienneté.
+
+L'algorithme SLA se résout sur ``prio`` : dans chaque bande de priorité, le
+premier membre est le plus ancien. La première tête de bande en retard est donc
+le ticket en retard le plus prioritaire ; sinon on prend la tête globale.
+
+Un membre retiré par ``pop_next`` est mis en réservation (``claims``, score =
+échéance) jusqu'au commit de la transaction qui appelle le ticket : ``confirm``
+la lève après commit. Si la transaction est annulée, à n'importe quel niveau,
+la réservation expire et le membre est réinséré par le ``pop_next`` suivant.
+"""
+
+from __future__ import annotations
+
+import logging
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import TYPE_CHECKING
+
+from django.db import transaction
+from django.utils import timezone
+
+from apps.core.redis_client import get_redis_client
+from apps.tickets.models import Ticket
+
+if TYPE_CHECKING:
+    from .models import Queue
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "sq:waiting"
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+# Durée d'une réservation : au-delà, la transaction d'appel est considérée annulée
+CLAIM_LEASE_SECONDS = 60
+
+# KEYS: fifo, prio, ready, claims, priorités des réservations
+# ARGV: algorithme, cutoff SLA (membre borne haute), durée de réservation
+_POP_SCRIPT = """
+if redis.call('EXISTS', KEYS[3]) == 0 then
+    return {-1}
+end
+local t = redis.call('TIME')
+local now = tonumber(t[1])
+local expired = redis.call('ZRANGEBYSCORE', KEYS[4], '-inf', now)
+for _, claimed in ipairs(expired) do
+    local score = redis.call('HGET', KEYS[5], claimed)
+    redis.call('ZADD', KEYS[1], 0, claimed)
+    redis.call('ZADD', KEYS[2], tonumber(score) or 0, claimed)
+    redis.call('ZREM', KEYS[4], claimed)
+    redis.call('HDEL', KEYS[5], claimed)
+end
+local member = nil
+local algo = ARGV[1]
+if algo == 'fifo' then
+    member = redis.call('ZRANGE', KEYS[1], 0, 0)[1]
+else
+    local head = redis.call('ZRANGE', KEYS[2], 0, 0, 'WITHSCORES')
+    member = head[1]
+    if algo == 'sla' and member then
+        local cutoff = ARGV[2]
+        local band = head
+        while band[1] do
+            if band[1] <= cutoff then
+                member = band[1]
+                break
+            end
+            band = redis.call('ZRANGEBYSCORE', KEYS[2], '(' .. band[2], '+inf', 'WITHSCORES', 'LIMIT', 0, 1)
+        end
+    end
+end
+if not member then
+    return {0}
+end
+local priority = redis.call('ZSCORE', KEYS[2], member) or 0
+redis.call('ZREM', KEYS[1], member)
+redis.call('ZREM', KEYS[2], member)
+redis.call('ZADD', KEYS[4], now + tonumber(ARGV[3]), member)
+redis.call('HSET', KEYS[5], member, priority)
+return {1, member}
+"""
+
+
+class WaitingIndexUnavailable(Exception):
+    """L'index n'est pas exploitable pour cette file (Redis absent ou index non construit)."""
+
+
+class WaitingTicketIndex:
+    """Maintien et consommation de l'index Redis des tickets en attente."""
+
+    _pop_script = None
+
+    @staticmethod
+    def _keys(queue_id) -> tuple[str, str, str]:
+        base = f"{KEY_PREFIX}:{queue_id}"
+        return (f"{base}:fifo", f"{base}:prio", f"{base}:ready")
+
+    @staticmethod
+    def _claim_keys(queue_id) -> tuple[str, str]:
+        base = f"{KEY_PREFIX}:{queue_id}"
+        return (f"{base}:claims", f"{base}:claimprio")
+
+    @staticmethod
+    def encode_member(ticket_id, created_at: datetime) -> str:
+        """Encode un membre triable lexicographiquement par date de création."""
+        micros = (created_at - _EPOCH) // timedelta(microseconds=1)
+        return f"{micros:017d}|{ticket_id}"
+
+    @staticmethod
+    def decode_member(member: str) -> str:
+        """Retourne l'identifiant du ticket contenu dans un membre."""
+        return member.split("|", 1)[1]
+
+    @staticmethod
+    def add(ticket: Ticket) -> None:
+        """Ajoute (ou repositionne) un ticket en attente dans l'index de sa file."""
+        client = get_redis_client()
+        if client is None:
+            return
+
+        fifo_key, prio_key, _ready_key = WaitingTicketIndex._keys(ticket.queue_id)
+        member = WaitingTicketIndex.encode_member(ticket.id, ticket.created_at)
+        try:
+            pipe = client.pipeline(transaction=True)
+            pipe.zadd(fifo_key, {member: 0})
+            pipe.zadd(prio_key, {member: -ticket.priority})
+            pipe.execute()
+        except Exception:  # noqa: BLE001 - l'index est secondaire
+            logger.warning("Index d'attente: ajout impossible pour %s", ticket.id, exc_info=True)
+            WaitingTicketIndex.invalidate(ticket.queue_id)
+
+    @staticmethod
+    def discard(ticket: Ticket, queue_id=None) -> None:
+        """Retire un ticket de l'index (appelé, transféré, clôturé, supprimé...)."""
+        client = get_redis_client()
+        if client is None:
+            return
+
+        queue_id = queue_id or ticket.queue_id
+        fifo_key, prio_key, _ready_key = WaitingTicketIndex._keys(queue_id)
+        member = WaitingTicketIndex.encode_member(ticket.id, ticket.created_at)
+        try:
+            pipe = client.pipeline(transaction=True)
+            pipe.zrem(fifo_key, member)
+            pipe.zrem(prio_key, member)
+            pipe.execute()
+        except Exception:  # noqa: BLE001
+            logger.warning("Index d'attente: retrait impossible pour %s", ticket.id, exc_info=True)
+            WaitingTicketIndex.invalidate(queue_id)
+
+    @staticmethod
+    def sync(ticket: Ticket, previous_queue_id=None) -> None:
+        """Aligne l'index sur l'état courant du ticket, après commit de la transaction."""
+
+        def _apply() -> None:
+            if previous_queue_id and previous_queue_id != ticket.queue_id:
+                WaitingTicketIndex.discard(ticket, queue_id=previous_queue_id)
+            if ticket.status == Ticket.STATUS_WAITING:
+                WaitingTicketIndex.add(ticket)
+            else:
+                WaitingTicketIndex.discard(ticket)
+
+        transaction.on_commit(_apply)
+
+    @staticmethod
+    def pop_next(queue: Queue, algorithm: str | None = None) -> str | None:
+        """
+        Retire atomiquement le prochain ticket de l'index et retourne son identifiant.
+
+        Le membre reste réservé pendant ``CLAIM_LEASE_SECONDS`` : l'appelant doit
+        appeler ``confirm`` après commit (ou ``restore`` en cas d'échec), faute de
+        quoi le ticket est réinséré à l'expiration.
+
+        Raises:
+            WaitingIndexUnavailable: si Redis est indisponible ou l'index non construit.
+        """
+        from .models import Queue
+
+        client = get_redis_client()
+        if client is None:
+            raise WaitingIndexUnavailable("Redis désactivé")
+
+        algo = algorithm or queue.algorithm
+        if algo not in (Queue.ALGO_FIFO, Queue.ALGO_PRIORITY, Queue.ALGO_SLA):
+            algo = Queue.ALGO_FIFO
+
+        cutoff = ""
+        if algo == Queue.ALGO_SLA:
+            cutoff_time = timezone.now() - timedelta(seconds=queue.service.sla_seconds)
+            # "~" est supérieur à tout caractère d'un UUID : inclut tous les membres de cette µs
+            cutoff = WaitingTicketIndex.encode_member("~", cutoff_time)
+
+        try:
+            if WaitingTicketIndex._pop_script is None:
+                WaitingTicketIndex._pop_script = client.register_script(_POP_SCRIPT)
+            result = WaitingTicketIndex._pop_script(
+                keys=[*WaitingTicketIndex._keys(queue.id), *WaitingTicketIndex._claim_keys(queue.id)],
+                args=[algo, cutoff, CLAIM_LEASE_SECONDS],
+            )
+        except Exception as exc:  # noqa: BLE001
+            raise WaitingIndexUnavailable(str(exc)) from exc
+
+        status_code = int(result[0])
+        if status_code < 0:
+            raise WaitingIndexUnavailable("Index non construit")
+        if status_code == 0:
+            return None
+        return WaitingTicketIndex.decode_member(result[1])
+
+    @staticmethod
+    def confirm(queue_id, ticket_id) -> None:
+        """Lève la réservation d'un ticket retiré par ``pop_next`` (retrait définitif)."""
+        client = get_redis_client()
+        if client is None:
+            return
+
+        claims_key, claim_prio_key = WaitingTicketIndex._claim_keys(queue_id)
+        try:
+            # Les réservations se limitent aux appels en cours : le parcours reste court
+            members = [member for member, _deadline in client.zscan_iter(claims_key, match=f"*|{ticket_id}")]
+            if members:
+                pipe = client.pipeline(transaction=True)
+                pipe.zrem(claims_key, *members)
+                pipe.hdel(claim_prio_key, *members)
+                pipe.execute()
+        except Exception:  # noqa: BLE001 - la réservation expirera, l'entrée sera ignorée
+            logger.warning("Index d'attente: confirmation impossible pour %s", ticket_id, exc_info=True)
+
+    @staticmethod
+    def confirm_on_commit(ticket: Ticket) -> None:
+        """Confirme le retrait d'un ticket appelé au commit de la transaction englobante."""
+        queue_id, ticket_id = ticket.queue_id, ticket.id
+        transaction.on_commit(lambda: WaitingTicketIndex.confirm(queue_id, ticket_id))
+
+    @staticmethod
+    def restore(ticket: Ticket) -> None:
+        """Réinsère un ticket retiré par ``pop_next`` mais finalement non appelé."""
+        WaitingTicketIndex.add(ticket)
+        WaitingTicketIndex.confirm(ticket.queue_id, ticket.id)
+
+    @staticmethod
+    def invalidate(queue_id) -> None:
+        """Marque l'index d'une file comme non fiable : les appels repassent par la base."""
+        client = get_redis_client()
+        if client is None:
+            return
+        try:
+            client.delete(WaitingTicketIndex._keys(queue_id)[2])
+        except Exception:  # noqa: BLE001
+            logger.warning("Index d'attente: invalidation impossible pour %s", queue_id, exc_info=True)
+
+    @staticmethod
+    def _expected_members(queue: Queue) -> dict[str, int]:
+        waiting = Ticket.objects.filter(queue=queue, status=Ticket.STATUS_WAITING).values_list(
+            "id", "created_at", "priority"
+        )
+        return {
+            WaitingTicketIndex.encode_member(ticket_id, created_at): priority
+            for ticket_id, created_at, priority in waiting
+        }
+
+    @staticmethod
+    def rebuild(queue: Queue) -> int:
+        """
+        Reconstruit l'index d'une file depuis la base. Retourne le nombre de tickets indexés.
+
+        L'index est fusionné plutôt que vidé : seuls les membres présents avant la
+        lecture de la base et absents de celle-ci sont retirés. Un ticket ajouté
+        par un commit concurrent pendant la reconstruction est donc conservé.
+        """
+        client = get_redis_client()
+        if client is None:
+            raise WaitingIndexUnavailable("Redis désactivé")
+
+        fifo_key, prio_key, ready_key = WaitingTicketIndex._keys(queue.id)
+        pipe = client.pipeline(transaction=True)
+        pipe.zrange(fifo_key, 0, -1)
+        pipe.zrange(prio_key, 0, -1)
+        fifo_members, prio_members = pipe.execute()
+
+        expected = WaitingTicketIndex._expected_members(queue)
+        stale = [member for member in set(fifo_members) | set(prio_members) if member not in expected]
+
+        pipe = client.pipeline(transaction=True)
+        if stale:
+            pipe.zrem(fifo_key, *stale)
+            pipe.zrem(prio_key, *stale)
+        if expected:
+            pipe.zadd(fifo_key, {member: 0 for member in expected})
+            pipe.zadd(prio_key, {member: -priority for member, priority in expected.items()})
+        pipe.set(ready_key, timezone.now().isoformat())
+        pipe.execute()
+        return len(expected)
+
+    @staticmethod
+    def check(queue: Queue) -> dict:
+        """
+        Compare l'index à la base pour une file.
+
+        Returns:
+            dict avec les membres manquants (en base mais pas dans l'index),
+            obsolètes (dans l'index mais plus en attente) et l'état de l'index.
+        """
+        client = get_redis_client()
+        if client is None:
+            raise WaitingIndexUnavailable("Redis désactivé")
+
+        fifo_key, prio_key, ready_key = WaitingTicketIndex._keys(queue.id)
+        claims_key, _claim_prio_key = WaitingTicketIndex._claim_keys(queue.id)
+        expected = WaitingTicketIndex._expected_members(queue)
+
+        pipe = client.pipeline(transaction=False)
+        pipe.exists(ready_key)
+        pipe.zrange(fifo_key, 0, -1)
+        pipe.zrange(prio_key, 0, -1, withscores=True)
+        pipe.zrange(claims_key, 0, -1)
+        ready, fifo_members, prio_members, claimed = pipe.execute()
+
+        indexed = set(fifo_members)
+        prio_scores = {member: -int(score) for member, score in prio_members}
+        # Un membre réservé par un appel en cours n'est pas manquant
+        missing = [m for m in expected if (m not in indexed or m not in prio_scores) and m not in claimed]
+        stale = [m for m in indexed | set(prio_scores) if m not in expected]
+        misranked = [
+            m for m, priority in expected.items() if m in prio_scores and prio_scores[m] != priority
+        ]
+
+        return {
+            "queue_id": str(queue.id),
+            "ready": bool(ready),
+            "expected": len(expected),
+            "missing": [WaitingTicketIndex.decode_member(m) for m in missing],
+            "stale": [WaitingTicketIndex.decode_member(m) for m in stale],
+            "misranked": [WaitingTicketIndex.decode_member(m) for m in misranked],
+            "consistent": bool(ready) and not (missing or stale or misranked),
+        }
@@ -3,62 +3,142 @@
 from __future__ import annotations
 
 import base64
+import logging
 import os
-from typing import Any
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Iterable
 
-from cryptography.fernet import Fernet, InvalidToken
+from cryptography.fernet import Fernet, InvalidToken, MultiFernet
 from cryptography.hazmat.backends import default_backend
 from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2
+from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import models
+from django.db.models.query_utils import DeferredAttribute
+
+logger = logging.getLogger(__name__)
+
+
+# Séparateur entre identifiant de clé et jeton Fernet (absent de l'alphabet base64url)
+KEY_ID_SEPARATOR = ":"
+# Identifiant de la clé dérivée de SECRET_KEY quand ENCRYPTION_KEYS est vide
+DEFAULT_KEY_ID = "v1"
+
+
+@dataclass(frozen=True)
+class KeyRing:
+    """Clés Fernet dérivées, de la plus récente (clé de chiffrement) à la plus ancienne."""
+
+    primary_id: str
+    keys: dict[str, bytes]
+    fernets: dict[str, Fernet]
+    multi: MultiFernet
+
+    @property
+    def primary(self) -> Fernet:
+        return self.fernets[self.primary_id]
+
+
+@lru_cache(maxsize=16)
+def _derive_key(secret: str, salt: bytes) -> bytes:
+    """Dérive une clé Fernet d'un secret (PBKDF2, coûteux : une fois par processus)."""
+    kdf = PBKDF2HMAC(
+        algorithm=hashes.SHA256(),
+        length=32,
+        salt=salt,
+        iterations=100000,
+        backend=default_backend(),
+    )
+    return base64.urlsafe_b64encode(kdf.derive(secret.encode()))
+
+
+@lru_cache(maxsize=4)
+def _build_keyring(keys: tuple[tuple[str, str], ...], salt: bytes) -> KeyRing:
+    derived = {key_id: _derive_key(secret, salt) for key_id, secret in keys}
+    fernets = {key_id: Fernet(key) for key_id, key in derived.items()}
+    return KeyRing(
+        primary_id=keys[0][0],
+        keys=derived,
+        fernets=fernets,
+        multi=MultiFernet(list(fernets.values())),
+    )
 
 
 class EncryptionService:
-    """Service pour chiffrer et déchiffrer les données sensibles."""
+    """Service pour chiffrer et déchiffrer les données sensibles.
+
+    Les clés viennent de ``ENCRYPTION_KEYS`` (``"id=secret"``, la première
+    chiffre, les suivantes ne servent plus qu'à déchiffrer) ou, à défaut, de
+    ``SECRET_KEY`` sous l'identifiant ``v1``. Chaque clé n'est dérivée qu'une
+    fois par processus.
+
+    Les valeurs chiffrées sont préfixées par l'identifiant de leur clé
+    (``v2:gAAAA...``). Les valeurs sans préfixe (format historique) sont
+    déchiffrées en essayant chaque clé.
+    """
+
+    @staticmethod
+    def _keyring() -> KeyRing:
+        keys = []
+        for entry in getattr(settings, "ENCRYPTION_KEYS", None) or []:
+            key_id, _sep, secret = entry.partition("=")
+            if not secret or KEY_ID_SEPARATOR in key_id:
+                raise ImproperlyConfigured(f"ENCRYPTION_KEYS: entrée invalide pour '{key_id}' (attendu id=secret)")
+            keys.append((key_id.strip(), secret))
+        if not keys:
+            keys.append((DEFAULT_KEY_ID, settings.SECRET_KEY))
+
+        salt = getattr(settings, "ENCRYPTION_SALT", "smartqueue-encryption-salt").encode()
+        return _build_keyring(tuple(keys), salt)
 
     @staticmethod
     def _get_encryption_key() -> bytes:
-        """Récupère la clé de chiffrement depuis les settings.
+        """Récupère la clé de chiffrement courante.
 
         Returns:
             bytes: Clé de chiffrement Fernet
         """
-        # Utiliser la SECRET_KEY Django pour dériver une clé Fernet
-        secret = settings.SECRET_KEY.encode()
+        keyring = EncryptionService._keyring()
+        return keyring.keys[keyring.primary_id]
 
-        # Utiliser un sel fixe (dans un environnement de production, ceci devrait être configurable)
-        salt = b"smartqueue-encryption-salt"
+    @staticmethod
+    def _encrypt_with(keyring: KeyRing, data: str | bytes) -> str:
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        token = keyring.primary.encrypt(data).decode("utf-8")
+        return f"{keyring.primary_id}{KEY_ID_SEPARATOR}{token}"
 
-        # Dériver une clé de 32 bytes avec PBKDF2
-        kdf = PBKDF2(
-            algorithm=hashes.SHA256(),
-            length=32,
-            salt=salt,
-            iterations=100000,
-            backend=default_backend(),
-        )
+    @staticmethod
+    def _decrypt_with(keyring: KeyRing, encrypted_data: str | bytes) -> str:
+        if isinstance(encrypted_data, bytes):
+            encrypted_data = encrypted_data.decode("utf-8")
 
-        key = base64.urlsafe_b64encode(kdf.derive(secret))
-        return key
+        key_id, sep, token = encrypted_data.rpartition(KEY_ID_SEPARATOR)
+        try:
+            if sep:
+                fernet = keyring.fernets.get(key_id)
+                if fernet is None:
+                    raise ValueError(f"Clé de chiffrement inconnue: {key_id}")
+                decrypted = fernet.decrypt(token.encode("utf-8"))
+            else:
+                decrypted = keyring.multi.decrypt(token.encode("utf-8"))
+            return decrypted.decode("utf-8")
+        except InvalidToken:
+            raise ValueError("Impossible de déchiffrer les données")
 
     @staticmethod
     def encrypt(data: str | bytes) -> str:
-        """Chiffre des données.
+        """Chiffre des données avec la clé courante.
 
         Args:
             data: Données à chiffrer (str ou bytes)
 
         Returns:
-            str: Données chiffrées en base64
+            str: Données chiffrées, préfixées par l'identifiant de clé
         """
-        if isinstance(data, str):
-            data = data.encode("utf-8")
-
-        key = EncryptionService._get_encryption_key()
-        fernet = Fernet(key)
-        encrypted = fernet.encrypt(data)
-
-        return encrypted.decode("utf-8")
+        return EncryptionService._encrypt_with(EncryptionService._keyring(), data)
 
     @staticmethod
     def decrypt(encrypted_data: str | bytes) -> str:
@@ -71,19 +151,68 @@ class EncryptionService:
             str: Données déchiffrées
 
         Raises:
-            InvalidToken: Si le déchiffrement échoue
+            ValueError: Si le déchiffrement échoue
         """
-        if isinstance(encrypted_data, str):
-            encrypted_data = encrypted_data.encode("utf-8")
+        return EncryptionService._decrypt_with(EncryptionService._keyring(), encrypted_data)
 
-        key = EncryptionService._get_encryption_key()
-        fernet = Fernet(key)
+    @staticmethod
+    def encrypt_many(values: Iterable[str | bytes]) -> list[str]:
+        """Chiffre une série de valeurs (clés résolues une seule fois).
 
-        try:
-            decrypted = fernet.decrypt(encrypted_data)
-            return decrypted.decode("utf-8")
-        except InvalidToken:
-            raise ValueError("Impossible de déchiffrer les données")
+        Args:
+            values: Valeurs à chiffrer
+
+        Returns:
+            list[str]: Valeurs chiffrées, dans le même ordre
+        """
+        keyring = EncryptionService._keyring()
+        return [EncryptionService._encrypt_with(keyring, value) for value in values]
+
+    @staticmethod
+    def decrypt_many(values: Iterable[str | bytes | None], default: str | None = None) -> list[str | None]:
+        """Déchiffre une série de valeurs (clés résolues une seule fois).
+
+        Args:
+            values: Valeurs chiffrées (vides ou None : retournées telles quelles)
+            default: Valeur retournée pour un déchiffrement impossible ; si None, lève ValueError
+
+        Returns:
+            list: Valeurs déchiffrées, dans le même ordre
+        """
+        keyring = EncryptionService._keyring()
+        results: list[str | None] = []
+        for value in values:
+            if not value:
+                results.append(value)
+                continue
+            try:
+                results.append(EncryptionService._decrypt_with(keyring, value))
+            except ValueError:
+                if default is None:
+                    raise
+                results.append(default)
+        return results
+
+    @staticmethod
+    def is_encrypted(value: str | None) -> bool:
+        """Indique si une valeur a l'apparence d'une donnée chiffrée par ce service."""
+        if not value:
+            return False
+        _key_id, _sep, token = value.rpartition(KEY_ID_SEPARATOR)
+        return token.startswith("gAAAAA")
+
+    @staticmethod
+    def needs_rotation(encrypted_data: str) -> bool:
+        """Indique si une valeur n'est pas chiffrée avec la clé courante."""
+        key_id, sep, _token = encrypted_data.rpartition(KEY_ID_SEPARATOR)
+        return not sep or key_id != EncryptionService._keyring().primary_id
+
+    @staticmethod
+    def rotate(encrypted_data: str) -> str:
+        """Rechiffre une valeur avec la clé courante (inchangée si déjà à jour)."""
+        if not EncryptionService.needs_rotation(encrypted_data):
+            return encrypted_data
+        return EncryptionService.encrypt(EncryptionService.decrypt(encrypted_data))
 
     @staticmethod
     def encrypt_dict(data: dict) -> dict:
@@ -159,6 +288,63 @@ class FieldEncryption:
             return ""
 
 
+class _Ciphertext(str):
+    """Valeur chiffrée telle que lue en base (pas encore déchiffrée)."""
+
+
+class _EncryptedAttribute(DeferredAttribute):
+    """Descripteur : déchiffre la valeur au premier accès puis la garde en clair."""
+
+    def __get__(self, instance, cls=None):
+        if instance is None:
+            return self
+        value = super().__get__(instance, cls)
+        if isinstance(value, _Ciphertext):
+            try:
+                value = EncryptionService.decrypt(value)
+            except ValueError:
+                logger.warning(
+                    "Déchiffrement impossible pour %s.%s (pk=%s)",
+                    type(instance).__name__,
+                    self.field.name,
+                    instance.pk,
+                )
+                # La valeur chiffrée reste en place : un save() ne l'écrase pas
+                return ""
+            instance.__dict__[self.field.attname] = value
+        return value
+
+    def __set__(self, instance, value) -> None:
+        instance.__dict__[self.field.attname] = value
+
+
+class EncryptedTextField(models.TextField):
+    """Champ texte chiffré en base, déchiffré paresseusement à l'accès.
+
+    Charger une page d'objets ne coûte aucun déchiffrement : seul l'attribut
+    lu est déchiffré. Une valeur jamais lue est réécrite telle quelle à
+    l'enregistrement. Les ``values()``/``values_list()`` retournent la valeur
+    chiffrée (voir ``EncryptionService.decrypt_many``).
+    """
+
+    descriptor_class = _EncryptedAttribute
+
+    def pre_save(self, model_instance, add):
+        # Sans passer par le descripteur : une valeur jamais lue reste chiffrée telle quelle
+        return model_instance.__dict__.get(self.attname)
+
+    def from_db_value(self, value, expression, connection):
+        if not value:
+            return value
+        return _Ciphertext(value)
+
+    def get_prep_value(self, value):
+        value = super().get_prep_value(value)
+        if not value or isinstance(value, _Ciphertext):
+            return value
+        return EncryptionService.encrypt(value)
+
+
 class TokenService:
     """Service pour générer et vérifier des tokens sécurisés."""
 
@@ -214,7 +400,7 @@ class TokenService:
         return check_password(api_key, hashed_key)
 
 
-class PII Protection:
+class PIIProtection:
     """Protection des informations personnellement identifiables (PII)."""
 
     @staticmethod
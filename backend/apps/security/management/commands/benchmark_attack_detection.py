@@ -0,0 +1,97 @@
+"""Management command comparant l'ancienne détection d'attaques (motif par motif) à la passe unique compilée."""
+
+import json
+import re
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from apps.security.middleware import AttackDetectionMiddleware
+from apps.security.services import AttackDetectionService
+
+LEGACY_SQL_INJECTION_PATTERNS = [
+    r"(\bUNION\b.*\bSELECT\b)",
+    r"(\bSELECT\b.*\bFROM\b.*\bWHERE\b)",
+    r"(\bDROP\b.*\bTABLE\b)",
+    r"(\bINSERT\b.*\bINTO\b)",
+    r"(\/\*|\*\/)",
+    r"(\bOR\b\s+\d+\s*=\s*\d+)",
+    r"(\bAND\b\s+\d+\s*=\s*\d+)",
+    r"('.*OR.*'.*=.*')",
+]
+
+LEGACY_XSS_PATTERNS = [
+    r"<script[^>]*>.*?</script>",
+    r"javascript:",
+    r"on\w+\s*=",
+    r"<iframe",
+    r"<object",
+    r"<embed",
+]
+
+
+def legacy_scan(value: str) -> bool:
+    """Implémentation d'origine : minuscules puis un ``re.search`` par motif, SQL puis XSS."""
+    value_lower = value.lower()
+    for pattern in LEGACY_SQL_INJECTION_PATTERNS:
+        if re.search(pattern, value_lower, re.IGNORECASE):
+            return True
+    for pattern in LEGACY_XSS_PATTERNS:
+        if re.search(pattern, value, re.IGNORECASE):
+            return True
+    return False
+
+
+class Command(BaseCommand):
+    help = "Micro-benchmark de la détection d'attaques : surcoût par requête selon la taille du corps"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=20, help="Requêtes par taille de corps")
+        parser.add_argument(
+            "--legacy-max-kb",
+            type=int,
+            default=16,
+            help="Taille max mesurée pour l'ancienne implémentation (retours arrière non bornés au-delà)",
+        )
+
+    def handle(self, *args, **options):
+        iterations = options["iterations"]
+        factory = RequestFactory()
+        middleware = AttackDetectionMiddleware(lambda request: HttpResponse())
+
+        self.stdout.write(f"Corps analysé par le middleware plafonné à {middleware.max_body_bytes // 1024} Ko")
+        self.stdout.write(f"{'corps':>8} {'ancien ms':>10} {'compilé ms':>11} {'middleware ms':>14}")
+        for size in (1024, 16 * 1024, 100 * 1024, 1024 * 1024):
+            body = self._benign_body(size)
+
+            legacy = None
+            if size <= options["legacy_max_kb"] * 1024:
+                legacy = self._time(lambda: legacy_scan(body), iterations)
+            compiled = self._time(lambda: AttackDetectionService.scan(body), iterations)
+
+            def request_cycle():
+                request = factory.post("/api/v1/tenants/bench/tickets/", data=body, content_type="application/json")
+                request.user = AnonymousUser()
+                middleware(request)
+
+            full = self._time(request_cycle, iterations)
+
+            legacy_cell = f"{legacy:>10.2f}" if legacy is not None else f"{'-':>10}"
+            self.stdout.write(f"{size // 1024:>6}KB {legacy_cell} {compiled:>11.2f} {full:>14.2f}")
+
+    @staticmethod
+    def _benign_body(size: int) -> str:
+        """Corps JSON réaliste : notes libres avec les mots-clés qui font reculer les ``.*``."""
+        note = "Le client a choisi l'option or et souhaite un rendez-vous pour insert de dossier; "
+        entry = json.dumps({"notes": note, "onboarding": True})
+        return ("[" + ", ".join([entry] * (size // len(entry) + 1)))[:size]
+
+    @staticmethod
+    def _time(func, iterations: int) -> float:
+        start = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        return (time.perf_counter() - start) / iterations * 1000
@@ -0,0 +1,83 @@
+"""Management command comparant l'ancien rate limiting (cache get + set) au limiteur atomique."""
+
+import threading
+import time
+import uuid
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+
+from apps.core.redis_client import get_redis_client
+from apps.security.rate_limit import LocalSlidingWindow, RateLimit, SlidingWindowRateLimiter
+
+
+def legacy_check_rate_limit(key: str, max_requests: int, window_seconds: int) -> tuple[bool, int]:
+    """Implémentation d'origine : lecture puis écriture non atomiques (deux allers-retours)."""
+    cache_key = f"rate_limit:{key}"
+    current = cache.get(cache_key, 0)
+    if current >= max_requests:
+        return False, 0
+    new_count = current + 1
+    cache.set(cache_key, new_count, timeout=window_seconds)
+    return True, max_requests - new_count
+
+
+class Command(BaseCommand):
+    help = "Micro-benchmark du rate limiting : latence par appel et admissions sous concurrence"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=5000, help="Appels par implémentation")
+        parser.add_argument("--threads", type=int, default=8, help="Threads pour le test de concurrence")
+
+    def handle(self, *args, **options):
+        iterations = options["iterations"]
+        threads = options["threads"]
+        local = LocalSlidingWindow()
+
+        implementations = {
+            "legacy cache get+set": lambda key, limit: legacy_check_rate_limit(key, limit, 60)[0],
+            "sliding window (atomique)": lambda key, limit: SlidingWindowRateLimiter.hit(
+                [RateLimit(key, limit, 60)]
+            ).allowed,
+            "repli en mémoire": lambda key, limit: local.hit([RateLimit(key, limit, 60)]).allowed,
+        }
+
+        backend = "Redis" if get_redis_client() is not None else "repli en mémoire (REDIS_URL vide)"
+        self.stdout.write(f"Limiteur atomique via : {backend}")
+        self.stdout.write(f"{'implémentation':<28} {'µs/appel':>10} {'appels/s':>10} {'admis':>8} {'limite':>8}")
+
+        for name, check in implementations.items():
+            # Latence séquentielle, limite jamais atteinte
+            key = f"bench:{uuid.uuid4().hex}"
+            start = time.perf_counter()
+            for _ in range(iterations):
+                check(key, iterations + 1)
+            elapsed = time.perf_counter() - start
+
+            # Concurrence : combien d'appels passent pour une limite de la moitié des appels
+            limit = iterations // 2
+            admitted = self._concurrent_admissions(check, f"bench:{uuid.uuid4().hex}", limit, iterations, threads)
+
+            per_call = elapsed / iterations * 1_000_000
+            style = self.style.WARNING if admitted > limit else self.style.SUCCESS
+            self.stdout.write(
+                f"{name:<28} {per_call:>10.1f} {iterations / elapsed:>10.0f} "
+                + style(f"{admitted:>8}")
+                + f" {limit:>8}"
+            )
+
+    @staticmethod
+    def _concurrent_admissions(check, key: str, limit: int, iterations: int, threads: int) -> int:
+        admitted = [0] * threads
+
+        def worker(index: int) -> None:
+            for _ in range(iterations // threads):
+                if check(key, limit):
+                    admitted[index] += 1
+
+        workers = [threading.Thread(target=worker, args=(index,)) for index in range(threads)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        return sum(admitted)
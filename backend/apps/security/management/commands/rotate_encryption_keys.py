@@ -0,0 +1,54 @@
+"""Management command rechiffrant les données sensibles avec la clé courante."""
+
+from django.core.management.base import BaseCommand
+
+from apps.security.encryption import EncryptionService
+from apps.security.oauth_models import OAuthConnection
+from apps.users.models import User
+
+# (modèle, champs chiffrés)
+ENCRYPTED_FIELDS = [
+    (OAuthConnection, ["access_token", "refresh_token"]),
+    (User, ["totp_secret"]),
+]
+
+
+class Command(BaseCommand):
+    help = "Rechiffre avec la clé courante (ENCRYPTION_KEYS) les valeurs chiffrées avec une ancienne clé"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--dry-run", action="store_true", help="Compter sans modifier")
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        dry_run = options["dry_run"]
+
+        for model, fields in ENCRYPTED_FIELDS:
+            rotated = 0
+            batch = []
+            rows = model.objects.exclude(**{f"{fields[0]}__isnull": True}).values_list("pk", *fields)
+            for pk, *values in rows.iterator(chunk_size=batch_size):
+                updates = {
+                    field: EncryptionService.rotate(value)
+                    for field, value in zip(fields, values)
+                    if value and EncryptionService.needs_rotation(value)
+                }
+                if not updates:
+                    continue
+                rotated += 1
+                if not dry_run:
+                    batch.append((pk, updates))
+                if len(batch) >= batch_size:
+                    self._apply(model, batch)
+                    batch = []
+            self._apply(model, batch)
+
+            verb = "à rechiffrer" if dry_run else "rechiffrés"
+            self.stdout.write(self.style.SUCCESS(f"{model.__name__}: {rotated} enregistrement(s) {verb}"))
+
+    @staticmethod
+    def _apply(model, batch) -> None:
+        # update() : pas de save() (OAuthConnection.save rechiffrerait) ni de signaux
+        for pk, updates in batch:
+            model.objects.filter(pk=pk).update(**updates)
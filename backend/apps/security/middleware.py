@@ -3,12 +3,14 @@
 from __future__ import annotations
 
 import logging
+import re
 from typing import Callable
 
+from django.conf import settings
 from django.http import HttpRequest, HttpResponse, JsonResponse
-from django.utils import timezone
 
 from .models import SecurityEvent
+from .rate_limit import RateLimit
 from .services import (
     AttackDetectionService,
     IPBlockingService,
@@ -59,14 +61,22 @@ class IPBlockingMiddleware:
 
 
 class RateLimitMiddleware:
-    """Middleware pour limiter le nombre de requêtes par IP."""
+    """Middleware pour limiter le nombre de requêtes par IP.
 
-    # Configuration du rate limiting
+    Les limites par utilisateur et par tenant, qui supposent l'authentification
+    résolue, sont appliquées par ``apps.security.throttling.MemberRateThrottle``.
+    """
+
+    # Groupes de routes : préfixe -> nom du groupe et limite IP (requêtes, fenêtre en
+    # secondes), appliquée par route normalisée (identifiants remplacés)
     RATE_LIMIT_CONFIG = {
-        "/api/v1/auth/": {"max_requests": 10, "window_seconds": 60},  # 10 req/min pour l'auth
-        "/api/": {"max_requests": 100, "window_seconds": 60},  # 100 req/min pour l'API
+        "/api/v1/auth/": {"group": "auth", "ip": (10, 60)},  # 10 req/min pour l'auth
+        "/api/": {"group": "api", "ip": (100, 60)},
     }
 
+    # Segments d'URL variables : UUID (avec ou sans tirets) et identifiants numériques
+    ID_SEGMENT_RE = re.compile(r"^(?:[0-9a-fA-F]{8}-?(?:[0-9a-fA-F]{4}-?){3}[0-9a-fA-F]{12}|\d+)$")
+
     def __init__(self, get_response: Callable):
         self.get_response = get_response
 
@@ -90,13 +100,12 @@ class RateLimitMiddleware:
             # Pas de rate limit pour ce endpoint
             return self.get_response(request)
 
-        # Vérifier le rate limit
-        key = f"{path}:{ip_address}"
-        is_allowed, remaining = RateLimitService.check_rate_limit(
-            key, config["max_requests"], config["window_seconds"]
+        max_requests, window = config["ip"]
+        result = RateLimitService.check_limits(
+            [RateLimit(f"{config['group']}:{self._route_key(path)}:ip:{ip_address}", max_requests, window)]
         )
 
-        if not is_allowed:
+        if not result.allowed:
             logger.warning(f"Rate limit exceeded for IP: {ip_address} on {path}")
 
             # Enregistrer l'événement
@@ -119,59 +128,104 @@ class RateLimitMiddleware:
                     duration_hours=24,
                 )
 
-            return JsonResponse(
+            response = JsonResponse(
                 {
                     "error": "Rate limit exceeded",
                     "message": "Too many requests. Please try again later.",
                 },
                 status=429,
             )
+            response["Retry-After"] = str(max(result.retry_after, 1))
+            return response
 
         response = self.get_response(request)
 
         # Ajouter les headers de rate limit
-        response["X-RateLimit-Limit"] = str(config["max_requests"])
-        response["X-RateLimit-Remaining"] = str(remaining)
+        response["X-RateLimit-Limit"] = str(config["ip"][0])
+        response["X-RateLimit-Remaining"] = str(result.remaining)
 
         return response
 
+    def _route_key(self, path: str) -> str:
+        """Chemin normalisé : un compteur par route, pas un par ticket ou par file."""
+        return "/".join(
+            ":id" if self.ID_SEGMENT_RE.match(segment) else segment
+            for segment in path.split("/")
+        )
+
 
 class AttackDetectionMiddleware:
     """Middleware pour détecter les tentatives d'attaque."""
 
+    # Corps analysés en flux, plafonnés à ATTACK_DETECTION_MAX_BODY_BYTES
+    RAW_BODY_CONTENT_TYPES = ("application/json", "application/xml", "text/")
+    # Formulaires analysés champ par champ (les fichiers envoyés ne sont pas lus)
+    FORM_CONTENT_TYPES = ("application/x-www-form-urlencoded", "multipart/form-data")
+    BODY_CHUNK_SIZE = 64 * 1024
+
     def __init__(self, get_response: Callable):
         self.get_response = get_response
+        self.max_body_bytes = getattr(settings, "ATTACK_DETECTION_MAX_BODY_BYTES", 256 * 1024)
 
     def __call__(self, request: HttpRequest) -> HttpResponse:
         ip_address = SecurityEventService.get_client_ip(request)
 
         # Vérifier les paramètres GET
         for key, value in request.GET.items():
-            if self._check_attack_patterns(value, ip_address, request, key):
+            if attack := AttackDetectionService.scan(value):
+                self._handle_attack(attack, value, ip_address, request, key)
                 return JsonResponse({"error": "Invalid request"}, status=400)
 
         # Vérifier le body pour les requêtes POST/PUT/PATCH
-        if request.method in ["POST", "PUT", "PATCH"] and request.body:
-            try:
-                body_str = request.body.decode("utf-8")
-                if self._check_attack_patterns(body_str, ip_address, request, "body"):
-                    return JsonResponse({"error": "Invalid request"}, status=400)
-            except Exception:
-                pass  # Ignore les erreurs de décodage
+        if request.method in ["POST", "PUT", "PATCH"]:
+            if detected := self._scan_body(request):
+                attack, excerpt, param_name = detected
+                self._handle_attack(attack, excerpt, ip_address, request, param_name)
+                return JsonResponse({"error": "Invalid request"}, status=400)
 
         response = self.get_response(request)
         return response
 
-    def _check_attack_patterns(
-        self, value: str, ip_address: str, request: HttpRequest, param_name: str
-    ) -> bool:
-        """Vérifie les patterns d'attaque dans une valeur.
+    def _scan_body(self, request: HttpRequest) -> tuple[str, str, str] | None:
+        """Analyse le corps selon son type de contenu.
 
         Returns:
-            bool: True si une attaque est détectée
+            tuple | None: (type d'attaque, extrait, paramètre) si une attaque est détectée
         """
+        content_type = request.content_type or ""
+
+        if content_type in self.FORM_CONTENT_TYPES:
+            try:
+                fields = request.POST
+            except Exception:  # noqa: BLE001 - formulaire invalide, laissé à la vue
+                return None
+            for key, value in fields.items():
+                if attack := AttackDetectionService.scan(value):
+                    return attack, value, key
+            return None
+
+        if not content_type.startswith(self.RAW_BODY_CONTENT_TYPES):
+            return None
+
+        try:
+            body = memoryview(request.body)
+        except Exception:  # noqa: BLE001 - corps trop volumineux ou déjà consommé
+            return None
+
+        chunk_size = self.BODY_CHUNK_SIZE
+        chunks = (body[offset:offset + chunk_size] for offset in range(0, len(body), chunk_size))
+        detected = AttackDetectionService.scan_stream(chunks, self.max_body_bytes)
+        if detected:
+            attack, excerpt = detected
+            return attack, excerpt, "body"
+        return None
+
+    def _handle_attack(
+        self, attack: str, value: str, ip_address: str, request: HttpRequest, param_name: str
+    ) -> None:
+        """Journalise une attaque détectée et applique la réponse associée."""
         # Détection SQL Injection
-        if AttackDetectionService.detect_sql_injection(value):
+        if attack == AttackDetectionService.ATTACK_SQL_INJECTION:
             logger.critical(
                 f"SQL injection attempt detected from {ip_address} in parameter '{param_name}'"
             )
@@ -191,24 +245,18 @@ class AttackDetectionMiddleware:
                 description="Tentative d'injection SQL détectée",
                 duration_hours=72,
             )
-
-            return True
+            return
 
         # Détection XSS
-        if AttackDetectionService.detect_xss(value):
-            logger.warning(f"XSS attempt detected from {ip_address} in parameter '{param_name}'")
-
-            SecurityEventService.log_event(
-                event_type=SecurityEvent.EVENT_XSS_ATTEMPT,
-                ip_address=ip_address,
-                description=f"Tentative XSS détectée dans '{param_name}': {value[:100]}",
-                severity=SecurityEvent.SEVERITY_HIGH,
-                request=request,
-            )
-
-            return True
-
-        return False
+        logger.warning(f"XSS attempt detected from {ip_address} in parameter '{param_name}'")
+
+        SecurityEventService.log_event(
+            event_type=SecurityEvent.EVENT_XSS_ATTEMPT,
+            ip_address=ip_address,
+            description=f"Tentative XSS détectée dans '{param_name}': {value[:100]}",
+            severity=SecurityEvent.SEVERITY_HIGH,
+            request=request,
+        )
 
 
 class SecurityHeadersMiddleware:
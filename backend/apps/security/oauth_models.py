@@ -67,10 +67,10 @@ class OAuthConnection(TimeStampedModel):
         from apps.security.encryption import EncryptionService
 
         # Chiffrer les tokens si non vides et non déjà chiffrés
-        if self.access_token and not self.access_token.startswith("gAAAAA"):
+        if self.access_token and not EncryptionService.is_encrypted(self.access_token):
             self.access_token = EncryptionService.encrypt(self.access_token)
 
-        if self.refresh_token and not self.refresh_token.startswith("gAAAAA"):
+        if self.refresh_token and not EncryptionService.is_encrypted(self.refresh_token):
             self.refresh_token = EncryptionService.encrypt(self.refresh_token)
 
         super().save(*args, **kwargs)
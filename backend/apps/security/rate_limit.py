@@ -0,0 +1,225 @@
+"""Limitation de débit atomique à fenêtre glissante.
+
+Chaque limite est un compteur à fenêtre glissante approximée : le compteur de
+la fenêtre courante plus celui de la fenêtre précédente pondéré par la part
+de celle-ci encore couverte. L'état tient dans un hash Redis par clé
+(``slot``, ``curr``, ``prev``).
+
+Toutes les limites d'une requête (IP, utilisateur, tenant) sont vérifiées
+puis incrémentées par un seul script Lua : un aller-retour, aucune course
+entre lecture et écriture, et une requête refusée n'est décomptée nulle part.
+
+Si Redis est absent, lent ou en erreur, un limiteur en mémoire du processus
+prend le relais (limites appliquées par processus) pendant
+``RATE_LIMIT_REDIS_RETRY_SECONDS`` avant de retenter Redis.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import threading
+import time
+from dataclasses import dataclass
+from typing import Iterable
+
+from django.conf import settings
+
+from apps.core.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "sq:ratelimit"
+
+# KEYS: une clé par limite — ARGV: limite, fenêtre (secondes) pour chaque clé
+# Retour: {autorisé (0/1), restant, délai avant nouvel essai (secondes)}
+_SLIDING_WINDOW_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local allowed = 1
+local remaining = -1
+local retry_after = 0
+local states = {}
+for i, key in ipairs(KEYS) do
+    local limit = tonumber(ARGV[2 * i - 1])
+    local window = tonumber(ARGV[2 * i])
+    local slot = math.floor(now / window)
+    local state = redis.call('HMGET', key, 'slot', 'curr', 'prev')
+    local stored_slot = tonumber(state[1])
+    local curr = 0
+    local prev = 0
+    if stored_slot == slot then
+        curr = tonumber(state[2]) or 0
+        prev = tonumber(state[3]) or 0
+    elseif stored_slot == slot - 1 then
+        prev = tonumber(state[2]) or 0
+    end
+    local elapsed = now - slot * window
+    local estimated = prev * (1 - elapsed / window) + curr
+    local left = math.floor(limit - estimated - 1)
+    if left < 0 then
+        allowed = 0
+        retry_after = math.max(retry_after, math.ceil(window - elapsed))
+        left = 0
+    end
+    if remaining < 0 or left < remaining then
+        remaining = left
+    end
+    states[i] = {slot, curr, prev, window}
+end
+if allowed == 1 then
+    for i, key in ipairs(KEYS) do
+        local state = states[i]
+        redis.call('HSET', key, 'slot', state[1], 'curr', state[2] + 1, 'prev', state[3])
+        redis.call('EXPIRE', key, state[4] * 2)
+    end
+end
+return {allowed, remaining, retry_after}
+"""
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """Une limite : ``limit`` requêtes par ``window`` secondes pour la clé ``key``."""
+
+    key: str
+    limit: int
+    window: int
+
+
+@dataclass(frozen=True)
+class RateLimitResult:
+    """Décision pour un ensemble de limites."""
+
+    allowed: bool
+    remaining: int
+    retry_after: int = 0
+
+
+class LocalSlidingWindow:
+    """Même algorithme que le script Lua, en mémoire du processus."""
+
+    # Au-delà, les compteurs expirés sont purgés
+    MAX_KEYS = 10_000
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._state: dict[str, tuple[int, int, int, int]] = {}
+
+    def hit(self, limits: list[RateLimit]) -> RateLimitResult:
+        now = time.time()
+        with self._lock:
+            allowed = True
+            remaining = None
+            retry_after = 0
+            states = []
+            for rate_limit in limits:
+                slot = math.floor(now / rate_limit.window)
+                stored_slot, curr, prev, _window = self._state.get(rate_limit.key, (None, 0, 0, 0))
+                if stored_slot == slot:
+                    pass
+                elif stored_slot == slot - 1:
+                    curr, prev = 0, curr
+                else:
+                    curr, prev = 0, 0
+
+                elapsed = now - slot * rate_limit.window
+                estimated = prev * (1 - elapsed / rate_limit.window) + curr
+                left = math.floor(rate_limit.limit - estimated - 1)
+                if left < 0:
+                    allowed = False
+                    retry_after = max(retry_after, math.ceil(rate_limit.window - elapsed))
+                    left = 0
+                remaining = left if remaining is None else min(remaining, left)
+                states.append((rate_limit, slot, curr, prev))
+
+            if allowed:
+                for rate_limit, slot, curr, prev in states:
+                    self._state[rate_limit.key] = (slot, curr + 1, prev, rate_limit.window)
+                if len(self._state) > self.MAX_KEYS:
+                    self._purge(now)
+
+        return RateLimitResult(allowed=allowed, remaining=remaining or 0, retry_after=retry_after)
+
+    def reset(self, key: str) -> None:
+        with self._lock:
+            self._state.pop(key, None)
+
+    def _purge(self, now: float) -> None:
+        self._state = {
+            key: state
+            for key, state in self._state.items()
+            if state[0] >= math.floor(now / state[3]) - 1
+        }
+
+
+class SlidingWindowRateLimiter:
+    """Limiteur partagé (Redis) avec repli en mémoire du processus."""
+
+    _script = None
+    _local = LocalSlidingWindow()
+    _redis_down_until = 0.0
+
+    @staticmethod
+    def redis_key(key: str) -> str:
+        return f"{KEY_PREFIX}:{key}"
+
+    @staticmethod
+    def hit(limits: Iterable[RateLimit]) -> RateLimitResult:
+        """
+        Vérifie et décompte une requête sur toutes les limites, atomiquement.
+
+        La requête n'est décomptée que si aucune limite n'est dépassée.
+        """
+        limits = list(limits)
+        if not limits:
+            return RateLimitResult(allowed=True, remaining=0)
+
+        result = SlidingWindowRateLimiter._hit_redis(limits)
+        if result is None:
+            result = SlidingWindowRateLimiter._local.hit(limits)
+        return result
+
+    @staticmethod
+    def reset(key: str) -> None:
+        """Réinitialise les compteurs d'une clé."""
+        SlidingWindowRateLimiter._local.reset(key)
+        client = SlidingWindowRateLimiter._client()
+        if client is None:
+            return
+        try:
+            client.delete(SlidingWindowRateLimiter.redis_key(key))
+        except Exception:  # noqa: BLE001
+            logger.warning("Rate limit: réinitialisation Redis impossible pour %s", key, exc_info=True)
+
+    @staticmethod
+    def _client():
+        if time.monotonic() < SlidingWindowRateLimiter._redis_down_until:
+            return None
+        return get_redis_client(socket_timeout=getattr(settings, "RATE_LIMIT_REDIS_TIMEOUT", 0.05))
+
+    @staticmethod
+    def _hit_redis(limits: list[RateLimit]) -> RateLimitResult | None:
+        client = SlidingWindowRateLimiter._client()
+        if client is None:
+            return None
+
+        args: list[int] = []
+        for rate_limit in limits:
+            args.extend((rate_limit.limit, rate_limit.window))
+
+        try:
+            if SlidingWindowRateLimiter._script is None:
+                SlidingWindowRateLimiter._script = client.register_script(_SLIDING_WINDOW_SCRIPT)
+            allowed, remaining, retry_after = SlidingWindowRateLimiter._script(
+                keys=[SlidingWindowRateLimiter.redis_key(rate_limit.key) for rate_limit in limits],
+                args=args,
+            )
+        except Exception:  # noqa: BLE001 - repli en mémoire
+            logger.warning("Rate limit: Redis indisponible, repli en mémoire", exc_info=True)
+            SlidingWindowRateLimiter._redis_down_until = (
+                time.monotonic() + getattr(settings, "RATE_LIMIT_REDIS_RETRY_SECONDS", 5)
+            )
+            return None
+
+        return RateLimitResult(allowed=bool(allowed), remaining=int(remaining), retry_after=int(retry_after))
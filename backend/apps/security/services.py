@@ -2,14 +2,16 @@
 
 from __future__ import annotations
 
+import codecs
 import re
 from datetime import timedelta
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Iterable
 
 from django.core.cache import cache
 from django.utils import timezone
 
 from .models import BlockedIP, PasswordHistory, PasswordPolicy, SecurityAlert, SecurityEvent
+from .rate_limit import RateLimit, RateLimitResult, SlidingWindowRateLimiter
 
 if TYPE_CHECKING:
     from django.http import HttpRequest
@@ -207,7 +209,7 @@ class RateLimitService:
     def check_rate_limit(
         key: str, max_requests: int, window_seconds: int
     ) -> tuple[bool, int]:
-        """Vérifie le rate limit.
+        """Vérifie le rate limit (fenêtre glissante, vérification et décompte atomiques).
 
         Args:
             key: Clé unique (ex: "login:192.168.1.1")
@@ -217,20 +219,20 @@ class RateLimitService:
         Returns:
             tuple: (is_allowed, remaining_requests)
         """
-        cache_key = f"rate_limit:{key}"
+        result = SlidingWindowRateLimiter.hit([RateLimit(key, max_requests, window_seconds)])
+        return result.allowed, result.remaining
 
-        # Récupérer le compteur actuel
-        current = cache.get(cache_key, 0)
-
-        if current >= max_requests:
-            return False, 0
+    @staticmethod
+    def check_limits(limits: list[RateLimit]) -> RateLimitResult:
+        """Vérifie plusieurs limites (IP, utilisateur, tenant...) en un seul aller-retour.
 
-        # Incrémenter le compteur
-        new_count = current + 1
-        cache.set(cache_key, new_count, timeout=window_seconds)
+        Args:
+            limits: Limites à appliquer à la requête
 
-        remaining = max_requests - new_count
-        return True, remaining
+        Returns:
+            RateLimitResult: décision, requêtes restantes et délai avant nouvel essai
+        """
+        return SlidingWindowRateLimiter.hit(limits)
 
     @staticmethod
     def reset_rate_limit(key: str) -> None:
@@ -239,35 +241,54 @@ class RateLimitService:
         Args:
             key: Clé à réinitialiser
         """
-        cache_key = f"rate_limit:{key}"
-        cache.delete(cache_key)
+        SlidingWindowRateLimiter.reset(key)
 
 
 class AttackDetectionService:
-    """Service pour détecter les tentatives d'attaque."""
+    """Service pour détecter les tentatives d'attaque.
+
+    Tous les motifs sont compilés une fois dans une seule expression
+    (un groupe nommé par type d'attaque) : une valeur est parcourue une
+    seule fois. Les écarts entre mots-clés sont bornés pour éviter les
+    retours arrière quadratiques des ``.*`` sur les gros corps JSON.
+    """
+
+    ATTACK_SQL_INJECTION = "sql_injection"
+    ATTACK_XSS = "xss"
 
     # Patterns pour détecter les injections SQL
     SQL_INJECTION_PATTERNS = [
-        r"(\bUNION\b.*\bSELECT\b)",
-        r"(\bSELECT\b.*\bFROM\b.*\bWHERE\b)",
-        r"(\bDROP\b.*\bTABLE\b)",
-        r"(\bINSERT\b.*\bINTO\b)",
-        r"(\/\*|\*\/)",
-        r"(\bOR\b\s+\d+\s*=\s*\d+)",
-        r"(\bAND\b\s+\d+\s*=\s*\d+)",
-        r"('.*OR.*'.*=.*')",
+        r"\bunion\b.{0,100}?\bselect\b",
+        r"\bselect\b.{0,100}?\bfrom\b.{0,100}?\bwhere\b",
+        r"\bdrop\b.{0,100}?\btable\b",
+        r"\binsert\b.{0,100}?\binto\b",
+        r"/\*|\*/",
+        r"\bor\b\s+\d+\s*=\s*\d+",
+        r"\band\b\s+\d+\s*=\s*\d+",
+        r"'[^']{0,100}\bor\b[^']{0,100}'[^=]{0,100}=[^']{0,100}'",
     ]
 
     # Patterns pour détecter les XSS
     XSS_PATTERNS = [
-        r"<script[^>]*>.*?</script>",
+        r"<script\b",
         r"javascript:",
-        r"on\w+\s*=",
+        r"\bon[a-z]{3,}\s*=",
         r"<iframe",
         r"<object",
         r"<embed",
     ]
 
+    # Longueur max d'une correspondance : recouvrement entre deux blocs d'un flux
+    MAX_MATCH_LENGTH = 512
+
+    SQL_INJECTION_RE = re.compile("|".join(SQL_INJECTION_PATTERNS), re.IGNORECASE)
+    XSS_RE = re.compile("|".join(XSS_PATTERNS), re.IGNORECASE)
+    ATTACK_RE = re.compile(
+        f"(?P<{ATTACK_SQL_INJECTION}>{'|'.join(SQL_INJECTION_PATTERNS)})"
+        f"|(?P<{ATTACK_XSS}>{'|'.join(XSS_PATTERNS)})",
+        re.IGNORECASE,
+    )
+
     @staticmethod
     def detect_sql_injection(input_string: str) -> bool:
         """Détecte les tentatives d'injection SQL.
@@ -280,14 +301,7 @@ class AttackDetectionService:
         """
         if not input_string:
             return False
-
-        input_lower = input_string.lower()
-
-        for pattern in AttackDetectionService.SQL_INJECTION_PATTERNS:
-            if re.search(pattern, input_lower, re.IGNORECASE):
-                return True
-
-        return False
+        return AttackDetectionService.SQL_INJECTION_RE.search(input_string) is not None
 
     @staticmethod
     def detect_xss(input_string: str) -> bool:
@@ -301,12 +315,55 @@ class AttackDetectionService:
         """
         if not input_string:
             return False
+        return AttackDetectionService.XSS_RE.search(input_string) is not None
 
-        for pattern in AttackDetectionService.XSS_PATTERNS:
-            if re.search(pattern, input_string, re.IGNORECASE):
-                return True
+    @staticmethod
+    def scan(input_string: str) -> str | None:
+        """Recherche tous les types d'attaque en une passe.
 
-        return False
+        Args:
+            input_string: Chaîne à analyser
+
+        Returns:
+            str | None: type d'attaque détecté (ATTACK_*), ou None
+        """
+        if not input_string:
+            return None
+        match = AttackDetectionService.ATTACK_RE.search(input_string)
+        return match.lastgroup if match else None
+
+    @staticmethod
+    def scan_stream(chunks: Iterable[bytes], max_bytes: int) -> tuple[str, str] | None:
+        """Analyse un flux d'octets (UTF-8) bloc par bloc, sans dépasser ``max_bytes``.
+
+        Les blocs se recouvrent de ``MAX_MATCH_LENGTH`` caractères pour ne pas
+        manquer une attaque à cheval sur deux blocs.
+
+        Args:
+            chunks: Blocs d'octets successifs
+            max_bytes: Nombre maximal d'octets analysés
+
+        Returns:
+            tuple | None: (type d'attaque, extrait) si une attaque est détectée
+        """
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        overlap = AttackDetectionService.MAX_MATCH_LENGTH
+        tail = ""
+        scanned = 0
+
+        for chunk in chunks:
+            if scanned >= max_bytes:
+                break
+            chunk = chunk[: max_bytes - scanned]
+            scanned += len(chunk)
+
+            text = tail + decoder.decode(bytes(chunk))
+            match = AttackDetectionService.ATTACK_RE.search(text)
+            if match:
+                return match.lastgroup, text[match.start():match.start() + 100]
+            tail = text[-overlap:]
+
+        return None
 
     @staticmethod
     def sanitize_input(input_string: str) -> str:
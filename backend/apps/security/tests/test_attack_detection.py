@@ -0,0 +1,95 @@
+"""Tests pour la détection d'attaques en une passe."""
+
+import json
+import time
+
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from apps.security.middleware import AttackDetectionMiddleware
+from apps.security.models import SecurityEvent
+from apps.security.services import AttackDetectionService
+
+
+class TestAttackDetectionService:
+    """Tests pour AttackDetectionService."""
+
+    @pytest.mark.parametrize(
+        ("value", "expected"),
+        [
+            ("admin' OR '1'='1", AttackDetectionService.ATTACK_SQL_INJECTION),
+            ("1 UNION ALL SELECT password FROM users", AttackDetectionService.ATTACK_SQL_INJECTION),
+            ("x; DROP TABLE tickets", AttackDetectionService.ATTACK_SQL_INJECTION),
+            ("<script>alert(1)</script>", AttackDetectionService.ATTACK_XSS),
+            ('" onfocus=alert(1)', AttackDetectionService.ATTACK_XSS),
+            ("javascript:alert(1)", AttackDetectionService.ATTACK_XSS),
+            ("Bonjour, l'agence ouvre à 8h", None),
+            ("description=guichet 2", None),
+        ],
+    )
+    def test_scan(self, value, expected):
+        """Test la détection combinée et l'absence de faux positifs courants."""
+        assert AttackDetectionService.scan(value) == expected
+
+    def test_stream_detects_attack_across_chunks(self):
+        """Test qu'une attaque à cheval sur deux blocs est détectée."""
+        body = b'{"note": "' + b"a" * 1000 + b'<scr'
+        chunks = [body, b'ipt>alert(1)</script>"}']
+
+        assert AttackDetectionService.scan_stream(chunks, max_bytes=10_000)[0] == AttackDetectionService.ATTACK_XSS
+
+    def test_stream_stops_at_size_cap(self):
+        """Test que les octets au-delà du plafond ne sont pas analysés."""
+        chunks = [b"a" * 1024, b"<script>"]
+
+        assert AttackDetectionService.scan_stream(chunks, max_bytes=1024) is None
+
+    def test_no_catastrophic_backtracking(self):
+        """Test qu'un gros corps piège pour les motifs '.*' reste rapide."""
+        value = "union insert select from drop ' or " * 30_000
+
+        start = time.perf_counter()
+        AttackDetectionService.scan(value)
+
+        assert time.perf_counter() - start < 1
+
+
+@pytest.mark.django_db
+class TestAttackDetectionMiddleware:
+    """Tests pour AttackDetectionMiddleware."""
+
+    @pytest.fixture
+    def middleware(self):
+        return AttackDetectionMiddleware(lambda request: HttpResponse())
+
+    def _post(self, middleware, data, content_type):
+        request = RequestFactory().post("/api/v1/tenants/acme/tickets/", data=data, content_type=content_type)
+        request.user = AnonymousUser()
+        return middleware(request)
+
+    def test_json_body_attack_is_blocked(self, middleware):
+        """Test le blocage d'une injection dans un corps JSON."""
+        response = self._post(middleware, json.dumps({"notes": "1' OR '1'='1"}), "application/json")
+
+        assert response.status_code == 400
+        assert SecurityEvent.objects.filter(event_type=SecurityEvent.EVENT_SQL_INJECTION_ATTEMPT).exists()
+
+    def test_binary_content_is_skipped(self, middleware):
+        """Test qu'un contenu binaire n'est pas analysé."""
+        assert self._post(middleware, b"<script>", "application/octet-stream").status_code == 200
+
+    def test_multipart_scans_fields_not_files(self, middleware):
+        """Test que les champs d'un formulaire sont analysés, pas les fichiers."""
+        request = RequestFactory().post(
+            "/api/v1/tenants/acme/uploads/",
+            data={"file": SimpleUploadedFile("page.html", b"<script>ok</script>"), "name": "logo"},
+        )
+        request.user = AnonymousUser()
+        assert middleware(request).status_code == 200
+
+        request = RequestFactory().post("/api/v1/tenants/acme/uploads/", data={"name": "<iframe src=x>"})
+        request.user = AnonymousUser()
+        assert middleware(request).status_code == 400
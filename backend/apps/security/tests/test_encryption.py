@@ -0,0 +1,120 @@
+"""Tests pour le service de chiffrement (clés mémorisées, rotation, API groupée)."""
+
+import pytest
+from cryptography.fernet import Fernet
+from django.db import models
+from model_bakery import baker
+
+from apps.security.encryption import EncryptedTextField, EncryptionService, _build_keyring, _derive_key
+from apps.security.oauth_models import OAuthConnection
+
+
+class EncryptedNote(models.Model):
+    body = EncryptedTextField(blank=True)
+
+    class Meta:
+        app_label = "security"
+        managed = False
+
+
+def _load(token):
+    """Instance telle que chargée par un queryset (convertisseur du champ appliqué)."""
+    field = EncryptedNote._meta.get_field("body")
+    return EncryptedNote.from_db("default", ["id", "body"], [1, field.from_db_value(token, None, None)])
+
+
+class TestEncryptionService:
+    """Tests pour EncryptionService."""
+
+    def test_key_derived_once(self):
+        """Test que PBKDF2 ne tourne qu'une fois pour de nombreux appels."""
+        _build_keyring.cache_clear()
+        _derive_key.cache_clear()
+
+        tokens = [EncryptionService.encrypt(f"secret-{index}") for index in range(20)]
+        assert [EncryptionService.decrypt(token) for token in tokens] == [f"secret-{index}" for index in range(20)]
+
+        assert _derive_key.cache_info().misses == 1
+
+    def test_versioned_token_and_legacy_format(self):
+        """Test le préfixe d'identifiant de clé et la lecture des jetons historiques."""
+        token = EncryptionService.encrypt("hello")
+        assert token.startswith("v1:gAAAAA")
+        assert EncryptionService.is_encrypted(token)
+
+        legacy = Fernet(EncryptionService._get_encryption_key()).encrypt(b"ancien").decode()
+        assert EncryptionService.is_encrypted(legacy)
+        assert EncryptionService.decrypt(legacy) == "ancien"
+
+    def test_rotation(self, settings):
+        """Test qu'une ancienne clé déchiffre encore et que rotate passe à la nouvelle."""
+        settings.ENCRYPTION_KEYS = ["2024=ancien-secret"]
+        old_token = EncryptionService.encrypt("totp")
+
+        settings.ENCRYPTION_KEYS = ["2025=nouveau-secret", "2024=ancien-secret"]
+        assert EncryptionService.decrypt(old_token) == "totp"
+        assert EncryptionService.needs_rotation(old_token)
+
+        rotated = EncryptionService.rotate(old_token)
+        assert rotated.startswith("2025:")
+        assert not EncryptionService.needs_rotation(rotated)
+        assert EncryptionService.decrypt(rotated) == "totp"
+
+        settings.ENCRYPTION_KEYS = ["2025=nouveau-secret"]
+        with pytest.raises(ValueError):
+            EncryptionService.decrypt(old_token)
+
+    def test_bulk_api(self):
+        """Test encrypt_many / decrypt_many, valeurs vides et invalides."""
+        tokens = EncryptionService.encrypt_many(["a", "b", "c"])
+
+        assert EncryptionService.decrypt_many(tokens + ["", None]) == ["a", "b", "c", "", None]
+        assert EncryptionService.decrypt_many(["v1:gAAAAAinvalide"], default="") == [""]
+        with pytest.raises(ValueError):
+            EncryptionService.decrypt_many(["v1:gAAAAAinvalide"])
+
+
+class TestEncryptedTextField:
+    """Tests pour EncryptedTextField."""
+
+    def test_lazy_decryption(self):
+        """Test que la valeur lue en base n'est déchiffrée qu'à l'accès."""
+        token = EncryptionService.encrypt("confidentiel")
+        note = _load(token)
+
+        assert note.__dict__["body"] == token
+        assert note.body == "confidentiel"
+        assert note.__dict__["body"] == "confidentiel"
+
+    def test_prep_value(self):
+        """Test le chiffrement à l'enregistrement, sans rechiffrer une valeur non lue."""
+        field = EncryptedNote._meta.get_field("body")
+        token = EncryptionService.encrypt("x")
+        untouched = _load(token)
+
+        assert field.get_prep_value(field.pre_save(untouched, add=False)) == token
+        assert EncryptionService.decrypt(field.get_prep_value("en clair")) == "en clair"
+        assert field.get_prep_value("") == ""
+
+    def test_undecryptable_value_is_kept_on_save(self, settings):
+        """Test qu'une valeur indéchiffrable (clé retirée) n'est pas écrasée à l'enregistrement."""
+        settings.ENCRYPTION_KEYS = ["2024=ancien-secret"]
+        token = EncryptionService.encrypt("totp")
+        settings.ENCRYPTION_KEYS = ["2025=nouveau-secret"]
+        field = EncryptedNote._meta.get_field("body")
+        note = _load(token)
+
+        assert note.body == ""
+        assert field.get_prep_value(field.pre_save(note, add=False)) == token
+
+
+@pytest.mark.django_db
+class TestOAuthConnectionEncryption:
+    """Tests pour le chiffrement des tokens OAuth."""
+
+    def test_tokens_not_encrypted_twice(self, user):
+        """Test qu'un token déjà chiffré (préfixé) n'est pas rechiffré."""
+        connection = baker.make(OAuthConnection, user=user, access_token="tok", refresh_token="")
+        connection.save()
+
+        assert connection.get_decrypted_access_token() == "tok"
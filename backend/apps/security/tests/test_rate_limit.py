@@ -0,0 +1,136 @@
+"""Tests pour le rate limiting à fenêtre glissante."""
+
+import uuid
+
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse
+from django.test import RequestFactory
+from freezegun import freeze_time
+from model_bakery import baker
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory, force_authenticate
+from rest_framework.views import APIView
+
+from apps.security.middleware import RateLimitMiddleware
+from apps.security.rate_limit import (
+    LocalSlidingWindow,
+    RateLimit,
+    SlidingWindowRateLimiter,
+)
+from apps.security.services import RateLimitService
+from apps.security.throttling import MemberRateThrottle
+from apps.users.models import User
+
+
+@pytest.fixture(autouse=True)
+def local_limiter(monkeypatch):
+    limiter = LocalSlidingWindow()
+    monkeypatch.setattr(SlidingWindowRateLimiter, "_local", limiter)
+    return limiter
+
+
+class TestLocalSlidingWindow:
+    """Tests pour le limiteur en mémoire (repli sans Redis)."""
+
+    def test_blocks_after_limit(self):
+        """Test le refus au-delà de la limite puis la réouverture progressive."""
+        with freeze_time("2025-01-01 10:00:00") as frozen:
+            results = [RateLimitService.check_rate_limit("login:1.2.3.4", 3, 60) for _ in range(4)]
+            assert results == [(True, 2), (True, 1), (True, 0), (False, 0)]
+
+            # Fenêtre suivante, à mi-parcours : la moitié de la précédente compte encore
+            frozen.tick(90)
+            assert RateLimitService.check_rate_limit("login:1.2.3.4", 3, 60) == (True, 0)
+            assert RateLimitService.check_rate_limit("login:1.2.3.4", 3, 60)[0] is False
+
+    def test_denied_request_consumes_no_limit(self):
+        """Test qu'une requête refusée ne décompte sur aucune des limites."""
+        ip_limit = RateLimit("api:ip:1.2.3.4", 1, 60)
+        user_limit = RateLimit("api:user:42", 5, 60)
+
+        assert RateLimitService.check_limits([ip_limit, user_limit]).allowed
+        denied = RateLimitService.check_limits([ip_limit, user_limit])
+
+        assert not denied.allowed
+        assert denied.retry_after > 0
+        assert RateLimitService.check_limits([user_limit]).remaining == 3
+
+    def test_reset(self):
+        """Test la réinitialisation d'une clé."""
+        RateLimitService.check_rate_limit("login_failures:1.2.3.4", 1, 900)
+        RateLimitService.reset_rate_limit("login_failures:1.2.3.4")
+
+        assert RateLimitService.check_rate_limit("login_failures:1.2.3.4", 1, 900)[0] is True
+
+
+@pytest.mark.django_db
+class TestRateLimitMiddleware:
+    """Tests pour RateLimitMiddleware."""
+
+    def _call(self, middleware, path, **extra):
+        request = RequestFactory().get(path, REMOTE_ADDR="10.0.0.1", **extra)
+        request.user = AnonymousUser()
+        return middleware(request)
+
+    def test_ids_in_path_share_route_bucket(self, monkeypatch):
+        """Test que chaque UUID de ticket n'obtient pas son propre compteur."""
+        monkeypatch.setattr(RateLimitMiddleware, "RATE_LIMIT_CONFIG", {"/api/": {"group": "api", "ip": (2, 60)}})
+        middleware = RateLimitMiddleware(lambda request: HttpResponse())
+
+        responses = [
+            self._call(middleware, f"/api/v1/tenants/acme/tickets/{uuid.uuid4()}/") for _ in range(3)
+        ]
+
+        assert [response.status_code for response in responses] == [200, 200, 429]
+        assert responses[-1]["Retry-After"]
+        # Une autre route garde son propre compteur IP
+        assert self._call(middleware, "/api/v1/tenants/acme/queues/").status_code == 200
+
+    def test_anonymous_requests_never_consume_tenant_budget(self, monkeypatch):
+        """Test qu'un client anonyme ne peut pas épuiser le budget d'un tenant (chemin ou en-tête)."""
+        monkeypatch.setattr(RateLimitMiddleware, "RATE_LIMIT_CONFIG", {"/api/": {"group": "api", "ip": (100, 60)}})
+        middleware = RateLimitMiddleware(lambda request: HttpResponse())
+        for index in range(5):
+            self._call(middleware, f"/api/v1/tenants/victim/{index}x/", HTTP_X_TENANT="victim")
+
+        assert RateLimitService.check_limits([RateLimit("api:tenant:victim", 1, 60)]).remaining == 0
+
+
+class _PingView(APIView):
+    throttle_classes = [MemberRateThrottle]
+
+    def get(self, request):
+        return Response({"ok": True})
+
+
+@pytest.mark.django_db
+class TestMemberRateThrottle:
+    """Tests pour MemberRateThrottle (limites utilisateur et tenant après authentification)."""
+
+    def _get(self, user, tenant):
+        request = APIRequestFactory().get("/ping/")
+        request.tenant = tenant
+        force_authenticate(request, user=user)
+        return _PingView.as_view()(request)
+
+    def test_tenant_limit_counts_members_only(self, monkeypatch, tenant, admin_membership, agent_membership):
+        """Test la limite par tenant résolu, partagée par ses membres, sans compter les non-membres."""
+        monkeypatch.setattr(MemberRateThrottle, "TENANT_LIMIT", (2, 60))
+        outsider = baker.make(User, email="outsider@example.com")
+
+        assert self._get(outsider, tenant).status_code == 200
+        assert self._get(outsider, tenant).status_code == 200
+        assert self._get(admin_membership.user, tenant).status_code == 200
+        assert self._get(agent_membership.user, tenant).status_code == 200
+        response = self._get(admin_membership.user, tenant)
+
+        assert response.status_code == 429
+        assert response["Retry-After"]
+
+    def test_user_limit(self, monkeypatch, user):
+        """Test la limite par utilisateur authentifié, sans tenant."""
+        monkeypatch.setattr(MemberRateThrottle, "USER_LIMIT", (1, 60))
+
+        assert self._get(user, None).status_code == 200
+        assert self._get(user, None).status_code == 429
@@ -0,0 +1,45 @@
+"""Limitation de débit par utilisateur et par tenant (throttle DRF).
+
+Appliquée par DRF après l'authentification et les permissions : l'utilisateur
+est celui authentifié par la vue (JWT, session, jeton) et le tenant celui
+résolu par ``TenantMiddleware``, compté seulement si l'utilisateur en est
+membre actif. Aucune clé ne provient d'un en-tête ou d'un chemin fournis par
+un client anonyme ; la limite par IP reste dans ``RateLimitMiddleware``.
+"""
+
+from __future__ import annotations
+
+from rest_framework.throttling import BaseThrottle
+
+from apps.tenants.cache import TenantCache
+
+from .rate_limit import RateLimit
+from .services import RateLimitService
+
+
+class MemberRateThrottle(BaseThrottle):
+    """Limites par utilisateur et par tenant, vérifiées en un seul aller-retour."""
+
+    # (requêtes, fenêtre en secondes)
+    USER_LIMIT = (300, 60)
+    TENANT_LIMIT = (6000, 60)
+
+    def __init__(self):
+        self.retry_after = 0
+
+    def allow_request(self, request, view) -> bool:
+        user = request.user
+        if not (user and user.is_authenticated) or user.is_superuser:
+            return True
+
+        limits = [RateLimit(f"api:user:{user.pk}", *self.USER_LIMIT)]
+        tenant = getattr(request, "tenant", None)
+        if tenant is not None and TenantCache.get_membership_role(tenant, user) is not None:
+            limits.append(RateLimit(f"api:tenant:{tenant.pk}", *self.TENANT_LIMIT))
+
+        result = RateLimitService.check_limits(limits)
+        self.retry_after = result.retry_after
+        return result.allowed
+
+    def wait(self) -> float | None:
+        return max(self.retry_after, 1)
@@ -11,6 +11,7 @@ from rest_framework.decorators import action
 from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 
+from apps.core.pagination import KeysetPagination
 from apps.users.two_factor import BackupCodesService, SMSTwoFactorService, TOTPService
 
 from .models import BlockedIP, PasswordPolicy, SecurityAlert, SecurityEvent
@@ -36,6 +37,7 @@ class SecurityEventViewSet(viewsets.ReadOnlyModelViewSet):
     search_fields = ["user_email", "ip_address", "description"]
     ordering_fields = ["created_at", "severity"]
     ordering = ["-created_at"]
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         """Retourne les événements de sécurité."""
@@ -3,7 +3,6 @@
 from __future__ import annotations
 
 from datetime import date, datetime, timedelta
-from calendar import monthrange
 
 try:
     import psutil
@@ -20,6 +19,9 @@ from rest_framework.decorators import action
 from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 
+from apps.core.db_router import replica_reads
+from apps.core.pagination import KeysetPagination
+
 from .admin_serializers import (
     CreateTenantSerializer,
     InvoiceAdminSerializer,
@@ -30,6 +32,7 @@ from .admin_serializers import (
     TransactionAdminSerializer,
 )
 from .models import Invoice, Subscription, SubscriptionPlan, Tenant, TenantMembership, Transaction
+from .platform_kpis import DEFAULT_WAIT_RANGE, WAIT_RANGES, PlatformKpiSnapshot
 
 User = get_user_model()
 
@@ -163,39 +166,32 @@ class TenantAdminViewSet(viewsets.ModelViewSet):
         return Response(TenantAdminSerializer(tenant).data)
 
     @action(detail=False, methods=["get"])
+    @replica_reads
     def stats(self, request):
-        """Statistiques globales de tous les tenants."""
-        tenants = Tenant.objects.all()
-        active_tenants = tenants.filter(is_active=True)
-
-        # Importer ici pour éviter les imports circulaires
-        from apps.queues.models import Queue, QueueAssignment
-        from apps.tickets.models import Ticket
+        """Statistiques globales de tous les tenants (instantané KPI plateforme)."""
+        live = PlatformKpiSnapshot.get()["live"]
 
         return Response(
             {
-                "total_organizations": tenants.count(),
-                "active_organizations": active_tenants.count(),
-                "trial_organizations": Subscription.objects.filter(status=Subscription.STATUS_TRIAL).count(),
-                "suspended_organizations": tenants.filter(is_active=False).count(),
-                "total_agents": QueueAssignment.objects.filter(is_active=True)
-                .values("agent")
-                .distinct()
-                .count(),
-                "total_sites": 0,  # TODO: compter les sites quand le modèle Site sera lié au tenant
-                "total_tickets_this_month": Ticket.objects.filter(
-                    created_at__month=date.today().month, created_at__year=date.today().year
-                ).count(),
+                "total_organizations": live["total_organizations"],
+                "active_organizations": live["active_organizations"],
+                "trial_organizations": live["trial_organizations"],
+                "suspended_organizations": live["suspended_organizations"],
+                "total_agents": live["total_agents"],
+                "total_sites": live["total_sites"],
+                "total_tickets_this_month": live["tickets_month"],
             }
         )
 
     @action(detail=True, methods=["get"], url_path="stats")
+    @replica_reads
     def tenant_stats(self, request, slug=None):
         """Statistiques détaillées d'un tenant spécifique."""
         tenant = self.get_object()
 
         # Importer ici pour éviter les imports circulaires
         from apps.queues.models import Queue, QueueAssignment
+        from apps.tickets.archive import TicketArchive
         from apps.tickets.models import Ticket
 
         return Response(
@@ -209,7 +205,7 @@ class TenantAdminViewSet(viewsets.ModelViewSet):
                 .values("agent")
                 .distinct()
                 .count(),
-                "tickets_total": Ticket.objects.filter(queue__tenant=tenant).count(),
+                "tickets_total": TicketArchive.count(queue__tenant=tenant),
                 "tickets_pending": Ticket.objects.filter(
                     queue__tenant=tenant, status=Ticket.STATUS_WAITING
                 ).count(),
@@ -222,167 +218,41 @@ class TenantAdminViewSet(viewsets.ModelViewSet):
         )
 
     @action(detail=False, methods=["get"], url_path="analytics")
+    @replica_reads
     def analytics(self, request):
-        """Analytics détaillées de la plateforme pour le super-admin."""
-        # Importer ici pour éviter les imports circulaires
-        from apps.queues.models import Queue, QueueAssignment
-        from apps.tickets.models import Ticket
+        """Analytics détaillées de la plateforme pour le super-admin (instantané KPI plateforme)."""
+        # Période du temps d'attente moyen : 7d, 30d (défaut), 90d ou 1y
+        time_range = request.query_params.get("time_range", DEFAULT_WAIT_RANGE)
+        if time_range not in WAIT_RANGES:
+            time_range = DEFAULT_WAIT_RANGE
 
-        # Récupérer les paramètres de filtre
-        time_range = request.query_params.get("time_range", "30d")
-        
-        # Calculer la date de début selon le time_range
-        if time_range == "7d":
-            start_date = date.today() - timedelta(days=7)
-        elif time_range == "90d":
-            start_date = date.today() - timedelta(days=90)
-        elif time_range == "1y":
-            start_date = date.today() - timedelta(days=365)
-        else:  # 30d par défaut
-            start_date = date.today() - timedelta(days=30)
-
-        tenants = Tenant.objects.all()
-        active_tenants = tenants.filter(is_active=True)
-        total_orgs = tenants.count()
-        active_orgs = active_tenants.count()
-
-        # Statistiques principales
-        total_users = User.objects.filter(tenant_memberships__tenant__isnull=False).distinct().count()
-        total_agents = QueueAssignment.objects.filter(is_active=True).values("agent").distinct().count()
-        
-        # Compter les sites (si la relation existe)
-        total_sites = 0
-        try:
-            from apps.sites.models import Site
-            total_sites = Site.objects.count()
-        except (ImportError, Exception):
-            # Modèle Site pas encore implémenté
-            total_sites = 0
-        
-        # Tickets
-        tickets_today = Ticket.objects.filter(created_at__date=date.today()).count()
-        tickets_month = Ticket.objects.filter(
-            created_at__month=date.today().month,
-            created_at__year=date.today().year
-        ).count()
-        
-        # Temps d'attente moyen (en minutes)
-        # On prend les tickets appelés, en service ou clos
-        completed_tickets = Ticket.objects.filter(
-            status__in=[Ticket.STATUS_CALLED, Ticket.STATUS_IN_SERVICE, Ticket.STATUS_CLOSED],
-            called_at__isnull=False,
-            created_at__gte=start_date
-        )
-        
-        wait_times = []
-        for ticket in completed_tickets:
-            if ticket.called_at and ticket.created_at:
-                wait_time = (ticket.called_at - ticket.created_at).total_seconds() / 60
-                wait_times.append(wait_time)
-        
-        avg_wait_time_minutes = sum(wait_times) / len(wait_times) if wait_times else 0
-
-        # Revenus
-        active_subscriptions = Subscription.objects.filter(status=Subscription.STATUS_ACTIVE)
-        revenue_month = sum(
-            float(sub.monthly_price / 100) for sub in active_subscriptions
-        )
-        
-        # Calculer la croissance (mois précédent)
-        today = date.today()
-        # Soustraire environ 30 jours pour le mois précédent
-        if today.month == 1:
-            previous_month_date = date(today.year - 1, 12, 1)
-        else:
-            previous_month_date = date(today.year, today.month - 1, 1)
-        
-        previous_month_subs = Subscription.objects.filter(
-            status=Subscription.STATUS_ACTIVE,
-            starts_at__lte=previous_month_date
-        )
-        previous_revenue = sum(
-            float(sub.monthly_price / 100) for sub in previous_month_subs
-        )
+        snapshot = PlatformKpiSnapshot.get()
+        daily, live = snapshot["daily"], snapshot["live"]
+
+        revenue_month = live["mrr"]
+        previous_revenue = daily["previous_revenue"]
         revenue_growth = (
             ((revenue_month - previous_revenue) / previous_revenue * 100)
             if previous_revenue > 0 else 0
         )
 
-        # Croissance des organisations (7 derniers mois)
-        organization_growth = []
-        for i in range(6, -1, -1):
-            # Calculer le mois
-            months_ago = i
-            year = today.year
-            month = today.month - months_ago
-            
-            while month <= 0:
-                month += 12
-                year -= 1
-            
-            # Dernier jour du mois
-            last_day = monthrange(year, month)[1]
-            month_date = date(year, month, min(today.day, last_day))
-            
-            count = tenants.filter(created_at__lte=month_date).count()
-            month_name = month_date.strftime("%b")
-            organization_growth.append({
-                "month": month_name,
-                "count": count
-            })
-
-        # Top 5 organisations par tickets
-        top_organizations = []
-        for tenant in tenants[:20]:  # Limiter pour la performance
-            tickets_count = Ticket.objects.filter(queue__tenant=tenant).count()
-            if tickets_count > 0:
-                # Calculer le revenu
-                subscription = Subscription.objects.filter(tenant=tenant).first()
-                revenue = float(subscription.monthly_price / 100) if subscription else 0
-                
-                # Calculer la croissance (simulée)
-                previous_tickets = Ticket.objects.filter(
-                    queue__tenant=tenant,
-                    created_at__month=previous_month_date.month,
-                    created_at__year=previous_month_date.year
-                ).count()
-                current_tickets = Ticket.objects.filter(
-                    queue__tenant=tenant,
-                    created_at__month=date.today().month,
-                    created_at__year=date.today().year
-                ).count()
-                growth = (
-                    ((current_tickets - previous_tickets) / previous_tickets * 100)
-                    if previous_tickets > 0 else 0
-                )
-                
-                top_organizations.append({
-                    "name": tenant.name,
-                    "tickets_count": tickets_count,
-                    "revenue": revenue,
-                    "growth": round(growth, 1)
-                })
-        
-        # Trier et prendre le top 5
-        top_organizations.sort(key=lambda x: x["tickets_count"], reverse=True)
-        top_organizations = top_organizations[:5]
-
         return Response({
             # Stats principales
-            "total_organizations": total_orgs,
-            "active_organizations": active_orgs,
-            "total_users": total_users,
-            "total_agents": total_agents,
-            "total_sites": total_sites,
-            "total_tickets_today": tickets_today,
-            "total_tickets_month": tickets_month,
-            "avg_wait_time_minutes": round(avg_wait_time_minutes, 1),
+            "total_organizations": live["total_organizations"],
+            "active_organizations": live["active_organizations"],
+            "total_users": live["total_users"],
+            "total_agents": live["total_agents"],
+            "total_sites": live["total_sites"],
+            "total_tickets_today": live["tickets_today"],
+            "total_tickets_month": live["tickets_month"],
+            "avg_wait_time_minutes": live["avg_wait_time_minutes"][time_range],
             "revenue_month": revenue_month,
             "revenue_growth": round(revenue_growth, 1),
-            
+
             # Données pour les graphiques
-            "organization_growth": organization_growth,
-            "top_organizations": top_organizations,
+            "organization_growth": daily["organization_growth"],
+            "top_organizations": live["top_organizations"],
+            "generated_at": snapshot["refreshed_at"],
         })
 
     def _get_plan_limit(self, plan: str, resource: str) -> int:
@@ -406,93 +276,28 @@ class TenantAdminViewSet(viewsets.ModelViewSet):
         return prices.get(plan, 0)
 
     @action(detail=False, methods=["get"], url_path="dashboard")
+    @replica_reads
     def dashboard(self, request):
-        """Dashboard complet pour le super-admin."""
-        from apps.queues.models import QueueAssignment
-        from apps.tickets.models import Ticket
-        
-        today = date.today()
-        tenants = Tenant.objects.all()
-        active_tenants = tenants.filter(is_active=True)
-        
+        """Dashboard complet pour le super-admin (instantané KPI plateforme)."""
+        snapshot = PlatformKpiSnapshot.get()
+        daily, live = snapshot["daily"], snapshot["live"]
+
         # MRR et growth
-        active_subscriptions = Subscription.objects.filter(status=Subscription.STATUS_ACTIVE)
-        mrr = sum(float(sub.monthly_price / 100) for sub in active_subscriptions)
-        
-        # Croissance MRR
-        if today.month == 1:
-            previous_month_date = date(today.year - 1, 12, 1)
-        else:
-            previous_month_date = date(today.year, today.month - 1, 1)
-            
-        previous_month_subs = Subscription.objects.filter(
-            status=Subscription.STATUS_ACTIVE,
-            starts_at__lte=previous_month_date
-        )
-        previous_mrr = sum(float(sub.monthly_price / 100) for sub in previous_month_subs)
+        mrr = live["mrr"]
+        previous_mrr = daily["previous_revenue"]
         mrr_growth = ((mrr - previous_mrr) / previous_mrr * 100) if previous_mrr > 0 else 0
-        
-        # Organisations
-        total_orgs = tenants.count()
-        active_orgs = active_tenants.count()
-        orgs_this_month = tenants.filter(
-            created_at__month=today.month,
-            created_at__year=today.year
-        ).count()
-        
-        # Utilisateurs
-        total_users = User.objects.filter(tenant_memberships__tenant__isnull=False).distinct().count()
-        total_agents = QueueAssignment.objects.filter(is_active=True).values("agent").distinct().count()
-        
-        # Churn rate (organisations désactivées ce mois)
-        churned_this_month = tenants.filter(
-            is_active=False,
-            suspended_at__month=today.month,
-            suspended_at__year=today.year
-        ).count()
-        churn_rate = (churned_this_month / total_orgs * 100) if total_orgs > 0 else 0
-        
-        # Churn mois précédent
-        previous_churned = tenants.filter(
-            is_active=False,
-            suspended_at__month=previous_month_date.month,
-            suspended_at__year=previous_month_date.year
-        ).count()
-        previous_churn_rate = (previous_churned / total_orgs * 100) if total_orgs > 0 else 0
+
+        # Churn rate (organisations désactivées ce mois / mois précédent)
+        total_orgs = live["total_organizations"]
+        churn_rate = (live["churned_this_month"] / total_orgs * 100) if total_orgs > 0 else 0
+        previous_churn_rate = (daily["previous_churned"] / total_orgs * 100) if total_orgs > 0 else 0
         churn_growth = churn_rate - previous_churn_rate
-        
-        # Tickets
-        tickets_today = Ticket.objects.filter(created_at__date=today).count()
-        tickets_month = Ticket.objects.filter(
-            created_at__month=today.month,
-            created_at__year=today.year
-        ).count()
-        
-        # Temps d'attente moyen
-        start_date = today - timedelta(days=30)
-        completed_tickets = Ticket.objects.filter(
-            status__in=[Ticket.STATUS_CALLED, Ticket.STATUS_IN_SERVICE, Ticket.STATUS_CLOSED],
-            called_at__isnull=False,
-            created_at__gte=start_date
-        )
-        
-        wait_times = []
-        for ticket in completed_tickets:
-            if ticket.called_at and ticket.created_at:
-                wait_time = (ticket.called_at - ticket.created_at).total_seconds() / 60
-                wait_times.append(wait_time)
-        
-        avg_wait_time = sum(wait_times) / len(wait_times) if wait_times else 0
-        
+
         # Alertes
         alerts = []
-        
+
         # Trials expirant bientôt
-        trial_expiring = Subscription.objects.filter(
-            status=Subscription.STATUS_TRIAL,
-            trial_ends_at__lte=today + timedelta(days=7),
-            trial_ends_at__gte=today
-        ).count()
+        trial_expiring = live["trial_expiring"]
         if trial_expiring > 0:
             alerts.append({
                 "id": "trial_expiring",
@@ -502,49 +307,39 @@ class TenantAdminViewSet(viewsets.ModelViewSet):
                 "action": "Voir les organisations",
                 "link": "/superadmin/organizations?filter=trial_expiring"
             })
-        
-        # Organisations proches des limites
-        # Compter les sites pour chaque tenant si le modèle Site existe
-        orgs_near_limits = []
-        try:
-            from apps.sites.models import Site
-            for tenant in tenants:
-                sites_count = Site.objects.filter(tenant=tenant).count()
-                if sites_count >= tenant.max_sites * 0.8:
-                    orgs_near_limits.append(tenant)
-        except (ImportError, Exception):
-            # Site model pas encore implémenté, skip cette alerte
-            pass
-        
-        if len(orgs_near_limits) > 0:
+
+        # Organisations proches des limites de sites
+        orgs_near_limits = live["orgs_near_limits"]
+        if orgs_near_limits > 0:
             alerts.append({
                 "id": "near_limits",
-                "title": f"{len(orgs_near_limits)} Orgs approchent des limites",
+                "title": f"{orgs_near_limits} Orgs approchent des limites",
                 "description": "Upgrade suggéré vers plan supérieur",
                 "severity": "warning",
                 "action": "Voir détails",
                 "link": "/superadmin/organizations?filter=near_limits"
             })
-        
+
         return Response({
             "mrr": round(mrr, 2),
             "mrr_growth": round(mrr_growth, 1),
             "total_organizations": total_orgs,
-            "active_organizations": active_orgs,
-            "orgs_this_month": orgs_this_month,
-            "total_users": total_users,
-            "total_agents": total_agents,
+            "active_organizations": live["active_organizations"],
+            "orgs_this_month": live["orgs_this_month"],
+            "total_users": live["total_users"],
+            "total_agents": live["total_agents"],
             "churn_rate": round(churn_rate, 1),
             "churn_growth": round(churn_growth, 1),
-            "tickets_today": tickets_today,
-            "tickets_month": tickets_month,
-            "avg_wait_time_minutes": round(avg_wait_time, 1),
+            "tickets_today": live["tickets_today"],
+            "tickets_month": live["tickets_month"],
+            "avg_wait_time_minutes": live["avg_wait_time_minutes"][DEFAULT_WAIT_RANGE],
             "satisfaction_rate": 92.0,  # TODO: calculer depuis les feedbacks réels
             "satisfaction_count": 0,  # TODO: compter les feedbacks
             "uptime_percentage": 99.97,  # TODO: calculer depuis monitoring
             "alerts": alerts,
+            "generated_at": snapshot["refreshed_at"],
         })
-    
+
     @action(detail=False, methods=["get"], url_path="monitoring")
     def monitoring(self, request):
         """Monitoring système pour le super-admin."""
@@ -735,6 +530,9 @@ class InvoiceAdminViewSet(viewsets.ModelViewSet):
     serializer_class = InvoiceAdminSerializer
     permission_classes = [IsSuperAdmin]
     filterset_fields = ["status", "tenant", "currency"]
+    ordering_fields = ["invoice_date", "due_date", "created_at"]
+    ordering = ["-invoice_date"]
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         """Filter invoices by status, date range, and tenant."""
@@ -959,50 +757,10 @@ class SubscriptionPlanViewSet(viewsets.ModelViewSet):
         ).order_by("monthly_price")
 
     @action(detail=False, methods=["get"])
+    @replica_reads
     def stats(self, request):
-        """Statistiques sur les plans d'abonnement."""
-        plans = self.get_queryset()
-
-        # Stats par plan
-        plan_stats = []
-        total_monthly_revenue = 0
-
-        for plan in plans:
-            active_subs = Subscription.objects.filter(plan=plan, status="active")
-            active_count = active_subs.count()
-            trial_count = Subscription.objects.filter(plan=plan, status="trial").count()
-
-            # Calculer le revenu mensuel récurrent (MRR)
-            mrr = sum(
-                float(sub.monthly_price / 100)
-                if sub.billing_cycle == "monthly"
-                else float(sub.monthly_price / 100 / 12)
-                for sub in active_subs
-            )
-            total_monthly_revenue += mrr
-
-            plan_stats.append(
-                {
-                    "plan_id": str(plan.id),
-                    "plan_name": plan.name,
-                    "plan_slug": plan.slug,
-                    "active_subscriptions": active_count,
-                    "trial_subscriptions": trial_count,
-                    "total_subscriptions": active_count + trial_count,
-                    "monthly_revenue": mrr,
-                    "price_monthly": float(plan.monthly_price),
-                    "price_yearly": float(plan.yearly_price),
-                }
-            )
-
-        return Response(
-            {
-                "total_plans": plans.count(),
-                "active_plans": plans.filter(is_active=True).count(),
-                "total_monthly_revenue": total_monthly_revenue,
-                "plan_statistics": plan_stats,
-            }
-        )
+        """Statistiques sur les plans d'abonnement (instantané KPI plateforme)."""
+        return Response(PlatformKpiSnapshot.get()["live"]["plans"])
 
 
 class TransactionViewSet(viewsets.ModelViewSet):
@@ -1015,6 +773,9 @@ class TransactionViewSet(viewsets.ModelViewSet):
     )
     serializer_class = TransactionAdminSerializer
     permission_classes = [IsSuperAdmin]
+    ordering_fields = ["created_at", "amount"]
+    ordering = ["-created_at"]
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         """Filtrer les transactions avec query params."""
@@ -1041,6 +802,7 @@ class TransactionViewSet(viewsets.ModelViewSet):
         return queryset
 
     @action(detail=False, methods=["get"])
+    @replica_reads
     def stats(self, request):
         """Statistiques sur les transactions."""
         queryset = self.get_queryset()
@@ -7,3 +7,8 @@ class TenantsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.tenants"
     verbose_name = "Tenants"
+
+    def ready(self) -> None:
+        from . import signals  # noqa: F401 - invalidation du cache tenant
+
+        return super().ready()
@@ -0,0 +1,139 @@
+"""Cache à deux niveaux des données tenant lues à chaque requête.
+
+- Tenant par slug, avec sa souscription et son plan préchargés : le
+  middleware tenant et la vérification d'abonnement ne font plus de requête.
+- Rôle d'un utilisateur dans un tenant (``TenantMembership``) : les classes
+  de permission en déduisent les scopes.
+
+Niveau 1 : LRU en mémoire du processus, expiration courte
+(``TENANT_CACHE_LOCAL_TIMEOUT``). Niveau 2 : cache partagé (Redis),
+``TENANT_CACHE_TIMEOUT``. Les signaux de ``apps.tenants.signals``
+invalident les deux niveaux à l'enregistrement ; les autres processus
+voient la modification au plus tard à l'expiration de leur niveau 1.
+"""
+
+from __future__ import annotations
+
+import logging
+import pickle
+from typing import TYPE_CHECKING
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from apps.core.local_cache import MISSING, LocalLRUCache
+
+from .models import Tenant, TenantMembership
+
+if TYPE_CHECKING:
+    from apps.users.models import User
+
+logger = logging.getLogger(__name__)
+
+TENANT_KEY = "tenant_cache:slug:{slug}"
+MEMBERSHIP_KEY = "tenant_cache:membership:{tenant_id}:{user_id}"
+
+CACHE_TIMEOUT = getattr(settings, "TENANT_CACHE_TIMEOUT", 60)
+LOCAL_TIMEOUT = getattr(settings, "TENANT_CACHE_LOCAL_TIMEOUT", 5)
+LOCAL_SIZE = getattr(settings, "TENANT_CACHE_LOCAL_SIZE", 1024)
+
+# Rôle mis en cache pour « pas de membership actif »
+NO_ROLE = ""
+
+_local = LocalLRUCache(max_size=LOCAL_SIZE, timeout=LOCAL_TIMEOUT)
+
+
+class TenantCache:
+    """Lecture et invalidation du cache tenant / membership."""
+
+    @staticmethod
+    def get_tenant(slug: str) -> Tenant | None:
+        """
+        Retourne le tenant d'un slug (actif ou non), souscription et plan préchargés.
+
+        Chaque appel retourne une instance distincte : la modifier n'affecte
+        pas les autres requêtes.
+        """
+        key = TENANT_KEY.format(slug=slug)
+
+        payload = _local.get(key)
+        if payload is MISSING:
+            payload = TenantCache._shared_get(key)
+            if payload is None:
+                tenant = (
+                    Tenant.objects.select_related("subscription__plan").filter(slug=slug).first()
+                )
+                if tenant is None:
+                    return None
+                payload = pickle.dumps(tenant, protocol=pickle.HIGHEST_PROTOCOL)
+                TenantCache._shared_set(key, payload)
+            _local.set(key, payload)
+
+        return pickle.loads(payload)  # noqa: S301 - données écrites par cette application
+
+    @staticmethod
+    def get_membership_role(tenant: Tenant, user: User) -> str | None:
+        """Rôle de l'utilisateur dans le tenant, ou None sans membership actif."""
+        if tenant is None or not user.is_authenticated:
+            return None
+
+        key = MEMBERSHIP_KEY.format(tenant_id=tenant.pk, user_id=user.pk)
+
+        role = _local.get(key)
+        if role is MISSING:
+            role = TenantCache._shared_get(key)
+            if role is None:
+                role = (
+                    TenantMembership.objects.filter(tenant=tenant, user=user, is_active=True)
+                    .values_list("role", flat=True)
+                    .first()
+                ) or NO_ROLE
+                TenantCache._shared_set(key, role)
+            _local.set(key, role)
+
+        return role or None
+
+    @staticmethod
+    def invalidate_tenant(*slugs: str) -> None:
+        """Invalide les entrées tenant, maintenant et au commit de la transaction."""
+        TenantCache._invalidate([TENANT_KEY.format(slug=slug) for slug in slugs if slug])
+
+    @staticmethod
+    def invalidate_membership(tenant_id, user_id) -> None:
+        """Invalide le rôle d'un utilisateur dans un tenant."""
+        TenantCache._invalidate([MEMBERSHIP_KEY.format(tenant_id=tenant_id, user_id=user_id)])
+
+    @staticmethod
+    def clear_local() -> None:
+        """Vide le niveau 1 du processus (tests)."""
+        _local.clear()
+
+    @staticmethod
+    def _invalidate(keys: list[str]) -> None:
+        def delete() -> None:
+            for key in keys:
+                _local.delete(key)
+            try:
+                cache.delete_many(keys)
+            except Exception:  # noqa: BLE001 - l'expiration prendra le relais
+                logger.warning("Cache tenant: invalidation impossible pour %s", keys, exc_info=True)
+
+        delete()
+        # Une requête concurrente a pu relire l'ancienne valeur avant le commit
+        transaction.on_commit(delete)
+
+    @staticmethod
+    def _shared_get(key: str):
+        try:
+            return cache.get(key)
+        except Exception:  # noqa: BLE001 - repli sur la base
+            logger.warning("Cache tenant: lecture impossible pour %s", key, exc_info=True)
+            return None
+
+    @staticmethod
+    def _shared_set(key: str, value) -> None:
+        try:
+            cache.set(key, value, timeout=CACHE_TIMEOUT)
+        except Exception:  # noqa: BLE001
+            logger.warning("Cache tenant: écriture impossible pour %s", key, exc_info=True)
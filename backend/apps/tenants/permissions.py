@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from rest_framework.permissions import BasePermission
 
+from .cache import TenantCache
 from .models import TenantMembership
 
 
@@ -12,9 +13,4 @@ class IsTenantAdmin(BasePermission):
         tenant = getattr(request, "tenant", None)
         if not request.user.is_authenticated or tenant is None:
             return False
-        return TenantMembership.objects.filter(
-            tenant=tenant,
-            user=request.user,
-            role=TenantMembership.ROLE_ADMIN,
-            is_active=True,
-        ).exists()
+        return TenantCache.get_membership_role(tenant, request.user) == TenantMembership.ROLE_ADMIN
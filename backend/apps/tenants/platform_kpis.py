@@ -0,0 +1,336 @@
+"""Instantané des KPI plateforme servis aux endpoints super-admin.
+
+Les endpoints ``analytics``, ``dashboard``, ``stats`` (tenants et plans)
+lisent un instantané en cache au lieu de recalculer leurs indicateurs à
+chaque requête. L'instantané est calculé par requêtes agrégées, en nombre
+fixe quel que soit le nombre de tenants, de souscriptions ou de tickets.
+Les chiffres de tickets (volumes, attente) viennent des agrégats KPI
+horaires (``QueueKpiRollup``).
+
+Deux sections :
+
+- ``daily`` : indicateurs figés sur la journée (croissance des
+  organisations, références du mois précédent), recalculés une fois par
+  jour (``build``) ;
+- ``live`` : compteurs du jour, revenus, top organisations, plans,
+  recalculés toutes les ``PLATFORM_KPI_REFRESH_SECONDS`` (``refresh``).
+
+Si la tâche planifiée ne tourne pas, ``get`` recalcule l'instantané dès qu'il
+a plus de ``PLATFORM_KPI_STALE_SECONDS``.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from calendar import monthrange
+from datetime import date, datetime, timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Subscription, SubscriptionPlan, Tenant
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY = "platform_kpi_snapshot"
+REFRESH_SECONDS = getattr(settings, "PLATFORM_KPI_REFRESH_SECONDS", 300)
+STALE_SECONDS = getattr(settings, "PLATFORM_KPI_STALE_SECONDS", 3 * REFRESH_SECONDS)
+
+# Périodes du temps d'attente moyen (paramètre time_range de /analytics)
+WAIT_RANGES = {"7d": 7, "30d": 30, "90d": 90, "1y": 365}
+DEFAULT_WAIT_RANGE = "30d"
+
+GROWTH_MONTHS = 7
+TOP_ORGANIZATIONS = 5
+
+# Seuil d'alerte « proche des limites » (part de max_sites utilisée)
+NEAR_LIMIT_RATIO = 0.8
+
+
+class PlatformKpiSnapshot:
+    """Calcul, stockage et lecture de l'instantané des KPI plateforme."""
+
+    @staticmethod
+    def get() -> dict:
+        """Instantané courant, recalculé s'il manque ou est périmé."""
+        snapshot = PlatformKpiSnapshot._load()
+        if snapshot is None or time.time() - snapshot["refreshed_ts"] > STALE_SECONDS:
+            snapshot = PlatformKpiSnapshot.refresh()
+        return snapshot
+
+    @staticmethod
+    def build() -> dict:
+        """Recalcule tout l'instantané (tâche quotidienne)."""
+        today = timezone.localdate()
+        snapshot = {"day": today.isoformat(), "daily": _daily_kpis(today)}
+        return PlatformKpiSnapshot._refresh_live(snapshot, today)
+
+    @staticmethod
+    def refresh() -> dict:
+        """
+        Rafraîchissement intra-journalier : recalcule la section ``live``.
+
+        La section ``daily`` est conservée, sauf si elle date d'un autre jour.
+        """
+        today = timezone.localdate()
+        snapshot = PlatformKpiSnapshot._load()
+        if snapshot is None or snapshot["day"] != today.isoformat():
+            return PlatformKpiSnapshot.build()
+        return PlatformKpiSnapshot._refresh_live(snapshot, today)
+
+    @staticmethod
+    def invalidate() -> None:
+        cache.delete(CACHE_KEY)
+
+    @staticmethod
+    def _refresh_live(snapshot: dict, today: date) -> dict:
+        started = time.monotonic()
+        now = timezone.now()
+        snapshot.update(
+            live=_live_kpis(today),
+            refreshed_at=now.isoformat(),
+            refreshed_ts=now.timestamp(),
+        )
+        try:
+            cache.set(CACHE_KEY, snapshot, timeout=None)
+        except Exception:  # noqa: BLE001 - l'instantané reste servi depuis le calcul
+            logger.warning("KPI plateforme: écriture du cache impossible", exc_info=True)
+        logger.debug("KPI plateforme rafraîchis en %.0f ms", (time.monotonic() - started) * 1000)
+        return snapshot
+
+    @staticmethod
+    def _load() -> dict | None:
+        try:
+            return cache.get(CACHE_KEY)
+        except Exception:  # noqa: BLE001 - repli sur le calcul
+            logger.warning("KPI plateforme: lecture du cache impossible", exc_info=True)
+            return None
+
+
+def _start_of(day: date) -> datetime:
+    """Minuit (fuseau courant) du jour donné."""
+    return timezone.make_aware(datetime.combine(day, datetime.min.time()))
+
+
+def _previous_month(today: date) -> date:
+    """Premier jour du mois précédent."""
+    if today.month == 1:
+        return date(today.year - 1, 12, 1)
+    return date(today.year, today.month - 1, 1)
+
+
+def _growth_dates(today: date) -> list[date]:
+    """Même jour du mois (borné à la fin du mois) sur les derniers mois."""
+    dates = []
+    for months_ago in range(GROWTH_MONTHS - 1, -1, -1):
+        year, month = today.year, today.month - months_ago
+        while month <= 0:
+            month += 12
+            year -= 1
+        dates.append(date(year, month, min(today.day, monthrange(year, month)[1])))
+    return dates
+
+
+def _daily_kpis(today: date) -> dict:
+    """Indicateurs de la section ``daily`` : deux requêtes."""
+    previous_month = _previous_month(today)
+    month_start = today.replace(day=1)
+    growth_dates = _growth_dates(today)
+
+    tenants = Tenant.objects.aggregate(
+        previous_churned=Count(
+            "id",
+            filter=Q(
+                is_active=False,
+                suspended_at__gte=_start_of(previous_month),
+                suspended_at__lt=_start_of(month_start),
+            ),
+        ),
+        **{
+            f"growth_{index}": Count("id", filter=Q(created_at__lte=_start_of(day)))
+            for index, day in enumerate(growth_dates)
+        },
+    )
+
+    previous_revenue = Subscription.objects.filter(
+        status=Subscription.STATUS_ACTIVE, starts_at__lte=previous_month
+    ).aggregate(total=Coalesce(Sum("monthly_price"), 0))["total"]
+
+    return {
+        "organization_growth": [
+            {"month": day.strftime("%b"), "count": tenants[f"growth_{index}"]}
+            for index, day in enumerate(growth_dates)
+        ],
+        "previous_revenue": previous_revenue / 100,
+        "previous_churned": tenants["previous_churned"],
+    }
+
+
+def _live_kpis(today: date) -> dict:
+    """Indicateurs de la section ``live``."""
+    # Importer ici pour éviter les imports circulaires
+    from apps.queues.models import QueueAssignment, QueueKpiRollup, Site
+
+    User = get_user_model()
+    month_start = _start_of(today.replace(day=1))
+    previous_month_start = _start_of(_previous_month(today))
+
+    tenants = Tenant.objects.aggregate(
+        total=Count("id"),
+        active=Count("id", filter=Q(is_active=True)),
+        suspended=Count("id", filter=Q(is_active=False)),
+        created_this_month=Count("id", filter=Q(created_at__gte=month_start)),
+        churned_this_month=Count("id", filter=Q(is_active=False, suspended_at__gte=month_start)),
+    )
+    near_limits = (
+        Tenant.objects.annotate(sites_count=Count("sites"))
+        .filter(sites_count__gte=F("max_sites") * NEAR_LIMIT_RATIO)
+        .count()
+    )
+
+    subscriptions = Subscription.objects.aggregate(
+        trial=Count("id", filter=Q(status=Subscription.STATUS_TRIAL)),
+        trial_expiring=Count(
+            "id",
+            filter=Q(
+                status=Subscription.STATUS_TRIAL,
+                trial_ends_at__gte=today,
+                trial_ends_at__lte=today + timedelta(days=7),
+            ),
+        ),
+        mrr=Coalesce(Sum("monthly_price", filter=Q(status=Subscription.STATUS_ACTIVE)), 0),
+    )
+
+    # Volumes et attentes : agrégats horaires, une requête
+    wait_since = {key: _start_of(today - timedelta(days=days)) for key, days in WAIT_RANGES.items()}
+    tickets = QueueKpiRollup.objects.filter(hour__gte=min(wait_since.values())).aggregate(
+        today=Coalesce(Sum("tickets_count", filter=Q(hour__gte=_start_of(today))), 0),
+        month=Coalesce(Sum("tickets_count", filter=Q(hour__gte=month_start)), 0),
+        **{
+            f"wait_sum_{key}": Sum("call_wait_sum", filter=Q(hour__gte=since))
+            for key, since in wait_since.items()
+        },
+        **{
+            f"wait_count_{key}": Sum("call_wait_count", filter=Q(hour__gte=since))
+            for key, since in wait_since.items()
+        },
+    )
+    avg_wait_minutes = {
+        key: round(tickets[f"wait_sum_{key}"] / tickets[f"wait_count_{key}"] / 60, 1)
+        if tickets[f"wait_count_{key}"]
+        else 0
+        for key in WAIT_RANGES
+    }
+
+    return {
+        "total_organizations": tenants["total"],
+        "active_organizations": tenants["active"],
+        "suspended_organizations": tenants["suspended"],
+        "trial_organizations": subscriptions["trial"],
+        "orgs_this_month": tenants["created_this_month"],
+        "churned_this_month": tenants["churned_this_month"],
+        "orgs_near_limits": near_limits,
+        "trial_expiring": subscriptions["trial_expiring"],
+        "total_users": User.objects.filter(tenant_memberships__tenant__isnull=False).distinct().count(),
+        "total_agents": QueueAssignment.objects.filter(is_active=True).values("agent").distinct().count(),
+        "total_sites": Site.objects.count(),
+        "tickets_today": tickets["today"],
+        "tickets_month": tickets["month"],
+        "avg_wait_time_minutes": avg_wait_minutes,
+        "mrr": subscriptions["mrr"] / 100,
+        "top_organizations": _top_organizations(month_start, previous_month_start),
+        "plans": _plan_statistics(),
+    }
+
+
+def _top_organizations(month_start: datetime, previous_month_start: datetime) -> list[dict]:
+    """Organisations ayant le plus de tickets, avec croissance mensuelle : deux requêtes."""
+    from apps.queues.models import QueueKpiRollup
+
+    top = list(
+        QueueKpiRollup.objects.order_by()
+        .values("tenant_id")
+        .annotate(
+            total=Sum("tickets_count"),
+            current=Coalesce(Sum("tickets_count", filter=Q(hour__gte=month_start)), 0),
+            previous=Coalesce(
+                Sum("tickets_count", filter=Q(hour__gte=previous_month_start, hour__lt=month_start)), 0
+            ),
+        )
+        .filter(total__gt=0)
+        .order_by("-total")[:TOP_ORGANIZATIONS]
+    )
+    tenants = {
+        row["id"]: row
+        for row in Tenant.objects.filter(id__in=[row["tenant_id"] for row in top]).values(
+            "id", "name", "subscription__monthly_price"
+        )
+    }
+
+    organizations = []
+    for row in top:
+        tenant = tenants.get(row["tenant_id"])
+        if tenant is None:
+            continue
+        growth = (row["current"] - row["previous"]) / row["previous"] * 100 if row["previous"] else 0
+        organizations.append(
+            {
+                "name": tenant["name"],
+                "tickets_count": row["total"],
+                "revenue": (tenant["subscription__monthly_price"] or 0) / 100,
+                "growth": round(growth, 1),
+            }
+        )
+    return organizations
+
+
+def _plan_statistics() -> dict:
+    """Souscriptions et MRR par plan : deux requêtes."""
+    plans = list(
+        SubscriptionPlan.objects.order_by("monthly_price").values(
+            "id", "name", "slug", "monthly_price", "yearly_price", "is_active"
+        )
+    )
+    counts = {plan["id"]: {"active": 0, "trial": 0, "mrr": 0.0} for plan in plans}
+
+    rows = (
+        Subscription.objects.filter(status__in=[Subscription.STATUS_ACTIVE, Subscription.STATUS_TRIAL])
+        .order_by()
+        .values("plan_id", "status", "billing_cycle")
+        .annotate(count=Count("id"), price=Coalesce(Sum("monthly_price"), 0))
+    )
+    for row in rows:
+        plan = counts.get(row["plan_id"])
+        if plan is None:
+            continue
+        plan[row["status"]] += row["count"]
+        if row["status"] == Subscription.STATUS_ACTIVE:
+            # Le prix d'un abonnement annuel est ramené au mois
+            divisor = 100 if row["billing_cycle"] == Subscription.BILLING_CYCLE_MONTHLY else 1200
+            plan["mrr"] += row["price"] / divisor
+
+    plan_statistics = [
+        {
+            "plan_id": str(plan["id"]),
+            "plan_name": plan["name"],
+            "plan_slug": plan["slug"],
+            "active_subscriptions": counts[plan["id"]]["active"],
+            "trial_subscriptions": counts[plan["id"]]["trial"],
+            "total_subscriptions": counts[plan["id"]]["active"] + counts[plan["id"]]["trial"],
+            "monthly_revenue": counts[plan["id"]]["mrr"],
+            "price_monthly": float(plan["monthly_price"]),
+            "price_yearly": float(plan["yearly_price"]),
+        }
+        for plan in plans
+    ]
+    return {
+        "total_plans": len(plans),
+        "active_plans": sum(1 for plan in plans if plan["is_active"]),
+        "total_monthly_revenue": sum(counts[plan["id"]]["mrr"] for plan in plans),
+        "plan_statistics": plan_statistics,
+    }
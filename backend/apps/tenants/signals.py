@@ -0,0 +1,48 @@
+"""Signaux de l'application tenants."""
+
+from __future__ import annotations
+
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .cache import TenantCache
+from .models import Subscription, SubscriptionPlan, Tenant, TenantMembership
+
+
+@receiver(pre_save, sender=Tenant, dispatch_uid="tenants.cache.tenant_pre_save")
+def remember_previous_slug(sender, instance: Tenant, **kwargs) -> None:
+    """Mémorise l'ancien slug : l'entrée correspondante doit aussi être invalidée."""
+    if instance._state.adding:
+        return
+    instance._previous_slug = Tenant.objects.filter(pk=instance.pk).values_list("slug", flat=True).first()
+
+
+@receiver(post_save, sender=Tenant, dispatch_uid="tenants.cache.tenant_saved")
+@receiver(post_delete, sender=Tenant, dispatch_uid="tenants.cache.tenant_deleted")
+def invalidate_tenant(sender, instance: Tenant, **kwargs) -> None:
+    TenantCache.invalidate_tenant(instance.slug, getattr(instance, "_previous_slug", None))
+
+
+@receiver(post_save, sender=Subscription, dispatch_uid="tenants.cache.subscription_saved")
+@receiver(post_delete, sender=Subscription, dispatch_uid="tenants.cache.subscription_deleted")
+def invalidate_subscription(sender, instance: Subscription, **kwargs) -> None:
+    """La souscription est mise en cache avec son tenant."""
+    TenantCache.invalidate_tenant(
+        *Tenant.objects.filter(pk=instance.tenant_id).values_list("slug", flat=True)
+    )
+
+
+@receiver(post_save, sender=SubscriptionPlan, dispatch_uid="tenants.cache.plan_saved")
+def invalidate_plan(sender, instance: SubscriptionPlan, created: bool, **kwargs) -> None:
+    """Les limites du plan sont mises en cache avec chaque tenant abonné."""
+    if created:
+        return
+    TenantCache.invalidate_tenant(
+        *Tenant.objects.filter(subscription__plan=instance).values_list("slug", flat=True)
+    )
+
+
+@receiver(post_save, sender=TenantMembership, dispatch_uid="tenants.cache.membership_saved")
+@receiver(post_delete, sender=TenantMembership, dispatch_uid="tenants.cache.membership_deleted")
+def invalidate_membership(sender, instance: TenantMembership, **kwargs) -> None:
+    TenantCache.invalidate_membership(instance.tenant_id, instance.user_id)
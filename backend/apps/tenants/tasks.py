@@ -7,6 +7,8 @@ from django.db import transaction
 from datetime import timedelta
 import logging
 
+from apps.core.db_router import replica_reads
+
 logger = logging.getLogger(__name__)
 
 
@@ -411,3 +413,28 @@ def update_payment_plan_installments():
 
     logger.info(f"[PAYMENT_PLANS] Résumé: {stats}")
     return stats
+
+
+@shared_task
+@replica_reads
+def build_platform_kpi_snapshot():
+    """
+    Recalcule l'instantané complet des KPI plateforme (super-admin).
+    Exécution: Tous les jours à 0h05
+    """
+    from apps.tenants.platform_kpis import PlatformKpiSnapshot
+
+    snapshot = PlatformKpiSnapshot.build()
+    logger.info(f"[PLATFORM_KPI] Instantané calculé ({snapshot['refreshed_at']})")
+
+
+@shared_task
+@replica_reads
+def refresh_platform_kpi_snapshot():
+    """
+    Rafraîchit la section intra-journalière de l'instantané des KPI plateforme.
+    Exécution: Toutes les PLATFORM_KPI_REFRESH_SECONDS (5 minutes par défaut)
+    """
+    from apps.tenants.platform_kpis import PlatformKpiSnapshot
+
+    PlatformKpiSnapshot.refresh()
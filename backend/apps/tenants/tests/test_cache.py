@@ -0,0 +1,110 @@
+"""Tests pour le cache tenant / souscription / membership."""
+
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.http import Http404, JsonResponse
+from django.test import RequestFactory
+from model_bakery import baker
+
+from apps.core.middleware import SubscriptionStatusMiddleware, TenantMiddleware
+from apps.core.permissions import HasScope, IsTenantMember, Scopes
+from apps.tenants.cache import TenantCache
+from apps.tenants.models import Subscription, SubscriptionPlan, TenantMembership
+
+
+@pytest.fixture(autouse=True)
+def clear_tenant_cache():
+    cache.clear()
+    TenantCache.clear_local()
+    yield
+    cache.clear()
+    TenantCache.clear_local()
+
+
+@pytest.fixture
+def subscription(tenant):
+    plan = baker.make(SubscriptionPlan, max_queues=7)
+    return baker.make(Subscription, tenant=tenant, plan=plan, status=Subscription.STATUS_ACTIVE)
+
+
+def _api_call(user, slug="test-tenant"):
+    """Middlewares tenant + abonnement, puis les permissions d'une vue."""
+
+    def view(request):
+        allowed = IsTenantMember().has_permission(request, None) and HasScope(
+            Scopes.MANAGE_QUEUE
+        )().has_permission(request, None)
+        return JsonResponse({"allowed": allowed})
+
+    request = RequestFactory().get(f"/api/v1/tenants/{slug}/queues/")
+    request.user = user
+    return TenantMiddleware(SubscriptionStatusMiddleware(view))(request)
+
+
+@pytest.mark.django_db
+class TestTenantCache:
+    """Tests pour TenantCache."""
+
+    def test_warm_api_call_makes_no_query(self, subscription, admin_membership, django_assert_num_queries):
+        """Test que tenant, souscription et membership sont servis par le cache."""
+        _api_call(admin_membership.user)
+
+        with django_assert_num_queries(0):
+            response = _api_call(admin_membership.user)
+
+        assert response.status_code == 200
+        assert b'"allowed": true' in response.content
+
+    def test_shared_tier_survives_local_expiry(self, subscription, django_assert_num_queries):
+        """Test qu'un autre processus (niveau 1 vide) lit le cache partagé."""
+        TenantCache.get_tenant("test-tenant")
+        TenantCache.clear_local()
+
+        with django_assert_num_queries(0):
+            tenant = TenantCache.get_tenant("test-tenant")
+            assert tenant.subscription.plan.max_queues == 7
+
+    def test_instances_are_independent(self, subscription):
+        """Test que modifier le tenant d'une requête n'affecte pas les suivantes."""
+        TenantCache.get_tenant("test-tenant").name = "modifié"
+
+        assert TenantCache.get_tenant("test-tenant").name == "Test Tenant"
+
+    def test_subscription_change_invalidates(self, subscription, admin_membership):
+        """Test qu'une souscription suspendue est vue dès l'enregistrement."""
+        _api_call(admin_membership.user)
+
+        subscription.status = Subscription.STATUS_SUSPENDED
+        subscription.save()
+
+        response = _api_call(admin_membership.user)
+        assert response.status_code == 403
+        assert b"subscription_suspended" in response.content
+
+    def test_tenant_deactivation_and_rename_invalidate(self, tenant):
+        """Test l'invalidation à la désactivation et sous l'ancien slug."""
+        assert TenantCache.get_tenant("test-tenant") is not None
+
+        tenant.slug = "renamed"
+        tenant.save()
+        assert TenantCache.get_tenant("test-tenant") is None
+        assert TenantCache.get_tenant("renamed").slug == "renamed"
+
+        tenant.is_active = False
+        tenant.save()
+        with pytest.raises(Http404):
+            _api_call(AnonymousUser(), slug="renamed")
+
+    def test_membership_changes_invalidate(self, tenant, admin_membership):
+        """Test que le changement de rôle ou la désactivation sont pris en compte."""
+        user = admin_membership.user
+        assert TenantCache.get_membership_role(tenant, user) == TenantMembership.ROLE_ADMIN
+
+        admin_membership.role = TenantMembership.ROLE_AGENT
+        admin_membership.save()
+        assert TenantCache.get_membership_role(tenant, user) == TenantMembership.ROLE_AGENT
+        assert b'"allowed": false' in _api_call(user).content
+
+        admin_membership.delete()
+        assert TenantCache.get_membership_role(tenant, user) is None
@@ -0,0 +1,126 @@
+"""Tests pour l'instantané des KPI plateforme (super-admin)."""
+
+import pytest
+from django.core.cache import cache
+from model_bakery import baker
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from apps.queues.rollups import KpiRollups
+from apps.tenants.admin_views import SubscriptionPlanViewSet, TenantAdminViewSet
+from apps.tenants.models import Subscription, SubscriptionPlan, Tenant
+from apps.tenants.platform_kpis import CACHE_KEY, PlatformKpiSnapshot
+from apps.tickets.models import Ticket
+
+
+@pytest.fixture(autouse=True)
+def clear_snapshot():
+    cache.delete(CACHE_KEY)
+    yield
+    cache.delete(CACHE_KEY)
+
+
+@pytest.fixture
+def plan():
+    return baker.make(SubscriptionPlan, name="Business", slug="business", monthly_price=99, yearly_price=990)
+
+
+@pytest.fixture
+def superuser():
+    from apps.users.models import User
+
+    return baker.make(User, email="root@example.com", is_superuser=True, is_staff=True, is_active=True)
+
+
+def _get(viewset, action, user, **params):
+    request = APIRequestFactory().get("/", params)
+    force_authenticate(request, user=user)
+    return viewset.as_view({"get": action})(request)
+
+
+@pytest.mark.django_db
+class TestPlatformKpiSnapshot:
+    """Tests pour le calcul et le rafraîchissement de l'instantané."""
+
+    def test_build_aggregates(self, tenant, queue, plan):
+        """Test les indicateurs calculés par requêtes agrégées."""
+        other = baker.make(Tenant, is_active=False)
+        baker.make(Subscription, tenant=tenant, plan=plan, status=Subscription.STATUS_ACTIVE, monthly_price=9900)
+        baker.make(
+            Subscription,
+            tenant=other,
+            plan=plan,
+            status=Subscription.STATUS_ACTIVE,
+            billing_cycle=Subscription.BILLING_CYCLE_YEARLY,
+            monthly_price=120000,
+        )
+        baker.make(Ticket, tenant=tenant, queue=queue, _quantity=3)
+        KpiRollups.rebuild()
+
+        live = PlatformKpiSnapshot.build()["live"]
+
+        assert live["total_organizations"] == 2
+        assert live["suspended_organizations"] == 1
+        assert live["mrr"] == 1299
+        assert live["tickets_today"] == 3
+        assert live["top_organizations"][0]["name"] == tenant.name
+        [plan_stats] = live["plans"]["plan_statistics"]
+        assert plan_stats["active_subscriptions"] == 2
+        # L'abonnement annuel compte pour un douzième
+        assert plan_stats["monthly_revenue"] == 99 + 100
+
+    def test_refresh_keeps_daily_section(self, tenant):
+        """Test que le rafraîchissement ne recalcule que la section live."""
+        snapshot = PlatformKpiSnapshot.build()
+        snapshot["daily"]["previous_churned"] = 42
+        cache.set(CACHE_KEY, snapshot)
+        baker.make(Tenant)
+
+        refreshed = PlatformKpiSnapshot.refresh()
+
+        assert refreshed["daily"]["previous_churned"] == 42
+        assert refreshed["live"]["total_organizations"] == 2
+
+    def test_get_serves_cached_snapshot(self, tenant, django_assert_num_queries):
+        """Test que la lecture de l'instantané ne fait aucune requête."""
+        PlatformKpiSnapshot.build()
+
+        with django_assert_num_queries(0):
+            assert PlatformKpiSnapshot.get()["live"]["total_organizations"] == 1
+
+    def test_get_rebuilds_stale_snapshot(self, tenant):
+        """Test qu'un instantané périmé est recalculé."""
+        snapshot = PlatformKpiSnapshot.build()
+        snapshot["refreshed_ts"] -= 24 * 3600
+        cache.set(CACHE_KEY, snapshot)
+        baker.make(Tenant)
+
+        assert PlatformKpiSnapshot.get()["live"]["total_organizations"] == 2
+
+
+@pytest.mark.django_db
+class TestAdminEndpoints:
+    """Tests pour les endpoints super-admin servis depuis l'instantané."""
+
+    def test_analytics(self, tenant, superuser, django_assert_num_queries):
+        """Test l'endpoint analytics sans requête sur les données plateforme."""
+        PlatformKpiSnapshot.build()
+
+        # Authentification forcée et instantané en cache : aucune requête
+        with django_assert_num_queries(0):
+            response = _get(TenantAdminViewSet, "analytics", superuser, time_range="7d")
+
+        assert response.status_code == 200
+        assert response.data["total_organizations"] == 1
+        assert len(response.data["organization_growth"]) == 7
+
+    def test_dashboard_and_plan_stats(self, tenant, plan, superuser):
+        """Test les endpoints dashboard et statistiques des plans."""
+        baker.make(Subscription, tenant=tenant, plan=plan, status=Subscription.STATUS_TRIAL)
+
+        dashboard = _get(TenantAdminViewSet, "dashboard", superuser)
+        plans = _get(SubscriptionPlanViewSet, "stats", superuser)
+
+        assert dashboard.status_code == 200
+        assert dashboard.data["total_organizations"] == 1
+        assert plans.data["total_plans"] == 1
+        assert plans.data["plan_statistics"][0]["trial_subscriptions"] == 1
@@ -88,12 +88,28 @@ class TenantMembershipViewSet(
         from apps.core.subscription_enforcement import SubscriptionEnforcement
         from rest_framework.exceptions import PermissionDenied
 
-        # Vérifier le quota AVANT de créer l'utilisateur ou le membership
-        if not SubscriptionEnforcement.can_create_agent(request.tenant):
+        # Réserver le quota AVANT de créer l'utilisateur ou le membership
+        if not SubscriptionEnforcement.claim("agent", request.tenant):
             raise PermissionDenied(
                 SubscriptionEnforcement.get_quota_error_message("agent", request.tenant)
             )
 
+        try:
+            response = self._invite(request)
+        except Exception:
+            SubscriptionEnforcement.release("agent", request.tenant)
+            raise
+
+        if response.status_code == status.HTTP_201_CREATED:
+            # Le compteur d'agents est recompté depuis la base au commit : la
+            # réservation n'a plus à être comptée (annulation : elle expire)
+            transaction.on_commit(lambda: SubscriptionEnforcement.release("agent", request.tenant))
+        else:
+            SubscriptionEnforcement.release("agent", request.tenant)
+        return response
+
+    def _invite(self, request):
+        """Crée ou réactive le membership de l'utilisateur invité."""
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from django.contrib import admin
 
-from .models import Appointment, Ticket
+from .models import Appointment, ArchivedTicket, Ticket, TicketSequence
 
 
 @admin.register(Ticket)
@@ -12,8 +12,27 @@ class TicketAdmin(admin.ModelAdmin):
     search_fields = ("number", "queue__name", "customer_name", "customer_phone")
 
 
+@admin.register(ArchivedTicket)
+class ArchivedTicketAdmin(admin.ModelAdmin):
+    list_display = ("number", "queue", "status", "created_at", "archived_at")
+    list_filter = ("status", "tenant")
+    search_fields = ("number", "customer_name", "customer_phone")
+
+    def has_add_permission(self, request):  # pragma: no cover - admin
+        return False
+
+    def has_change_permission(self, request, obj=None):  # pragma: no cover - admin
+        return False
+
+
 @admin.register(Appointment)
 class AppointmentAdmin(admin.ModelAdmin):
     list_display = ("customer_name", "service", "starts_at", "status")
     list_filter = ("status", "service__tenant")
     search_fields = ("customer_name", "customer_email", "customer_phone")
+
+
+@admin.register(TicketSequence)
+class TicketSequenceAdmin(admin.ModelAdmin):
+    list_display = ("queue", "period", "last_value", "updated_at")
+    list_filter = ("queue__tenant",)
@@ -0,0 +1,205 @@
+"""Archivage des tickets terminés hors de la table ``tickets``.
+
+Les tickets clôturés ou absents terminés depuis plus de
+``TICKET_ARCHIVE_AFTER_DAYS`` jours sont déplacés vers ``tickets_archive``
+(``ArchivedTicket``), partitionnée par mois de création sur PostgreSQL : la
+table chaude ne garde que l'activité récente et les files en cours.
+
+Déplacement par lots, un lot par transaction : verrouillage des tickets
+(``SKIP LOCKED``), copie idempotente (``ON CONFLICT DO NOTHING``) puis
+suppression. Une exécution interrompue ne laisse aucun ticket à moitié
+déplacé ; la suivante reprend où elle s'était arrêtée.
+
+La suppression est brute (``_raw_delete``) : ni signaux ni cascade ORM. Les
+agrégats horaires (``apps.queues.rollups``) gardent la contribution des
+tickets archivés, et avis et notifications gardent leur ``ticket_id``
+(clés sans contrainte en base).
+
+Lectures : ``KpiRollups.rebuild`` lit les deux tables ; ``history`` et
+``count`` donnent l'historique complet d'un client, d'une file, d'un tenant.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from datetime import date, datetime, timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, connections, router, transaction
+from django.db.models import DateTimeField, Min, QuerySet, Value
+from django.utils import timezone
+
+from .models import ArchivedTicket, Ticket
+
+logger = logging.getLogger(__name__)
+
+ARCHIVABLE_STATUSES = (Ticket.STATUS_CLOSED, Ticket.STATUS_NO_SHOW)
+
+# Colonnes copiées telles quelles de ``tickets`` vers ``tickets_archive``
+COPIED_FIELDS = [field.attname for field in ArchivedTicket._meta.concrete_fields if field.name != "archived_at"]
+
+# Colonnes de l'historique (``history``) ; ``archived_at`` est nul pour un ticket chaud
+HISTORY_FIELDS = (
+    "id",
+    "number",
+    "status",
+    "channel",
+    "priority",
+    "queue_id",
+    "agent_id",
+    "customer_id",
+    "customer_name",
+    "customer_phone",
+    "created_at",
+    "called_at",
+    "started_at",
+    "ended_at",
+)
+
+# Partitions mensuelles déjà créées par ce processus
+_known_partitions: set[str] = set()
+
+
+class TicketArchive:
+    """Déplacement des tickets terminés vers l'archive et lecture des deux tables."""
+
+    @staticmethod
+    def cutoff(days: int | None = None) -> datetime:
+        """Date de fin avant laquelle un ticket terminé est archivé."""
+        if days is None:
+            days = getattr(settings, "TICKET_ARCHIVE_AFTER_DAYS", 90)
+        return timezone.now() - timedelta(days=days)
+
+    @staticmethod
+    def candidates(cutoff: datetime) -> QuerySet[Ticket]:
+        """Tickets terminés avant ``cutoff`` (index ``tickets_status_ended_idx``)."""
+        return Ticket.objects.filter(status__in=ARCHIVABLE_STATUSES, ended_at__lt=cutoff).order_by()
+
+    @staticmethod
+    def archive(
+        cutoff: datetime | None = None,
+        chunk_size: int | None = None,
+        max_seconds: float | None = None,
+        max_batches: int | None = None,
+    ) -> dict:
+        """
+        Archive les tickets terminés avant ``cutoff`` par lots successifs.
+
+        Args:
+            cutoff: date de fin limite (``TICKET_ARCHIVE_AFTER_DAYS`` par défaut)
+            chunk_size: tickets par lot (``TICKET_ARCHIVE_CHUNK_SIZE`` par défaut)
+            max_seconds: durée après laquelle aucun nouveau lot n'est commencé
+            max_batches: nombre maximal de lots
+
+        Returns:
+            dict: ``archived`` (tickets déplacés), ``batches``, ``complete``
+            (plus rien à archiver), ``cutoff``
+        """
+        if cutoff is None:
+            cutoff = TicketArchive.cutoff()
+        if chunk_size is None:
+            chunk_size = getattr(settings, "TICKET_ARCHIVE_CHUNK_SIZE", 1000)
+
+        first = TicketArchive.candidates(cutoff).aggregate(first=Min("created_at"))["first"]
+        if first is not None:
+            TicketArchive.ensure_partitions(first, cutoff)
+
+        started = time.monotonic()
+        archived = batches = 0
+        complete = first is None
+        while not complete:
+            if max_batches is not None and batches >= max_batches:
+                break
+            if max_seconds is not None and time.monotonic() - started >= max_seconds:
+                break
+            moved = TicketArchive.archive_batch(cutoff, chunk_size)
+            archived += moved
+            batches += 1
+            complete = moved < chunk_size
+
+        if archived:
+            logger.info("Archivage tickets: %s tickets déplacés en %s lots (avant %s)", archived, batches, cutoff)
+        return {"archived": archived, "batches": batches, "complete": complete, "cutoff": cutoff}
+
+    @staticmethod
+    def archive_batch(cutoff: datetime, chunk_size: int) -> int:
+        """Déplace au plus ``chunk_size`` tickets dans une transaction ; retourne leur nombre."""
+        using = router.db_for_write(Ticket)
+        with transaction.atomic(using=using):
+            rows = list(
+                TicketArchive.candidates(cutoff)
+                .using(using)
+                .select_for_update(skip_locked=True)
+                .values(*COPIED_FIELDS)[:chunk_size]
+            )
+            if not rows:
+                return 0
+
+            archived_at = timezone.now()
+            ArchivedTicket.objects.using(using).bulk_create(
+                [ArchivedTicket(archived_at=archived_at, **row) for row in rows],
+                batch_size=chunk_size,
+                ignore_conflicts=True,
+            )
+            Ticket.objects.filter(id__in=[row["id"] for row in rows])._raw_delete(using)
+        return len(rows)
+
+    @staticmethod
+    def ensure_partitions(since: datetime, until: datetime) -> list[str]:
+        """
+        Crée les partitions mensuelles couvrant ``[since, until]`` (PostgreSQL).
+
+        Returns:
+            list: partitions créées par cet appel
+        """
+        using = router.db_for_write(ArchivedTicket)
+        connection = connections[using]
+        if connection.vendor != "postgresql":
+            return []
+
+        created = []
+        month = date(since.year, since.month, 1)
+        last = date(until.year, until.month, 1)
+        while month <= last:
+            following = date(month.year + month.month // 12, month.month % 12 + 1, 1)
+            name = f"tickets_archive_y{month:%Y}m{month:%m}"
+            if name not in _known_partitions:
+                try:
+                    with transaction.atomic(using=using), connection.cursor() as cursor:
+                        cursor.execute(
+                            f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF tickets_archive "
+                            "FOR VALUES FROM (%s) TO (%s)",
+                            [month.isoformat(), following.isoformat()],
+                        )
+                except DatabaseError:
+                    # Lignes du mois déjà dans la partition par défaut : elles y restent
+                    logger.warning("Archivage tickets: partition %s impossible à créer", name, exc_info=True)
+                else:
+                    _known_partitions.add(name)
+                    created.append(name)
+            month = following
+        return created
+
+    # --- Lecture ------------------------------------------------------------------
+
+    @staticmethod
+    def history(**lookups) -> QuerySet:
+        """
+        Tickets chauds et archivés répondant aux filtres, en dictionnaires.
+
+        Union de deux requêtes : la trier ou la découper, pas la refiltrer.
+        """
+        hot = (
+            Ticket.objects.filter(**lookups)
+            .order_by()
+            .annotate(archived_at=Value(None, output_field=DateTimeField()))
+            .values(*HISTORY_FIELDS, "archived_at")
+        )
+        archived = ArchivedTicket.objects.filter(**lookups).order_by().values(*HISTORY_FIELDS, "archived_at")
+        return hot.union(archived, all=True)
+
+    @staticmethod
+    def count(**lookups) -> int:
+        """Nombre de tickets chauds et archivés répondant aux filtres."""
+        return Ticket.objects.filter(**lookups).count() + ArchivedTicket.objects.filter(**lookups).count()
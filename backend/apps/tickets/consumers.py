@@ -2,6 +2,8 @@ from __future__ import annotations
 
 from channels.generic.websocket import AsyncJsonWebsocketConsumer
 
+from apps.core.realtime import RealtimeGroups
+
 
 class TicketConsumer(AsyncJsonWebsocketConsumer):
     """Diffuse les mises à jour d'un ticket particulier."""
@@ -9,7 +11,7 @@ class TicketConsumer(AsyncJsonWebsocketConsumer):
     async def connect(self):  # pragma: no cover
         tenant_slug = self.scope["url_route"]["kwargs"].get("tenant_slug")
         ticket_id = self.scope["url_route"]["kwargs"].get("ticket_id")
-        self.group_name = f"ticket:{tenant_slug}:{ticket_id}"
+        self.group_name = RealtimeGroups.ticket(tenant_slug, ticket_id)
         await self.channel_layer.group_add(self.group_name, self.channel_name)
         await self.accept()
 
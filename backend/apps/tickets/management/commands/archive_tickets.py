@@ -0,0 +1,45 @@
+"""Management command pour archiver les tickets terminés (``apps.tickets.archive``)."""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.tickets.archive import TicketArchive
+
+
+class Command(BaseCommand):
+    help = (
+        "Déplace les tickets clôturés ou absents vers l'archive par lots "
+        "(reprend là où une exécution précédente s'est arrêtée)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than-days",
+            type=int,
+            default=None,
+            help=f"Ancienneté minimale en jours (défaut : {settings.TICKET_ARCHIVE_AFTER_DAYS})",
+        )
+        parser.add_argument("--chunk-size", type=int, default=None, help="Tickets par lot")
+        parser.add_argument("--max-batches", type=int, default=None, help="Nombre maximal de lots")
+        parser.add_argument("--max-seconds", type=float, default=None, help="Durée maximale")
+        parser.add_argument("--dry-run", action="store_true", help="Compter sans déplacer")
+
+    def handle(self, *args, **options):
+        cutoff = TicketArchive.cutoff(options["older_than_days"])
+
+        if options["dry_run"]:
+            count = TicketArchive.candidates(cutoff).count()
+            self.stdout.write(f"{count} ticket(s) terminé(s) avant {cutoff:%Y-%m-%d %H:%M} à archiver")
+            return
+
+        result = TicketArchive.archive(
+            cutoff=cutoff,
+            chunk_size=options["chunk_size"],
+            max_seconds=options["max_seconds"],
+            max_batches=options["max_batches"],
+        )
+        message = f"{result['archived']} ticket(s) archivé(s) en {result['batches']} lot(s)"
+        if result["complete"]:
+            self.stdout.write(self.style.SUCCESS(message))
+        else:
+            self.stdout.write(self.style.WARNING(f"{message} ; relancer pour continuer"))
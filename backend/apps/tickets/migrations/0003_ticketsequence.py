@@ -0,0 +1,55 @@
+# Generated by Django 4.2.30 on 2026-10-17 03:34
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tenants", "0009_paymentplan_dunningaction_paymentplaninstallment"),
+        ("queues", "0005_queue_ticket_number_reset"),
+        ("tickets", "0002_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TicketSequence",
+            fields=[
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("period", models.CharField(blank=True, default="", max_length=10)),
+                ("last_value", models.PositiveBigIntegerField(default=0)),
+                (
+                    "queue",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="ticket_sequences",
+                        to="queues.queue",
+                    ),
+                ),
+                (
+                    "tenant",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="%(class)ss",
+                        to="tenants.tenant",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "ticket_sequences",
+                "unique_together": {("queue", "period")},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-17 04:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tickets", "0003_ticketsequence"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ticket",
+            name="ready_notified_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
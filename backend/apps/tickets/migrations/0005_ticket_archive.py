@@ -0,0 +1,156 @@
+# Generated by Django 4.2.30 on 2026-10-17 04:33
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+ARCHIVE_INDEXES = {
+    "tickets_arch_tenant_idx": "(tenant_id, created_at)",
+    "tickets_arch_queue_idx": "(queue_id, created_at)",
+    "tickets_arch_customer_idx": "(customer_id, created_at)",
+}
+
+
+def partition_archive(apps, schema_editor):
+    """
+    PostgreSQL : recrée ``tickets_archive`` partitionnée par mois sur ``created_at``.
+
+    La clé de partition doit figurer dans la clé primaire : (id, created_at).
+    Les partitions mensuelles sont créées à la demande par
+    ``TicketArchive.ensure_partitions`` ; la partition par défaut ne reçoit
+    que ce qui précède leur création.
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        "CREATE TABLE tickets_archive_partitioned (LIKE tickets_archive INCLUDING DEFAULTS) "
+        "PARTITION BY RANGE (created_at)"
+    )
+    schema_editor.execute("DROP TABLE tickets_archive")
+    schema_editor.execute("ALTER TABLE tickets_archive_partitioned RENAME TO tickets_archive")
+    schema_editor.execute("ALTER TABLE tickets_archive ADD PRIMARY KEY (id, created_at)")
+    for name, columns in ARCHIVE_INDEXES.items():
+        schema_editor.execute(f"CREATE INDEX {name} ON tickets_archive {columns}")
+    schema_editor.execute("CREATE TABLE tickets_archive_default PARTITION OF tickets_archive DEFAULT")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tenants", "0009_paymentplan_dunningaction_paymentplaninstallment"),
+        ("users", "0005_add_pending_company_name"),
+        ("queues", "0007_queuekpirollup"),
+        ("customers", "0001_initial"),
+        ("tickets", "0004_ticket_ready_notified_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArchivedTicket",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(editable=False, primary_key=True, serialize=False),
+                ),
+                ("number", models.CharField(max_length=20)),
+                (
+                    "channel",
+                    models.CharField(
+                        choices=[
+                            ("web", "Web"),
+                            ("app", "App"),
+                            ("qr", "QR"),
+                            ("whatsapp", "WhatsApp"),
+                            ("kiosk", "Borne"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("priority", models.IntegerField(default=0)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("en_attente", "En attente"),
+                            ("appele", "Appelé"),
+                            ("en_service", "En service"),
+                            ("pause", "En pause"),
+                            ("transfere", "Transféré"),
+                            ("clos", "Clôturé"),
+                            ("no_show", "No show"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("eta_seconds", models.IntegerField(blank=True, null=True)),
+                ("customer_name", models.CharField(blank=True, max_length=255)),
+                ("customer_phone", models.CharField(blank=True, max_length=32)),
+                ("created_at", models.DateTimeField()),
+                ("updated_at", models.DateTimeField()),
+                ("called_at", models.DateTimeField(blank=True, null=True)),
+                ("started_at", models.DateTimeField(blank=True, null=True)),
+                ("ended_at", models.DateTimeField(blank=True, null=True)),
+                ("ready_notified_at", models.DateTimeField(blank=True, null=True)),
+                ("archived_at", models.DateTimeField()),
+                (
+                    "agent",
+                    models.ForeignKey(
+                        blank=True,
+                        db_constraint=False,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="archived_tickets",
+                        to="users.agentprofile",
+                    ),
+                ),
+                (
+                    "customer",
+                    models.ForeignKey(
+                        blank=True,
+                        db_constraint=False,
+                        db_index=False,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="archived_tickets",
+                        to="customers.customer",
+                    ),
+                ),
+                (
+                    "queue",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="archived_tickets",
+                        to="queues.queue",
+                    ),
+                ),
+                (
+                    "tenant",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="archived_tickets",
+                        to="tenants.tenant",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "tickets_archive",
+                "ordering": ("created_at",),
+                "indexes": [
+                    models.Index(
+                        fields=["tenant", "created_at"], name="tickets_arch_tenant_idx"
+                    ),
+                    models.Index(
+                        fields=["queue", "created_at"], name="tickets_arch_queue_idx"
+                    ),
+                    models.Index(
+                        fields=["customer", "created_at"],
+                        name="tickets_arch_customer_idx",
+                    ),
+                ],
+            },
+        ),
+        migrations.RunPython(partition_archive, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,88 @@
+# Generated by Django 4.2.30 on 2026-10-17 04:37
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+from apps.core.migration_operations import AddIndexConcurrentlyIfSupported, DropFieldIndexConcurrently
+
+
+class Migration(migrations.Migration):
+
+    # Index créés et supprimés avec CONCURRENTLY sur PostgreSQL : hors transaction
+    atomic = False
+
+    dependencies = [
+        ("queues", "0007_queuekpirollup"),
+        ("tickets", "0005_ticket_archive"),
+    ]
+
+    operations = [
+        AddIndexConcurrentlyIfSupported(
+            model_name="ticket",
+            index=models.Index(fields=["status", "ended_at"], name="tickets_status_ended_idx"),
+        ),
+        AddIndexConcurrentlyIfSupported(
+            model_name="ticket",
+            index=models.Index(
+                condition=models.Q(("status", "en_attente")),
+                fields=["queue", "created_at"],
+                name="tickets_waiting_fifo_idx",
+            ),
+        ),
+        AddIndexConcurrentlyIfSupported(
+            model_name="ticket",
+            index=models.Index(
+                condition=models.Q(("status", "en_attente")),
+                fields=["queue", "-priority", "created_at"],
+                name="tickets_waiting_priority_idx",
+            ),
+        ),
+        AddIndexConcurrentlyIfSupported(
+            model_name="ticket",
+            index=models.Index(
+                condition=models.Q(
+                    ("status__in", ["en_attente", "appele", "en_service"])
+                ),
+                fields=["queue", "status", "called_at"],
+                name="tickets_live_idx",
+            ),
+        ),
+        AddIndexConcurrentlyIfSupported(
+            model_name="ticket",
+            index=models.Index(
+                condition=models.Q(("status__in", ["appele", "en_service"])),
+                fields=["agent", "status"],
+                name="tickets_agent_active_idx",
+            ),
+        ),
+        AddIndexConcurrentlyIfSupported(
+            model_name="ticket",
+            index=models.Index(
+                condition=models.Q(("status", "clos")),
+                fields=["queue", "ended_at"],
+                name="tickets_closed_idx",
+            ),
+        ),
+        AddIndexConcurrentlyIfSupported(
+            model_name="ticket",
+            index=models.Index(
+                fields=["queue", "created_at"], name="tickets_queue_created_idx"
+            ),
+        ),
+        AddIndexConcurrentlyIfSupported(
+            model_name="ticket",
+            index=models.Index(
+                fields=["tenant", "created_at"], name="tickets_tenant_created_idx"
+            ),
+        ),
+        DropFieldIndexConcurrently(
+            model_name="ticket",
+            name="queue",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="tickets",
+                to="queues.queue",
+            ),
+        ),
+    ]
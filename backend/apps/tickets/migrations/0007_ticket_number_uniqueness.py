@@ -0,0 +1,36 @@
+# Generated by Django 4.2.30 on 2026-10-17 05:52
+
+from django.db import migrations, models
+
+from apps.core.migration_operations import AddUniqueConstraintConcurrentlyIfSupported
+
+
+class Migration(migrations.Migration):
+
+    # Index unique créé avec CONCURRENTLY sur PostgreSQL : hors transaction
+    atomic = False
+
+    dependencies = [
+        ("tickets", "0006_hot_path_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ticket",
+            name="number_period",
+            field=models.CharField(blank=True, max_length=10, null=True),
+        ),
+        migrations.AddField(
+            model_name="ticketsequence",
+            name="redis_behind",
+            field=models.BooleanField(default=False),
+        ),
+        AddUniqueConstraintConcurrentlyIfSupported(
+            model_name="ticket",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("number_period__isnull", False)),
+                fields=("queue", "number_period", "number"),
+                name="tickets_unique_number",
+            ),
+        ),
+    ]
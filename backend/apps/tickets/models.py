@@ -45,9 +45,13 @@ class Ticket(TenantAwareModel):
     queue = models.ForeignKey(
         "queues.Queue",
         on_delete=models.CASCADE,
+        # Couvert par ``tickets_queue_created_idx`` (queue, created_at)
+        db_index=False,
         related_name="tickets",
     )
     number = models.CharField(max_length=20)
+    # Période de numérotation (``TicketSequence.period``) ; NULL pour les tickets antérieurs
+    number_period = models.CharField(max_length=10, null=True, blank=True)
     channel = models.CharField(max_length=20, choices=CHANNEL_CHOICES)
     priority = models.IntegerField(default=0)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_WAITING)
@@ -73,15 +77,166 @@ class Ticket(TenantAwareModel):
     called_at = models.DateTimeField(null=True, blank=True)
     started_at = models.DateTimeField(null=True, blank=True)
     ended_at = models.DateTimeField(null=True, blank=True)
+    # Notification « votre tour approche » déjà envoyée (apps.notifications.triggers)
+    ready_notified_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         db_table = "tickets"
         ordering = ("created_at",)
+        # Index des chemins chauds ; les index partiels ne couvrent que les
+        # tickets vivants et restent petits quelle que soit la taille de
+        # l'historique. Vérifiés par la commande ``benchmark_query_plans``.
+        indexes = [
+            # Tickets en attente d'une file par ancienneté : FIFO, positions, ETA
+            models.Index(
+                fields=["queue", "created_at"],
+                condition=models.Q(status="en_attente"),
+                name="tickets_waiting_fifo_idx",
+            ),
+            # Tickets en attente dans l'ordre de l'algorithme par priorité
+            models.Index(
+                fields=["queue", "-priority", "created_at"],
+                condition=models.Q(status="en_attente"),
+                name="tickets_waiting_priority_idx",
+            ),
+            # Compteurs par statut des tickets vivants (instantanés, capacité, écrans)
+            models.Index(
+                fields=["queue", "status", "called_at"],
+                condition=models.Q(status__in=["en_attente", "appele", "en_service"]),
+                name="tickets_live_idx",
+            ),
+            # Ticket actif d'un agent (``call_next``)
+            models.Index(
+                fields=["agent", "status"],
+                condition=models.Q(status__in=["appele", "en_service"]),
+                name="tickets_agent_active_idx",
+            ),
+            # Derniers tickets clôturés d'une file (temps de service, attente du jour)
+            models.Index(
+                fields=["queue", "ended_at"],
+                condition=models.Q(status="clos"),
+                name="tickets_closed_idx",
+            ),
+            # Historique d'une file (prédictions, optimiseur) ; sert aussi d'index de la clé ``queue``
+            models.Index(fields=["queue", "created_at"], name="tickets_queue_created_idx"),
+            # Quotas mensuels d'un tenant
+            models.Index(fields=["tenant", "created_at"], name="tickets_tenant_created_idx"),
+            # Sélection des tickets à archiver (apps.tickets.archive)
+            models.Index(fields=["status", "ended_at"], name="tickets_status_ended_idx"),
+        ]
+        constraints = [
+            # Un numéro n'est émis qu'une fois par file et par période : un doublon échoue
+            models.UniqueConstraint(
+                fields=["queue", "number_period", "number"],
+                condition=models.Q(number_period__isnull=False),
+                name="tickets_unique_number",
+            ),
+        ]
 
     def __str__(self) -> str:  # pragma: no cover - affichage admin
         return f"Ticket {self.number}"
 
 
+class ArchivedTicket(models.Model):
+    """
+    Ticket terminé déplacé hors de la table ``tickets`` (voir ``apps.tickets.archive``).
+
+    Mêmes colonnes que ``Ticket`` : ``created_at``/``updated_at`` sont copiés
+    tels quels (pas d'``auto_now``). Sur PostgreSQL la table est partitionnée
+    par mois sur ``created_at`` ; les clés étrangères ne sont pas contraintes
+    en base pour que les partitions se détachent sans verrouiller les tables
+    référencées.
+    """
+
+    id = models.UUIDField(primary_key=True, editable=False)
+    tenant = models.ForeignKey(
+        "tenants.Tenant",
+        on_delete=models.CASCADE,
+        db_constraint=False,
+        # Couvert par les index composites (…, created_at)
+        db_index=False,
+        related_name="archived_tickets",
+    )
+    queue = models.ForeignKey(
+        "queues.Queue",
+        on_delete=models.CASCADE,
+        db_constraint=False,
+        # Couvert par les index composites (…, created_at)
+        db_index=False,
+        related_name="archived_tickets",
+    )
+    number = models.CharField(max_length=20)
+    channel = models.CharField(max_length=20, choices=Ticket.CHANNEL_CHOICES)
+    priority = models.IntegerField(default=0)
+    status = models.CharField(max_length=20, choices=Ticket.STATUS_CHOICES)
+    eta_seconds = models.IntegerField(null=True, blank=True)
+    agent = models.ForeignKey(
+        "users.AgentProfile",
+        on_delete=models.SET_NULL,
+        db_constraint=False,
+        null=True,
+        blank=True,
+        related_name="archived_tickets",
+    )
+    customer = models.ForeignKey(
+        "customers.Customer",
+        on_delete=models.SET_NULL,
+        db_constraint=False,
+        # Couvert par les index composites (…, created_at)
+        db_index=False,
+        null=True,
+        blank=True,
+        related_name="archived_tickets",
+    )
+    customer_name = models.CharField(max_length=255, blank=True)
+    customer_phone = models.CharField(max_length=32, blank=True)
+
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    called_at = models.DateTimeField(null=True, blank=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    ended_at = models.DateTimeField(null=True, blank=True)
+    ready_notified_at = models.DateTimeField(null=True, blank=True)
+    archived_at = models.DateTimeField()
+
+    class Meta:
+        db_table = "tickets_archive"
+        ordering = ("created_at",)
+        indexes = [
+            models.Index(fields=["tenant", "created_at"], name="tickets_arch_tenant_idx"),
+            models.Index(fields=["queue", "created_at"], name="tickets_arch_queue_idx"),
+            models.Index(fields=["customer", "created_at"], name="tickets_arch_customer_idx"),
+        ]
+
+    def __str__(self) -> str:  # pragma: no cover - affichage admin
+        return f"Ticket archivé {self.number}"
+
+
+class TicketSequence(TenantAwareModel):
+    """Compteur de numérotation des tickets d'une file pour une période."""
+
+    PERIOD_ALL = ""
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    queue = models.ForeignKey(
+        "queues.Queue",
+        on_delete=models.CASCADE,
+        related_name="ticket_sequences",
+    )
+    # Vide si la numérotation ne se réinitialise jamais, sinon date ISO (YYYY-MM-DD)
+    period = models.CharField(max_length=10, blank=True, default=PERIOD_ALL)
+    last_value = models.PositiveBigIntegerField(default=0)
+    # Le repli SQL a émis des numéros que le compteur Redis n'a pas vus
+    redis_behind = models.BooleanField(default=False)
+
+    class Meta:
+        db_table = "ticket_sequences"
+        unique_together = ("queue", "period")
+
+    def __str__(self) -> str:  # pragma: no cover - affichage admin
+        return f"{self.queue_id} [{self.period or 'global'}] = {self.last_value}"
+
+
 class Appointment(TenantAwareModel):
     """Rendez-vous planifié."""
 
@@ -0,0 +1,187 @@
+"""Allocation des numéros de tickets par file.
+
+Chemin nominal : un ``INCR`` Redis atomique par ticket (aucun verrou SQL).
+Repli : ligne de compteur ``TicketSequence`` verrouillée en base.
+
+Les deux chemins partagent un plancher pour ne jamais réémettre un numéro :
+
+- un compteur Redis absent repart du compteur SQL et du dernier ticket émis ;
+- le repli SQL repart du dernier ticket émis quand sa ligne est créée ou quand
+  Redis, configuré mais en échec, a pu émettre au-delà du compteur SQL. Il
+  marque alors la ligne (``redis_behind``) : tant que la marque est posée, le
+  chemin Redis part au moins du compteur SQL, puis la lève.
+
+Un doublon qui échapperait à ces planchers (repli non encore commité) est
+rejeté par la contrainte ``tickets_unique_number`` (file, période, numéro).
+"""
+
+from __future__ import annotations
+
+import logging
+from datetime import datetime, time
+from typing import TYPE_CHECKING
+
+from django.db import transaction
+from django.utils import timezone
+
+from apps.core.redis_client import get_redis_client
+
+from .models import Ticket, TicketSequence
+
+if TYPE_CHECKING:
+    from apps.queues.models import Queue
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "sq:ticketseq"
+
+# Durée de vie d'un compteur Redis quotidien (le lendemain il n'est plus utilisé)
+DAILY_KEY_TTL = 2 * 24 * 3600
+
+# KEYS: compteur — ARGV: plancher, amorçage autorisé (0/1), TTL (0 = aucun)
+_INCR_SCRIPT = """
+local current = tonumber(redis.call('GET', KEYS[1]))
+if not current then
+    if ARGV[2] == '0' then
+        return -1
+    end
+    current = 0
+end
+local floor = tonumber(ARGV[1])
+if current < floor then
+    current = floor
+end
+current = current + 1
+if tonumber(ARGV[3]) > 0 then
+    redis.call('SET', KEYS[1], current, 'EX', ARGV[3])
+else
+    redis.call('SET', KEYS[1], current)
+end
+return current
+"""
+
+
+class TicketNumberSequence:
+    """Générateur de numéros de tickets unique par file et par période."""
+
+    _incr_script = None
+
+    @staticmethod
+    def format_number(queue_id, value: int) -> str:
+        """Formate un numéro humain : préfixe de la file + compteur sur 4 chiffres."""
+        prefix = str(queue_id).split("-")[0].upper()
+        return f"{prefix}-{value:04d}"
+
+    @staticmethod
+    def next_number(queue: Queue) -> str:
+        """Alloue et formate le prochain numéro de ticket de la file."""
+        return TicketNumberSequence.allocate_number(queue)[0]
+
+    @staticmethod
+    def allocate_number(queue: Queue) -> tuple[str, str]:
+        """Alloue le prochain numéro formaté et sa période (``Ticket.number_period``)."""
+        period = TicketNumberSequence._current_period(queue)
+        value = TicketNumberSequence._allocate(queue, period)
+        return TicketNumberSequence.format_number(queue.id, value), period
+
+    @staticmethod
+    def allocate(queue: Queue) -> int:
+        """Alloue la prochaine valeur du compteur de la file (temps constant)."""
+        return TicketNumberSequence._allocate(queue, TicketNumberSequence._current_period(queue))
+
+    @staticmethod
+    def _allocate(queue: Queue, period: str) -> int:
+        value = TicketNumberSequence._allocate_redis(queue, period)
+        if value is not None:
+            return value
+        # Redis configuré mais en échec : il a pu émettre au-delà du compteur SQL
+        return TicketNumberSequence._allocate_db(queue, period, redis_configured=get_redis_client() is not None)
+
+    @staticmethod
+    def _redis_key(queue: Queue, period: str) -> str:
+        return f"{KEY_PREFIX}:{queue.id}:{period or 'all'}"
+
+    @staticmethod
+    def _current_period(queue: Queue) -> str:
+        from apps.queues.models import Queue
+
+        if queue.ticket_number_reset == Queue.NUMBER_RESET_DAILY:
+            return timezone.localdate().isoformat()
+        return TicketSequence.PERIOD_ALL
+
+    @staticmethod
+    def _stored_state(queue: Queue, period: str) -> tuple[int, bool]:
+        """Compteur SQL et marque ``redis_behind`` de la période (0, False sans ligne)."""
+        state = (
+            TicketSequence.objects.filter(queue=queue, period=period)
+            .values_list("last_value", "redis_behind")
+            .first()
+        )
+        return state or (0, False)
+
+    @staticmethod
+    def _last_issued_value(queue: Queue, period: str) -> int:
+        """Valeur portée par le dernier ticket émis sur la période (réamorçage)."""
+        tickets = Ticket.objects.filter(queue=queue)
+        if period:
+            day_start = timezone.make_aware(datetime.combine(datetime.fromisoformat(period).date(), time.min))
+            tickets = tickets.filter(created_at__gte=day_start)
+
+        last_number = tickets.order_by("-created_at").values_list("number", flat=True).first()
+        if not last_number:
+            return 0
+        try:
+            return int(last_number.rsplit("-", 1)[-1])
+        except ValueError:
+            return tickets.count()
+
+    @staticmethod
+    def _allocate_redis(queue: Queue, period: str) -> int | None:
+        client = get_redis_client()
+        if client is None:
+            return None
+
+        key = TicketNumberSequence._redis_key(queue, period)
+        ttl = DAILY_KEY_TTL if period else 0
+        stored, redis_behind = TicketNumberSequence._stored_state(queue, period)
+        # Plancher seulement si le repli SQL a émis des numéros depuis
+        floor = stored if redis_behind else 0
+
+        try:
+            if TicketNumberSequence._incr_script is None:
+                TicketNumberSequence._incr_script = client.register_script(_INCR_SCRIPT)
+            value = int(TicketNumberSequence._incr_script(keys=[key], args=[floor, 0, ttl]))
+            if value < 0:
+                # Compteur absent : réamorçage depuis la base
+                floor = max(stored, TicketNumberSequence._last_issued_value(queue, period))
+                value = int(TicketNumberSequence._incr_script(keys=[key], args=[floor, 1, ttl]))
+        except Exception:  # noqa: BLE001 - repli base de données
+            logger.warning("Séquence tickets: Redis indisponible pour %s", queue.id, exc_info=True)
+            return None
+
+        if redis_behind:
+            # Redis a rattrapé le compteur SQL (sauf nouveau repli entre-temps)
+            TicketSequence.objects.filter(
+                queue=queue, period=period, redis_behind=True, last_value__lt=value
+            ).update(redis_behind=False)
+        return value
+
+    @staticmethod
+    def _allocate_db(queue: Queue, period: str, redis_configured: bool = False) -> int:
+        with transaction.atomic():
+            sequence, created = TicketSequence.objects.get_or_create(
+                queue=queue,
+                period=period,
+                defaults={"tenant_id": queue.tenant_id},
+            )
+            sequence = TicketSequence.objects.select_for_update().get(pk=sequence.pk)
+
+            value = sequence.last_value
+            if created or redis_configured:
+                # Données existantes, ou numéros émis par Redis au-delà du compteur SQL
+                value = max(value, TicketNumberSequence._last_issued_value(queue, period))
+            value += 1
+            sequence.last_value = value
+            sequence.redis_behind = sequence.redis_behind or redis_configured
+            sequence.save(update_fields=["last_value", "redis_behind", "updated_at"])
+        return value
@@ -4,11 +4,12 @@ from rest_framework import serializers
 
 from apps.customers.models import Customer
 from apps.customers.serializers import CustomerSerializer
-from apps.queues.models import Service
+from apps.queues.models import Queue, Service
 from apps.queues.serializers import QueueSerializer
 from apps.users.serializers import AgentProfileSerializer
 
 from .models import Appointment, Ticket
+from .sequences import TicketNumberSequence
 
 
 class TicketSerializer(serializers.ModelSerializer):
@@ -80,7 +81,8 @@ class TicketSerializer(serializers.ModelSerializer):
             validated_data.setdefault("customer_phone", customer.phone)
 
         validated_data["queue_id"] = queue_id
-        validated_data.setdefault("number", self._generate_ticket_number(queue_id))
+        if not validated_data.get("number"):
+            validated_data["number"], validated_data["number_period"] = self._generate_ticket_number(tenant, queue_id)
         validated_data["tenant"] = tenant
         return super().create(validated_data)
 
@@ -107,10 +109,12 @@ class TicketSerializer(serializers.ModelSerializer):
         except Customer.DoesNotExist as exc:  # pragma: no cover - validation
             raise serializers.ValidationError({"customer_id": "Client introuvable pour ce tenant."}) from exc
 
-    def _generate_ticket_number(self, queue_id):
-        prefix = str(queue_id).split("-")[0].upper()
-        count = Ticket.objects.filter(queue_id=queue_id).count() + 1
-        return f"{prefix}-{count:04d}"
+    def _generate_ticket_number(self, tenant, queue_id):
+        try:
+            queue = Queue.objects.only("id", "tenant_id", "ticket_number_reset").get(id=queue_id, tenant=tenant)
+        except Queue.DoesNotExist as exc:
+            raise serializers.ValidationError({"queue_id": "File introuvable pour ce tenant."}) from exc
+        return TicketNumberSequence.allocate_number(queue)
 
 
 class AppointmentSerializer(serializers.ModelSerializer):
@@ -0,0 +1,122 @@
+"""Tests pour l'archivage des tickets terminés."""
+
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+from model_bakery import baker
+
+from apps.feedback.models import Feedback
+from apps.notifications.models import Notification
+from apps.queues.analytics_advanced import AdvancedAnalytics
+from apps.queues.models import QueueKpiRollup
+from apps.queues.rollups import KpiRollups
+from apps.tickets.archive import TicketArchive
+from apps.tickets.models import ArchivedTicket, Ticket
+
+
+def make_ticket(tenant, queue, customer=None, days_ago=120, status=Ticket.STATUS_CLOSED, **fields):
+    """Ticket terminé il y a ``days_ago`` jours (dates forcées par ``update``)."""
+    ticket = baker.make(Ticket, tenant=tenant, queue=queue, customer=customer, status=status, **fields)
+    created = timezone.now() - timedelta(days=days_ago, minutes=30)
+    Ticket.objects.filter(id=ticket.id).update(
+        created_at=created,
+        started_at=created + timedelta(minutes=10),
+        ended_at=created + timedelta(minutes=20) if status != Ticket.STATUS_WAITING else None,
+    )
+    ticket.refresh_from_db()
+    return ticket
+
+
+@pytest.mark.django_db
+class TestTicketArchive:
+    """Tests pour TicketArchive."""
+
+    def test_moves_only_old_finished_tickets(self, tenant, queue, customer):
+        """Test que seuls les tickets clos ou absents au-delà du délai sont déplacés."""
+        closed = make_ticket(tenant, queue, customer, number="A-001")
+        no_show = make_ticket(tenant, queue, customer, status=Ticket.STATUS_NO_SHOW)
+        recent = make_ticket(tenant, queue, customer, days_ago=10)
+        waiting = make_ticket(tenant, queue, customer, status=Ticket.STATUS_WAITING)
+
+        result = TicketArchive.archive(cutoff=TicketArchive.cutoff(90))
+
+        assert result["archived"] == 2 and result["complete"]
+        assert set(Ticket.objects.values_list("id", flat=True)) == {recent.id, waiting.id}
+        archived = ArchivedTicket.objects.get(id=closed.id)
+        assert set(ArchivedTicket.objects.values_list("id", flat=True)) == {closed.id, no_show.id}
+        assert (archived.number, archived.created_at, archived.ended_at) == (
+            "A-001",
+            closed.created_at,
+            closed.ended_at,
+        )
+        assert archived.customer_id == customer.id and archived.archived_at is not None
+
+    def test_batches_are_resumable(self, tenant, queue):
+        """Test qu'une exécution interrompue reprend avec les tickets restants."""
+        for _ in range(5):
+            make_ticket(tenant, queue)
+
+        first = TicketArchive.archive(chunk_size=2, max_batches=1)
+        assert (first["archived"], first["complete"]) == (2, False)
+        assert Ticket.objects.count() == 3
+
+        second = TicketArchive.archive(chunk_size=2)
+        assert (second["archived"], second["batches"], second["complete"]) == (3, 2, True)
+        assert ArchivedTicket.objects.count() == 5 and not Ticket.objects.exists()
+
+    def test_related_rows_keep_ticket_id(self, tenant, queue, customer):
+        """Test que avis et notifications gardent la référence au ticket archivé."""
+        ticket = make_ticket(tenant, queue, customer)
+        feedback = baker.make(Feedback, tenant=tenant, ticket=ticket)
+        notification = baker.make(Notification, tenant=tenant, ticket=ticket)
+
+        TicketArchive.archive()
+
+        assert Feedback.objects.get(id=feedback.id).ticket_id == ticket.id
+        assert Notification.objects.get(id=notification.id).ticket_id == ticket.id
+
+    def test_csat_counts_archived_tickets(self, tenant, queue, customer):
+        """Test que la satisfaction d'une file inclut les avis de tickets archivés."""
+        ticket = make_ticket(tenant, queue, customer)
+        baker.make(Feedback, tenant=tenant, ticket=ticket, csat_score=5)
+
+        TicketArchive.archive()
+
+        csat = AdvancedAnalytics.get_csat_by_queue(queue)
+        assert csat["total_feedback"] == 1
+        assert csat["average_csat"] == 5
+
+    def test_rollup_rebuild_reads_archive(self, tenant, queue):
+        """Test que la reconstruction des agrégats compte les tickets archivés."""
+        make_ticket(tenant, queue)
+        make_ticket(tenant, queue, days_ago=1)
+        TicketArchive.archive()
+
+        KpiRollups.rebuild(tenant=tenant)
+
+        totals = KpiRollups.totals(QueueKpiRollup.objects.filter(queue=queue))
+        assert totals["tickets_count"] == 2
+        assert totals["closed_count"] == 2
+
+    def test_history_spans_hot_and_archived(self, tenant, queue, customer):
+        """Test que l'historique d'un client réunit tickets chauds et archivés."""
+        old = make_ticket(tenant, queue, customer)
+        recent = make_ticket(tenant, queue, customer, days_ago=1)
+        make_ticket(tenant, queue)
+        TicketArchive.archive()
+
+        history = list(TicketArchive.history(tenant=tenant, customer=customer).order_by("-created_at"))
+
+        assert [row["id"] for row in history] == [recent.id, old.id]
+        assert history[0]["archived_at"] is None and history[1]["archived_at"] is not None
+        assert TicketArchive.count(tenant=tenant, customer=customer) == 2
+
+    def test_command_dry_run_moves_nothing(self, tenant, queue):
+        """Test que --dry-run compte sans déplacer."""
+        make_ticket(tenant, queue)
+
+        call_command("archive_tickets", "--dry-run")
+
+        assert Ticket.objects.count() == 1 and not ArchivedTicket.objects.exists()
@@ -0,0 +1,117 @@
+"""Tests pour l'allocation des numéros de tickets."""
+
+import pytest
+from django.db import IntegrityError, transaction
+from freezegun import freeze_time
+from model_bakery import baker
+
+from apps.core.redis_client import get_redis_client, reset_redis_client
+from apps.queues.models import Queue
+from apps.tickets.models import Ticket, TicketSequence
+from apps.tickets.sequences import TicketNumberSequence
+
+
+@pytest.fixture
+def redis_sequences(settings):
+    """Compteurs sur un Redis local (base 15), test ignoré s'il est injoignable."""
+    settings.REDIS_URL = "redis://localhost:6379/15"
+    reset_redis_client()
+    client = get_redis_client()
+    try:
+        client.flushdb()
+    except Exception:  # noqa: BLE001
+        reset_redis_client()
+        pytest.skip("Redis local indisponible")
+    TicketNumberSequence._incr_script = None
+    yield client
+    client.flushdb()
+    TicketNumberSequence._incr_script = None
+    reset_redis_client()
+
+
+@pytest.mark.django_db
+class TestTicketNumberSequence:
+    """Tests pour TicketNumberSequence (repli base de données)."""
+
+    def test_allocations_are_sequential(self, queue):
+        """Test que les numéros se suivent sans trou ni doublon."""
+        values = [TicketNumberSequence.allocate(queue) for _ in range(5)]
+
+        assert values == [1, 2, 3, 4, 5]
+        assert TicketSequence.objects.get(queue=queue).last_value == 5
+
+    def test_reseeds_only_on_creation(self, queue, tenant, django_assert_num_queries):
+        """Test que seule la première allocation lit l'historique des tickets."""
+        TicketNumberSequence.allocate(queue)
+        baker.make(Ticket, tenant=tenant, queue=queue, number=TicketNumberSequence.format_number(queue.id, 99))
+
+        # get_or_create, verrou, mise à jour (savepoints compris)
+        with django_assert_num_queries(5):
+            assert TicketNumberSequence.allocate(queue) == 2
+
+    def test_number_format_uses_queue_prefix(self, queue):
+        """Test le format humain du numéro."""
+        prefix = str(queue.id).split("-")[0].upper()
+
+        assert TicketNumberSequence.next_number(queue) == f"{prefix}-0001"
+
+    def test_continues_after_existing_tickets(self, queue, tenant):
+        """Test que le compteur repart du dernier ticket émis (données existantes)."""
+        baker.make(Ticket, tenant=tenant, queue=queue, number=TicketNumberSequence.format_number(queue.id, 41))
+
+        assert TicketNumberSequence.allocate(queue) == 42
+
+    def test_daily_reset(self, queue, tenant):
+        """Test la remise à zéro quotidienne."""
+        queue.ticket_number_reset = Queue.NUMBER_RESET_DAILY
+        queue.save()
+
+        with freeze_time("2025-01-01 09:00:00"):
+            assert TicketNumberSequence.allocate(queue) == 1
+            assert TicketNumberSequence.allocate(queue) == 2
+
+        with freeze_time("2025-01-02 09:00:00"):
+            assert TicketNumberSequence.allocate(queue) == 1
+
+        assert TicketSequence.objects.filter(queue=queue).count() == 2
+
+
+@pytest.mark.django_db
+class TestTicketNumberSequenceRedis:
+    """Tests pour TicketNumberSequence (chemin Redis)."""
+
+    def test_redis_allocations_only_read_sequence_row(self, queue, redis_sequences, django_assert_num_queries):
+        """Test qu'un compteur Redis amorcé alloue sans lire l'historique des tickets."""
+        assert TicketNumberSequence.allocate(queue) == 1
+
+        # Lecture de la marque ``redis_behind`` seulement
+        with django_assert_num_queries(1):
+            assert TicketNumberSequence.allocate(queue) == 2
+
+    def test_redis_continues_after_outage_numbers(self, queue, tenant, redis_sequences, mocker):
+        """Test qu'après une panne Redis (compteur non supprimé), Redis reprend après les numéros du repli."""
+        for _ in range(3):
+            number, period = TicketNumberSequence.allocate_number(queue)
+            baker.make(Ticket, tenant=tenant, queue=queue, number=number, number_period=period)
+
+        # Redis injoignable : le script et la suppression échouent, le compteur (3) reste en place
+        redis_error = ConnectionError("Redis indisponible")
+        mocker.patch.object(TicketNumberSequence, "_incr_script", side_effect=redis_error)
+        mocker.patch.object(redis_sequences, "delete", side_effect=redis_error)
+        assert [TicketNumberSequence.allocate(queue) for _ in range(2)] == [4, 5]
+        assert TicketSequence.objects.get(queue=queue).redis_behind is True
+        mocker.stopall()
+
+        key = TicketNumberSequence._redis_key(queue, TicketSequence.PERIOD_ALL)
+        assert redis_sequences.get(key) == "3"
+        assert TicketNumberSequence.allocate(queue) == 6
+        assert TicketSequence.objects.get(queue=queue).redis_behind is False
+        assert TicketNumberSequence.allocate(queue) == 7
+
+    def test_duplicate_number_is_rejected(self, queue, tenant):
+        """Test qu'un numéro émis deux fois sur la même période échoue."""
+        number, period = TicketNumberSequence.allocate_number(queue)
+        baker.make(Ticket, tenant=tenant, queue=queue, number=number, number_period=period)
+
+        with pytest.raises(IntegrityError), transaction.atomic():
+            baker.make(Ticket, tenant=tenant, queue=queue, number=number, number_period=period)
@@ -1,7 +1,5 @@
 from __future__ import annotations
 
-from asgiref.sync import async_to_sync
-from channels.layers import get_channel_layer
 from django.utils import timezone
 from django_filters import rest_framework as filters
 from rest_framework import viewsets
@@ -9,6 +7,9 @@ from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
+from apps.core.pagination import KeysetPagination
+from apps.core.realtime import RealtimeBroadcaster
+
 from .models import Appointment, Ticket
 from .serializers import AppointmentSerializer, TicketSerializer
 from .tasks import calculate_eta
@@ -49,6 +50,7 @@ class TicketViewSet(viewsets.ModelViewSet):
     filterset_class = TicketFilter
     ordering_fields = ("created_at", "priority", "called_at")
     search_fields = ("number", "customer_name", "customer_phone")
+    pagination_class = KeysetPagination
     subscription_resource_type = "ticket"  # Pour vérification de quota
 
     def get_permissions(self):  # type: ignore[override]
@@ -68,18 +70,24 @@ class TicketViewSet(viewsets.ModelViewSet):
         )
 
     def perform_create(self, serializer):  # type: ignore[override]
-        # Double vérification de sécurité
+        # Réservation atomique du quota (la permission ne fait qu'une lecture)
         from apps.core.subscription_enforcement import SubscriptionEnforcement
         from rest_framework.exceptions import PermissionDenied
 
-        if not SubscriptionEnforcement.can_create_ticket(self.request.tenant):
+        if not SubscriptionEnforcement.claim("ticket", self.request.tenant):
             raise PermissionDenied(
                 SubscriptionEnforcement.get_quota_error_message(
                     "ticket", self.request.tenant
                 )
             )
 
-        ticket = serializer.save(tenant=self.request.tenant)
+        # Si la transaction de la requête est annulée après save(), la réservation
+        # n'est jamais consommée : elle expire (PENDING_TIMEOUT) et est décomptée
+        try:
+            ticket = serializer.save(tenant=self.request.tenant)
+        except Exception:
+            SubscriptionEnforcement.release("ticket", self.request.tenant)
+            raise
         calculate_eta.delay(str(ticket.id))
         self._broadcast_ticket_event(ticket, event_type="ticket.created")
 
@@ -211,74 +219,7 @@ class TicketViewSet(viewsets.ModelViewSet):
             return Response({"error": str(e)}, status=400)
 
     def _broadcast_ticket_event(self, ticket: Ticket, event_type: str) -> None:
-        channel_layer = get_channel_layer()
-        if channel_layer is None:
-            return
-
-        payload = {
-            "event": event_type,
-            "ticket_id": str(ticket.id),
-            "queue_id": str(ticket.queue_id),
-            "status": ticket.status,
-            "number": ticket.number,
-        }
-
-        # Sanitize group names: ensure valid characters and length < 100
-        # Valid characters: ASCII alphanumerics, hyphens, underscores, periods only
-        # Remove colons and other special characters, use periods or hyphens as separators
-        tenant_slug = ticket.tenant.slug.replace(" ", "-")
-        queue_id = str(ticket.queue_id)  # UUIDs are fine with hyphens
-        ticket_id = str(ticket.id)
-
-        queue_group = f"queue.{tenant_slug}.{queue_id}"
-        ticket_group = f"ticket.{tenant_slug}.{ticket_id}"
-
-        async_to_sync(channel_layer.group_send)(
-            queue_group,
-            {
-                "type": "queue_updated",
-                "payload": payload,
-            },
-        )
-        async_to_sync(channel_layer.group_send)(
-            ticket_group,
-            {
-                "type": "ticket_updated",
-                "payload": payload,
-            },
-        )
-
-        # If ticket is called, broadcast to all displays showing this queue
-        if event_type == "ticket.called":
-            from apps.displays.models import Display
-            displays = Display.objects.filter(
-                tenant=ticket.tenant,
-                queues=ticket.queue,
-                is_active=True
-            )
-
-            # Build ticket data for display
-            ticket_data = {
-                "id": str(ticket.id),
-                "number": ticket.number,
-                "queue_name": ticket.queue.name,
-                "queue_id": str(ticket.queue_id),
-                "status": ticket.status,
-                "called_at": ticket.called_at.isoformat() if ticket.called_at else None,
-                "agent_name": f"{ticket.agent.user.first_name} {ticket.agent.user.last_name}" if ticket.agent else None,
-                "counter": ticket.agent.counter_number if ticket.agent and ticket.agent.counter_number else None,
-            }
-
-            # Send to each display
-            for display in displays:
-                display_group = f"display_{tenant_slug}_{str(display.id)}"
-                async_to_sync(channel_layer.group_send)(
-                    display_group,
-                    {
-                        "type": "ticket_called",
-                        "ticket": ticket_data,
-                    },
-                )
+        RealtimeBroadcaster.ticket_event(ticket, event_type)
 
 
 class AppointmentViewSet(viewsets.ModelViewSet):
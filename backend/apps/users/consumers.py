@@ -2,6 +2,8 @@ from __future__ import annotations
 
 from channels.generic.websocket import AsyncJsonWebsocketConsumer
 
+from apps.core.realtime import RealtimeGroups
+
 
 class AgentConsumer(AsyncJsonWebsocketConsumer):
     """Flux temps réel pour l'état d'un agent."""
@@ -9,7 +11,7 @@ class AgentConsumer(AsyncJsonWebsocketConsumer):
     async def connect(self):  # pragma: no cover
         tenant_slug = self.scope["url_route"]["kwargs"].get("tenant_slug")
         agent_id = self.scope["url_route"]["kwargs"].get("agent_id")
-        self.group_name = f"agent:{tenant_slug}:{agent_id}"
+        self.group_name = RealtimeGroups.agent(tenant_slug, agent_id)
         await self.channel_layer.group_add(self.group_name, self.channel_name)
         await self.accept()
 
@@ -1,7 +1,5 @@
 from __future__ import annotations
 
-from asgiref.sync import async_to_sync
-from channels.layers import get_channel_layer
 from django.shortcuts import get_object_or_404
 from drf_spectacular.utils import extend_schema, extend_schema_view
 from rest_framework import status, viewsets
@@ -11,6 +9,7 @@ from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 
 from apps.core.permissions import HasScope, IsAgent, IsTenantMember, Scopes
+from apps.core.realtime import RealtimeBroadcaster
 from apps.queues.models import Queue
 from apps.queues.services import QueueService
 from apps.tenants.models import TenantMembership
@@ -74,13 +73,10 @@ class AgentStatusViewSet(viewsets.ViewSet):
     @action(detail=False, methods=["post"], permission_classes=[IsAuthenticated])
     def call_next(self, request, tenant_slug=None):
         """Agent appelle le prochain ticket d'une file."""
-        print(f"[DEBUG call_next] User: {request.user.email}, Authenticated: {request.user.is_authenticated}")
-        print(f"[DEBUG call_next] Tenant: {getattr(request, 'tenant', None)}")
         queue_id = request.data.get("queue_id")
 
         # Si aucun queue_id n'est fourni, utiliser la première file active
         if not queue_id:
-            from apps.queues.models import Queue
             queue = Queue.objects.filter(tenant=request.tenant, status='active').first()
             if not queue:
                 return Response(
@@ -100,6 +96,8 @@ class AgentStatusViewSet(viewsets.ViewSet):
                     status=status.HTTP_404_NOT_FOUND,
                 )
 
+            RealtimeBroadcaster.ticket_event(ticket, "ticket.called")
+
             from apps.tickets.serializers import TicketSerializer
 
             return Response(TicketSerializer(ticket).data)
@@ -126,26 +124,9 @@ class AgentStatusViewSet(viewsets.ViewSet):
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
     def _broadcast_status(self, profile: AgentProfile) -> None:
-        channel_layer = get_channel_layer()
-        if channel_layer is None:
-            return
-        membership = profile.user.tenant_memberships.filter(is_active=True).first()
+        membership = profile.user.tenant_memberships.filter(is_active=True).select_related("tenant").first()
         tenant_slug = membership.tenant.slug if membership else "global"
-        # Sanitize group name: replace colons with periods, ensure valid characters
-        tenant_slug_clean = tenant_slug.replace(":", ".").replace(" ", "-")
-        user_id_clean = str(profile.user_id).replace(":", ".")
-
-        async_to_sync(channel_layer.group_send)(
-            f"agent.{tenant_slug_clean}.{user_id_clean}",
-            {
-                "type": "status_updated",
-                "payload": {
-                    "agent_id": str(profile.user_id),
-                    "status": profile.current_status,
-                    "updated_at": profile.status_updated_at.isoformat(),
-                },
-            },
-        )
+        RealtimeBroadcaster.agent_status(profile, tenant_slug)
 
 
 @extend_schema_view(
@@ -36,6 +36,10 @@ if ENV_FILE.exists():
 
 DEBUG = env("DEBUG")
 SECRET_KEY = env("SECRET_KEY")
+# Clés de chiffrement des données sensibles ("id=secret", la première chiffre,
+# les suivantes ne font que déchiffrer). Vide : clé "v1" dérivée de SECRET_KEY.
+ENCRYPTION_KEYS = env.list("ENCRYPTION_KEYS", default=[])
+ENCRYPTION_SALT = env("ENCRYPTION_SALT", default="smartqueue-encryption-salt")
 # ALLOWED_HOSTS est maintenant défini plus bas avec la configuration WebSocket
 
 INSTALLED_APPS = [
@@ -79,6 +83,8 @@ AUTHENTICATION_BACKENDS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    # Routage primaire/réplica : avant tout middleware accédant à la base
+    "apps.core.middleware.ReplicaPinningMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -127,10 +133,35 @@ if replica_url := env("DATABASE_REPLICA_URL"):
     DATABASES["replica"] = env.db("DATABASE_REPLICA_URL")
     DATABASES["default"]["OPTIONS"] = {"options": "-c default_transaction_isolation=read committed"}
     DATABASES["replica"]["ROLE"] = "replica"
+    # Lectures seules : pas de transaction ouverte sur le réplica à chaque requête
+    DATABASES["replica"]["ATOMIC_REQUESTS"] = False
 
 for db_config in DATABASES.values():
     db_config.setdefault("ATOMIC_REQUESTS", True)
 
+# Lectures en lecture seule (analytics, listes publiques, écrans) sur le réplica
+DATABASE_ROUTERS = ["apps.core.db_router.ReplicaRouter"]
+REPLICA_READS_ENABLED = env.bool("REPLICA_READS_ENABLED", default=True)
+# Après une écriture, lectures sur la primaire pendant cette fenêtre
+REPLICA_PIN_SECONDS = env.float("REPLICA_PIN_SECONDS", default=5)
+# Retard de réplication max toléré, et fréquence de vérification par processus
+REPLICA_MAX_LAG_SECONDS = env.float("REPLICA_MAX_LAG_SECONDS", default=10)
+REPLICA_HEALTH_CHECK_SECONDS = env.float("REPLICA_HEALTH_CHECK_SECONDS", default=5)
+
+REDIS_URL = env("REDIS_URL")
+# Délai max (secondes) des appels Redis directs avant repli sur la base
+REDIS_SOCKET_TIMEOUT = env.float("REDIS_SOCKET_TIMEOUT", default=0.5)
+# Rate limiting : délai Redis max avant repli en mémoire, puis durée du repli
+RATE_LIMIT_REDIS_TIMEOUT = env.float("RATE_LIMIT_REDIS_TIMEOUT", default=0.05)
+RATE_LIMIT_REDIS_RETRY_SECONDS = env.int("RATE_LIMIT_REDIS_RETRY_SECONDS", default=5)
+# Cache tenant / souscription / membership : cache partagé puis LRU du processus
+TENANT_CACHE_TIMEOUT = env.int("TENANT_CACHE_TIMEOUT", default=60)
+TENANT_CACHE_LOCAL_TIMEOUT = env.float("TENANT_CACHE_LOCAL_TIMEOUT", default=5)
+TENANT_CACHE_LOCAL_SIZE = env.int("TENANT_CACHE_LOCAL_SIZE", default=1024)
+# Instantané des KPI plateforme (super-admin) : rafraîchissement et péremption
+PLATFORM_KPI_REFRESH_SECONDS = env.int("PLATFORM_KPI_REFRESH_SECONDS", default=300)
+PLATFORM_KPI_STALE_SECONDS = env.int("PLATFORM_KPI_STALE_SECONDS", default=900)
+
 CACHES = {
     "default": {
         "BACKEND": "django.core.cache.backends.redis.RedisCache",
@@ -150,6 +181,10 @@ REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
     ],
+    # Limites par utilisateur et par tenant, après authentification (limite IP : RateLimitMiddleware)
+    "DEFAULT_THROTTLE_CLASSES": [
+        "apps.security.throttling.MemberRateThrottle",
+    ],
     "DEFAULT_FILTER_BACKENDS": [
         "django_filters.rest_framework.DjangoFilterBackend",
         "rest_framework.filters.OrderingFilter",
@@ -158,6 +193,12 @@ REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
 }
 
+# Pagination par curseur des grandes listes (apps.core.pagination.KeysetPagination)
+PAGINATION_PAGE_SIZE = env.int("PAGINATION_PAGE_SIZE", default=50)
+PAGINATION_MAX_PAGE_SIZE = env.int("PAGINATION_MAX_PAGE_SIZE", default=500)
+# Au-delà, le total (?with_count=1) est estimé par le planificateur PostgreSQL
+PAGINATION_EXACT_COUNT_THRESHOLD = env.int("PAGINATION_EXACT_COUNT_THRESHOLD", default=1000)
+
 SPECTACULAR_SETTINGS = {
     "TITLE": "SmartQueue API",
     "DESCRIPTION": "API REST multi-tenant pour la gestion des files d'attente et des rendez-vous.",
@@ -210,6 +251,61 @@ EMAIL_HOST_PASSWORD = env("EMAIL_HOST_PASSWORD", default="")
 FIREBASE_CREDENTIALS_PATH = env("FIREBASE_CREDENTIALS_PATH")
 FCM_SERVER_KEY = env("FCM_SERVER_KEY")
 
+# Cache des templates de notification (apps.notifications.template_cache)
+NOTIFICATION_TEMPLATE_CACHE_TIMEOUT = env.int("NOTIFICATION_TEMPLATE_CACHE_TIMEOUT", default=300)
+NOTIFICATION_TEMPLATE_CACHE_LOCAL_TIMEOUT = env.float("NOTIFICATION_TEMPLATE_CACHE_LOCAL_TIMEOUT", default=5)
+NOTIFICATION_TEMPLATE_CACHE_SIZE = env.int("NOTIFICATION_TEMPLATE_CACHE_SIZE", default=512)
+
+# Notification « votre tour approche » (apps.notifications.triggers) : position
+# ou ETA (secondes, 0 pour désactiver) à partir desquelles un ticket est prévenu
+TICKET_READY_ENABLED = env.bool("TICKET_READY_ENABLED", default=True)
+TICKET_READY_POSITION = env.int("TICKET_READY_POSITION", default=3)
+TICKET_READY_ETA_SECONDS = env.int("TICKET_READY_ETA_SECONDS", default=300)
+# Borne de la fenêtre de tête de file examinée à chaque événement
+TICKET_READY_MAX_WINDOW = env.int("TICKET_READY_MAX_WINDOW", default=20)
+
+# Archivage des tickets terminés (apps.tickets.archive) : ancienneté en jours,
+# taille des lots et durée max d'une exécution de la tâche quotidienne
+TICKET_ARCHIVE_AFTER_DAYS = env.int("TICKET_ARCHIVE_AFTER_DAYS", default=90)
+TICKET_ARCHIVE_CHUNK_SIZE = env.int("TICKET_ARCHIVE_CHUNK_SIZE", default=1000)
+TICKET_ARCHIVE_MAX_SECONDS = env.int("TICKET_ARCHIVE_MAX_SECONDS", default=1800)
+
+# Compteurs d'utilisation des quotas (apps.core.usage_counters) : durée de vie
+# des compteurs Redis et intervalle (secondes) de réalignement sur la base
+USAGE_COUNTER_TIMEOUT = env.int("USAGE_COUNTER_TIMEOUT", default=86400)
+USAGE_COUNTER_RECONCILE_SECONDS = env.int("USAGE_COUNTER_RECONCILE_SECONDS", default=900)
+
+# Documents d'état des écrans (apps.displays.state) : durée de vie en cache et
+# regroupement (secondes) des rafraîchissements déclenchés par les tickets
+DISPLAY_STATE_TIMEOUT = env.int("DISPLAY_STATE_TIMEOUT", default=300)
+DISPLAY_STATE_REFRESH_DELAY = env.float("DISPLAY_STATE_REFRESH_DELAY", default=1)
+
+# Profils d'arrivées et prévisions d'effectif (apps.queues.forecast) : semaines
+# d'historique agrégées chaque nuit et conformité SLA visée par défaut (%)
+QUEUE_PROFILE_WEEKS = env.int("QUEUE_PROFILE_WEEKS", default=8)
+QUEUE_STAFFING_TARGET_SLA = env.float("QUEUE_STAFFING_TARGET_SLA", default=80)
+
+# Envoi des notifications par lots (apps.notifications.dispatcher)
+NOTIFICATION_BATCH_SIZE = env.int("NOTIFICATION_BATCH_SIZE", default=100)
+# Durée max d'un drainage (inférieure à l'intervalle du drainage périodique)
+NOTIFICATION_DISPATCH_SECONDS = env.float("NOTIFICATION_DISPATCH_SECONDS", default=25)
+# Regroupement des drainages déclenchés à la création des notifications
+NOTIFICATION_DISPATCH_DELAY = env.float("NOTIFICATION_DISPATCH_DELAY", default=1)
+NOTIFICATION_MAX_ATTEMPTS = env.int("NOTIFICATION_MAX_ATTEMPTS", default=5)
+# Lots "sending" plus vieux que ce délai (worker arrêté) : remis en attente
+NOTIFICATION_SENDING_TIMEOUT = env.int("NOTIFICATION_SENDING_TIMEOUT", default=600)
+NOTIFICATION_HTTP_TIMEOUT = env.float("NOTIFICATION_HTTP_TIMEOUT", default=10)
+# Appels Twilio simultanés par worker (pas d'endpoint groupé chez Twilio)
+NOTIFICATION_TWILIO_CONCURRENCY = env.int("NOTIFICATION_TWILIO_CONCURRENCY", default=4)
+# Appels API par seconde et par fournisseur, tous workers confondus
+NOTIFICATION_RATE_LIMITS = env.dict(
+    "NOTIFICATION_RATE_LIMITS",
+    cast={"value": int},
+    default={"twilio_sms": 30, "twilio_whatsapp": 20, "sendgrid": 10, "smtp": 20, "fcm": 10},
+)
+# Redirige Twilio et SendGrid (ex. faux fournisseur local : manage.py fake_notification_provider)
+NOTIFICATION_PROVIDER_BASE_URL = env("NOTIFICATION_PROVIDER_BASE_URL", default="")
+
 # OAuth Configuration
 # Google OAuth
 GOOGLE_OAUTH_CLIENT_ID = env("GOOGLE_OAUTH_CLIENT_ID", default="")
@@ -249,6 +345,8 @@ SECURE_HSTS_SECONDS = 31536000  # 1 year
 SECURE_HSTS_INCLUDE_SUBDOMAINS = True
 SECURE_HSTS_PRELOAD = True
 SECURE_SSL_REDIRECT = env.bool("SECURE_SSL_REDIRECT", default=False)  # True in production
+# Attack detection: max bytes of a request body scanned by AttackDetectionMiddleware
+ATTACK_DETECTION_MAX_BODY_BYTES = env.int("ATTACK_DETECTION_MAX_BODY_BYTES", default=256 * 1024)
 
 # Session Security
 SESSION_COOKIE_SECURE = env.bool("SESSION_COOKIE_SECURE", default=False)  # True in production
@@ -284,6 +382,10 @@ CHANNEL_LAYERS = {
     }
 }
 
+# Diffusion temps réel : envoi différé hors requête et coalescence des rafales
+REALTIME_BROADCAST_ASYNC = env.bool("REALTIME_BROADCAST_ASYNC", default=True)
+REALTIME_COALESCE_WINDOW_MS = env.int("REALTIME_COALESCE_WINDOW_MS", default=100)
+
 CELERY_BROKER_URL = env("REDIS_URL")
 CELERY_RESULT_BACKEND = env("REDIS_URL")
 CELERY_TASK_DEFAULT_QUEUE = "smartqueue.default"
@@ -325,6 +427,33 @@ CELERY_BEAT_SCHEDULE: dict[str, dict] = {
         'schedule': crontab(hour=4, minute=0),
         'options': {'expires': 3600},
     },
+    # Instantané des KPI plateforme : calcul complet après minuit...
+    'build-platform-kpi-snapshot': {
+        'task': 'apps.tenants.tasks.build_platform_kpi_snapshot',
+        'schedule': crontab(hour=0, minute=5),
+        'options': {'expires': 3600},
+    },
+    # ... puis rafraîchissement intra-journalier
+    'refresh-platform-kpi-snapshot': {
+        'task': 'apps.tenants.tasks.refresh_platform_kpi_snapshot',
+        'schedule': float(PLATFORM_KPI_REFRESH_SECONDS),
+        'options': {'expires': PLATFORM_KPI_REFRESH_SECONDS},
+    },
+
+    # Réalignement des compteurs d'utilisation des quotas sur la base
+    'reconcile-usage-counters': {
+        'task': 'apps.core.tasks.reconcile_usage_counters',
+        'schedule': float(USAGE_COUNTER_RECONCILE_SECONDS),
+        'options': {'expires': USAGE_COUNTER_RECONCILE_SECONDS},
+    },
+
+    # === Notifications ===
+    # Drainage des notifications en attente (rattrapage des drainages déclenchés)
+    'dispatch-notifications': {
+        'task': 'apps.notifications.tasks.dispatch_notifications',
+        'schedule': 30.0,
+        'options': {'expires': 30},
+    },
 
     # === Queue Analytics & Intelligence ===
     # Mise à jour de l'ETA des tickets toutes les 2 minutes
@@ -339,6 +468,18 @@ CELERY_BEAT_SCHEDULE: dict[str, dict] = {
         'schedule': 300.0,  # Toutes les 5 minutes
         'options': {'expires': 120},
     },
+    # Réconciliation de l'index Redis des tickets en attente toutes les 5 minutes
+    'reconcile-waiting-index': {
+        'task': 'apps.queues.tasks.reconcile_waiting_index',
+        'schedule': 300.0,
+        'options': {'expires': 120},
+    },
+    # Reconstruction des profils d'arrivées des files chaque nuit à 1h30
+    'build-arrival-profiles': {
+        'task': 'apps.queues.tasks.build_arrival_profiles',
+        'schedule': crontab(hour=1, minute=30),
+        'options': {'expires': 3600},
+    },
     # Nettoyage des vieux tickets quotidiennement à 4h00
     'cleanup-old-tickets': {
         'task': 'apps.queues.tasks.cleanup_old_tickets',
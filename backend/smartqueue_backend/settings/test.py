@@ -9,15 +9,35 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": ":memory:",
-    }
+    },
+    # Seconde base distincte pour les tests du routeur primaire/réplica
+    # (tests marqués databases=["default", "replica"])
+    "replica": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": ":memory:",
+    },
 }
+# Lectures sur le réplica activées uniquement par les tests du routeur
+REPLICA_READS_ENABLED = False
 
 PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
 EMAIL_BACKEND = "django.core.mail.backends.locmem.EmailBackend"
 
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
+# Pas de Redis en tests : les index et compteurs Redis passent en repli base
+REDIS_URL = ""
+
 # Désactiver le channel layer pour les tests
 CHANNEL_LAYERS = {
     "default": {
         "BACKEND": "channels.layers.InMemoryChannelLayer",
     }
 }
+
+# Diffusions envoyées immédiatement au commit (pas de thread d'envoi)
+REALTIME_BROADCAST_ASYNC = False